@@ -0,0 +1,506 @@
+"""Benchmark de la ruta de procesamiento de paquetes.
+
+Uso (desde la raíz del repositorio):
+
+    python -m benchmarks.run --paquetes 200000 --ips 5000 --salida resultado.json
+    python -m benchmarks.run --comparar base.json --tolerancia 0.10
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from array import array
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.synthetic import TrafficGenerator, write_pcap
+
+# Paquetes procesados entre dos ciclos de interfaz simulados (50 ms a 100k pps)
+PACKETS_PER_TICK = 5000
+
+# Filas visibles simuladas en la lista de paquetes
+VISIBLE_ROWS = 30
+
+# Contadores Space-Saving de la etapa sesion_aproximada
+HEAVY_HITTERS = 1024
+
+
+class StageRun:
+    """Mediciones de una pasada de una etapa."""
+
+    def __init__(self, packets: int):
+        self.packets = packets
+        self.elapsed = 0.0
+        self.latencies: Dict[str, array] = {}
+
+    def record(self, name: str, nanoseconds: int) -> None:
+        self.latencies.setdefault(name, array('q')).append(nanoseconds)
+
+
+def _percentiles(samples: array) -> Dict[str, float]:
+    """Percentiles de latencia en microsegundos."""
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+
+    def pick(fraction: float) -> float:
+        return round(ordered[min(last, int(fraction * last))] / 1000, 3)
+
+    return {"p50": pick(0.50), "p90": pick(0.90), "p99": pick(0.99), "max": pick(1.0)}
+
+
+# --- Etapas ---------------------------------------------------------------
+
+def stage_decode_raw(frames, ctx) -> StageRun:
+    """PacketModel.process_raw sobre tramas crudas."""
+    from models.packet_model import PacketModel
+
+    model = PacketModel()
+    run = StageRun(len(frames))
+    clock = time.perf_counter_ns
+    process = model.process_raw
+    started = clock()
+    for timestamp, frame in frames:
+        t0 = clock()
+        process(frame, timestamp)
+        run.record("paquete", clock() - t0)
+    run.elapsed = (clock() - started) / 1e9
+    return run
+
+
+def stage_decode_scapy(frames, ctx) -> StageRun:
+    """PacketModel.process_packet sobre paquetes ya diseccionados por Scapy."""
+    from models.packet_model import PacketModel
+
+    packets = ctx["scapy_packets"]
+    model = PacketModel()
+    run = StageRun(len(packets))
+    clock = time.perf_counter_ns
+    process = model.process_packet
+    started = clock()
+    for packet in packets:
+        t0 = clock()
+        process(packet)
+        run.record("paquete", clock() - t0)
+    run.elapsed = (clock() - started) / 1e9
+    return run
+
+
+def stage_dissect_scapy(frames, ctx) -> StageRun:
+    """Coste de la disección completa de Scapy (Ether(bytes)), como referencia."""
+    from scapy.layers.l2 import Ether  # type: ignore
+
+    subset = frames[:ctx["scapy_limit"]]
+    run = StageRun(len(subset))
+    clock = time.perf_counter_ns
+    started = clock()
+    for _, frame in subset:
+        t0 = clock()
+        Ether(frame)
+        run.record("paquete", clock() - t0)
+    run.elapsed = (clock() - started) / 1e9
+    return run
+
+
+def stage_session(frames, ctx) -> StageRun:
+    """Extremo a extremo sin interfaz: captura, buffer, almacén y top de IPs."""
+    from controllers.capture_session import CaptureSession
+    from models.ip_ranking import IpRanking
+
+    session = CaptureSession()
+    ranking = IpRanking()
+    model = session.model
+    run = StageRun(len(frames))
+    clock = time.perf_counter_ns
+    started = clock()
+    for index, (timestamp, frame) in enumerate(frames, 1):
+        t0 = clock()
+        session._process_frame(frame, timestamp)
+        run.record("paquete", clock() - t0)
+        if index % PACKETS_PER_TICK == 0:
+            t0 = clock()
+            session.drain()
+            ranking.update(model.ip_counts, model.pop_dirty_ips())
+            session.snapshot()
+            run.record("ciclo", clock() - t0)
+    session.drain()
+    run.elapsed = (clock() - started) / 1e9
+    return run
+
+
+def stage_session_heavy_hitters(frames, ctx) -> StageRun:
+    """Como sesion_headless, con conteo Space-Saving de IPs/puertos/flujos."""
+    from controllers.capture_session import CaptureSession
+    from models.ip_ranking import IpRanking
+
+    session = CaptureSession(heavy_hitters=HEAVY_HITTERS)
+    ranking = IpRanking()
+    sketch = session.model.ip_sketch
+    run = StageRun(len(frames))
+    clock = time.perf_counter_ns
+    started = clock()
+    for index, (timestamp, frame) in enumerate(frames, 1):
+        t0 = clock()
+        session._process_frame(frame, timestamp)
+        run.record("paquete", clock() - t0)
+        if index % PACKETS_PER_TICK == 0:
+            t0 = clock()
+            session.drain()
+            ranking.load([(ip, count) for ip, count, _ in sketch.top(ranking.limit)], len(sketch))
+            run.record("ciclo", clock() - t0)
+    session.drain()
+    run.elapsed = (clock() - started) / 1e9
+    return run
+
+
+def stage_ip_ranking(frames, ctx) -> StageRun:
+    """IpRanking.update con los conjuntos de IPs modificadas de cada ciclo."""
+    from models.ip_ranking import IpRanking
+
+    ticks = ctx["ip_ticks"]
+    ranking = IpRanking()
+    run = StageRun(len(frames))
+    clock = time.perf_counter_ns
+    started = clock()
+    for counts, dirty in ticks:
+        t0 = clock()
+        ranking.update(counts, dirty)
+        run.record("ciclo", clock() - t0)
+    run.elapsed = (clock() - started) / 1e9
+    return run
+
+
+def stage_packet_store(frames, ctx) -> StageRun:
+    """PacketStore.append_many por ciclos y materialización de una pantalla."""
+    from models.packet_store import PacketStore
+
+    store = PacketStore()
+    records = ctx["records"]
+    run = StageRun(len(records))
+    clock = time.perf_counter_ns
+    started = clock()
+    for start in range(0, len(records), PACKETS_PER_TICK):
+        t0 = clock()
+        store.append_many(records[start:start + PACKETS_PER_TICK])
+        store.newest(0, VISIBLE_ROWS)
+        run.record("ciclo", clock() - t0)
+    run.elapsed = (clock() - started) / 1e9
+    return run
+
+
+def stage_time_format(frames, ctx) -> StageRun:
+    """Hora de cada fila: strftime por fila frente al formateador memorizado."""
+    from models.packet_store import TimestampFormatter
+
+    timestamps = [record[0] for record in ctx["records"]]
+    formatters = {
+        "strftime": lambda ts: time.strftime("%H:%M:%S", time.localtime(ts)),
+        "memorizado": TimestampFormatter(),
+        "memorizado_ms": TimestampFormatter(milliseconds=True),
+    }
+    run = StageRun(len(timestamps))
+    clock = time.perf_counter_ns
+    started = clock()
+    for start in range(0, len(timestamps), PACKETS_PER_TICK):
+        chunk = timestamps[start:start + PACKETS_PER_TICK]
+        for name, formatter in formatters.items():
+            t0 = clock()
+            for timestamp in chunk:
+                formatter(timestamp)
+            run.record(name, clock() - t0)
+    run.elapsed = (clock() - started) / 1e9
+    return run
+
+
+def stage_row_materialization(frames, ctx) -> StageRun:
+    """PacketStore.rows por bloques, como en la exportación CSV."""
+    from models.packet_store import PacketStore
+
+    store = PacketStore()
+    store.append_many(ctx["records"])
+    run = StageRun(len(store))
+    clock = time.perf_counter_ns
+    started = clock()
+    for start in range(store.first_seq, store.total, PACKETS_PER_TICK):
+        t0 = clock()
+        store.rows(start, min(start + PACKETS_PER_TICK, store.total))
+        run.record("bloque", clock() - t0)
+    run.elapsed = (clock() - started) / 1e9
+    return run
+
+
+def stage_display_filter(frames, ctx) -> StageRun:
+    """Almacén + índices + un filtro de visualización activo en cada ciclo."""
+    from models.packet_store import PacketStore
+    from models.packet_index import PacketIndex
+    from models.display_filter import FilteredPackets
+
+    store = PacketStore()
+    index = PacketIndex(store)
+    records = ctx["records"]
+    filtered = FilteredPackets(store, index, f"host {records[0][2]} or dport 443")
+    run = StageRun(len(records))
+    clock = time.perf_counter_ns
+    started = clock()
+    for start in range(0, len(records), PACKETS_PER_TICK):
+        store.append_many(records[start:start + PACKETS_PER_TICK])
+        t0 = clock()
+        filtered.update()
+        filtered.newest(0, VISIBLE_ROWS)
+        run.record("ciclo", clock() - t0)
+    # Filtro nuevo sobre todo lo capturado, con los índices ya construidos
+    t0 = clock()
+    FilteredPackets(store, index, f"src {records[-1][2]} and not udp")
+    run.record("consulta_completa", clock() - t0)
+    run.elapsed = (clock() - started) / 1e9
+    return run
+
+
+def stage_view_packet_list(frames, ctx) -> StageRun:
+    """Almacén de paquetes + repintado de la lista virtual en cada ciclo (Tk)."""
+    from models.packet_store import PacketStore
+
+    view = ctx["view"]
+    store = PacketStore()
+    view.set_packet_source(store)
+    view.packet_list._visible_rows = VISIBLE_ROWS
+    records = ctx["records"]
+    run = StageRun(len(records))
+    clock = time.perf_counter_ns
+    started = clock()
+    for start in range(0, len(records), PACKETS_PER_TICK):
+        t0 = clock()
+        store.append_many(records[start:start + PACKETS_PER_TICK])
+        view.refresh_packet_list()
+        run.record("ciclo", clock() - t0)
+    run.elapsed = (clock() - started) / 1e9
+    return run
+
+
+def stage_view_ip_list(frames, ctx) -> StageRun:
+    """IpRanking + MainView.update_ip_list en cada ciclo (Tk)."""
+    from models.ip_ranking import IpRanking
+
+    view = ctx["view"]
+    view.clear_ip_list()
+    ranking = IpRanking()
+    run = StageRun(len(frames))
+    clock = time.perf_counter_ns
+    started = clock()
+    for counts, dirty in ctx["ip_ticks"]:
+        t0 = clock()
+        if ranking.update(counts, dirty):
+            view.update_ip_list(ranking.page_rows(), ranking.page, ranking.page_count)
+        run.record("ciclo", clock() - t0)
+    run.elapsed = (clock() - started) / 1e9
+    return run
+
+
+def stage_gui(frames, ctx) -> StageRun:
+    """Extremo a extremo con interfaz: NetworkController.ui_tick cada ciclo (Tk)."""
+    from controllers.network_controller import NetworkController
+
+    view = ctx["view"]
+    controller = NetworkController(view)
+    view.packet_list._visible_rows = VISIBLE_ROWS
+    run = StageRun(len(frames))
+    clock = time.perf_counter_ns
+    started = clock()
+    for index, (timestamp, frame) in enumerate(frames, 1):
+        t0 = clock()
+        controller.session._process_frame(frame, timestamp)
+        run.record("paquete", clock() - t0)
+        if index % PACKETS_PER_TICK == 0:
+            t0 = clock()
+            controller.ui_tick()
+            run.record("ciclo", clock() - t0)
+    controller.ui_tick()
+    run.elapsed = (clock() - started) / 1e9
+    return run
+
+
+# (nombre, función, requiere Tk, requiere Scapy)
+STAGES = [
+    ("decodificacion_raw", stage_decode_raw, False, False),
+    ("diseccion_scapy", stage_dissect_scapy, False, True),
+    ("decodificacion_scapy", stage_decode_scapy, False, True),
+    ("ranking_ips", stage_ip_ranking, False, False),
+    ("almacen_paquetes", stage_packet_store, False, False),
+    ("formato_hora", stage_time_format, False, False),
+    ("materializar_filas", stage_row_materialization, False, False),
+    ("filtro_visualizacion", stage_display_filter, False, False),
+    ("sesion_headless", stage_session, False, False),
+    ("sesion_aproximada", stage_session_heavy_hitters, False, False),
+    ("vista_lista_paquetes", stage_view_packet_list, True, False),
+    ("vista_lista_ips", stage_view_ip_list, True, False),
+    ("gui_extremo_a_extremo", stage_gui, True, False),
+]
+
+
+# --- Preparación y ejecución ----------------------------------------------
+
+def _prepare_context(frames, args) -> Dict:
+    """Precalcula las entradas que algunas etapas no deben medir."""
+    from models.packet_model import PacketModel
+
+    ctx: Dict = {"scapy_limit": args.paquetes_scapy}
+
+    # Registros y conjuntos de IPs modificadas por ciclo, tal como los produce el modelo
+    model = PacketModel()
+    ticks = []
+    for index, (timestamp, frame) in enumerate(frames, 1):
+        model.process_raw(frame, timestamp)
+        if index % PACKETS_PER_TICK == 0:
+            ticks.append((dict(model.ip_counts), model.pop_dirty_ips()))
+    ticks.append((dict(model.ip_counts), model.pop_dirty_ips()))
+    ctx["ip_ticks"] = ticks
+    ctx["records"] = model.packet_buffer.drain()
+
+    try:
+        from scapy.layers.l2 import Ether  # type: ignore
+        packets = []
+        for timestamp, frame in frames[:args.paquetes_scapy]:
+            packet = Ether(frame)
+            packet.time = timestamp
+            packets.append(packet)
+        ctx["scapy_packets"] = packets
+    except ImportError:
+        ctx["scapy_packets"] = None
+
+    ctx["view"] = None
+    if not args.sin_tk:
+        try:
+            from views.main_view import MainView
+            view = MainView()
+            view.withdraw()
+            ctx["view"] = view
+        except Exception as e:
+            ctx["tk_error"] = str(e)
+    return ctx
+
+
+def _run_stage(function: Callable, frames, ctx, measure_memory: bool) -> Dict:
+    gc.collect()
+    run = function(frames, ctx)
+    result = {
+        "paquetes": run.packets,
+        "segundos": round(run.elapsed, 6),
+        "pps": round(run.packets / run.elapsed, 1) if run.elapsed > 0 else None,
+        "latencia_us": {name: _percentiles(samples) for name, samples in run.latencies.items()},
+    }
+    if measure_memory:
+        gc.collect()
+        tracemalloc.start()
+        function(frames, ctx)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["memoria_pico_bytes"] = peak
+    return result
+
+
+def run_benchmarks(args) -> Dict:
+    """Ejecuta las etapas seleccionadas y devuelve el resultado serializable."""
+    generator = TrafficGenerator(ip_cardinality=args.ips, seed=args.semilla)
+    frames = generator.frames(args.paquetes)
+    if args.pcap:
+        write_pcap(args.pcap, frames)
+
+    ctx = _prepare_context(frames, args)
+    results: Dict[str, Dict] = {}
+    for name, function, needs_tk, needs_scapy in STAGES:
+        if args.etapas and name not in args.etapas:
+            continue
+        if needs_tk and ctx["view"] is None:
+            results[name] = {"omitida": ctx.get("tk_error", "interfaz Tk desactivada")}
+            continue
+        if needs_scapy and ctx["scapy_packets"] is None:
+            results[name] = {"omitida": "Scapy no está disponible"}
+            continue
+        results[name] = _run_stage(function, frames, ctx, not args.sin_memoria)
+        print(f"{name:<24} {_summary(results[name])}", file=sys.stderr)
+
+    if ctx["view"] is not None:
+        ctx["view"].destroy()
+
+    return {
+        "version": 1,
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "parametros": {
+            "paquetes": args.paquetes,
+            "paquetes_scapy": args.paquetes_scapy,
+            "ips": args.ips,
+            "semilla": args.semilla,
+            "paquetes_por_ciclo": PACKETS_PER_TICK,
+        },
+        "etapas": results,
+    }
+
+
+def _summary(result: Dict) -> str:
+    if "omitida" in result:
+        return f"omitida: {result['omitida']}"
+    text = f"{result['pps']:>12,.0f} pps"
+    for name, values in result["latencia_us"].items():
+        text += f"  {name} p50={values['p50']}us p99={values['p99']}us"
+    if "memoria_pico_bytes" in result:
+        text += f"  memoria={result['memoria_pico_bytes'] / 1024**2:.1f} MB"
+    return text
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Devuelve las etapas cuyo rendimiento cayó más que la tolerancia."""
+    regressions = []
+    for name, result in current["etapas"].items():
+        base = baseline.get("etapas", {}).get(name, {})
+        if not result.get("pps") or not base.get("pps"):
+            continue
+        change = result["pps"] / base["pps"] - 1
+        if change < -tolerance:
+            regressions.append(f"{name}: {base['pps']:,.0f} -> {result['pps']:,.0f} pps ({change:+.1%})")
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark de la ruta de procesamiento de paquetes")
+    parser.add_argument("--paquetes", type=int, default=100_000, help="paquetes sintéticos a generar")
+    parser.add_argument("--paquetes-scapy", type=int, default=20_000,
+                        help="paquetes usados en las etapas de Scapy (más lentas)")
+    parser.add_argument("--ips", type=int, default=1000, help="direcciones IP de origen distintas")
+    parser.add_argument("--semilla", type=int, default=1, help="semilla del generador")
+    parser.add_argument("--etapas", nargs="*", choices=[name for name, *_ in STAGES],
+                        help="etapas a ejecutar (por defecto todas)")
+    parser.add_argument("--salida", help="fichero JSON donde guardar el resultado")
+    parser.add_argument("--pcap", help="guardar también el tráfico sintético en este pcap")
+    parser.add_argument("--comparar", help="resultado JSON de referencia para detectar regresiones")
+    parser.add_argument("--tolerancia", type=float, default=0.10,
+                        help="caída máxima de pps admitida frente a la referencia (0.10 = 10%%)")
+    parser.add_argument("--sin-tk", action="store_true", help="omitir las etapas que necesitan Tk")
+    parser.add_argument("--sin-memoria", action="store_true", help="no medir el pico de memoria")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    result = run_benchmarks(args)
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as file:
+            file.write(output)
+    else:
+        print(output)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare(result, baseline, args.tolerancia)
+        for line in regressions:
+            print(f"REGRESIÓN {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
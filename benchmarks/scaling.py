@@ -0,0 +1,124 @@
+"""Escalado de la decodificación en varios procesos (ParallelPipeline).
+
+Uso (desde la raíz del repositorio):
+
+    python -m benchmarks.scaling --paquetes 500000 --procesos 1 2 4 8
+    python -m benchmarks.scaling --sin-registros --salida escalado.json
+
+Mide los paquetes por segundo procesados de extremo a extremo (reparto por
+flujo, decodificación en los procesos y fusión de contadores en el proceso
+principal) para cada número de procesos, frente a la ruta de un solo hilo.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.synthetic import TrafficGenerator
+
+
+def run_single(frames) -> float:
+    """Ruta de un solo hilo: CaptureSession sin procesos auxiliares."""
+    from controllers.capture_session import CaptureSession
+
+    session = CaptureSession()
+    started = time.perf_counter()
+    for index, (timestamp, frame) in enumerate(frames, 1):
+        session._process_frame(frame, timestamp)
+        if index % 5000 == 0:
+            session.drain()
+    session.drain()
+    return time.perf_counter() - started
+
+
+def run_parallel(frames, workers: int, forward_packets: bool) -> Dict:
+    """Reparte las tramas entre ``workers`` procesos y espera la fusión final."""
+    from controllers.parallel_capture import ParallelPipeline
+    from models.packet_model import PacketModel
+    from models.packet_store import PacketStore
+
+    model = PacketModel()
+    store = PacketStore()
+    pipeline = ParallelPipeline(workers, forward_packets=forward_packets, lossless=True)
+    pipeline.start()
+    if not pipeline.wait_ready():
+        pipeline.terminate()
+        raise RuntimeError("los procesos no arrancaron")
+
+    submit = pipeline.submit
+    started = time.perf_counter()
+    for index, (timestamp, frame) in enumerate(frames, 1):
+        submit(frame, timestamp)
+        if index % 5000 == 0:
+            pipeline.merge(model, store)
+    submitted = time.perf_counter() - started
+    pipeline.finish()
+    while not pipeline.done:
+        pipeline.merge(model, store, timeout=0.2)
+    elapsed = time.perf_counter() - started
+
+    processed = model.counters.snapshot().packets
+    if processed != len(frames):
+        raise RuntimeError(f"se procesaron {processed} de {len(frames)} paquetes")
+    return {"segundos": round(elapsed, 6), "segundos_reparto": round(submitted, 6)}
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Escalado de la decodificación en varios procesos")
+    parser.add_argument("--paquetes", type=int, default=200_000, help="paquetes sintéticos a generar")
+    parser.add_argument("--ips", type=int, default=1000, help="direcciones IP de origen distintas")
+    parser.add_argument("--semilla", type=int, default=1, help="semilla del generador")
+    parser.add_argument("--procesos", type=int, nargs="*", default=[1, 2, 4, 8],
+                        help="números de procesos a medir")
+    parser.add_argument("--sin-registros", action="store_true",
+                        help="no devolver los registros de paquetes al proceso principal "
+                             "(solo contadores)")
+    parser.add_argument("--salida", help="fichero JSON donde guardar el resultado")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    frames = TrafficGenerator(ip_cardinality=args.ips, seed=args.semilla).frames(args.paquetes)
+    forward = not args.sin_registros
+
+    single = run_single(frames)
+    base_pps = len(frames) / single
+    print(f"{'un hilo':<12} {base_pps:>12,.0f} pps", file=sys.stderr)
+    results: Dict[str, Dict] = {"un_hilo": {"segundos": round(single, 6), "pps": round(base_pps, 1)}}
+
+    for workers in args.procesos:
+        result = run_parallel(frames, workers, forward)
+        pps = len(frames) / result["segundos"]
+        result["pps"] = round(pps, 1)
+        result["aceleracion"] = round(pps / base_pps, 2)
+        results[f"procesos_{workers}"] = result
+        print(f"{workers:>2} procesos  {pps:>12,.0f} pps  x{result['aceleracion']:.2f}", file=sys.stderr)
+
+    output = json.dumps({
+        "version": 1,
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "nucleos": os.cpu_count(),
+        "parametros": {
+            "paquetes": args.paquetes,
+            "ips": args.ips,
+            "semilla": args.semilla,
+            "registros": forward,
+        },
+        "resultados": results,
+    }, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as file:
+            file.write(output)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+import socket
+import struct
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from models.packet_model import CAPTURE_MODE_RAW
+
+# Tipo de enlace Ethernet (DLT_EN10MB) para compilar filtros sin interfaz
+DLT_EN10MB = 1
+
+# Opciones de socket de Linux que no expone el módulo socket
+SOL_PACKET = 263
+PACKET_STATISTICS = 6
+SO_RCVBUFFORCE = 33
+PACKET_AUXDATA = 8
+SO_TIMESTAMPNS = 35
+# struct tpacket_stats: paquetes recibidos y descartados desde la última lectura
+_tpacket_stats = struct.Struct("II")
+# struct tpacket_auxdata: status, len, snaplen, mac, net, vlan_tci, vlan_tpid
+_tpacket_auxdata = struct.Struct("IIIHHHH")
+TP_STATUS_VLAN_VALID = 1 << 4
+TP_STATUS_VLAN_TPID_VALID = 1 << 6
+ETH_P_8021Q = 0x8100
+# Espacio para los dos mensajes de control que se leen con cada trama
+ANCILLARY_BUFSIZE = socket.CMSG_SPACE(_tpacket_auxdata.size) + socket.CMSG_SPACE(16)
+
+
+class CaptureOptions:
+    """Parámetros de captura en vivo además del filtro BPF.
+
+    - ``interfaces``: interfaces de captura, leídas a la vez; vacía usa la
+      predeterminada de Scapy.
+    - ``filters``: filtro BPF propio de algunas de esas interfaces
+      (interfaz -> filtro); las demás usan el filtro general de la captura.
+    - ``snaplen``: bytes copiados de cada trama en el modo rápido; 0 = completa.
+      El tamaño contabilizado sigue siendo la longitud original. La
+      disección de Scapy lee siempre la trama completa (ver check_mode).
+    - ``rcvbuf``: tamaño del buffer de recepción del socket en bytes; 0 deja
+      el valor de Scapy. Un buffer mayor absorbe ráfagas sin descartes.
+    - ``promisc``: poner la interfaz en modo promiscuo.
+    """
+
+    def __init__(self, interfaces: Sequence[str] = (), snaplen: int = 0,
+                 rcvbuf: int = 0, promisc: bool = True,
+                 filters: Optional[Dict[str, str]] = None):
+        if snaplen < 0 or rcvbuf < 0:
+            raise ValueError("snaplen y el buffer del kernel no pueden ser negativos")
+        if 0 < snaplen < 64:
+            raise ValueError("snaplen debe ser 0 (trama completa) o al menos 64 bytes")
+        # Sin repetidos y en el orden indicado (es el de los índices de interfaz)
+        self.interfaces = list(dict.fromkeys(name for name in interfaces if name))
+        self.filters = dict(filters or {})
+        for name in self.filters:
+            if name not in self.interfaces:
+                raise ValueError(f"hay un filtro para la interfaz '{name}', que no se captura")
+        self.snaplen = snaplen
+        self.rcvbuf = rcvbuf
+        self.promisc = promisc
+
+    def socket_filters(self, filtro: str) -> List[Tuple[Optional[str], str]]:
+        """(interfaz, filtro BPF) de cada socket de captura.
+
+        La interfaz None es la predeterminada de Scapy (sin ``interfaces``).
+        """
+        if not self.interfaces:
+            return [(None, filtro)]
+        return [(name, self.filters.get(name, filtro)) for name in self.interfaces]
+
+    def check_mode(self, modo: str, workers: int = 1) -> None:
+        """Lanza ValueError si las opciones no se pueden aplicar en el modo ``modo``.
+
+        Con varios procesos la captura es siempre cruda.
+        """
+        if self.snaplen and modo != CAPTURE_MODE_RAW and workers <= 1:
+            raise ValueError("snaplen solo se aplica en el modo raw; "
+                             "la disección de Scapy lee la trama completa")
+
+    def describe(self) -> str:
+        """Resumen de una línea para los mensajes de inicio."""
+        interfaces = [
+            f"{name} (filtro '{self.filters[name]}')" if name in self.filters else name
+            for name in self.interfaces
+        ] or [str(scapy_conf().iface)]
+        return (
+            f"interfaz={', '.join(interfaces)}, "
+            f"snaplen={self.snaplen or 'completa'}, "
+            f"buffer={self.rcvbuf or 'predeterminado'}, "
+            f"promiscuo={'sí' if self.promisc else 'no'}"
+        )
+
+
+def scapy_conf():
+    """Configuración de Scapy con la arquitectura ya cargada.
+
+    Importa solo ``scapy.arch`` (que registra L2listen y la interfaz
+    predeterminada) en lugar de ``scapy.all``, y solo cuando hace falta.
+    """
+    from scapy.config import conf  # type: ignore
+    import scapy.arch  # type: ignore  # noqa: F401
+    return conf
+
+
+def preload_capture_modules() -> List[str]:
+    """Importa los módulos de Scapy de la captura y devuelve las interfaces.
+
+    La interfaz gráfica la llama en un hilo en segundo plano tras mostrar la
+    ventana, para que la primera captura no tenga que esperar a Scapy.
+    """
+    from models.packet_model import load_scapy_layers
+    import scapy.utils  # type: ignore  # noqa: F401
+    scapy_conf()
+    load_scapy_layers()
+    return list_interfaces()
+
+
+def list_interfaces() -> List[str]:
+    """Nombres de las interfaces de captura disponibles."""
+    try:
+        from scapy.interfaces import get_if_list  # type: ignore
+        return sorted(get_if_list())
+    except Exception:
+        return []
+
+
+def validate_filter(filtro: str, interface: Optional[str] = None) -> Optional[str]:
+    """Compila el filtro BPF con libpcap antes de iniciar la captura.
+
+    Devuelve None si es válido (o está vacío) y, si no, el mensaje de error
+    para mostrar al usuario.
+    """
+    if not filtro:
+        return None
+    from scapy.arch.common import compile_filter  # type: ignore
+    from scapy.arch.common import free_filter  # type: ignore
+    try:
+        if interface:
+            program = compile_filter(filtro, iface=interface)
+        else:
+            program = compile_filter(filtro, linktype=DLT_EN10MB)
+    except ImportError:
+        return "libpcap no está disponible: no se pueden aplicar filtros BPF"
+    except Exception as e:
+        return f"Filtro BPF no válido '{filtro}': {e}"
+    free_filter(program)
+    return None
+
+
+def validate_filters(filtro: str, options: CaptureOptions) -> Optional[str]:
+    """Valida el filtro de cada socket de captura (general o propio de la interfaz).
+
+    Devuelve None si todos son válidos y, si no, el primer error, con la
+    interfaz delante cuando se capturan varias.
+    """
+    sockets = options.socket_filters(filtro)
+    for interface, interface_filter in sockets:
+        error = validate_filter(interface_filter, interface)
+        if error:
+            return f"{interface}: {error}" if len(sockets) > 1 else error
+    return None
+
+
+def set_receive_buffer(sock: socket.socket, size: int) -> int:
+    """Ajusta el buffer de recepción del socket. Devuelve el tamaño efectivo.
+
+    Con privilegios se usa SO_RCVBUFFORCE para superar net.core.rmem_max;
+    sin ellos el kernel recorta el valor a ese máximo. Linux reserva el
+    doble de lo pedido y así lo devuelve getsockopt.
+    """
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, SO_RCVBUFFORCE, size)
+    except OSError:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+    return sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+
+
+def read_ancillary(ancdata: Iterable[Tuple[int, int, bytes]]) -> Tuple[Optional[float], bytes]:
+    """Marca de tiempo y etiqueta 802.1Q de los mensajes de control de una trama.
+
+    El kernel quita la etiqueta VLAN de la trama y la entrega aparte en
+    PACKET_AUXDATA; se devuelve ya empaquetada (TPID y TCI) para volver a
+    insertarla tras las direcciones MAC, o vacía si no había. La marca de
+    tiempo (SO_TIMESTAMPNS) es None si el socket no la proporciona.
+    """
+    timestamp = None
+    tag = b""
+    for level, kind, data in ancdata:
+        if level == SOL_PACKET and kind == PACKET_AUXDATA and len(data) >= _tpacket_auxdata.size:
+            status, _, _, _, _, tci, tpid = _tpacket_auxdata.unpack_from(data)
+            if tci or status & TP_STATUS_VLAN_VALID:
+                if not status & TP_STATUS_VLAN_TPID_VALID:
+                    tpid = ETH_P_8021Q
+                tag = struct.pack("!HH", tpid, tci)
+        elif level == socket.SOL_SOCKET and kind == SO_TIMESTAMPNS:
+            if len(data) >= 16:
+                seconds, nanoseconds = struct.unpack_from("qq", data)
+            elif len(data) >= 8:
+                seconds, nanoseconds = struct.unpack_from("ii", data)
+            else:
+                continue
+            timestamp = seconds + nanoseconds * 1e-9
+    return timestamp, tag
+
+
+class KernelStats:
+    """Contadores de recepción del socket de captura (PACKET_STATISTICS).
+
+    El kernel pone a cero sus contadores en cada lectura, así que se
+    acumulan aquí. En sistemas sin sockets AF_PACKET ``available`` queda a
+    False y los contadores no se actualizan.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        self.received = 0
+        self.dropped = 0
+        self.available = False
+
+    def poll(self, sock: socket.socket) -> Tuple[int, int]:
+        """Lee y acumula los contadores del socket. Devuelve (recibidos, descartados)."""
+        try:
+            raw = sock.getsockopt(SOL_PACKET, PACKET_STATISTICS, _tpacket_stats.size)
+        except (OSError, AttributeError):
+            return self.received, self.dropped
+        received, dropped = _tpacket_stats.unpack(raw)
+        self.available = True
+        self.received += received
+        self.dropped += dropped
+        return self.received, self.dropped
+
+
+class InterfaceStats:
+    """Contadores de una interfaz de captura: paquetes, bytes y descartes del kernel.
+
+    ``packets`` y ``bytes`` los suma el hilo de captura al leer cada trama
+    de la interfaz (o del fichero, en las reproducciones); ``kernel``
+    acumula los contadores PACKET_STATISTICS de su socket.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.kernel = KernelStats()
+        self.clear()
+
+    def clear(self) -> None:
+        self.packets = 0
+        self.bytes = 0
+        self.kernel.clear()
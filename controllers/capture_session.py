@@ -0,0 +1,815 @@
+import os
+import select
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from models.packet_model import PacketModel, CAPTURE_MODE_RAW, load_scapy_layers
+from models.network_stats import NetworkStats
+from models.stats_engine import StatsSnapshot
+from models.packet_store import PacketStore
+from models.protocol_classifier import ProtocolClassifier
+from models.instrumentation import Instrumentation, StageProbe
+from models.packet_sampler import PacketSampler
+from controllers.parallel_capture import ParallelPipeline
+from controllers.capture_options import (
+    ANCILLARY_BUFSIZE, CaptureOptions, InterfaceStats, KernelStats, read_ancillary, scapy_conf,
+    set_receive_buffer
+)
+from controllers.pcap_spool import PcapSpool
+from controllers.session_store import SessionInfo, SessionStore
+
+# Tipo de enlace Ethernet en ficheros pcap/pcapng
+LINKTYPE_ETHERNET = 1
+
+# Estados de la sesión
+STATE_IDLE = "detenida"
+STATE_RUNNING = "capturando"
+STATE_STOPPING = "deteniendo"
+
+
+class CaptureSession:
+    """Núcleo de captura y estadísticas independiente de la interfaz.
+
+    Gestiona el hilo de captura y el paso de los paquetes del buffer del
+    modelo al almacén. Lo comparten la interfaz gráfica y el modo sin
+    interfaz (headless).
+
+    Con ``workers`` > 1 el hilo de captura solo lee tramas crudas y las
+    reparte entre procesos de decodificación (ParallelPipeline); drain()
+    fusiona sus contadores en el modelo. Ese modo siempre decodifica las
+    tramas crudas, sea cual sea el modo de captura elegido.
+
+    La captura en vivo abre un socket de Scapy por interfaz con las opciones
+    de CaptureOptions (interfaces y sus filtros, snaplen, buffer de
+    recepción, modo promiscuo) y lee del kernel los contadores de tramas
+    descartadas (``kernel_stats``). Todos los sockets se atienden desde el
+    mismo hilo de captura con un único select, de modo que el modelo sigue
+    teniendo un solo escritor; cada paquete lleva el nombre de su interfaz y
+    ``interface_stats`` guarda los paquetes, bytes y descartes de cada una.
+    Si ``spool`` está asignado, las tramas de la captura en vivo se guardan
+    además en ficheros pcap rotativos desde un hilo escritor propio.
+    Con ``sampler`` (PacketSampler) solo se decodifican las tramas que
+    elige, antes de la disección o decodificación, y cada una cuenta por
+    su peso; los contadores por interfaz y el spool siguen viendo todas.
+    Con ``recorder`` (SessionStore, asignado con ``set_recorder``) drain()
+    le pasa cada segundo los agregados de la sesión para guardarlos en
+    SQLite desde su propio hilo escritor, y al terminar la captura los
+    finales; ``loaded_session`` indica la sesión guardada que se reabrió,
+    cuyos datos se descartan al iniciar otra captura.
+    Si es adaptativo, drain() le pasa la ocupación de la cola, la latencia
+    y los descartes de cada ciclo para que ajuste N.
+    ``instrumentation`` acumula los tiempos de cada etapa (muestreados en 1
+    de cada ``sample_every`` paquetes) para el panel de diagnóstico.
+
+    Ciclo de vida: detenida -> capturando (start/start_file) -> deteniendo
+    (stop) -> detenida (al terminar el hilo). El hilo de captura espera a
+    los sockets como mucho POLL_INTERVAL, de modo que stop() lo une en un tiempo
+    acotado aunque no lleguen paquetes; start() y clear() solo se aceptan
+    con la sesión detenida, así nunca hay dos hilos de captura a la vez.
+    """
+
+    # Espera máxima del hilo de captura a que algún socket tenga datos
+    POLL_INTERVAL = 0.1
+    # Tramas leídas seguidas de un mismo socket antes de atender a los demás
+    MAX_BURST = 256
+    # Espera máxima de stop() a que termine el hilo de captura
+    STOP_TIMEOUT = 2.0
+
+    def __init__(self, on_error: Optional[Callable[[str], None]] = None,
+                 on_finished: Optional[Callable[[], None]] = None,
+                 store_capacity: int = 1_000_000, heavy_hitters: int = 0,
+                 workers: int = 1, classifier: Optional[ProtocolClassifier] = None,
+                 sample_every: int = Instrumentation.DEFAULT_SAMPLE_EVERY):
+        """``classifier`` sustituye la clasificación de TCP/UDP por defecto;
+        con varios procesos se envía a cada uno, así que debe poder serializarse.
+        ``sample_every`` = 0 desactiva el muestreo de las etapas por paquete."""
+        if workers > 1 and heavy_hitters:
+            raise ValueError("el conteo aproximado no admite varios procesos de decodificación")
+        self.instrumentation = Instrumentation(sample_every)
+        self.model = PacketModel(heavy_hitters, classifier, self.instrumentation)
+        self.classifier = classifier
+        self.stats = NetworkStats()
+        self.store = PacketStore(store_capacity)
+        self.capture_thread: Optional[threading.Thread] = None
+        self.state = STATE_IDLE
+        self._state_lock = threading.Lock()
+        self.on_error = on_error
+        self.on_finished = on_finished
+        self.workers = workers
+        self.pipeline: Optional[ParallelPipeline] = None
+        self._flow_table = self.model.flows
+        self.options = CaptureOptions()
+        # Suma de los contadores del kernel de todas las interfaces
+        self.kernel_stats = KernelStats()
+        # Contadores por interfaz (o fichero), conservados hasta clear()
+        self.interface_stats: Dict[str, InterfaceStats] = {}
+        # Nombres de las interfaces de la captura actual, por índice
+        self._interface_names: List[str] = [""]
+        # Buffer de recepción efectivo del socket en vivo (0 = sin captura en vivo)
+        self.kernel_rcvbuf = 0
+        self._sockets: List[Tuple[object, InterfaceStats]] = []
+        self._socket_lock = threading.Lock()
+        self.spool: Optional[PcapSpool] = None
+        self.sampler: Optional[PacketSampler] = None
+        self.recorder: Optional[SessionStore] = None
+        self.loaded_session: Optional[SessionInfo] = None
+        # Captura en vivo (la latencia del muestreo adaptativo solo vale en vivo)
+        self._live = False
+        # Descartes (buffer, anillos y kernel) vistos en el último drain
+        self._dropped_seen = 0
+
+    def _start_pipeline(self, lossless: bool) -> None:
+        """Arranca los procesos de decodificación para una nueva captura."""
+        if self.pipeline is not None:
+            self.pipeline.terminate()
+            self.pipeline = None
+        # Las posiciones de las marcas de latencia vuelven a empezar con el pipeline
+        self.instrumentation.reset_marks()
+        if self.workers > 1:
+            self.pipeline = ParallelPipeline(self.workers, lossless=lossless, classifier=self.classifier,
+                                             instrumentation=self.instrumentation,
+                                             interfaces=self._interface_names,
+                                             weighted_flows=self.model.weighted_flows)
+            self.pipeline.start()
+            self.model.flows = self.pipeline.flows
+        else:
+            self.model.flows = self._flow_table
+
+    @property
+    def is_capturing(self) -> bool:
+        """True mientras el hilo de captura deba seguir leyendo paquetes."""
+        return self.state == STATE_RUNNING
+
+    @property
+    def is_idle(self) -> bool:
+        """True si no hay hilo de captura activo (se puede iniciar o limpiar)."""
+        with self._state_lock:
+            return self._refresh_state() == STATE_IDLE
+
+    def _refresh_state(self) -> str:
+        """Pasa a detenida si el hilo de una parada lenta ya terminó (con el cerrojo tomado)."""
+        if self.state == STATE_STOPPING and not (self.capture_thread and self.capture_thread.is_alive()):
+            self.state = STATE_IDLE
+        return self.state
+
+    def _begin(self, target: Callable, args: tuple, lossless: bool, interfaces: List[str],
+               live: bool = False) -> bool:
+        """Transición detenida -> capturando y arranque del hilo de captura.
+
+        ``interfaces`` son los nombres con que se etiquetan los paquetes. Si
+        los procesos de decodificación o el hilo no arrancan, la sesión
+        vuelve a detenida, se notifica el error y devuelve False.
+        """
+        with self._state_lock:
+            if self._refresh_state() != STATE_IDLE:
+                return False
+            self.state = STATE_RUNNING
+        self._interface_names = interfaces
+        for name in interfaces:
+            if name not in self.interface_stats:
+                self.interface_stats[name] = InterfaceStats(name)
+        sampler = self.sampler
+        if sampler is not None:
+            sampler.reset()
+        self.model.weighted_flows = sampler is None or not sampler.complete_flows
+        self._live = live
+        self._dropped_seen = self._dropped()
+        self.model.counters.start()
+        try:
+            self._start_pipeline(lossless)
+            self.capture_thread = threading.Thread(target=target, args=args, daemon=True)
+            self.capture_thread.start()
+        except Exception as e:
+            # Sin hilo de captura nadie volvería a dejar la sesión detenida
+            self._abort_start()
+            if self.on_error:
+                self.on_error(f"Error al iniciar la captura: {str(e)}")
+            else:
+                print(f"Error al iniciar la captura: {e}")
+            return False
+        return True
+
+    def _abort_start(self) -> None:
+        """Deshace un arranque fallido: cierra el pipeline a medio arrancar y vuelve a detenida."""
+        if self.pipeline is not None:
+            self.pipeline.terminate()
+            self.pipeline = None
+        self.model.flows = self._flow_table
+        with self._state_lock:
+            self.state = STATE_IDLE
+
+    def _finish_thread(self) -> bool:
+        """Transición al terminar el hilo de captura. Devuelve True si terminó solo."""
+        with self._state_lock:
+            finished = self.state == STATE_RUNNING
+            self.state = STATE_IDLE
+        if self.pipeline is not None:
+            self.pipeline.finish()
+        return finished
+
+    def start(self, filtro: str, modo: str, options: Optional[CaptureOptions] = None) -> bool:
+        """Inicia la captura en un hilo propio. Devuelve False si la sesión no está detenida.
+
+        Lanza ValueError si las opciones no se pueden aplicar en ``modo``
+        (CaptureOptions.check_mode).
+        """
+        if options is not None and self.is_idle:
+            self.options = options
+        if self.workers > 1:
+            modo = CAPTURE_MODE_RAW
+        self.options.check_mode(modo)
+        interfaces = self.options.interfaces or [str(scapy_conf().iface)]
+        self._discard_loaded_session()
+        if not self._begin(self._capture_packets, (filtro, modo), lossless=False,
+                           interfaces=interfaces, live=True):
+            return False
+        self._record(", ".join(interfaces), modo)
+        return True
+
+    def start_file(self, path: str, modo: str, realtime: bool = False) -> bool:
+        """Reproduce un fichero pcap/pcapng por la misma ruta de procesamiento.
+
+        Los paquetes se leen en streaming, con memoria constante. Con
+        ``realtime`` se respetan los intervalos originales entre paquetes;
+        si no, se procesan tan rápido como sea posible. Los paquetes se
+        etiquetan con el nombre del fichero en lugar de una interfaz.
+        """
+        if self.workers > 1:
+            modo = CAPTURE_MODE_RAW
+        self._discard_loaded_session()
+        if not self._begin(self._replay_file, (path, modo, realtime), lossless=True,
+                           interfaces=[os.path.basename(path)]):
+            return False
+        self._record(path, modo)
+        return True
+
+    def _discard_loaded_session(self) -> None:
+        """Una sesión reabierta solo se consulta: antes de capturar se limpia,
+        para que sus datos no pasen a la nueva sesión guardada."""
+        if self.loaded_session is not None:
+            self.clear()
+
+    def set_recorder(self, recorder: Optional[SessionStore]) -> None:
+        """Asigna la base de sesiones (None = no guardar); cierra la sesión de la anterior."""
+        if recorder is not self.recorder and self.recorder is not None:
+            self._finish_recording()
+            self.recorder.end()
+        self.recorder = recorder
+        # La base solo recibe las IPs que cambiaron desde el último agregado
+        self.model.track_unsaved_ips(recorder is not None)
+
+    def _record(self, origin: str, modo: str) -> None:
+        """Empieza (o continúa) la sesión guardada de la captura que acaba de arrancar."""
+        if self.recorder is not None:
+            self.loaded_session = None
+            self.recorder.begin(origin, modo)
+
+    def _finish_recording(self) -> None:
+        """Envía a la base los agregados finales si aún no se enviaron."""
+        recorder = self.recorder
+        if recorder is not None and recorder.capturing:
+            recorder.flush(self)
+
+    def close_recorder(self) -> None:
+        """Guarda lo pendiente y detiene el hilo escritor de la base (al salir)."""
+        if self.recorder is not None:
+            self._finish_recording()
+            self.recorder.close()
+
+    def stop(self, timeout: Optional[float] = None) -> bool:
+        """Detiene la captura y espera al hilo como mucho ``timeout`` segundos.
+
+        Devuelve True si la sesión quedó detenida. Si el hilo no terminó a
+        tiempo la sesión sigue en "deteniendo" hasta que lo haga.
+        """
+        with self._state_lock:
+            if self.state == STATE_RUNNING:
+                self.state = STATE_STOPPING
+                if self.pipeline is not None:
+                    self.pipeline.finish()
+        thread = self.capture_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(self.STOP_TIMEOUT if timeout is None else timeout)
+        return self.is_idle
+
+    def clear(self) -> bool:
+        """Limpia todos los datos capturados. Devuelve False si la sesión no está detenida."""
+        if not self.is_idle:
+            return False
+        if self.recorder is not None:
+            self._finish_recording()
+            self.recorder.end()
+        self.loaded_session = None
+        # Los flujos vuelven a la tabla propia (el pipeline fija la suya al arrancar)
+        self.model.flows = self._flow_table
+        self.model.clear_data()
+        self.store.clear()
+        self.kernel_stats.clear()
+        self.interface_stats = {}
+        self.instrumentation.clear()
+        return True
+
+    def save_diagnostics(self, path: str) -> str:
+        """Guarda en JSON los histogramas de la instrumentación y el estado del buffer."""
+        buffer = self.model.packet_buffer
+        return self.instrumentation.save(path, {
+            "paquetes": self.snapshot().packets,
+            "procesos": self.workers,
+            "buffer": {"capacidad": buffer.capacity, "pico": buffer.peak, "descartados": buffer.dropped},
+        })
+
+    def snapshot(self) -> StatsSnapshot:
+        """Instantánea inmutable de los contadores (una por ciclo de la interfaz)."""
+        return self.model.counters.snapshot()
+
+    def drain(self) -> int:
+        """Pasa al almacén los paquetes acumulados en el buffer. Devuelve cuántos.
+
+        Registra su duración y, durante la captura, los paquetes pendientes;
+        las marcas de latencia quedan listas para ``Instrumentation.displayed``.
+        Con ``recorder``, le entrega los agregados (``tick``) y, en el primer
+        drenado tras terminar la captura, los finales (``flush``).
+        """
+        self.poll_kernel_stats()
+        recorder = self.recorder
+        recording = recorder is not None and recorder.capturing
+        # Si el hilo ya había terminado, este drenado recoge lo último
+        finished = recording and self.is_idle
+        instrumentation = self.instrumentation
+        started = time.perf_counter_ns()
+        pipeline = self.pipeline
+        if pipeline is not None:
+            queue = pipeline.backlog()
+            count = pipeline.merge(self.model, self.store)
+            instrumentation.consumed(pipeline.stored)
+        else:
+            buffer = self.model.packet_buffer
+            queue = len(buffer) / buffer.capacity
+            batch = buffer.drain()
+            if batch:
+                self.store.append_many(batch)
+            count = len(batch)
+            instrumentation.consumed(buffer.pushed - len(buffer))
+        instrumentation.record("drenado", time.perf_counter_ns() - started)
+        if self.is_capturing:
+            instrumentation.record("cola", count)
+            sampler = self.sampler
+            if sampler is not None and sampler.adaptive:
+                self._adapt_sampling(sampler, queue, count)
+        if recording:
+            if finished and (pipeline is None or pipeline.done):
+                recorder.flush(self)
+            else:
+                recorder.tick(self)
+        return count
+
+    def _adapt_sampling(self, sampler: PacketSampler, queue: float, count: int) -> None:
+        """Pasa al muestreo adaptativo la carga del ciclo que acaba de drenarse."""
+        latency = None
+        store = self.store
+        if self._live and count:
+            # Antigüedad del paquete más antiguo de este ciclo al llegar al almacén
+            latency = time.time() - store.timestamps[(store.total - count) % store.capacity]
+        dropped = self._dropped()
+        sampler.adapt(queue, latency, dropped > self._dropped_seen)
+        self._dropped_seen = dropped
+
+    def _dropped(self) -> int:
+        """Tramas perdidas hasta ahora: buffer del modelo, anillos y kernel."""
+        return self.model.packet_buffer.dropped + self.kernel_stats.dropped
+
+    def poll_kernel_stats(self) -> None:
+        """Acumula los contadores del kernel de los sockets de captura abiertos."""
+        with self._socket_lock:
+            if not self._sockets:
+                return
+            for sock, stats in self._sockets:
+                stats.kernel.poll(sock.ins)
+            self._sum_kernel_stats()
+
+    def _sum_kernel_stats(self) -> None:
+        """Recalcula ``kernel_stats`` como la suma de todas las interfaces."""
+        parts = [stats.kernel for stats in self.interface_stats.values()]
+        total = self.kernel_stats
+        total.received = sum(kernel.received for kernel in parts)
+        total.dropped = sum(kernel.dropped for kernel in parts)
+        total.available = any(kernel.available for kernel in parts)
+
+    def wait_idle(self, timeout: float = 5.0) -> None:
+        """Espera a que los procesos de decodificación entreguen sus informes finales."""
+        pipeline = self.pipeline
+        deadline = time.monotonic() + timeout
+        while pipeline is not None and not pipeline.done:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                pipeline.terminate()
+                break
+            pipeline.merge(self.model, self.store, timeout=min(remaining, 0.2))
+
+    def _capture_packets(self, filtro: str, modo: str):
+        """Función ejecutada en el hilo de captura."""
+        try:
+            if not self._wait_pipeline():
+                return
+            if modo != CAPTURE_MODE_RAW:
+                # Las capas se importan aquí, en el hilo de captura, y no al arrancar
+                load_scapy_layers()
+            sockets = self._open_sockets(filtro)
+            spool = self.spool
+            if spool is not None:
+                spool.start()
+            try:
+                if modo == CAPTURE_MODE_RAW:
+                    self._capture_raw(sockets, spool)
+                else:
+                    self._capture_scapy(sockets, spool)
+            finally:
+                self._close_sockets()
+                if spool is not None:
+                    spool.stop()
+        except Exception as e:
+            if self.on_error:
+                self.on_error(f"Error al capturar paquetes: {str(e)}")
+            else:
+                print(f"Error al capturar paquetes: {e}")
+        finally:
+            self._finish_thread()
+
+    def _wait_pipeline(self) -> bool:
+        """Espera a que los procesos de decodificación estén listos antes de leer tramas.
+
+        Devuelve False si se pidió parar durante la espera.
+        """
+        if self.pipeline is None:
+            return True
+        if not self.pipeline.wait_ready():
+            if not self.is_capturing:
+                return False
+            raise RuntimeError("los procesos de decodificación no arrancaron a tiempo")
+        return True
+
+    def _replay_file(self, path: str, modo: str, realtime: bool):
+        """Función ejecutada en el hilo de reproducción de ficheros."""
+        finished = False
+        try:
+            if not self._wait_pipeline():
+                return
+            if modo == CAPTURE_MODE_RAW:
+                self._replay_raw(path, realtime)
+            else:
+                self._replay_scapy(path, realtime)
+        except Exception as e:
+            if self.on_error:
+                self.on_error(f"Error al leer el fichero de captura: {str(e)}")
+            else:
+                print(f"Error al leer el fichero de captura: {e}")
+        finally:
+            finished = self._finish_thread()
+            if finished and self.on_finished:
+                self.on_finished()
+
+    def _replay_scapy(self, path: str, realtime: bool):
+        """Reproduce el fichero diseccionando cada paquete con Scapy."""
+        from scapy.utils import PcapReader  # type: ignore
+
+        load_scapy_layers()
+        if self.sampler is not None:
+            self._replay_scapy_sampled(path, realtime)
+            return
+        pacer = _Pacer() if realtime else None
+        stats = self.interface_stats[self._interface_names[0]]
+        with PcapReader(path) as reader:
+            # Leer el siguiente paquete incluye su disección
+            read = _sampled(iter(reader).__next__, self.instrumentation.probe(), "diseccion")
+            for packet in iter(read, None):
+                if not self.is_capturing:
+                    break
+                if pacer:
+                    pacer.wait(float(packet.time), lambda: self.is_capturing)
+                stats.packets += 1
+                stats.bytes += len(packet)
+                self._process_packet(packet)
+
+    def _replay_scapy_sampled(self, path: str, realtime: bool):
+        """Reproduce el fichero diseccionando solo las tramas que elige el muestreo."""
+        from scapy.utils import RawPcapReader  # type: ignore
+
+        pacer = _Pacer() if realtime else None
+        stats = self.interface_stats[self._interface_names[0]]
+        weight_of = self.sampler.weight
+        conf = scapy_conf()
+        dissect = _sampled(_dissect, self.instrumentation.probe(), "diseccion")
+        with RawPcapReader(path) as reader:
+            nano = getattr(reader, "nano", False)
+            for frame, meta in reader:
+                if not self.is_capturing:
+                    break
+                timestamp = _metadata_time(meta, nano)
+                if pacer:
+                    pacer.wait(timestamp, lambda: self.is_capturing)
+                stats.packets += 1
+                stats.bytes += len(frame)
+                weight = weight_of(frame)
+                if weight:
+                    linktype = getattr(meta, "linktype", None) or getattr(reader, "linktype", LINKTYPE_ETHERNET)
+                    layer = conf.l2types.num2layer.get(linktype, conf.raw_layer)
+                    self._process_packet(dissect(layer, frame, timestamp), 0, weight)
+
+    def _replay_raw(self, path: str, realtime: bool):
+        """Reproduce el fichero decodificando las tramas crudas."""
+        from scapy.utils import RawPcapReader  # type: ignore
+
+        pacer = _Pacer() if realtime else None
+        stats = self.interface_stats[self._interface_names[0]]
+        with RawPcapReader(path) as reader:
+            nano = getattr(reader, "nano", False)
+            for frame, meta in reader:
+                if not self.is_capturing:
+                    break
+                linktype = getattr(meta, "linktype", None) or getattr(reader, "linktype", LINKTYPE_ETHERNET)
+                if linktype != LINKTYPE_ETHERNET:
+                    raise ValueError(
+                        f"tipo de enlace {linktype} no soportado en modo rápido; use el modo Scapy"
+                    )
+                timestamp = _metadata_time(meta, nano)
+                if pacer:
+                    pacer.wait(timestamp, lambda: self.is_capturing)
+                stats.packets += 1
+                stats.bytes += len(frame)
+                self._process_frame(frame, timestamp)
+
+    def _open_sockets(self, filtro: str) -> List:
+        """Abre un socket de captura por interfaz, cada uno con su filtro.
+
+        Devuelve los sockets en el orden de los índices de interfaz; si
+        alguno falla se cierran los ya abiertos.
+        """
+        try:
+            return [
+                self._open_socket(index, interface, interface_filter)
+                for index, (interface, interface_filter)
+                in enumerate(self.options.socket_filters(filtro))
+            ]
+        except Exception:
+            self._close_sockets()
+            raise
+
+    def _open_socket(self, index: int, interface: Optional[str], filtro: str):
+        """Abre el socket de captura en vivo de una interfaz con las opciones de la sesión."""
+        options = self.options
+        sock = scapy_conf().L2listen(
+            iface=interface,
+            filter=filtro if filtro else None,
+            promisc=options.promisc
+        )
+        try:
+            ins = getattr(sock, "ins", None)
+            if options.rcvbuf and ins is not None:
+                self.kernel_rcvbuf = set_receive_buffer(ins, options.rcvbuf)
+            elif ins is not None:
+                self.kernel_rcvbuf = ins.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        except Exception:
+            sock.close()
+            raise
+        with self._socket_lock:
+            self._sockets.append((sock, self.interface_stats[self._interface_names[index]]))
+        return sock
+
+    def _close_sockets(self):
+        """Lee los últimos contadores del kernel y cierra los sockets de captura."""
+        with self._socket_lock:
+            sockets, self._sockets = self._sockets, []
+            for sock, stats in sockets:
+                stats.kernel.poll(sock.ins)
+                sock.close()
+            if sockets:
+                self._sum_kernel_stats()
+
+    def _poll_sockets(self, receivers: List[Tuple[object, Callable[[], None]]]):
+        """Llama al ``receive`` de cada socket con datos hasta que se pida parar.
+
+        Una sola llamada a select espera a todos los sockets, nunca más de
+        POLL_INTERVAL sin comprobar el estado. En Linux los sockets pasan a
+        modo no bloqueante y, tras cada espera, se vacía la ráfaga pendiente
+        de cada socket listo, hasta MAX_BURST tramas: una interfaz saturada
+        no deja sin atender a las demás, que vuelven a entrar en el
+        siguiente select (inmediato si quedan tramas).
+        """
+        sockets = [getattr(sock, "ins", None) for sock, _ in receivers]
+        burst = all(isinstance(ins, socket.socket) for ins in sockets)
+        if burst:
+            for ins in sockets:
+                ins.setblocking(False)
+            ready_map = {ins: receive for ins, (_, receive) in zip(sockets, receivers)}
+        else:
+            ready_map = {sock: receive for sock, receive in receivers}
+        waiting = list(ready_map)
+        # Sin sockets del sistema, la espera la hace el select de Scapy
+        scapy_select = None if burst else receivers[0][0].select
+        interval = self.POLL_INTERVAL
+        max_burst = self.MAX_BURST
+        while self.is_capturing:
+            if burst:
+                ready, _, _ = select.select(waiting, [], [], interval)
+            else:
+                ready = scapy_select(waiting, interval)
+            for key in ready:
+                receive = ready_map[key]
+                if not burst:
+                    receive()
+                    continue
+                try:
+                    for _ in range(max_burst):
+                        receive()
+                except BlockingIOError:
+                    pass
+                if not self.is_capturing:
+                    break
+
+    def _capture_scapy(self, sockets: List, spool: Optional[PcapSpool] = None):
+        """Captura paquetes diseccionados por Scapy de todas las interfaces."""
+        self._poll_sockets([
+            (sock, self._scapy_receiver(sock, index, spool)) for index, sock in enumerate(sockets)
+        ])
+
+    def _scapy_receiver(self, sock, index: int, spool: Optional[PcapSpool]) -> Callable[[], None]:
+        """Función que lee y procesa un paquete del socket de la interfaz ``index``."""
+        from scapy.data import MTU  # type: ignore
+
+        stats = self.interface_stats[self._interface_names[index]]
+        if self.sampler is not None:
+            return self._scapy_sampled_receiver(sock, index, spool, stats)
+        recv = _sampled(sock.recv, self.instrumentation.probe(), "diseccion")
+
+        def receive():
+            packet = recv(MTU)
+            if packet is not None:
+                stats.packets += 1
+                stats.bytes += len(packet)
+                if spool is not None:
+                    spool.offer(getattr(packet, "original", None) or bytes(packet), float(packet.time))
+                self._process_packet(packet, index)
+
+        return receive
+
+    def _scapy_sampled_receiver(self, sock, index: int, spool: Optional[PcapSpool],
+                                stats: InterfaceStats) -> Callable[[], None]:
+        """Como _scapy_receiver, pero lee la trama cruda y solo disecciona las muestreadas."""
+        from scapy.data import MTU  # type: ignore
+
+        weight_of = self.sampler.weight
+        dissect = _sampled(_dissect, self.instrumentation.probe(), "diseccion")
+
+        def receive():
+            layer, frame, timestamp = sock.recv_raw(MTU)
+            if frame and layer:
+                stats.packets += 1
+                stats.bytes += len(frame)
+                if spool is not None:
+                    spool.offer(frame, timestamp)
+                weight = weight_of(frame)
+                if weight:
+                    self._process_packet(dissect(layer, frame, timestamp), index, weight)
+
+        return receive
+
+    def _capture_raw(self, sockets: List, spool: Optional[PcapSpool] = None):
+        """Captura tramas crudas sin disección de Scapy (ruta rápida) de todas las interfaces."""
+        self._poll_sockets([
+            (sock, self._raw_receiver(sock, index, spool)) for index, sock in enumerate(sockets)
+        ])
+
+    def _raw_receiver(self, sock, index: int, spool: Optional[PcapSpool]) -> Callable[[], None]:
+        """Función que lee y procesa una trama cruda del socket de la interfaz ``index``."""
+        from scapy.data import MTU  # type: ignore
+
+        snaplen = self.options.snaplen
+        stats = self.interface_stats[self._interface_names[index]]
+        ins = getattr(sock, "ins", None)
+        if not snaplen or not isinstance(ins, socket.socket):
+            def receive():
+                _, frame, timestamp = sock.recv_raw(MTU)
+                if frame:
+                    stats.packets += 1
+                    stats.bytes += len(frame)
+                    if spool is not None:
+                        spool.offer(frame, timestamp)
+                    self._process_frame(frame, timestamp, None, index)
+        else:
+            # Con snaplen solo se copian a Python los primeros bytes de cada
+            # trama; MSG_TRUNC hace que recvmsg_into devuelva la longitud
+            # original. Los mensajes de control traen la marca de tiempo del
+            # kernel y la etiqueta VLAN que el kernel quitó de la trama
+            buffer = bytearray(snaplen)
+            buffers = [memoryview(buffer)]
+            ancbufsize = ANCILLARY_BUFSIZE if getattr(sock, "auxdata_available", False) else 0
+
+            def receive():
+                size, ancdata, _, _ = ins.recvmsg_into(buffers, ancbufsize, socket.MSG_TRUNC)
+                if size:
+                    frame = bytes(buffer[:min(size, snaplen)])
+                    timestamp, tag = read_ancillary(ancdata)
+                    if tag:
+                        frame = (frame[:12] + tag + frame[12:])[:snaplen]
+                        size += len(tag)
+                    stats.packets += 1
+                    stats.bytes += size
+                    if spool is not None:
+                        spool.offer(frame, timestamp, size)
+                    self._process_frame(frame, timestamp, size, index)
+
+        return receive
+
+    def _process_packet(self, packet, interface: int = 0, weight: int = 1):
+        """Procesa un paquete capturado en el hilo de captura.
+
+        Solo actualiza el modelo; los consumidores recogen los paquetes por
+        lotes desde el buffer con drain(). ``interface`` es el índice de la
+        interfaz de origen y ``weight`` su peso de muestreo.
+        """
+        try:
+            self.model.process_packet(packet, self._interface_names[interface], weight)
+        except Exception:
+            # Paquete de Scapy que ni siquiera se pudo medir
+            self.model.count_error(0, weight)
+
+    def _process_frame(self, frame: bytes, timestamp: Optional[float], size: Optional[int] = None,
+                       interface: int = 0):
+        """Procesa una trama cruda en el hilo de captura (modo rápido).
+
+        ``size`` es la longitud original cuando la trama llega recortada e
+        ``interface`` el índice de la interfaz de origen. Con muestreo, las
+        tramas descartadas no llegan a decodificarse.
+        """
+        sampler = self.sampler
+        if sampler is None:
+            weight = 1
+        else:
+            weight = sampler.weight(frame)
+            if not weight:
+                return
+        if self.pipeline is not None:
+            self.pipeline.submit(frame, timestamp, size, interface, weight)
+        else:
+            self.model.process_raw(frame, timestamp, size, self._interface_names[interface], weight)
+
+
+def _sampled(function: Callable, probe: Optional[StageProbe], stage: str) -> Callable:
+    """Envuelve ``function`` para medir en ``stage`` las llamadas que la sonda muestrea.
+
+    Solo se anotan las llamadas que terminan bien (no las lecturas vacías
+    de un socket no bloqueante). Sin sonda devuelve ``function`` tal cual.
+    """
+    if probe is None:
+        return function
+    clock = time.perf_counter_ns
+
+    def timed(*args):
+        if not probe.due():
+            return function(*args)
+        started = clock()
+        result = function(*args)
+        probe.record(stage, clock() - started)
+        return result
+
+    return timed
+
+
+def _dissect(layer, frame: bytes, timestamp: Optional[float]):
+    """Disecciona una trama cruda como SuperSocket.recv de Scapy."""
+    try:
+        packet = layer(frame)
+    except Exception:
+        packet = scapy_conf().raw_layer(frame)
+    if timestamp is not None:
+        packet.time = timestamp
+    return packet
+
+
+def _metadata_time(meta, nano: bool = False) -> float:
+    """Obtiene la marca de tiempo de los metadatos de RawPcapReader/RawPcapNgReader."""
+    if hasattr(meta, "sec"):
+        return meta.sec + meta.usec / (1e9 if nano else 1e6)
+    return ((meta.tshigh << 32) + meta.tslow) / meta.tsresol
+
+
+class _Pacer:
+    """Reproduce los intervalos originales entre paquetes de un fichero."""
+
+    # Máxima espera continua, para poder atender una parada
+    MAX_SLEEP = 0.1
+
+    def __init__(self):
+        self._offset: Optional[float] = None
+
+    def wait(self, packet_time: float, keep_going: Callable[[], bool]) -> None:
+        """Espera hasta el instante que corresponde al paquete."""
+        now = time.monotonic()
+        if self._offset is None:
+            self._offset = now - packet_time
+            return
+        delay = packet_time + self._offset - now
+        while delay > 0 and keep_going():
+            time.sleep(min(delay, self.MAX_SLEEP))
+            delay = packet_time + self._offset - time.monotonic()
@@ -0,0 +1,64 @@
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+
+
+class ExportJob:
+    """Ejecuta una exportación en un hilo propio y expone su progreso.
+
+    ``writer`` recibe una función de progreso ``(hecho, total)``; lo que
+    devuelva queda en ``result``. La interfaz consulta ``progress``,
+    ``finished``, ``result`` y ``error`` desde su ciclo de actualización, sin
+    callbacks entre hilos.
+    """
+
+    def __init__(self, label: str, writer: Callable[[Callable[[int, int], None]], Any]):
+        self.label = label
+        self._writer = writer
+        self._done = 0
+        self._total = 0
+        self.result: Any = None
+        self.error: Optional[Exception] = None
+        self.started = 0.0
+        self.elapsed = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name=f"exportar-{self.label}", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            self.result = self._writer(self._report)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.elapsed = time.monotonic() - self.started
+
+    def _report(self, done: int, total: int) -> None:
+        self._done, self._total = done, total
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def finished(self) -> bool:
+        """True cuando el hilo terminó (con resultado o con error)."""
+        return self._thread is not None and not self._thread.is_alive()
+
+    @property
+    def progress(self) -> Tuple[int, int]:
+        """(hecho, total) según el último aviso del escritor."""
+        return self._done, self._total
+
+    def fraction(self) -> float:
+        done, total = self._done, self._total
+        return done / total if total else 0.0
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que termine. Devuelve True si terminó."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.finished
@@ -0,0 +1,236 @@
+import os
+import time
+from typing import Optional
+from controllers.capture_session import CaptureSession
+from controllers.capture_options import CaptureOptions, validate_filters
+from controllers.pcap_spool import PcapSpool
+from controllers.profiler import SamplingProfiler
+from controllers.session_store import SessionStore
+from models.instrumentation import Instrumentation
+from models.packet_sampler import PacketSampler
+from models.protocol_classifier import ProtocolClassifier
+
+
+class HeadlessController:
+    """Controlador sin interfaz gráfica para sensores remotos.
+
+    Ejecuta la misma sesión de captura que la interfaz, imprime estadísticas
+    periódicas con la tasa de paquetes por segundo y escribe reportes según
+    un intervalo configurado. Al terminar puede guardar los tiempos de cada
+    etapa en JSON (``diagnostics_file``) y perfilar los primeros
+    ``profile_seconds`` de la captura. Con ``sampler`` solo se decodifica
+    una muestra de las tramas y las cifras impresas son estimaciones. Con
+    ``session_store`` los agregados de la captura se guardan en SQLite.
+    """
+
+    # Periodo con el que se vacía el buffer de paquetes hacia el almacén
+    DRAIN_INTERVAL = 0.2
+
+    def __init__(self, filtro: str, modo: str, stats_interval: float = 5.0,
+                 report_interval: float = 0.0, report_dir: str = ".",
+                 duration: Optional[float] = None, capture_file: Optional[str] = None,
+                 realtime: bool = False, store_capacity: int = 1_000_000,
+                 heavy_hitters: int = 0, workers: int = 1,
+                 options: Optional[CaptureOptions] = None, packet_format: str = "csv",
+                 spool: Optional[PcapSpool] = None, sampler: Optional[PacketSampler] = None,
+                 classifier: Optional[ProtocolClassifier] = None, milliseconds: bool = False,
+                 sample_every: int = Instrumentation.DEFAULT_SAMPLE_EVERY,
+                 diagnostics_file: Optional[str] = None, profile_seconds: float = 0.0,
+                 session_store: Optional[SessionStore] = None):
+        self.session = CaptureSession(
+            store_capacity=store_capacity,
+            heavy_hitters=heavy_hitters,
+            workers=workers,
+            classifier=classifier,
+            sample_every=sample_every
+        )
+        self.session.spool = spool
+        self.session.sampler = sampler
+        self.session.set_recorder(session_store)
+        self.session.store.set_milliseconds(milliseconds)
+        self.filtro = filtro
+        self.modo = modo
+        self.stats_interval = stats_interval
+        self.report_interval = report_interval
+        self.report_dir = report_dir
+        self.duration = duration
+        self.capture_file = capture_file
+        self.realtime = realtime
+        self.options = options or CaptureOptions()
+        self.packet_format = packet_format
+        self.diagnostics_file = diagnostics_file
+        self.profile_seconds = profile_seconds
+        self._last_count = 0
+        self._last_time = 0.0
+
+    def run(self) -> None:
+        """Captura hasta agotar la duración, el fichero de entrada o recibir Ctrl+C."""
+        session = self.session
+        if self.capture_file:
+            print(f"Reproduciendo '{self.capture_file}' (modo={self.modo}, tiempo real={self.realtime})"
+                  f"{self._sampling_status()}")
+            session.start_file(self.capture_file, self.modo, self.realtime)
+        else:
+            error = validate_filters(self.filtro, self.options)
+            if error:
+                print(error)
+                return
+            print(f"Captura sin interfaz iniciada (filtro='{self.filtro}', modo={self.modo}, "
+                  f"{self.options.describe()}){self._sampling_status()}")
+            session.start(self.filtro, self.modo, self.options)
+        profiler = None
+        if self.profile_seconds > 0:
+            profiler = SamplingProfiler(self.profile_seconds, self.report_dir)
+            profiler.start()
+        started = time.time()
+        self._last_time = started
+        next_stats = started + self.stats_interval
+        next_report = started + self.report_interval if self.report_interval > 0 else None
+
+        try:
+            while session.is_capturing:
+                # Esperar al hilo de captura como temporizador: termina antes si acaba el fichero
+                session.capture_thread.join(self.DRAIN_INTERVAL)
+                session.drain()
+                # Sin vista, la latencia se mide hasta el almacén
+                session.instrumentation.displayed()
+                now = time.time()
+                if now >= next_stats:
+                    self._print_stats(now)
+                    next_stats = now + self.stats_interval
+                if next_report is not None and now >= next_report:
+                    self._write_reports()
+                    next_report = now + self.report_interval
+                if self.duration is not None and now - started >= self.duration:
+                    break
+        except KeyboardInterrupt:
+            print("\nCaptura interrumpida por el usuario.")
+        finally:
+            session.stop()
+            session.wait_idle()
+            session.drain()
+            session.instrumentation.displayed()
+            session.close_recorder()
+            self._print_summary(time.time() - started)
+            if self.report_interval > 0:
+                self._write_reports()
+            if profiler is not None:
+                self._finish_profile(profiler)
+            if self.diagnostics_file:
+                self._write_diagnostics()
+
+    def _finish_profile(self, profiler: SamplingProfiler) -> None:
+        """Corta el perfil si la captura terminó antes y muestra dónde quedó."""
+        profiler.stop()
+        profiler.wait()
+        if profiler.error is not None:
+            print(f"Error en el perfil: {profiler.error}")
+        else:
+            print(f"Perfil generado: {profiler.result}")
+
+    def _write_diagnostics(self) -> None:
+        """Guarda los tiempos de cada etapa e imprime los percentiles principales."""
+        instrumentation = self.session.instrumentation
+        stats = self.session.stats
+        for name, _, stage in instrumentation.rows():
+            if stage["muestras"] and stage["unidad"] == "ns":
+                print(f"  {name}: p50={stats.format_duration(stage['p50'])} "
+                      f"p99={stats.format_duration(stage['p99'])} ({stage['muestras']} muestras)")
+        try:
+            print(f"Diagnóstico generado: {self.session.save_diagnostics(self.diagnostics_file)}")
+        except OSError as e:
+            print(f"Error guardando el diagnóstico: {e}")
+
+    def _print_stats(self, now: float) -> None:
+        """Imprime el estado de la captura y la tasa desde la última línea."""
+        model = self.session.model
+        stats = self.session.stats
+        snapshot = self.session.snapshot()
+        count = snapshot.packets
+        elapsed = now - self._last_time
+        pps = (count - self._last_count) / elapsed if elapsed > 0 else 0.0
+        self._last_count = count
+        self._last_time = now
+        buffer = model.packet_buffer
+        bps, _ = model.traffic.current_rate()
+        print(
+            f"[{stats.format_elapsed(snapshot.elapsed(now))}] paquetes={count} ({pps:.0f} pps) "
+            f"tráfico={stats.format_size(snapshot.bytes)} tasa={stats.format_rate(bps)} "
+            f"TCP={snapshot.transport('TCP')} UDP={snapshot.transport('UDP')} "
+            f"cola={len(buffer)} descartados={buffer.dropped} errores={snapshot.errors}"
+            f"{self._kernel_drops()}{self._spool_status()}"
+            f"{self._sampling_status()}"
+        )
+        self._print_interfaces()
+
+    def _print_summary(self, elapsed: float) -> None:
+        """Imprime el resumen final con la tasa media sostenida."""
+        model = self.session.model
+        snapshot = self.session.snapshot()
+        pps = snapshot.packets / elapsed if elapsed > 0 else 0.0
+        print(
+            f"Resumen: {snapshot.packets} paquetes en {elapsed:.1f} s "
+            f"({pps:.0f} pps de media), "
+            f"{self.session.stats.format_size(snapshot.bytes)}, "
+            f"descartados={model.packet_buffer.dropped} errores={snapshot.errors}"
+            f"{self._kernel_drops()}{self._spool_status()}"
+            f"{self._sampling_status()}"
+        )
+        sampler = self.session.sampler
+        if sampler is not None:
+            print(f"  Muestreo: {self.session.stats.format_sampling(sampler)}; paquetes, bytes "
+                  f"y repartos son estimaciones ({sampler.kept} de {sampler.seen} tramas "
+                  f"decodificadas, {sampler.changes} cambios de N)")
+        recorder = self.session.recorder
+        if recorder is not None:
+            print(f"  {self.session.stats.format_session_store(recorder)}")
+        self._print_interfaces()
+
+    def _print_interfaces(self) -> None:
+        """Con varias interfaces, imprime los contadores de cada una."""
+        interfaces = self.session.interface_stats
+        if len(interfaces) > 1:
+            for interface in interfaces.values():
+                print(f"  {self.session.stats.format_interface(interface)}")
+
+    def _kernel_drops(self) -> str:
+        """Fragmento con los descartes del kernel, vacío si no hay datos."""
+        kernel = self.session.kernel_stats
+        if not kernel.available:
+            return ""
+        return f" descartados_kernel={kernel.dropped}"
+
+    def _spool_status(self) -> str:
+        """Fragmento con el tamaño del spool pcap y sus descartes, vacío sin spool."""
+        spool = self.session.spool
+        if spool is None:
+            return ""
+        return (f" spool={self.session.stats.format_size(spool.spool_bytes)}"
+                f" spool_descartes={spool.dropped}")
+
+    def _sampling_status(self) -> str:
+        """Fragmento con el N de muestreo vigente, vacío sin muestreo."""
+        sampler = self.session.sampler
+        if sampler is None:
+            return ""
+        return f" muestreo=1/{sampler.every}"
+
+    def _write_reports(self) -> None:
+        """Escribe los reportes PDF y CSV con marca de tiempo en el nombre."""
+        from controllers.reports import (
+            write_pdf_report, write_csv_report, write_flow_csv_report, write_npz_report
+        )
+
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        os.makedirs(self.report_dir, exist_ok=True)
+        packet_writer = write_npz_report if self.packet_format == "npz" else write_csv_report
+        for writer, name in (
+            (write_pdf_report, f"reporte_monitoreo_{stamp}.pdf"),
+            (packet_writer, f"reporte_paquetes_{stamp}.{self.packet_format}"),
+            (write_flow_csv_report, f"reporte_flujos_{stamp}.csv"),
+        ):
+            try:
+                filename = writer(self.session, os.path.join(self.report_dir, name))
+                print(f"Reporte generado: {filename}")
+            except Exception as e:
+                print(f"Error generando el reporte '{name}': {e}")
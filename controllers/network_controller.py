@@ -1,28 +1,109 @@
 import threading
 import time
-from typing import Optional
-from models.packet_model import PacketModel
-from models.network_stats import NetworkStats
+from typing import List, Optional
+from models.ip_ranking import IpRanking
+from models.packet_index import PacketIndex
+from models.protocol_classifier import ProtocolClassifier
+from models.stats_engine import StatsSnapshot
+from models.display_filter import DisplayFilterError, FilteredPackets
+from models.instrumentation import Instrumentation
+from models.packet_sampler import PacketSampler
 from views.main_view import MainView
-from scapy.all import sniff  # type: ignore
-import csv
-from fpdf import FPDF  # type: ignore
+from controllers.capture_session import CaptureSession, STATE_IDLE, STATE_STOPPING
+from controllers.capture_options import CaptureOptions, preload_capture_modules, validate_filters
+from controllers.reports import (
+    write_pdf_report, write_csv_report, write_flow_csv_report, write_npz_report, pdf_available,
+    write_session_pdf_report, write_session_traffic_csv_report, write_session_flow_csv_report
+)
+from controllers.export_job import ExportJob
+from controllers.pcap_spool import PcapSpool
+from controllers.session_store import SessionStore
+from controllers.startup_timer import StartupTimer
+from controllers.profiler import SamplingProfiler
 
 class NetworkController:
-    def __init__(self, view: MainView):
+    # Segundos mostrados en la gráfica de tráfico y periodo de repintado
+    # de la gráfica y del top de flujos
+    GRAPH_SECONDS = 120
+    GRAPH_INTERVAL = 1.0
+    TOP_FLOWS = 15
+    # Directorio del spool pcap si no se indica otro
+    SPOOL_DIR = "spool"
+    # Base de sesiones si no se indica otra
+    SESSIONS_DB = "sesiones.db"
+    # Periodo del ciclo de actualización de la interfaz
+    UI_INTERVAL_MS = 50
+
+    def __init__(self, view: MainView, store_capacity: int = 1_000_000, heavy_hitters: int = 0,
+                 workers: int = 1, spool: Optional[PcapSpool] = None,
+                 sampler: Optional[PacketSampler] = None,
+                 session_store: Optional[SessionStore] = None,
+                 classifier: Optional[ProtocolClassifier] = None, milliseconds: bool = False,
+                 startup_timer: Optional[StartupTimer] = None,
+                 sample_every: int = Instrumentation.DEFAULT_SAMPLE_EVERY):
         self.view = view
-        self.model = PacketModel()
-        self.stats = NetworkStats()
-        self.capture_thread: Optional[threading.Thread] = None
-        self.is_capturing = False
+        self.session = CaptureSession(
+            on_error=self._on_capture_error,
+            on_finished=self._on_capture_finished,
+            store_capacity=store_capacity,
+            heavy_hitters=heavy_hitters,
+            workers=workers,
+            classifier=classifier,
+            sample_every=sample_every
+        )
+        self.instrumentation = self.session.instrumentation
+        self.model = self.session.model
+        self.stats = self.session.stats
+        self.store = self.session.store
+        self.ip_ranking = IpRanking()
+        self._last_graph_update = 0.0
+        self._last_state = self.session.state
+        self.export_job: Optional[ExportJob] = None
+        self.spool = spool or PcapSpool(self.SPOOL_DIR)
+        self.session_store = session_store or SessionStore(self.SESSIONS_DB)
+        # Umbrales del muestreo adaptativo (la vista solo elige modo, N y si adapta)
+        self._sampling_limits = (0.5, 0.5) if sampler is None else (
+            sampler.queue_limit, sampler.latency_limit
+        )
+        # Índices para el filtro de visualización; se construyen al aplicar
+        # el primer filtro y se mantienen al día solo mientras hay uno activo
+        self.packet_index = PacketIndex(self.store)
+        self.filtered: Optional[FilteredPackets] = None
+        # Ventanas de diagnóstico y de sesiones (si están abiertas) y perfil en curso
+        self.diagnostics = None
+        self.sessions = None
+        self.profiler: Optional[SamplingProfiler] = None
+        # Instante (perf_counter_ns) en que debería empezar el siguiente ciclo
+        self._tick_due = 0
+        self.startup_timer = startup_timer
+        # Scapy se importa en segundo plano con la ventana ya visible; la
+        # lista de interfaces llega a la vista desde ui_tick al terminar
+        self._interfaces: Optional[List[str]] = None
+        self._preload_thread: Optional[threading.Thread] = threading.Thread(
+            target=self._preload_capture, name="precarga-scapy", daemon=True
+        )
+        self._preload_thread.start()
         
         # Configurar callbacks de la vista
         self.view.set_start_capture_callback(self.start_capture)
         self.view.set_stop_capture_callback(self.stop_capture)
         self.view.set_clear_results_callback(self.clear_results)
+        self.view.set_ip_page_callback(self.change_ip_page)
+        self.view.set_open_capture_callback(self.open_capture_file)
+        self.view.set_display_filter_callbacks(self.apply_display_filter, self.remove_display_filter)
+        self.view.set_milliseconds_callback(self.toggle_milliseconds)
+        self.view.set_diagnostics_callback(self.open_diagnostics)
+        self.view.set_sessions_callback(self.open_sessions)
         
         # Configurar eventos del menú
         self._setup_menu_callbacks()
+        self.store.set_milliseconds(milliseconds)
+        self.view.set_milliseconds(milliseconds)
+        self.view.set_packet_source(self.store)
+        self.view.set_spool(spool is not None, self.spool.directory)
+        self.view.set_session_store(session_store is not None, self.session_store.path)
+        if sampler is not None:
+            self.view.set_sampling_options(sampler.mode, sampler.base_every, sampler.adaptive)
         
         # Iniciar actualización de UI
         self._schedule_ui_update()
@@ -32,187 +113,589 @@ class NetworkController:
         self.view.report_menu.add_command(
             label="Generar Reporte PDF",
             command=self.generate_pdf_report,
-            state="normal" if FPDF else "disabled"
+            state="normal" if pdf_available() else "disabled"
         )
         self.view.report_menu.add_command(
             label="Generar Reporte CSV",
             command=self.generate_csv_report
         )
+        self.view.report_menu.add_command(
+            label="Generar Reporte CSV comprimido (.gz)",
+            command=lambda: self.generate_csv_report(compress=True)
+        )
+        self.view.report_menu.add_command(
+            label="Exportar Paquetes en Columnas (.npz)",
+            command=self.export_npz
+        )
+
+    @property
+    def is_capturing(self) -> bool:
+        return self.session.is_capturing
 
     def start_capture(self):
-        """Inicia la captura de paquetes."""
-        if not self.is_capturing:
-            self.is_capturing = True
-            self.view.update_capture_state(True)
-            self.stats.start_counting()
-            
-            # Iniciar hilo de captura
-            filtro = self.view.get_filter()
-            self.capture_thread = threading.Thread(
-                target=self._capture_packets,
-                args=(filtro,),
-                daemon=True
+        """Inicia la captura de paquetes tras validar el filtro y las opciones."""
+        if self._export_running("Iniciar Captura"):
+            return
+        options = self._read_capture_options()
+        if options is None:
+            return
+        try:
+            options.check_mode(self.view.get_capture_mode(), self.session.workers)
+        except ValueError as e:
+            self.view.show_error("Opciones de captura", str(e))
+            return
+        filtro = self.view.get_filter()
+        error = validate_filters(filtro, options)
+        if error:
+            self.view.show_error("Filtro BPF", error)
+            return
+        if not self._apply_sampling():
+            return
+        if not self._leave_loaded_session():
+            return
+        self.session.spool = self.spool if self.view.get_capture_options()['spool'] else None
+        self._apply_session_store()
+        if self.session.start(filtro, self.view.get_capture_mode(), options):
+            self._sync_capture_state()
+
+    def _read_capture_options(self) -> Optional[CaptureOptions]:
+        """Convierte las opciones de la vista; muestra el error si no son válidas."""
+        values = self.view.get_capture_options()
+        try:
+            return CaptureOptions(
+                interfaces=values['interfaces'],
+                filters=values['interface_filters'],
+                snaplen=int(values['snaplen'] or 0),
+                rcvbuf=int(float(values['rcvbuf'] or 0) * 1024 * 1024),
+                promisc=values['promisc']
             )
-            self.capture_thread.start()
+        except ValueError as e:
+            self.view.show_error("Opciones de captura", f"Valor no válido: {e}")
+            return None
+
+    def _apply_sampling(self) -> bool:
+        """Asigna a la sesión el muestreo elegido en la vista; muestra el error si no es válido."""
+        values = self.view.get_sampling_options()
+        if values['mode'] is None and not values['adaptive']:
+            self.session.sampler = None
+            return True
+        queue_limit, latency_limit = self._sampling_limits
+        try:
+            self.session.sampler = PacketSampler(
+                values['mode'] or "1-de-n",
+                int(values['every'] or 1) if values['mode'] else 1,
+                adaptive=values['adaptive'],
+                queue_limit=queue_limit,
+                latency_limit=latency_limit
+            )
+        except ValueError as e:
+            self.view.show_error("Muestreo", f"Valor no válido: {e}")
+            return False
+        return True
+
+    def _apply_session_store(self):
+        """Guarda o no la sesión en la base según la casilla de la vista."""
+        enabled = self.view.get_capture_options()['sessions']
+        self.session.set_recorder(self.session_store if enabled else None)
+
+    def _leave_loaded_session(self) -> bool:
+        """Vacía la sesión reabierta antes de capturar: la captura nueva empieza
+        de cero y no arrastra sus datos a la sesión que se guarde. Devuelve
+        False si no se pudo limpiar."""
+        if self.session.loaded_session is not None:
+            self.clear_results()
+        return self.session.loaded_session is None
+
+    def open_capture_file(self, path: Optional[str] = None, realtime: Optional[bool] = None):
+        """Reproduce un fichero pcap/pcapng como si fuera una captura."""
+        if not self.session.is_idle:
+            self.view.show_warning("Abrir captura", "Detén la captura antes de abrir un fichero.")
+            return
+        path = path or self.view.ask_capture_file()
+        if not path:
+            return
+        if realtime is None:
+            realtime = self.view.get_realtime_replay()
+        if not self._apply_sampling():
+            return
+        if not self._leave_loaded_session():
+            return
+        self._apply_session_store()
+        if self.session.start_file(path, self.view.get_capture_mode(), realtime):
+            self._sync_capture_state()
 
     def stop_capture(self):
-        """Detiene la captura de paquetes."""
+        """Detiene la captura de paquetes.
+
+        La sesión une el hilo de captura en un tiempo acotado; si aún no ha
+        terminado, los controles quedan bloqueados hasta que ui_tick vea la
+        sesión detenida.
+        """
         if self.is_capturing:
-            self.is_capturing = False
-            self.model.stop_capture()
-            self.view.update_capture_state(False)
+            self.session.stop()
+            self._sync_capture_state()
+
+    def _sync_capture_state(self):
+        """Refleja en los controles el estado de la sesión cuando cambia."""
+        idle = self.session.is_idle  # también cierra una parada lenta ya terminada
+        state = STATE_IDLE if idle else self.session.state
+        if state != self._last_state:
+            self._last_state = state
+            self.view.update_capture_state(state != STATE_IDLE, stopping=state == STATE_STOPPING)
 
     def clear_results(self):
         """Limpia todos los resultados y reinicia las estadísticas."""
-        if not self.is_capturing:
-            self.model.clear_data()
-            self.stats.reset_stats()
-            self.view.packet_tree.delete(*self.view.packet_tree.get_children())
-            self.view.ip_tree.delete(*self.view.ip_tree.get_children())
-            self._update_stats_display()
+        if self._export_running("Limpiar"):
+            return
+        if self.session.clear():
+            self.ip_ranking.clear()
+            if self.filtered is not None:
+                self._update_display_filter()
+            self.view.refresh_packet_list()
+            self.view.clear_ip_list()
+            self._refresh_throughput()
+            self._refresh_flow_list()
+            self._update_stats_display(self.session.snapshot())
         else:
             self.view.show_warning("Limpiar", "Detén la captura antes de limpiar.")
 
-    def _capture_packets(self, filtro: str):
-        """Función ejecutada en el hilo de captura."""
-        try:
-            # Iniciar la captura directamente desde aquí
-            sniff(
-                filter=filtro if filtro else None,
-                prn=self._process_packet,
-                stop_filter=lambda x: not self.is_capturing,
-                store=False
+    def _on_capture_finished(self):
+        """Restablece los controles al terminar la lectura de un fichero."""
+        self.view.after(0, self._sync_capture_state)
+
+    def _on_capture_error(self, message: str):
+        """Notifica en el hilo principal un error del hilo de captura."""
+        self.view.after(0, lambda: self.view.show_error("Error de Captura", message))
+        self.view.after(0, self._sync_capture_state)
+            
+    def _update_stats_display(self, snapshot: StatsSnapshot):
+        """Actualiza las etiquetas de estadísticas con una instantánea de los contadores."""
+        if self.is_capturing:
+            self.view.update_stats_label('Tiempo', f"Tiempo: {self.stats.format_elapsed(snapshot.elapsed())}")
+        
+        # Con muestreo los contadores son estimaciones
+        sampler = self.session.sampler
+        approx = "≈" if sampler is not None else ""
+        self.view.update_stats_label('Paquetes', f"Paquetes: {approx}{snapshot.packets}")
+        kernel = self.session.kernel_stats
+        self.view.update_stats_label(
+            'Kernel',
+            f"Descartes kernel: {kernel.dropped}" if kernel.available else "Descartes kernel: n/d"
+        )
+        self.view.update_stats_label('Trafico', f"Tráfico: {approx}{self.stats.format_size(snapshot.bytes)}")
+        self.view.update_stats_label('Muestreo', f"Muestreo: {self.stats.format_sampling(sampler)}")
+        # Por transporte: TCP + UDP + Otros suman el total de paquetes
+        self.view.update_stats_label('TCP', f"TCP: {snapshot.transport('TCP')}")
+        self.view.update_stats_label('UDP', f"UDP: {snapshot.transport('UDP')}")
+        self.view.update_stats_label('Otros', f"Otros: {snapshot.other_transports()}")
+
+        bps, pps = self.model.traffic.current_rate()
+        self.view.update_stats_label('Tasa', f"Tasa: {self.stats.format_rate(bps)} ({pps:.0f} pps)")
+
+        buffer = self.model.packet_buffer
+        self.view.update_stats_label('Cola', f"Cola: {len(buffer)}/{buffer.capacity}")
+        self.view.update_stats_label('Descartados', f"Descartados: {buffer.dropped}")
+        self.view.update_stats_label('Errores', f"Errores decodificación: {snapshot.errors}")
+
+        interfaces = self.session.interface_stats.values()
+        self.view.update_stats_label(
+            'Interfaces',
+            "Interfaces: " + (" | ".join(map(self.stats.format_interface, interfaces)) or "-")
+        )
+
+        spool = self.session.spool
+        if spool is None:
+            self.view.update_stats_label('Spool', "Spool: inactivo")
+        else:
+            self.view.update_stats_label(
+                'Spool',
+                f"Spool: {self.stats.format_size(spool.spool_bytes)} en {len(spool.files())} ficheros, "
+                f"{spool.dropped} descartes"
             )
-        except Exception as e:
-            self.view.after(0, lambda: self.view.show_error(
-                "Error de Captura",
-                f"Error al capturar paquetes: {str(e)}"
-            ))
-            self.is_capturing = False
-            self.view.after(0, lambda: self.view.update_capture_state(False))
 
-    def _process_packet(self, packet):
-        """Procesa un paquete capturado y lo muestra en la vista."""
+        loaded = self.session.loaded_session
+        recorder = self.session.recorder
+        if loaded is not None:
+            self.view.update_stats_label('Sesion', f"Sesión: #{loaded.id} reabierta ({loaded.origin})")
+        elif recorder is not None and recorder.open:
+            self.view.update_stats_label('Sesion', self.stats.format_session_store(recorder))
+        else:
+            self.view.update_stats_label('Sesion', "Sesión: no se guarda")
+
+    def change_ip_page(self, delta: int):
+        """Cambia la página visible del top de IPs."""
+        if self.model.ip_sketch is None:
+            self.ip_ranking.set_page(self.ip_ranking.page + delta, self.model.ip_counts)
+        else:
+            self.ip_ranking.set_page(self.ip_ranking.page + delta)
+            self._load_ip_sketch()
+        self._refresh_ip_list()
+
+    def _load_ip_sketch(self) -> bool:
+        """Lee el top de IPs del contador Space-Saving, en O(K)."""
+        sketch = self.model.ip_sketch
+        return self.ip_ranking.load(
+            [(ip, estimate) for ip, estimate, _ in sketch.top(self.ip_ranking.limit)],
+            len(sketch)
+        )
+
+    def _refresh_ip_list(self):
+        """Envía a la vista la página actual del top de IPs."""
+        self.view.update_ip_list(
+            self.ip_ranking.page_rows(),
+            self.ip_ranking.page,
+            self.ip_ranking.page_count
+        )
+
+    def _preload_capture(self):
+        """Importa Scapy y obtiene las interfaces (hilo en segundo plano)."""
         try:
-            # Procesar el paquete en el modelo
-            self.model.process_packet(packet)
-            
-            # Procesar todos los paquetes pendientes en la cola
-            while not self.model.packet_queue.empty():
-                try:
-                    packet_info = self.model.packet_queue.get_nowait()
-                    if packet_info and len(packet_info) == 7:
-                        # Asegurar que la actualización de UI se haga en el hilo principal
-                        self.view.after(1, self.view.add_packet_to_tree, packet_info)
-                except Exception as e:
-                    print(f"Error procesando paquete de la cola: {e}")
-                    break
-                    
+            self._interfaces = preload_capture_modules()
         except Exception as e:
-            print(f"Error en _process_packet: {e}")
-            
-    def _update_stats_display(self):
-        """Actualiza las etiquetas de estadísticas en la vista."""
-        if self.is_capturing:
-            self.view.update_stats_label('Tiempo', f"Tiempo: {self.stats.get_elapsed_time()}")
+            print(f"Error cargando los módulos de captura: {e}")
+            self._interfaces = []
+
+    def _check_preload(self):
+        """Entrega a la vista las interfaces cuando termina la precarga."""
+        if self._preload_thread.is_alive():
+            return
+        self._preload_thread = None
+        self.view.set_interfaces(self._interfaces or [])
+        if self.startup_timer is not None:
+            self.startup_timer.mark("módulos de captura cargados")
+
+    def ui_tick(self):
+        """Ejecuta un ciclo de actualización de la interfaz.
+
+        Cada etapa se mide en la instrumentación de la sesión (ventana de
+        diagnóstico); el drenado lo mide la propia sesión.
+        """
+        instrumentation = self.instrumentation
+        self._sync_capture_state()
+        if self._preload_thread is not None:
+            self._check_preload()
+
+        # Actualizar estadísticas con una sola instantánea por ciclo
+        with instrumentation.stage("estadisticas"):
+            self._update_stats_display(self.session.snapshot())
         
-        self.view.update_stats_label('Paquetes', f"Paquetes: {self.model.packet_count}")
-        self.view.update_stats_label('Trafico', f"Tráfico: {self.stats.format_size(self.model.total_bytes)}")
-        self.view.update_stats_label('TCP', f"TCP: {self.model.protocol_counts.get('TCP', 0)}")
-        self.view.update_stats_label('UDP', f"UDP: {self.model.protocol_counts.get('UDP', 0)}")
+        # Actualizar solo las IPs que cambiaron desde el último ciclo
+        with instrumentation.stage("ips"):
+            if self.model.ip_sketch is not None:
+                if self._load_ip_sketch():
+                    self._refresh_ip_list()
+            elif self.ip_ranking.update(self.model.ip_counts, self.model.pop_dirty_ips()):
+                self._refresh_ip_list()
         
-        otros = self.stats.calculate_other_protocols(self.model.protocol_counts)
-        self.view.update_stats_label('Otros', f"Otros: {otros}")
+        # Recoger de una vez todos los paquetes acumulados en el buffer
+        if self.session.drain():
+            if self.filtered is not None:
+                with instrumentation.stage("filtro"):
+                    self._update_display_filter()
+            with instrumentation.stage("lista"):
+                self.view.refresh_packet_list()
+            instrumentation.displayed()
+
+        now = time.monotonic()
+        if now - self._last_graph_update >= self.GRAPH_INTERVAL:
+            self._last_graph_update = now
+            with instrumentation.stage("grafica"):
+                self._refresh_throughput()
+                self._refresh_flow_list()
+            if self.diagnostics is not None:
+                self._refresh_diagnostics()
+
+        if self.export_job is not None:
+            self._refresh_export()
+        if self.profiler is not None:
+            self._refresh_profiler()
+
+    def toggle_milliseconds(self):
+        """Cambia la precisión de la columna Hora (y de la exportación CSV)."""
+        enabled = self.view.get_milliseconds()
+        self.store.set_milliseconds(enabled)
+        self.view.set_milliseconds(enabled)
+        self.view.refresh_packet_list()
+
+    def apply_display_filter(self):
+        """Muestra solo los paquetes que cumplen el filtro de visualización."""
+        text = self.view.get_display_filter()
+        if not text:
+            self.remove_display_filter()
+            return
+        started = time.perf_counter()
+        try:
+            filtered = FilteredPackets(self.store, self.packet_index, text,
+                                       self.model.classifier.labels())
+        except DisplayFilterError as e:
+            self.view.show_error("Filtro de visualización", f"Filtro no válido: {e}")
+            return
+        self.filtered = filtered
+        self._show_display_filter((time.perf_counter() - started) * 1000)
+        self.view.set_packet_source(filtered)
+
+    def remove_display_filter(self):
+        """Vuelve a mostrar todos los paquetes del almacén."""
+        if self.filtered is None:
+            return
+        self.filtered = None
+        self.view.update_display_filter(False)
+        self.view.set_packet_source(self.store)
+
+    def _update_display_filter(self):
+        """Añade al filtro activo las coincidencias de los paquetes nuevos."""
+        started = time.perf_counter()
+        self.filtered.update()
+        self._show_display_filter((time.perf_counter() - started) * 1000)
+
+    def _show_display_filter(self, elapsed_ms: float):
+        self.view.update_display_filter(
+            True, f"{self.filtered.total} coincidencias ({elapsed_ms:.1f} ms)"
+        )
+
+    def _refresh_flow_list(self):
+        """Envía a la vista los flujos activos con más bytes."""
+        self.view.update_flow_list([
+            (flow.label(), flow.protocol, flow.packets, self.stats.format_size(flow.bytes))
+            for flow in self.model.flows.top(self.TOP_FLOWS)
+        ])
+
+    def _refresh_throughput(self):
+        """Repinta la gráfica con los últimos segundos completos."""
+        points = self.model.traffic.recent(self.GRAPH_SECONDS + 1)[:-1]
+        values = [size * 8 for _, size, _ in points]
+        if not values:
+            self.view.update_throughput([], "", "")
+            return
+        self.view.update_throughput(
+            values,
+            f"Máx: {self.stats.format_rate(max(values))}",
+            f"Actual: {self.stats.format_rate(values[-1])}"
+        )
 
     def _schedule_ui_update(self):
-        """Programa la siguiente actualización de la interfaz."""
+        """Programa la siguiente actualización de la interfaz.
+
+        Registra la duración de cada ciclo y cuánto se retrasó sobre lo
+        programado (el bucle de Tk estaba ocupado en otra cosa).
+        """
         if not self.view.winfo_exists():
             return
-            
+
+        instrumentation = self.instrumentation
+        started = time.perf_counter_ns()
+        if self._tick_due:
+            instrumentation.record("retraso_tick", max(0, started - self._tick_due))
         try:
-            # Actualizar estadísticas
-            self._update_stats_display()
-            
-            # Actualizar lista de IPs (solo las IPs válidas)
-            ip_counts = {ip: count for ip, count in self.model.ip_counts.items() 
-                       if ip != "N/A" and ip != ""}
-            self.view.update_ip_list(ip_counts)
-            
-            # Procesar cualquier paquete pendiente
-            while not self.model.packet_queue.empty():
-                try:
-                    packet_info = self.model.packet_queue.get_nowait()
-                    if packet_info and len(packet_info) == 7:
-                        self.view.add_packet_to_tree(packet_info)
-                except Exception as e:
-                    print(f"Error procesando paquete pendiente: {e}")
-                    break
-                    
+            self.ui_tick()
         except Exception as e:
             print(f"Error actualizando UI: {e}")
         finally:
+            finished = time.perf_counter_ns()
+            instrumentation.record("tick", finished - started)
             if self.view.winfo_exists():
-                self.view.after(50, self._schedule_ui_update)  # Actualizar más frecuentemente
+                self._tick_due = finished + self.UI_INTERVAL_MS * 1_000_000
+                self.view.after(self.UI_INTERVAL_MS, self._schedule_ui_update)
+
+    def open_diagnostics(self):
+        """Abre (o trae al frente) la ventana de diagnóstico de rendimiento."""
+        if self.diagnostics is not None and self.diagnostics.winfo_exists():
+            self.diagnostics.lift()
+            return
+        self.diagnostics = self.view.open_diagnostics()
+        self.diagnostics.set_callbacks(self.save_diagnostics, self.start_profile)
+        self.diagnostics.protocol("WM_DELETE_WINDOW", self._close_diagnostics)
+        self._refresh_diagnostics()
+        if self.profiler is not None:
+            self.diagnostics.update_profile(self.profiler.running, "Perfilando...")
+
+    def _close_diagnostics(self):
+        self.diagnostics.destroy()
+        self.diagnostics = None
+
+    def _refresh_diagnostics(self):
+        """Envía a la ventana de diagnóstico el resumen de cada etapa."""
+        instrumentation = self.instrumentation
+        sample_every = instrumentation.sample_every
+        buffer = self.model.packet_buffer
+        summary = (
+            f"Muestreo por paquete: {f'1 de cada {sample_every}' if sample_every else 'desactivado'}"
+            f" | Cola: {len(buffer)}/{buffer.capacity}, máximo {buffer.peak}"
+            f" | Marcas de latencia pendientes: {len(instrumentation.marks)}"
+        )
+        rows = []
+        for _, description, stage in instrumentation.rows():
+            unit = stage["unidad"]
+            rows.append((description, stage["muestras"]) + tuple(
+                self._format_stage_value(stage[key], unit) for key in ("media", "p50", "p90", "p99", "max")
+            ))
+        self.diagnostics.update_rows(summary, rows)
+
+    def _format_stage_value(self, value: float, unit: str) -> str:
+        if unit == "ns":
+            return self.stats.format_duration(value)
+        return f"{value:.0f}"
+
+    def save_diagnostics(self):
+        """Guarda en JSON el resumen de la ventana de diagnóstico."""
+        path = self.diagnostics.ask_json_file()
+        if not path:
+            return
+        try:
+            self.session.save_diagnostics(path)
+            self.view.show_info("Diagnóstico", f"Diagnóstico guardado en '{path}'.")
+        except OSError as e:
+            self.view.show_error("Diagnóstico", f"No se pudo guardar el diagnóstico:\n{e}")
+
+    def start_profile(self):
+        """Lanza un perfil por muestreo de todos los hilos durante los segundos indicados."""
+        if self.profiler is not None:
+            return
+        try:
+            seconds = float(self.diagnostics.get_profile_seconds())
+            if seconds <= 0:
+                raise ValueError(seconds)
+        except ValueError:
+            self.view.show_error("Perfilar", "La duración debe ser un número de segundos positivo.")
+            return
+        self.profiler = SamplingProfiler(seconds)
+        self.profiler.start()
+        self.diagnostics.update_profile(True, f"Perfilando {seconds:g} s...")
+
+    def _refresh_profiler(self):
+        """Al terminar el perfil, informa del fichero generado."""
+        profiler = self.profiler
+        if not profiler.finished:
+            return
+        self.profiler = None
+        if profiler.error is not None:
+            text = f"Error en el perfil: {profiler.error}"
+        else:
+            text = f"Perfil guardado en '{profiler.result}'"
+        if self.diagnostics is not None:
+            self.diagnostics.update_profile(False, text)
+        else:
+            self.view.show_info("Perfilar", text)
+
+    def open_sessions(self):
+        """Abre (o trae al frente) la ventana de sesiones guardadas."""
+        if self.sessions is not None and self.sessions.winfo_exists():
+            self.sessions.lift()
+            return
+        self.sessions = self.view.open_sessions(self.session_store.path)
+        self.sessions.set_callbacks(
+            self.load_session, self.generate_session_pdf, self.generate_session_csv, self._refresh_sessions
+        )
+        self.sessions.protocol("WM_DELETE_WINDOW", self._close_sessions)
+        self._refresh_sessions()
+
+    def _close_sessions(self):
+        self.sessions.destroy()
+        self.sessions = None
+
+    def _refresh_sessions(self):
+        """Vuelve a leer la lista de sesiones de la base."""
+        try:
+            sessions = self.session_store.sessions()
+        except Exception as e:
+            self.view.show_error("Sesiones guardadas", f"No se pudo leer la base de sesiones:\n{e}")
+            return
+        stats = self.stats
+        self.sessions.update_rows([
+            (info.id, time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(info.start)),
+             stats.format_elapsed(info.duration), info.origin, info.mode, info.packets,
+             stats.format_size(info.bytes), info.sampling or "-")
+            for info in sessions
+        ], pdf_available())
+
+    def load_session(self) -> bool:
+        """Abre en la ventana principal la sesión seleccionada. Devuelve True si se cargó."""
+        session_id = self.sessions.get_selected()
+        if session_id is None:
+            self.view.show_info("Sesiones guardadas", "Selecciona una sesión.")
+            return False
+        loaded = self.session.loaded_session
+        if loaded is not None and loaded.id == session_id:
+            return True
+        if not self.session.is_idle:
+            self.view.show_warning("Sesiones guardadas", "Detén la captura antes de abrir una sesión.")
+            return False
+        if self._export_running("Sesiones guardadas"):
+            return False
+        if loaded is None and self.session.snapshot().packets and not self.view.ask_yes_no(
+                "Sesiones guardadas",
+                "Abrir la sesión descarta los datos de la captura actual, incluida la lista "
+                "de paquetes. ¿Continuar?"):
+            return False
+        try:
+            self.session_store.restore(session_id, self.session)
+        except Exception as e:
+            self.view.show_error("Sesiones guardadas", f"No se pudo abrir la sesión {session_id}:\n{e}")
+            return False
+        self.ip_ranking.clear()
+        self.view.clear_ip_list()
+        if self.filtered is not None:
+            self._update_display_filter()
+        self.view.refresh_packet_list()
+        self._refresh_throughput()
+        self._refresh_flow_list()
+        snapshot = self.session.snapshot()
+        self._update_stats_display(snapshot)
+        self.view.update_stats_label('Tiempo', f"Tiempo: {self.stats.format_elapsed(snapshot.elapsed())}")
+        return True
+
+    def generate_session_pdf(self):
+        """Genera el reporte PDF de la sesión seleccionada, sin abrirla en la ventana."""
+        self._write_session_reports("Reporte PDF", [
+            lambda session_id: write_session_pdf_report(
+                self.session_store, session_id, f"reporte_sesion_{session_id}.pdf")
+        ])
+
+    def generate_session_csv(self):
+        """Genera los CSV de agregados por segundo y de flujos de la sesión seleccionada."""
+        self._write_session_reports("Reportes CSV", [
+            lambda session_id: write_session_traffic_csv_report(
+                self.session_store, session_id, f"reporte_sesion_{session_id}_trafico.csv"),
+            lambda session_id: write_session_flow_csv_report(
+                self.session_store, session_id, f"reporte_sesion_{session_id}_flujos.csv"),
+        ])
+
+    def _write_session_reports(self, title: str, writers):
+        """Escribe los reportes de la sesión seleccionada e informa de los ficheros."""
+        session_id = self.sessions.get_selected()
+        if session_id is None:
+            self.view.show_info(title, "Selecciona una sesión.")
+            return
+        try:
+            self.session_store.session(session_id)
+            names = [writer(session_id) for writer in writers]
+        except Exception as e:
+            self.view.show_error(f"Error {title}", f"No se pudo generar el reporte:\n{e}")
+            return
+        if len(names) == 1:
+            message = f"El reporte '{names[0]}' ha sido generado exitosamente."
+        else:
+            message = f"Los reportes {' y '.join(f'{name!r}' for name in names)} han sido generados exitosamente."
+        self.view.show_info("Reporte Generado", message)
+
+    def close(self):
+        """Detiene la captura y guarda lo pendiente en la base de sesiones (al salir)."""
+        self.session.stop()
+        self.session.wait_idle()
+        self.session.drain()
+        self.session.close_recorder()
 
     def generate_pdf_report(self):
         """Genera un reporte en PDF de las estadísticas actuales."""
         if self.is_capturing:
             self.view.show_warning("Reporte PDF", "Detén la captura antes de generar el reporte.")
             return
-        if not self.model.packet_count:
+        if not self.session.snapshot().packets:
             self.view.show_info("Reporte PDF", "No hay datos capturados para generar el reporte.")
             return
 
         try:
-            pdf = FPDF()
-            pdf.add_page()
-            pdf.set_font('Arial', 'B', 16)
-            pdf.cell(0, 10, 'Reporte de Monitoreo de Red', ln=True, align='C')
-            pdf.ln(10)
-
-            # Estadísticas generales
-            pdf.set_font('Arial', 'B', 12)
-            pdf.cell(0, 10, 'Resumen Estadístico', ln=True)
-            pdf.set_font('Arial', '', 10)
-            
-            stats = [
-                f"Tiempo: {self.stats.get_elapsed_time()}",
-                f"Paquetes Totales: {self.model.packet_count}",
-                f"Tráfico Total: {self.stats.format_size(self.model.total_bytes)}"
-            ]
-            
-            for stat in stats:
-                pdf.cell(0, 7, stat, ln=True)
-            
-            # Protocolos
-            pdf.ln(5)
-            pdf.set_font('Arial', 'B', 12)
-            pdf.cell(0, 10, 'Distribución por Protocolo', ln=True)
-            pdf.set_font('Arial', '', 10)
-            
-            for proto, count in sorted(
-                self.model.protocol_counts.items(),
-                key=lambda x: x[1],
-                reverse=True
-            ):
-                if count > 0:
-                    pdf.cell(0, 7, f"- {proto}: {count}", ln=True)
-
-            # Top IPs
-            pdf.ln(5)
-            pdf.set_font('Arial', 'B', 12)
-            pdf.cell(0, 10, 'Top 20 Direcciones IP', ln=True)
-            pdf.set_font('Arial', '', 10)
-            
-            for i, (ip, count) in enumerate(
-                sorted(self.model.ip_counts.items(),
-                key=lambda x: x[1],
-                reverse=True)[:20]
-            ):
-                pdf.cell(0, 7, f"- {ip}: {count} paquetes", ln=True)
-
-            filename = 'reporte_monitoreo.pdf'
-            pdf.output(filename)
+            filename = write_pdf_report(self.session)
             self.view.show_info(
                 "Reporte Generado",
                 f"El reporte '{filename}' ha sido generado exitosamente."
@@ -224,38 +707,65 @@ class NetworkController:
                 f"No se pudo generar el reporte PDF:\n{e}"
             )
 
-    def generate_csv_report(self):
-        """Genera un reporte CSV con los datos de paquetes capturados."""
-        if self.is_capturing:
-            self.view.show_warning(
-                "Reporte CSV",
-                "Detén la captura antes de generar el reporte."
-            )
+    def generate_csv_report(self, compress: bool = False):
+        """Genera en segundo plano un reporte CSV con los paquetes capturados."""
+        if not self._can_export("Reporte CSV"):
             return
-            
-        if not self.view.packet_tree.get_children():
-            self.view.show_info(
-                "Reporte CSV",
-                "No hay paquetes capturados para exportar."
-            )
+        filename = 'reporte_paquetes.csv.gz' if compress else 'reporte_paquetes.csv'
+
+        def writer(progress):
+            packets = write_csv_report(self.session, filename, progress)
+            flows = write_flow_csv_report(self.session)
+            return f"Los reportes '{packets}' y '{flows}' han sido generados exitosamente."
+
+        self._start_export("Reporte CSV", writer)
+
+    def export_npz(self):
+        """Exporta en segundo plano las columnas de paquetes en formato NumPy .npz."""
+        if not self._can_export("Exportar Columnas"):
             return
 
-        try:
-            filename = 'reporte_paquetes.csv'
-            with open(filename, mode='w', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                writer.writerow(self.view.packet_tree['columns'])
-                
-                for item_id in self.view.packet_tree.get_children():
-                    writer.writerow(self.view.packet_tree.item(item_id)['values'])
-                    
-            self.view.show_info(
-                "Reporte Generado",
-                f"El reporte '{filename}' ha sido generado exitosamente."
-            )
+        def writer(progress):
+            filename = write_npz_report(self.session, progress=progress)
+            return f"El fichero '{filename}' ha sido generado exitosamente."
 
-        except Exception as e:
-            self.view.show_error(
-                "Error Reporte CSV",
-                f"No se pudo generar el reporte CSV:\n{e}"
-            )
\ No newline at end of file
+        self._start_export("Exportar Columnas", writer)
+
+    def _can_export(self, title: str) -> bool:
+        """Comprueba que se puede iniciar una exportación de paquetes."""
+        if self.is_capturing:
+            self.view.show_warning(title, "Detén la captura antes de generar el reporte.")
+            return False
+        if self._export_running(title):
+            return False
+        if not len(self.store):
+            self.view.show_info(title, "No hay paquetes capturados para exportar.")
+            return False
+        return True
+
+    def _export_running(self, title: str) -> bool:
+        """Avisa si hay una exportación en curso (el almacén no debe cambiar)."""
+        if self.export_job is not None and self.export_job.running:
+            self.view.show_warning(title, "Espera a que termine la exportación en curso.")
+            return True
+        return False
+
+    def _start_export(self, title: str, writer):
+        """Lanza la exportación en un hilo; ui_tick muestra su progreso."""
+        self.export_job = ExportJob(title, writer)
+        self.export_job.start()
+        self.view.update_export_progress(f"{title}: 0%")
+
+    def _refresh_export(self):
+        """Actualiza el progreso y, al terminar, informa del resultado."""
+        job = self.export_job
+        if not job.finished:
+            fraction = job.fraction()
+            self.view.update_export_progress(f"{job.label}: {fraction:.0%}", fraction)
+            return
+        self.export_job = None
+        self.view.update_export_progress("")
+        if job.error is not None:
+            self.view.show_error(f"Error {job.label}", f"No se pudo generar el reporte:\n{job.error}")
+        else:
+            self.view.show_info("Reporte Generado", job.result)
\ No newline at end of file
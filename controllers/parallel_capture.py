@@ -0,0 +1,412 @@
+import heapq
+import multiprocessing
+import queue
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence
+
+from models.flow_table import Flow
+from models.frame_ring import FrameRing
+from models.instrumentation import Instrumentation
+from models.packet_sampler import flow_hash
+from models.protocol_classifier import ProtocolClassifier
+
+# Casillas por anillo y bytes copiados de cada trama
+RING_SLOTS = 16384
+RING_SNAPLEN = 256
+
+# Periodo con el que cada proceso envía sus contadores acumulados
+REPORT_INTERVAL = 0.2
+
+# Flujos activos que envía cada proceso en cada informe (para el top)
+TOP_FLOWS_PER_SHARD = 50
+
+# Flujos terminados retenidos tras la fusión, como FlowTable.keep_finished
+KEEP_FINISHED = 10000
+
+# Etapas que miden los procesos; el encolado se mide en el hilo de captura
+WORKER_STAGES = ("decodificacion", "clasificacion", "conteo")
+
+def flow_shard(frame: bytes, shards: int) -> int:
+    """Elige el proceso de una trama con un hash simétrico de su 5-tupla.
+
+    Los dos sentidos de una conversación IPv4 TCP/UDP van al mismo proceso,
+    de modo que cada flujo vive en una sola tabla. El resto de tramas
+    (IPv6, VLAN, ARP, fragmentos) se reparte por el par de direcciones MAC.
+    """
+    return flow_hash(frame) % shards
+
+
+class _TrafficDeltas:
+    """Sustituye a TrafficSeries en los procesos: acumula el tráfico por
+    (segundo, protocolo) desde el último informe, con los pesos de
+    muestreo ya aplicados, para sumarlo a la serie del proceso principal."""
+
+    def __init__(self):
+        self.clear()
+
+    def add(self, timestamp: float, protocol: str, size: int, packets: int = 1) -> None:
+        if self.first_time is None or timestamp < self.first_time:
+            self.first_time = timestamp
+        if self.last_time is None or timestamp > self.last_time:
+            self.last_time = timestamp
+        key = (int(timestamp), protocol)
+        slot = self.slots.get(key)
+        if slot is None:
+            self.slots[key] = [size, packets]
+        else:
+            slot[0] += size
+            slot[1] += packets
+
+    def clear(self) -> None:
+        # (segundo, protocolo) -> [bytes, paquetes]
+        self.slots: Dict = {}
+        self.first_time: Optional[float] = None
+        self.last_time: Optional[float] = None
+
+
+def _worker_main(shard: int, ring_name: str, slots: int, snaplen: int, results,
+                 stop_event, ready, forward_packets: bool,
+                 classifier: Optional[ProtocolClassifier] = None, sample_every: int = 0,
+                 interfaces: Sequence[str] = ("",), weighted_flows: bool = True) -> None:
+    """Proceso de decodificación: vacía su anillo y actualiza su parte de los contadores.
+
+    ``interfaces`` traduce el índice de interfaz de cada casilla a su nombre
+    y ``weighted_flows`` es PacketModel.weighted_flows del proceso principal.
+    Envía los registros de cada lote (si ``forward_packets``) y, cada
+    REPORT_INTERVAL, los incrementos de sus contadores y, con
+    ``sample_every``, los histogramas de sus etapas.
+    """
+    from models.packet_model import PacketModel
+
+    ring = FrameRing(slots, snaplen, name=ring_name)
+    model = PacketModel(
+        classifier=classifier,
+        instrumentation=Instrumentation(sample_every) if sample_every else None
+    )
+    model.traffic = _TrafficDeltas()
+    model.weighted_flows = weighted_flows
+    process = model.process_raw
+    next_report = time.monotonic() + REPORT_INTERVAL
+    ready.release()
+    try:
+        while True:
+            stopping = stop_event.is_set()
+            batch = ring.get_batch()
+            if batch:
+                for timestamp, size, interface, weight, frame in batch:
+                    process(frame, timestamp, size, interfaces[interface], weight)
+                records = model.packet_buffer.drain()
+                if forward_packets:
+                    results.put(("registros", shard, records))
+            elif stopping:
+                results.put(("final", shard, _take_counters(model, final=True)))
+                break
+            else:
+                time.sleep(0.001)
+            now = time.monotonic()
+            if now >= next_report:
+                results.put(("contadores", shard, _take_counters(model, final=False)))
+                next_report = now + REPORT_INTERVAL
+    finally:
+        ring.close()
+
+
+def _take_counters(model, final: bool) -> Dict:
+    """Extrae los incrementos de los contadores del proceso y los reinicia."""
+    flows = model.flows
+    finished = list(flows.finished)
+    flows.finished.clear()
+    counts = model.counters.snapshot()
+    probe = model.probe
+    traffic = model.traffic
+    payload = {
+        "paquetes": counts.packets,
+        "bytes": counts.bytes,
+        "protocolos": dict(counts.protocols),
+        "transportes": dict(counts.transports),
+        "errores": counts.errors,
+        "ips": dict(model.ip_counts),
+        "trafico": [(second, protocol, size, packets)
+                    for (second, protocol), (size, packets) in traffic.slots.items()],
+        "primera": traffic.first_time,
+        "ultima": traffic.last_time,
+        "descartados": model.packet_buffer.dropped,
+        "flujos_activos": flows.snapshot() if final else flows.top(TOP_FLOWS_PER_SHARD),
+        "flujos_terminados": finished,
+        "num_flujos": len(flows),
+        "flujos_creados": flows.created,
+        "flujos_expirados": flows.expired,
+        "flujos_desalojados": flows.evicted,
+        "etapas": probe.instrumentation.take(WORKER_STAGES) if probe is not None else {},
+    }
+    model.counters.clear()
+    model.ip_counts.clear()
+    model.ip_dirty.clear()
+    model.packet_buffer.dropped = 0
+    traffic.clear()
+    return payload
+
+
+class ShardedFlows:
+    """Vista de solo lectura de las tablas de flujos de todos los procesos.
+
+    Ofrece la misma interfaz de lectura que FlowTable (``top``,
+    ``snapshot``, ``finished``, ``len``) para la interfaz y los reportes.
+    Durante la captura cada proceso envía solo sus flujos más activos; al
+    terminar envía la tabla completa.
+    """
+
+    def __init__(self, shards: int):
+        self._active: List[List[Flow]] = [[] for _ in range(shards)]
+        self._counts = [0] * shards
+        self.finished: Deque[Flow] = deque(maxlen=KEEP_FINISHED)
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return sum(self._counts)
+
+    def update(self, shard: int, payload: Dict) -> None:
+        self._active[shard] = payload["flujos_activos"]
+        self._counts[shard] = payload["num_flujos"]
+        self.finished.extend(payload["flujos_terminados"])
+
+    def set_totals(self, created: int, expired: int, evicted: int) -> None:
+        self.created, self.expired, self.evicted = created, expired, evicted
+
+    def snapshot(self) -> List[Flow]:
+        return [flow for flows in self._active for flow in flows]
+
+    def top(self, count: int, finished: bool = False) -> List[Flow]:
+        flows = self.snapshot()
+        if finished:
+            flows.extend(self.finished)
+        return heapq.nlargest(count, flows, key=lambda flow: flow.bytes_fwd + flow.bytes_rev)
+
+    def clear(self) -> None:
+        self.__init__(len(self._active))
+
+
+class ParallelPipeline:
+    """Reparte las tramas crudas entre procesos y fusiona sus contadores.
+
+    El hilo de captura llama a ``submit`` con cada trama, que se copia al
+    anillo en memoria compartida del proceso elegido por ``flow_shard``.
+    Cada proceso decodifica con PacketModel.process_raw y mantiene su parte
+    de los contadores de protocolos, IPs y flujos. ``merge`` (llamado desde
+    CaptureSession.drain) suma los incrementos recibidos al modelo principal,
+    que la interfaz y los reportes leen como siempre.
+    """
+
+    # Espera máxima a que los procesos terminen de arrancar
+    START_TIMEOUT = 30.0
+
+    def __init__(self, workers: int, forward_packets: bool = True, lossless: bool = False,
+                 slots: int = RING_SLOTS, snaplen: int = RING_SNAPLEN,
+                 classifier: Optional[ProtocolClassifier] = None,
+                 instrumentation: Optional[Instrumentation] = None,
+                 interfaces: Sequence[str] = ("",), weighted_flows: bool = True):
+        """``interfaces`` son los nombres de las interfaces (o el fichero) de
+        la captura, en el orden de los índices que recibe ``submit``.
+        ``weighted_flows`` es False con muestreo por flujo (los flujos
+        conservados están completos y no se escalan).
+        Con ``lossless`` (ficheros) ``submit`` espera cuando un anillo está
+        lleno; sin él (captura en vivo) la trama se descarta y se cuenta.
+        Con ``instrumentation`` se mide el encolado en el hilo de captura y
+        cada proceso muestrea sus etapas con el mismo intervalo."""
+        self.workers = workers
+        self.instrumentation = instrumentation
+        self._probe = instrumentation.probe() if instrumentation is not None else None
+        sample_every = instrumentation.sample_every if self._probe is not None else 0
+        self.forward_packets = forward_packets
+        self.lossless = lossless
+        context = multiprocessing.get_context("spawn")
+        self._results = context.Queue()
+        self._stop = context.Event()
+        self._ready = context.Semaphore(0)
+        self._rings: List[FrameRing] = []
+        try:
+            for _ in range(workers):
+                self._rings.append(FrameRing(slots, snaplen))
+        except Exception:
+            # No dejar segmentos de memoria compartida huérfanos
+            for ring in self._rings:
+                ring.close()
+                ring.unlink()
+            raise
+        self._processes = [
+            context.Process(
+                target=_worker_main,
+                args=(shard, ring.name, slots, snaplen, self._results, self._stop, self._ready,
+                      forward_packets, classifier, sample_every, tuple(interfaces),
+                      weighted_flows),
+                name=f"decodificador-{shard}",
+                daemon=True
+            )
+            for shard, ring in enumerate(self._rings)
+        ]
+        self.flows = ShardedFlows(workers)
+        self._flow_totals = [(0, 0, 0)] * workers
+        self._finals = 0
+        self._closed = False
+        self.dropped = 0
+        self._merged_dropped = 0
+        self.submitted = 0
+        # Registros pasados al almacén (posición para la latencia de visualización)
+        self.stored = 0
+
+    def start(self) -> None:
+        for process in self._processes:
+            process.start()
+
+    def wait_ready(self) -> bool:
+        """Espera a que todos los procesos estén leyendo su anillo (hilo de captura).
+
+        Devuelve False si no arrancan a tiempo o si se llama a ``finish``
+        durante la espera.
+        """
+        deadline = time.monotonic() + self.START_TIMEOUT
+        pending = self.workers
+        while pending:
+            if self._stop.is_set():
+                return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if self._ready.acquire(timeout=min(remaining, 0.1)):
+                pending -= 1
+        return True
+
+    def submit(self, frame: bytes, timestamp: Optional[float], size: Optional[int] = None,
+               interface: int = 0, weight: int = 1) -> None:
+        """Entrega una trama al proceso de su flujo (hilo de captura).
+
+        ``size`` es la longitud original si la trama llega recortada,
+        ``interface`` el índice de su interfaz en ``interfaces`` y
+        ``weight`` su peso de muestreo.
+        """
+        if self._closed:
+            return
+        probe = self._probe
+        if probe is not None and probe.due():
+            started = time.perf_counter_ns()
+            if self._put(frame, timestamp, size, interface, weight):
+                probe.record("encolado", time.perf_counter_ns() - started)
+                probe.mark(self.submitted, started)
+            return
+        self._put(frame, timestamp, size, interface, weight)
+
+    def _put(self, frame: bytes, timestamp: Optional[float], size: Optional[int],
+             interface: int, weight: int) -> bool:
+        ring = self._rings[flow_shard(frame, self.workers)]
+        if timestamp is None:
+            timestamp = time.time()
+        while not ring.put(frame, timestamp, size, interface, weight):
+            if not self.lossless or self._stop.is_set():
+                self.dropped += 1
+                return False
+            time.sleep(0.0005)
+        self.submitted += 1
+        return True
+
+    def backlog(self) -> float:
+        """Ocupación del anillo más lleno (0-1), para el muestreo adaptativo."""
+        if self._closed:
+            return 0.0
+        return max(len(ring) for ring in self._rings) / self._rings[0].slots
+
+    def finish(self) -> None:
+        """Pide a los procesos que terminen tras vaciar sus anillos."""
+        self._stop.set()
+
+    @property
+    def done(self) -> bool:
+        return self._closed
+
+    def merge(self, model, store, timeout: float = 0.0) -> int:
+        """Fusiona los informes recibidos. Devuelve cuántos paquetes pasaron al almacén.
+
+        Con ``timeout`` espera hasta ese tiempo a que lleguen los informes
+        finales de todos los procesos.
+        """
+        deadline = time.monotonic() + timeout
+        stored = 0
+        while not self._closed:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    kind, shard, payload = self._results.get(timeout=remaining)
+                else:
+                    kind, shard, payload = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "registros":
+                store.append_many(payload)
+                stored += len(payload)
+                self.stored += len(payload)
+                continue
+            self._merge_counters(model, shard, payload)
+            if kind == "final":
+                self._finals += 1
+                if self._finals == self.workers:
+                    self._close()
+
+        # Las tramas descartadas por anillos llenos cuentan como descartes del buffer
+        dropped = self.dropped
+        model.packet_buffer.dropped += dropped - self._merged_dropped
+        self._merged_dropped = dropped
+        return stored
+
+    def _merge_counters(self, model, shard: int, payload: Dict) -> None:
+        model.counters.merge(
+            payload["paquetes"], payload["bytes"], payload["protocolos"], payload["transportes"],
+            payload["errores"]
+        )
+        ip_counts = model.ip_counts
+        dirty = model.ip_dirty
+        for ip, count in payload["ips"].items():
+            ip_counts[ip] = ip_counts.get(ip, 0) + count
+            dirty.add(ip)
+        if model.ip_unsaved is not None:
+            model.ip_unsaved.update(payload["ips"])
+        # Los agregados van por segundo entero; los instantes exactos de la
+        # primera y la última trama se fijan aparte
+        traffic = model.traffic
+        first = payload["primera"]
+        if first is not None and (traffic.first_time is None or first < traffic.first_time):
+            traffic.first_time = first
+        for second, protocol, size, packets in payload["trafico"]:
+            traffic.add(second, protocol, size, packets)
+        if payload["ultima"] is not None:
+            traffic.last_time = max(traffic.last_time, payload["ultima"])
+        model.packet_buffer.dropped += payload["descartados"]
+        if self.instrumentation is not None:
+            self.instrumentation.merge(payload["etapas"])
+
+        self.flows.update(shard, payload)
+        self._flow_totals[shard] = (
+            payload["flujos_creados"], payload["flujos_expirados"], payload["flujos_desalojados"]
+        )
+        self.flows.set_totals(*(sum(values) for values in zip(*self._flow_totals)))
+
+    def _close(self) -> None:
+        self._closed = True
+        for process in self._processes:
+            # Si start() falló a medias, algunos procesos no llegaron a arrancar
+            if process.pid is not None:
+                process.join(timeout=1.0)
+        for ring in self._rings:
+            ring.close()
+            ring.unlink()
+
+    def terminate(self) -> None:
+        """Detiene los procesos sin esperar sus informes (al cerrar la aplicación)."""
+        if self._closed:
+            return
+        self._stop.set()
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+        self._close()
@@ -0,0 +1,220 @@
+import os
+import struct
+import threading
+import time
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+# Cabecera global pcap (microsegundos, Ethernet) y cabecera de cada registro
+_pcap_header = struct.Struct("<IHHiIII")
+_record_header = struct.Struct("<IIII")
+PCAP_MAGIC = 0xA1B2C3D4
+LINKTYPE_ETHERNET = 1
+PCAP_SNAPLEN = 65535
+
+# Prefijo de los ficheros del spool; la retención solo borra ficheros con él
+SPOOL_PREFIX = "spool_"
+
+# (marca de tiempo, trama, longitud original)
+SpoolFrame = Tuple[float, bytes, int]
+
+
+class PcapSpool:
+    """Escritura continua de las tramas capturadas en ficheros pcap rotativos.
+
+    El hilo de captura solo añade cada trama a una cola acotada con
+    ``offer`` (O(1), sin E/S); un hilo escritor propio la vacía cada
+    FLUSH_INTERVAL y escribe los registros en bloque. Si la cola se llena
+    o el disco falla, las tramas se descartan y se cuentan en ``dropped``,
+    sin frenar nunca la captura.
+
+    Se pasa a un fichero nuevo al superar ``max_file_bytes`` o tras
+    ``rotate_seconds`` (0 = solo por tamaño), y se conservan como mucho
+    ``max_files`` ficheros en el directorio (los más antiguos se borran,
+    incluidos los de capturas anteriores).
+    """
+
+    FLUSH_INTERVAL = 0.2
+    # Buffer del fichero abierto; las escrituras de cada lote van juntas
+    WRITE_BUFFER = 1 << 20
+
+    def __init__(self, directory: str, max_file_bytes: int = 100 * 1024 * 1024,
+                 rotate_seconds: float = 3600.0, max_files: int = 10,
+                 queue_capacity: int = 65536):
+        if max_files < 1:
+            raise ValueError("max_files debe ser al menos 1")
+        self.directory = directory
+        self.max_file_bytes = max_file_bytes
+        self.rotate_seconds = rotate_seconds
+        self.max_files = max_files
+        self.queue_capacity = queue_capacity
+        self._queue: Deque[SpoolFrame] = deque()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+        self._file_bytes = 0
+        self._file_opened = 0.0
+        self._sequence = 0
+        self._files: Deque[Tuple[str, int]] = deque()
+        self.dropped = 0
+        self.written = 0
+        self.spool_bytes = 0
+        self.error: Optional[str] = None
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def current_file(self) -> Optional[str]:
+        return self._files[-1][0] if self._file is not None and self._files else None
+
+    def files(self) -> List[str]:
+        """Ficheros retenidos, del más antiguo al más reciente."""
+        return [path for path, _ in list(self._files)]
+
+    def start(self) -> None:
+        """Arranca el hilo escritor (al iniciar una captura en vivo)."""
+        if self.active:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._scan_existing()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="spool-pcap", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Escribe lo pendiente, cierra el fichero y detiene el hilo escritor."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def offer(self, frame: bytes, timestamp: Optional[float], length: Optional[int] = None) -> bool:
+        """Encola una trama para escribirla (hilo de captura). False si se descartó."""
+        if len(self._queue) >= self.queue_capacity:
+            self.dropped += 1
+            return False
+        self._queue.append((
+            timestamp if timestamp is not None else time.time(),
+            frame,
+            length if length is not None else len(frame)
+        ))
+        return True
+
+    def _scan_existing(self) -> None:
+        """Incorpora a la retención los ficheros de spool de capturas anteriores."""
+        names = sorted(name for name in os.listdir(self.directory)
+                       if name.startswith(SPOOL_PREFIX) and name.endswith(".pcap"))
+        self._files = deque()
+        self.spool_bytes = 0
+        for name in names:
+            path = os.path.join(self.directory, name)
+            size = os.path.getsize(path)
+            self._files.append((path, size))
+            self.spool_bytes += size
+        self._enforce_retention(reserve=1)
+
+    def _run(self) -> None:
+        try:
+            while True:
+                stopping = self._stop.wait(self.FLUSH_INTERVAL)
+                self._flush()
+                if stopping:
+                    break
+        finally:
+            self._close_file()
+
+    def _flush(self) -> None:
+        """Vacía la cola y la escribe en bloques, rotando cuando corresponde."""
+        queue = self._queue
+        if not queue:
+            if self._file is not None and self._rotation_due(0, 0):
+                self._close_file()
+            return
+        pack = _record_header.pack
+        chunk = bytearray()
+        count = 0
+        while queue:
+            timestamp, frame, length = queue.popleft()
+            size = _record_header.size + len(frame)
+            if self._file is None or self._rotation_due(len(chunk), size):
+                self._write(chunk, count)
+                chunk = bytearray()
+                count = 0
+                self._rotate()
+            seconds = int(timestamp)
+            chunk += pack(seconds, int((timestamp - seconds) * 1_000_000), len(frame), length)
+            chunk += frame
+            count += 1
+        self._write(chunk, count)
+
+    def _rotation_due(self, pending: int, incoming: int) -> bool:
+        """Indica si hay que cambiar de fichero antes de añadir ``incoming`` bytes.
+
+        ``pending`` son los bytes del lote aún sin escribir; un fichero sin
+        registros no se rota por tamaño, para admitir tramas muy grandes.
+        """
+        content = self._file_bytes + pending
+        if content + incoming > self.max_file_bytes and content > _pcap_header.size:
+            return True
+        return bool(self.rotate_seconds) and time.monotonic() - self._file_opened >= self.rotate_seconds
+
+    def _write(self, chunk: bytearray, count: int) -> None:
+        """Escribe un bloque de ``count`` registros; si falla, se cuentan como descartados."""
+        if not count:
+            return
+        if self._file is None:
+            self.dropped += count
+            return
+        try:
+            self._file.write(chunk)
+        except OSError as e:
+            self.error = str(e)
+            self.dropped += count
+            return
+        self._file_bytes += len(chunk)
+        self.spool_bytes += len(chunk)
+        path, _ = self._files[-1]
+        self._files[-1] = (path, self._file_bytes)
+        self.written += count
+
+    def _rotate(self) -> None:
+        """Cierra el fichero actual y abre el siguiente con su cabecera pcap."""
+        self._close_file()
+        self._enforce_retention(reserve=1)
+        stamp = time.strftime('%Y%m%d_%H%M%S')
+        while True:
+            self._sequence += 1
+            path = os.path.join(self.directory, f"{SPOOL_PREFIX}{stamp}_{self._sequence:04d}.pcap")
+            if not os.path.exists(path):
+                break
+        try:
+            self._file = open(path, "wb", buffering=self.WRITE_BUFFER)
+            self._file.write(_pcap_header.pack(PCAP_MAGIC, 2, 4, 0, 0, PCAP_SNAPLEN, LINKTYPE_ETHERNET))
+        except OSError as e:
+            self.error = str(e)
+            self._file = None
+            return
+        self._file_bytes = _pcap_header.size
+        self._file_opened = time.monotonic()
+        self._files.append((path, self._file_bytes))
+        self.spool_bytes += self._file_bytes
+
+    def _close_file(self) -> None:
+        if self._file is None:
+            return
+        try:
+            self._file.close()
+        except OSError as e:
+            self.error = str(e)
+        self._file = None
+
+    def _enforce_retention(self, reserve: int = 0) -> None:
+        """Borra los ficheros más antiguos para dejar sitio a ``reserve`` nuevos."""
+        while self._files and len(self._files) + reserve > self.max_files:
+            path, size = self._files.popleft()
+            self.spool_bytes -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,123 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+
+class SamplingProfiler:
+    """Perfil por muestreo de todos los hilos durante unos segundos.
+
+    Un hilo propio lee cada INTERVAL las pilas de todos los hilos con
+    ``sys._current_frames()``: el de captura, el de la interfaz y los de
+    exportación, sin instrumentar cada llamada (cProfile además solo ve el
+    hilo que lo activa). Las muestras son de tiempo real, así que un hilo
+    esperando en select o en el bucle de Tk también aparece, en la función
+    donde espera.
+
+    Al terminar escribe ``perfil_<fecha>.txt`` con las funciones con más
+    muestras de cada hilo (propias y acumuladas) y ``perfil_<fecha>.folded``
+    con las pilas plegadas (``hilo;f1;f2 N``), el formato de entrada
+    habitual de los flamegraphs. Como ExportJob, la interfaz consulta
+    ``finished``, ``result`` y ``error`` desde su ciclo de actualización.
+    """
+
+    INTERVAL = 0.005
+    # Funciones listadas por hilo en el informe de texto
+    TOP_FUNCTIONS = 25
+
+    def __init__(self, seconds: float, directory: str = "."):
+        self.seconds = seconds
+        self.directory = directory
+        self.samples = 0
+        self.elapsed = 0.0
+        self.result: Optional[str] = None
+        self.error: Optional[Exception] = None
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="perfilador", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Termina antes de tiempo; el informe se escribe con lo muestreado."""
+        self._stop.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que termine. Devuelve True si terminó."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.finished
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def finished(self) -> bool:
+        """True cuando el hilo terminó (con informe o con error)."""
+        return self._thread is not None and not self._thread.is_alive()
+
+    def _run(self) -> None:
+        try:
+            started = time.monotonic()
+            deadline = started + self.seconds
+            while not self._stop.wait(self.INTERVAL) and time.monotonic() < deadline:
+                self._sample()
+            self.elapsed = time.monotonic() - started
+            self.result = self._write()
+        except Exception as e:
+            self.error = e
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.reverse()
+            self._stacks[(names.get(ident, str(ident)),) + tuple(stack)] += 1
+        self.samples += 1
+
+    def _write(self) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, f"perfil_{time.strftime('%Y%m%d_%H%M%S')}")
+        with open(base + ".folded", "w", encoding="utf-8") as handle:
+            for stack, count in self._stacks.most_common():
+                handle.write(f"{';'.join(stack)} {count}\n")
+        with open(base + ".txt", "w", encoding="utf-8") as handle:
+            handle.write(self.report())
+        return base + ".txt"
+
+    def report(self) -> str:
+        """Informe de texto: por hilo, funciones con más muestras propias y acumuladas."""
+        threads: Dict[str, Tuple[Counter, Counter, int]] = {}
+        for (thread, *stack), count in self._stacks.items():
+            own, cumulative, total = threads.get(thread, (Counter(), Counter(), 0))
+            if stack:
+                own[stack[-1]] += count
+            for function in set(stack):
+                cumulative[function] += count
+            threads[thread] = (own, cumulative, total + count)
+
+        lines = [
+            f"Perfil por muestreo: {self.samples} muestras en {self.elapsed:.1f} s "
+            f"(intervalo de {self.INTERVAL * 1000:.0f} ms)",
+            "",
+        ]
+        for thread, (own, cumulative, total) in sorted(threads.items(), key=lambda item: -item[1][2]):
+            lines.append(f"== Hilo '{thread}' ({total} muestras)")
+            for title, counter in (("Propias", own), ("Acumuladas", cumulative)):
+                lines.append(f"  {title}:")
+                for function, count in counter.most_common(self.TOP_FUNCTIONS):
+                    lines.append(f"    {count / total:6.1%} {count:7d}  {function}")
+            lines.append("")
+        return "\n".join(lines)
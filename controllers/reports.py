@@ -0,0 +1,300 @@
+import csv
+import gzip
+import importlib.util
+import struct
+import sys
+import time
+import zipfile
+from typing import Callable, Optional
+from models.packet_store import PACKET_COLUMNS, COLUMN_NAMES
+from models.flow_table import FLOW_COLUMNS
+
+# Columnas del CSV de agregados por segundo de una sesión guardada
+TRAFFIC_COLUMNS = ('Segundo', 'Hora', 'Protocolo', 'Paquetes', 'Bytes')
+
+
+def pdf_available() -> bool:
+    """Indica si fpdf está instalado, sin importarlo."""
+    return importlib.util.find_spec("fpdf") is not None
+
+
+def write_pdf_report(session, filename: str = 'reporte_monitoreo.pdf') -> str:
+    """Escribe un reporte PDF con las estadísticas de la sesión de captura.
+
+    fpdf se importa aquí, al pedir el primer reporte, y no al arrancar.
+    """
+    from fpdf import FPDF  # type: ignore
+
+    model = session.model
+    stats = session.stats
+    # Instantánea inmutable: la captura puede seguir activa (modo headless)
+    snapshot = session.snapshot()
+
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font('Arial', 'B', 16)
+    pdf.cell(0, 10, 'Reporte de Monitoreo de Red', ln=True, align='C')
+    pdf.ln(10)
+
+    # Estadísticas generales
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 10, 'Resumen Estadístico', ln=True)
+    pdf.set_font('Arial', '', 10)
+
+    summary = [
+        f"Tiempo: {stats.format_elapsed(snapshot.elapsed())}",
+        f"Paquetes Totales: {snapshot.packets}",
+        f"Tráfico Total: {stats.format_size(snapshot.bytes)}"
+    ]
+    loaded = session.loaded_session
+    if loaded is not None:
+        summary.insert(0, f"Sesión guardada #{loaded.id}: {loaded.origin} "
+                          f"({time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(loaded.start))})")
+        if loaded.sampling:
+            summary.append(f"Muestreo: {loaded.sampling} (cifras estimadas)")
+    elif session.sampler is not None:
+        summary.append(f"Muestreo: {stats.format_sampling(session.sampler)} (cifras estimadas)")
+
+    for line in summary:
+        pdf.cell(0, 7, line, ln=True)
+
+    # Tasas de tráfico
+    rates = model.traffic.summary()
+    if rates:
+        pdf.ln(5)
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(0, 10, 'Tasas de Tráfico', ln=True)
+        pdf.set_font('Arial', '', 10)
+        pdf.cell(0, 7, f"Ventana analizada: {rates['ventana_s']} s", ln=True)
+        pdf.cell(0, 7, f"Media: {stats.format_rate(rates['bps_medio'])} ({rates['pps_medio']:.1f} pps)", ln=True)
+        pdf.cell(0, 7, f"Máxima: {stats.format_rate(rates['bps_maximo'])} ({rates['pps_maximo']:.0f} pps)", ln=True)
+        for proto, bps in sorted(rates['bps_por_protocolo'].items(), key=lambda x: x[1], reverse=True):
+            pdf.cell(0, 7, f"- {proto}: {stats.format_rate(bps)} de media", ln=True)
+
+    # Protocolos
+    pdf.ln(5)
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 10, 'Distribución por Protocolo', ln=True)
+    pdf.set_font('Arial', '', 10)
+
+    for proto, count in sorted(
+        snapshot.protocols.items(),
+        key=lambda x: x[1],
+        reverse=True
+    ):
+        if count > 0:
+            pdf.cell(0, 7, f"- {proto}: {count}", ln=True)
+
+    # Top IPs
+    pdf.ln(5)
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 10, 'Top 20 Direcciones IP', ln=True)
+    pdf.set_font('Arial', '', 10)
+
+    if model.ip_sketch is None:
+        for ip, count in model.top_ips(20):
+            pdf.cell(0, 7, f"- {ip}: {count} paquetes", ln=True)
+    else:
+        _write_heavy_hitters(pdf, model.ip_sketch.top(20), str, 'paquetes')
+        _write_heavy_hitters_note(pdf, model.ip_sketch)
+
+        pdf.ln(5)
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(0, 10, 'Top 20 Puertos', ln=True)
+        pdf.set_font('Arial', '', 10)
+        _write_heavy_hitters(pdf, model.port_sketch.top(20), str, 'apariciones')
+        _write_heavy_hitters_note(pdf, model.port_sketch)
+
+    # Top flujos
+    flows = model.flows.top(20, finished=True)
+    if flows:
+        pdf.ln(5)
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(0, 10, 'Top 20 Flujos', ln=True)
+        pdf.set_font('Arial', '', 10)
+        for flow in flows:
+            pdf.cell(
+                0, 7,
+                f"- {flow.protocol} {flow.label()}: {flow.packets} paquetes, {stats.format_size(flow.bytes)}",
+                ln=True
+            )
+
+    if model.flow_sketch is not None:
+        pdf.ln(5)
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(0, 10, 'Top 20 Flujos por Paquetes (toda la captura)', ln=True)
+        pdf.set_font('Arial', '', 10)
+        _write_heavy_hitters(pdf, model.flow_sketch.top(20), _flow_key_label, 'paquetes')
+        _write_heavy_hitters_note(pdf, model.flow_sketch)
+
+    pdf.output(filename)
+    return filename
+
+
+def _write_heavy_hitters(pdf, rows, label, unit: str) -> None:
+    """Lista un top Space-Saving con el margen de error de cada estimación."""
+    for item, estimate, error in rows:
+        if error:
+            pdf.cell(0, 7, f"- {label(item)}: {estimate - error}-{estimate} {unit}", ln=True)
+        else:
+            pdf.cell(0, 7, f"- {label(item)}: {estimate} {unit}", ln=True)
+
+
+def _write_heavy_hitters_note(pdf, sketch) -> None:
+    pdf.set_font('Arial', 'I', 8)
+    pdf.cell(
+        0, 6,
+        f"Conteo aproximado con {sketch.capacity} contadores: error máximo {sketch.error_bound} "
+        f"de {sketch.total}.",
+        ln=True
+    )
+    pdf.set_font('Arial', '', 10)
+
+
+def _flow_key_label(key) -> str:
+    protocol, ip_a, port_a, ip_b, port_b = key
+    if isinstance(port_a, int):
+        return f"{protocol} {ip_a}:{port_a} <-> {ip_b}:{port_b}"
+    return f"{protocol} {ip_a} <-> {ip_b}"
+
+
+# Filas (o valores por columna en .npz) escritos entre dos avisos de progreso
+EXPORT_CHUNK = 50_000
+
+# (hecho, total) en unidades de trabajo de cada exportación
+Progress = Callable[[int, int], None]
+
+
+def write_csv_report(session, filename: str = 'reporte_paquetes.csv',
+                     progress: Optional[Progress] = None) -> str:
+    """Escribe un CSV con los paquetes retenidos en el almacén de la sesión.
+
+    Las filas se generan por bloques de EXPORT_CHUNK, con memoria acotada, y
+    ``progress`` se llama tras cada bloque. Si el nombre termina en ``.gz``
+    el fichero se comprime con gzip.
+    """
+    store = session.store
+    first, total = store.first_seq, store.total
+    opener = gzip.open if filename.endswith('.gz') else open
+    with opener(filename, mode='wt', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(PACKET_COLUMNS)
+        for start in range(first, total, EXPORT_CHUNK):
+            stop = min(start + EXPORT_CHUNK, total)
+            writer.writerows(store.rows(start, stop))
+            if progress:
+                progress(stop - first, total - first)
+    return filename
+
+
+def write_npz_report(session, filename: str = 'reporte_paquetes.npz', compress: bool = False,
+                     progress: Optional[Progress] = None) -> str:
+    """Escribe las columnas tipadas del almacén en formato NumPy ``.npz``.
+
+    Cada columna de COLUMN_NAMES es un array ``.npy`` dentro del zip, en
+    orden de llegada, más ``nombres_protocolo`` y ``nombres_interfaz`` (los
+    índices de las columnas ``protocolo`` e ``interfaz``). Las direcciones
+    van como dos enteros de 64 bits (IPv4 como ::ffff:a.b.c.d). Se escribe
+    sin NumPy, volcando las columnas por bloques, y se lee con
+    ``numpy.load``.
+    """
+    store = session.store
+    first, total = store.first_seq, store.total
+    count = total - first
+    segments = store.segments(first, total)
+    columns = store.columns()
+    work = count * len(columns)
+    done = 0
+    compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    with zipfile.ZipFile(filename, mode='w', compression=compression, allowZip64=True) as archive:
+        for name, column in zip(COLUMN_NAMES, columns):
+            with archive.open(f'{name}.npy', mode='w', force_zip64=True) as member:
+                member.write(_npy_header(_npy_descr(column), count))
+                for begin, end in segments:
+                    for start in range(begin, end, EXPORT_CHUNK):
+                        stop = min(start + EXPORT_CHUNK, end)
+                        member.write(column[start:stop].tobytes())
+                        done += stop - start
+                        if progress:
+                            progress(done, work)
+        _write_npy_names(archive, 'nombres_protocolo.npy', list(store.protocol_names))
+        _write_npy_names(archive, 'nombres_interfaz.npy', list(store.interface_names))
+    return filename
+
+
+def _write_npy_names(archive: zipfile.ZipFile, member_name: str, names) -> None:
+    """Escribe una lista de textos como array .npy de cadenas Unicode."""
+    width = max((len(name) for name in names), default=1) or 1
+    with archive.open(member_name, mode='w') as member:
+        member.write(_npy_header(f'{_BYTE_ORDER}U{width}', len(names)))
+        for name in names:
+            member.write(name.ljust(width, '\0').encode(_UTF32))
+
+
+# Orden de bytes de las columnas de ``array`` (el nativo de la máquina)
+_BYTE_ORDER = '<' if sys.byteorder == 'little' else '>'
+_UTF32 = 'utf-32-le' if sys.byteorder == 'little' else 'utf-32-be'
+
+
+def _npy_descr(column) -> str:
+    """Tipo NumPy (p. ej. '<u8') de una columna ``array``."""
+    kind = 'f' if column.typecode in 'fd' else 'u'
+    order = '|' if column.itemsize == 1 else _BYTE_ORDER
+    return f'{order}{kind}{column.itemsize}'
+
+
+def _npy_header(descr: str, length: int) -> bytes:
+    """Cabecera del formato .npy 1.0 para un array unidimensional."""
+    header = f"{{'descr': '{descr}', 'fortran_order': False, 'shape': ({length},), }}"
+    # Magia (6) + versión (2) + longitud (2) + cabecera, alineado a 64 bytes
+    padding = 64 - (10 + len(header) + 1) % 64
+    header = header + ' ' * (padding % 64) + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin-1')
+
+
+def write_flow_csv_report(session, filename: str = 'reporte_flujos.csv') -> str:
+    """Escribe un CSV con los flujos terminados retenidos y los activos."""
+    flows = session.model.flows
+    with open(filename, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(FLOW_COLUMNS)
+        writer.writerows(flow.as_row() for flow in list(flows.finished))
+        writer.writerows(flow.as_row() for flow in flows.snapshot())
+    return filename
+
+
+def write_session_pdf_report(store, session_id: int,
+                             filename: str = 'reporte_sesion.pdf') -> str:
+    """Escribe el reporte PDF de una sesión guardada sin tocar la captura actual.
+
+    La sesión se carga en una CaptureSession aparte, que se descarta al
+    terminar. KeyError si la sesión no existe.
+    """
+    from controllers.capture_session import CaptureSession
+
+    session = CaptureSession(store_capacity=1, sample_every=0)
+    store.restore(session_id, session)
+    return write_pdf_report(session, filename)
+
+
+def write_session_traffic_csv_report(store, session_id: int,
+                                     filename: str = 'reporte_trafico.csv') -> str:
+    """Escribe un CSV con los agregados por segundo y protocolo de una sesión guardada."""
+    with open(filename, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(TRAFFIC_COLUMNS)
+        writer.writerows(
+            (second, time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second)), protocol, packets, size)
+            for second, protocol, packets, size in store.traffic(session_id)
+        )
+    return filename
+
+
+def write_session_flow_csv_report(store, session_id: int,
+                                  filename: str = 'reporte_flujos.csv') -> str:
+    """Escribe un CSV con todos los flujos de una sesión guardada (sin el límite en memoria)."""
+    with open(filename, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(FLOW_COLUMNS)
+        writer.writerows(flow.as_row() for flow in store.flows(session_id))
+    return filename
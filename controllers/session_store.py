@@ -0,0 +1,496 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+from models.flow_table import Flow, flow_key
+
+# Versión del esquema (PRAGMA user_version)
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sesiones (
+    id INTEGER PRIMARY KEY,
+    inicio REAL NOT NULL,
+    fin REAL NOT NULL,
+    origen TEXT NOT NULL,
+    modo TEXT NOT NULL,
+    paquetes INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    protocolos TEXT NOT NULL DEFAULT '{}',
+    transportes TEXT NOT NULL DEFAULT '{}',
+    muestreo TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS sesiones_inicio ON sesiones (inicio);
+CREATE TABLE IF NOT EXISTS trafico (
+    sesion INTEGER NOT NULL,
+    segundo INTEGER NOT NULL,
+    protocolo TEXT NOT NULL,
+    paquetes INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    PRIMARY KEY (sesion, segundo, protocolo)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ips (
+    sesion INTEGER NOT NULL,
+    segundo INTEGER NOT NULL,
+    ip TEXT NOT NULL,
+    paquetes INTEGER NOT NULL,
+    PRIMARY KEY (sesion, segundo, ip)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ips_ip ON ips (sesion, ip, segundo);
+CREATE TABLE IF NOT EXISTS flujos (
+    sesion INTEGER NOT NULL,
+    clave TEXT NOT NULL,
+    inicio REAL NOT NULL,
+    fin REAL NOT NULL,
+    protocolo TEXT NOT NULL,
+    origen TEXT NOT NULL,
+    puerto_origen,
+    destino TEXT NOT NULL,
+    puerto_destino,
+    paquetes_ida INTEGER NOT NULL,
+    bytes_ida INTEGER NOT NULL,
+    flags_ida INTEGER NOT NULL,
+    paquetes_vuelta INTEGER NOT NULL,
+    bytes_vuelta INTEGER NOT NULL,
+    flags_vuelta INTEGER NOT NULL,
+    estado TEXT NOT NULL,
+    PRIMARY KEY (sesion, clave, inicio)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS flujos_inicio ON flujos (sesion, inicio, fin);
+"""
+
+# Columnas de ``flujos`` tras sesion, en el orden de las filas de _flow_row
+_FLOW_FIELDS = (
+    "clave", "inicio", "fin", "protocolo", "origen", "puerto_origen", "destino", "puerto_destino",
+    "paquetes_ida", "bytes_ida", "flags_ida", "paquetes_vuelta", "bytes_vuelta", "flags_vuelta",
+    "estado"
+)
+_INSERT_FLOW = (f"INSERT OR REPLACE INTO flujos (sesion, {', '.join(_FLOW_FIELDS)}) "
+                f"VALUES (?{', ?' * len(_FLOW_FIELDS)})")
+_INSERT_TRAFFIC = "INSERT OR REPLACE INTO trafico VALUES (?, ?, ?, ?, ?)"
+_ADD_IPS = ("INSERT INTO ips VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (sesion, segundo, ip) DO UPDATE SET paquetes = paquetes + excluded.paquetes")
+
+# (segundo, protocolo, paquetes, bytes)
+TrafficRow = Tuple[int, str, int, int]
+
+
+class SessionInfo(NamedTuple):
+    """Fila de la tabla ``sesiones``."""
+    id: int
+    start: float
+    end: float
+    origin: str
+    mode: str
+    packets: int
+    bytes: int
+    sampling: str
+
+    @property
+    def duration(self) -> float:
+        return max(0.0, self.end - self.start)
+
+
+class SessionStore:
+    """Base SQLite con los agregados de las sesiones de captura.
+
+    No guarda paquetes sino agregados: por segundo y protocolo, paquetes
+    y bytes (de la serie por segundo del modelo); por segundo e IP, los
+    paquetes nuevos desde el agregado anterior, solo de las IPs que el
+    modelo marcó como cambiadas; y una fila por flujo, que se reescribe
+    mientras sigue activo. Además, los totales de cada sesión.
+    Con ella se pueden listar y reabrir sesiones pasadas (``restore``) y
+    volver a generar sus reportes.
+
+    Como PcapSpool, nunca frena la captura: el hilo que drena la sesión
+    (CaptureSession.drain) llama a ``tick`` y este, como mucho cada
+    TICK_INTERVAL, copia los agregados nuevos y los encola sin E/S; un
+    hilo escritor propio los vacía cada FLUSH_INTERVAL en una sola
+    transacción con inserciones por lotes. Si la cola está llena el ciclo
+    se omite y se cuenta en ``dropped``; lo omitido se envía en el
+    siguiente, salvo los segundos que ya hayan salido de la serie (una
+    hora). El hilo de captura no toca la base en ningún caso.
+
+    Una sesión abarca lo acumulado en la CaptureSession hasta ``clear``:
+    una nueva captura sin limpiar continúa la misma sesión (``begin``),
+    igual que los contadores de la ventana. Las lecturas abren su propia
+    conexión y pueden hacerse desde cualquier hilo mientras se escribe.
+    """
+
+    FLUSH_INTERVAL = 1.0
+    TICK_INTERVAL = 1.0
+    # Segundos ya enviados que se reenvían en cada ciclo (paquetes tardíos
+    # y segundo en curso); los agregados por segundo se sustituyen
+    REWRITE_SECONDS = 2
+    # Segundos de captura sin enviar que fuerzan un ciclo (la reproducción
+    # rápida de ficheros avanza más deprisa que el reloj)
+    MAX_LAG = 1800
+    # Flujos activos reescritos en cada ciclo; al parar se escriben todos
+    ACTIVE_FLOWS = 100
+
+    def __init__(self, path: str, queue_capacity: int = 600):
+        self.path = path
+        self.queue_capacity = queue_capacity
+        self._queue: Deque[tuple] = deque()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Estado del hilo escritor: sesión abierta y última creada
+        self.session_id: Optional[int] = None
+        self.last_session_id: Optional[int] = None
+        self._ip_totals: Dict[str, int] = {}
+        # Estado del hilo que drena la sesión
+        self.open = False
+        self.capturing = False
+        self._flushed: Optional[int] = None
+        self._last_tick = 0.0
+        self._last_flow: Optional[Flow] = None
+        self._flows_created = 0
+        self.dropped = 0
+        self.written = 0
+        self.error: Optional[str] = None
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            with connection:
+                connection.executescript(_SCHEMA)
+                connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        return connection
+
+    # Escritura (hilo que drena la sesión)
+
+    def begin(self, origin: str, mode: str) -> None:
+        """Empieza una sesión o, si no se limpió la anterior, la continúa."""
+        if not self.active:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sesiones-sqlite", daemon=True)
+            self._thread.start()
+        if self.open:
+            self._queue.append(("continuar", origin))
+        else:
+            self._queue.append(("inicio", time.time(), origin, mode))
+            self._last_flow = None
+            self._flows_created = 0
+        self.open = True
+        self.capturing = True
+        # La primera vez se envía toda la serie: una captura continuada puede
+        # reproducir un fichero con tiempos anteriores a los ya enviados
+        self._flushed = None
+        self._last_tick = time.monotonic()
+
+    def tick(self, session) -> None:
+        """Encola los agregados nuevos si pasó TICK_INTERVAL o la captura se adelanta."""
+        now = time.monotonic()
+        if now - self._last_tick < self.TICK_INTERVAL and not self._behind(session):
+            return
+        self._last_tick = now
+        self._enqueue(session, final=False)
+
+    def _behind(self, session) -> bool:
+        """True si hay que enviar ya: MAX_LAG segundos de captura sin enviar, o
+        tantos flujos nuevos que los terminados podrían salir de ``finished``."""
+        model = session.model
+        last = _last_packet_time(session.store)
+        flushed = self._flushed if self._flushed is not None else model.traffic.first_time
+        if last is not None and flushed is not None and last - flushed >= self.MAX_LAG:
+            return True
+        flows = model.flows
+        limit = flows.finished.maxlen
+        return limit is not None and flows.created - self._flows_created >= limit // 2
+
+    def flush(self, session) -> None:
+        """Envía los agregados al terminar la captura, con todos los flujos activos."""
+        self.capturing = False
+        self._enqueue(session, final=True)
+
+    def end(self) -> None:
+        """Cierra la sesión (al limpiar la captura); la siguiente será nueva."""
+        if self.open:
+            self._queue.append(("fin",))
+        self.open = False
+        self.capturing = False
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Escribe lo pendiente y detiene el hilo escritor."""
+        self.end()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _enqueue(self, session, final: bool) -> None:
+        if not final and len(self._queue) >= self.queue_capacity:
+            self.dropped += 1
+            return
+        model = session.model
+        snapshot = session.snapshot()
+        traffic = model.traffic
+        last = _last_packet_time(session.store)
+        rows: List[TrafficRow] = []
+        second = int(last if last is not None else time.time())
+        if last is not None and traffic.first_time is not None:
+            first = traffic.first_time if self._flushed is None else self._flushed - self.REWRITE_SECONDS
+            rows = [(start, protocol, round(packets), round(size))
+                    for start, protocol, size, packets in traffic.per_second.rows(first, last)]
+            self._flushed = second
+        flows = model.flows
+        self._flows_created = flows.created
+        finished = list(flows.finished)
+        new_flows = self._new_flows(finished)
+        if finished:
+            self._last_flow = finished[-1]
+        active = flows.snapshot() if final else flows.top(self.ACTIVE_FLOWS)
+        sampler = session.sampler
+        self._queue.append((
+            "datos", time.time(), snapshot.packets, snapshot.bytes,
+            json.dumps(dict(snapshot.protocols)), json.dumps(dict(snapshot.transports)),
+            session.stats.format_sampling(sampler) if sampler is not None else "",
+            rows, second, *_ip_totals(model),
+            [_flow_row(flow) for flow in new_flows + active]
+        ))
+
+    def _new_flows(self, finished: List[Flow]) -> List[Flow]:
+        """Flujos terminados desde el último ciclo (tras el último enviado)."""
+        marker = self._last_flow
+        for index in range(len(finished) - 1, -1, -1):
+            if finished[index] is marker:
+                return finished[index + 1:]
+        return finished
+
+    # Hilo escritor
+
+    def _run(self) -> None:
+        try:
+            connection = self._connect()
+        except sqlite3.Error as e:
+            self.error = str(e)
+            return
+        try:
+            while True:
+                stopping = self._stop.wait(self.FLUSH_INTERVAL)
+                self._write(connection)
+                if stopping:
+                    break
+        finally:
+            connection.close()
+
+    def _write(self, connection: sqlite3.Connection) -> None:
+        """Escribe todos los mensajes pendientes en una transacción."""
+        queue = self._queue
+        if not queue:
+            return
+        batch = [queue.popleft() for _ in range(len(queue))]
+        try:
+            with connection:
+                for message in batch:
+                    getattr(self, "_write_" + message[0])(connection, *message[1:])
+        except sqlite3.Error as e:
+            self.error = str(e)
+            self.dropped += len(batch)
+            return
+        self.written += len(batch)
+
+    def _write_inicio(self, connection, started: float, origin: str, mode: str) -> None:
+        cursor = connection.execute(
+            "INSERT INTO sesiones (inicio, fin, origen, modo) VALUES (?, ?, ?, ?)",
+            (started, started, origin, mode)
+        )
+        self.session_id = self.last_session_id = cursor.lastrowid
+        self._ip_totals = {}
+
+    def _write_continuar(self, connection, origin: str) -> None:
+        if self.session_id is None:
+            return
+        (current,) = connection.execute(
+            "SELECT origen FROM sesiones WHERE id = ?", (self.session_id,)
+        ).fetchone()
+        if origin not in current.split(", "):
+            connection.execute("UPDATE sesiones SET origen = ? WHERE id = ?",
+                               (f"{current}, {origin}", self.session_id))
+
+    def _write_datos(self, connection, ended: float, packets: int, size: int, protocols: str,
+                     transports: str, sampling: str, traffic: List[TrafficRow], second: int,
+                     ip_totals: Dict[str, int], all_ips: bool, flows: List[tuple]) -> None:
+        session_id = self.session_id
+        if session_id is None:
+            return
+        connection.execute(
+            "UPDATE sesiones SET fin = ?, paquetes = ?, bytes = ?, protocolos = ?, transportes = ?,"
+            " muestreo = CASE WHEN ? = '' THEN muestreo ELSE ? END WHERE id = ?",
+            (ended, packets, size, protocols, transports, sampling, sampling, session_id)
+        )
+        connection.executemany(_INSERT_TRAFFIC, [(session_id,) + row for row in traffic])
+        previous = self._ip_totals
+        connection.executemany(_ADD_IPS, [
+            (session_id, second, ip, count - previous.get(ip, 0))
+            for ip, count in ip_totals.items() if count > previous.get(ip, 0)
+        ])
+        if all_ips:
+            self._ip_totals = ip_totals
+        else:
+            previous.update(ip_totals)
+        connection.executemany(_INSERT_FLOW, [(session_id,) + row for row in flows])
+
+    def _write_fin(self, connection) -> None:
+        self.session_id = None
+        self._ip_totals = {}
+
+    # Lectura (cualquier hilo)
+
+    def sessions(self) -> List[SessionInfo]:
+        """Sesiones guardadas, de la más reciente a la más antigua."""
+        connection = self._connect()
+        try:
+            return [SessionInfo(*row) for row in connection.execute(
+                "SELECT id, inicio, fin, origen, modo, paquetes, bytes, muestreo "
+                "FROM sesiones ORDER BY inicio DESC"
+            )]
+        finally:
+            connection.close()
+
+    def session(self, session_id: int) -> SessionInfo:
+        """Datos de una sesión; KeyError si no existe."""
+        connection = self._connect()
+        try:
+            row = connection.execute(
+                "SELECT id, inicio, fin, origen, modo, paquetes, bytes, muestreo "
+                "FROM sesiones WHERE id = ?", (session_id,)
+            ).fetchone()
+        finally:
+            connection.close()
+        if row is None:
+            raise KeyError(f"no existe la sesión {session_id}")
+        return SessionInfo(*row)
+
+    def traffic(self, session_id: int, start: Optional[float] = None,
+                end: Optional[float] = None) -> List[TrafficRow]:
+        """Agregados por segundo y protocolo entre ``start`` y ``end`` (epoch, incluidos)."""
+        return self._query(
+            "SELECT segundo, protocolo, paquetes, bytes FROM trafico "
+            "WHERE sesion = ? AND segundo BETWEEN ? AND ? ORDER BY segundo, protocolo",
+            session_id, start, end
+        )
+
+    def top_ips(self, session_id: int, count: int, start: Optional[float] = None,
+                end: Optional[float] = None) -> List[Tuple[str, int]]:
+        """Las ``count`` IPs con más paquetes entre ``start`` y ``end``."""
+        return self._query(
+            "SELECT ip, SUM(paquetes) AS total FROM ips WHERE sesion = ? AND segundo BETWEEN ? AND ? "
+            "GROUP BY ip ORDER BY total DESC LIMIT ?",
+            session_id, start, end, count
+        )
+
+    def flows(self, session_id: int, start: Optional[float] = None,
+              end: Optional[float] = None) -> List[Flow]:
+        """Flujos con actividad entre ``start`` y ``end``, por orden de inicio."""
+        rows = self._query(
+            f"SELECT {', '.join(_FLOW_FIELDS[1:])} FROM flujos "
+            "WHERE sesion = ? AND inicio <= ? AND fin >= ? ORDER BY inicio",
+            session_id, end, start, reverse=True
+        )
+        return [_flow_from_row(row) for row in rows]
+
+    def _query(self, sql: str, session_id: int, start: Optional[float], end: Optional[float],
+               *extra, reverse: bool = False) -> list:
+        """Consulta por rango de tiempo; sin límites, toda la sesión."""
+        low = start if start is not None else float("-inf")
+        high = end if end is not None else float("inf")
+        connection = self._connect()
+        try:
+            bounds = (high, low) if reverse else (low, high)
+            return connection.execute(sql, (session_id,) + bounds + extra).fetchall()
+        finally:
+            connection.close()
+
+    def restore(self, session_id: int, session) -> SessionInfo:
+        """Carga una sesión guardada en una CaptureSession detenida.
+
+        Rellena los contadores, la serie de tráfico, las IPs y los flujos
+        (todos, como terminados), de modo que la ventana y los reportes la
+        muestran como si se acabara de capturar; el almacén de paquetes
+        queda vacío. Descarta lo que hubiera en ``session``. ValueError si
+        la sesión sigue capturando.
+        """
+        info = self.session(session_id)
+        if not session.clear():
+            raise ValueError("detén la captura antes de abrir una sesión guardada")
+        connection = self._connect()
+        try:
+            protocols, transports = connection.execute(
+                "SELECT protocolos, transportes FROM sesiones WHERE id = ?", (session_id,)
+            ).fetchone()
+            model = session.model
+            counters = model.counters
+            counters.merge(info.packets, info.bytes, json.loads(protocols), json.loads(transports))
+            counters.start_time = info.start
+            counters.end_time = info.end
+            traffic = model.traffic
+            for second, protocol, packets, size in connection.execute(
+                    "SELECT segundo, protocolo, paquetes, bytes FROM trafico "
+                    "WHERE sesion = ? ORDER BY segundo", (session_id,)):
+                traffic.add(second, protocol, size, packets)
+            ip_sketch = model.ip_sketch
+            for ip, count in connection.execute(
+                    "SELECT ip, SUM(paquetes) FROM ips WHERE sesion = ? GROUP BY ip", (session_id,)):
+                if ip_sketch is None:
+                    model.ip_counts[ip] = count
+                    model.ip_dirty.add(ip)
+                else:
+                    ip_sketch.add(ip, count)
+            model.flows.load_finished(_flow_from_row(row) for row in connection.execute(
+                f"SELECT {', '.join(_FLOW_FIELDS[1:])} FROM flujos WHERE sesion = ? ORDER BY inicio",
+                (session_id,)
+            ))
+        finally:
+            connection.close()
+        session.loaded_session = info
+        return info
+
+
+def _last_packet_time(store) -> Optional[float]:
+    """Marca de tiempo del último paquete que llegó al almacén (None si está vacío)."""
+    if not store.total:
+        return None
+    return store.timestamps[(store.total - 1) % store.capacity]
+
+
+def _ip_totals(model) -> Tuple[Dict[str, int], bool]:
+    """Paquetes acumulados de las IPs que cambiaron, y si son todas las IPs.
+
+    Con el conteo exacto solo se copian las de ``pop_unsaved_ips``, así el
+    coste por ciclo no crece con las IPs distintas de la sesión; con el
+    aproximado se copian todos los contadores, acotados por su tamaño.
+    """
+    if model.ip_sketch is not None:
+        return {ip: estimate for ip, estimate, _ in model.ip_sketch.top(len(model.ip_sketch))}, True
+    counts = model.ip_counts
+    return {ip: counts[ip] for ip in model.pop_unsaved_ips()}, False
+
+
+def _flow_row(flow: Flow) -> tuple:
+    """Fila de ``flujos`` (sin la sesión) con las columnas de _FLOW_FIELDS."""
+    return (
+        "|".join(map(str, flow.key)), flow.first_seen, flow.last_seen, flow.protocol,
+        flow.src, flow.sport, flow.dst, flow.dport,
+        flow.packets_fwd, round(flow.bytes_fwd), flow.flags_fwd,
+        flow.packets_rev, round(flow.bytes_rev), flow.flags_rev, flow.state
+    )
+
+
+def _flow_from_row(row: tuple) -> Flow:
+    """Flujo a partir de las columnas de _FLOW_FIELDS sin la clave."""
+    (first_seen, last_seen, protocol, src, sport, dst, dport,
+     packets_fwd, bytes_fwd, flags_fwd, packets_rev, bytes_rev, flags_rev, state) = row
+    flow = Flow(flow_key(protocol, src, dst, sport, dport), protocol, src, sport, dst, dport, first_seen)
+    flow.last_seen = last_seen
+    flow.packets_fwd, flow.bytes_fwd, flow.flags_fwd = packets_fwd, bytes_fwd, flags_fwd
+    flow.packets_rev, flow.bytes_rev, flow.flags_rev = packets_rev, bytes_rev, flags_rev
+    flow.state = state
+    return flow
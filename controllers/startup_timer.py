@@ -0,0 +1,22 @@
+import time
+from typing import List, Optional, Tuple
+
+
+class StartupTimer:
+    """Marcas de tiempo del arranque de la aplicación (``--medir-arranque``).
+
+    Cada marca se imprime al registrarse con los milisegundos transcurridos
+    desde ``origin`` (un valor de ``time.perf_counter`` tomado al empezar
+    el script), para seguir la evolución del tiempo de arranque.
+    """
+
+    def __init__(self, origin: Optional[float] = None):
+        self.origin = time.perf_counter() if origin is None else origin
+        self.marks: List[Tuple[str, float]] = []
+
+    def mark(self, label: str) -> float:
+        """Registra e imprime una marca. Devuelve los ms desde el origen."""
+        elapsed = (time.perf_counter() - self.origin) * 1000
+        self.marks.append((label, elapsed))
+        print(f"[arranque] {label}: {elapsed:.0f} ms")
+        return elapsed
@@ -0,0 +1,263 @@
+import re
+from array import array
+from bisect import bisect_left
+from typing import Iterable, List, Optional, Set, Tuple, Union
+
+from models.packet_index import PacketIndex
+from models.packet_store import DisplayRow, address_to_int
+from models.protocol_classifier import default_classifier
+
+# Nodo del filtro ya interpretado:
+# ('and', a, b), ('or', a, b), ('not', a) o una hoja (tipo de índice, valor)
+FilterNode = Tuple
+
+_TOKEN = re.compile(r"\s*(\(|\)|&&|\|\||!|[^\s()!&|]+)")
+
+# Palabras que aceptan una dirección IP y los índices que consultan
+_ADDRESS_FIELDS = {'ip': ('src', 'dst'), 'host': ('src', 'dst'), 'src': ('src',), 'dst': ('dst',)}
+_PORT_FIELDS = {'port': ('sport', 'dport'), 'sport': ('sport',), 'dport': ('dport',)}
+
+
+class DisplayFilterError(ValueError):
+    """Expresión de filtro de visualización no válida."""
+
+
+def parse_display_filter(text: str, protocols: Optional[Iterable[str]] = None) -> FilterNode:
+    """Interpreta un filtro de visualización con sintaxis parecida a BPF.
+
+    Primitivas: ``ip|host DIR``, ``src DIR``, ``dst DIR``, ``port N``,
+    ``sport N``, ``dport N``, ``iface INTERFAZ``, ``proto NOMBRE`` o el
+    nombre del protocolo tal como aparece en la lista (``https``,
+    ``dns``...). Se combinan con
+    ``and``/``&&``, ``or``/``||``, ``not``/``!`` y paréntesis, por ejemplo
+    ``ip 10.0.0.5 and dport 443``.
+
+    ``protocols`` son los nombres de protocolo admitidos (por defecto, las
+    etiquetas del clasificador de la aplicación); cualquier otra palabra es
+    un error, para que una errata no muestre una lista vacía sin avisar.
+    """
+    tokens = _tokenize(text)
+    if not tokens:
+        raise DisplayFilterError("el filtro está vacío")
+    if protocols is None:
+        protocols = default_classifier().labels()
+    parser = _Parser(tokens, {name.upper() for name in protocols})
+    node = parser.expression()
+    if parser.position != len(tokens):
+        raise DisplayFilterError(f"texto inesperado: '{tokens[parser.position]}'")
+    return node
+
+
+def _tokenize(text: str) -> List[str]:
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None:
+            raise DisplayFilterError(f"carácter no válido en la posición {position + 1}")
+        tokens.append(match.group(1))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Descenso recursivo: or < and < not < primitiva."""
+
+    def __init__(self, tokens: List[str], protocols: Set[str]):
+        self.tokens = tokens
+        self.protocols = protocols
+        self.position = 0
+
+    def _peek(self) -> str:
+        return self.tokens[self.position].lower() if self.position < len(self.tokens) else ''
+
+    def _next(self, expected: str) -> str:
+        if self.position >= len(self.tokens):
+            raise DisplayFilterError(f"falta {expected} al final del filtro")
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def expression(self) -> FilterNode:
+        node = self.term()
+        while self._peek() in ('or', '||'):
+            self.position += 1
+            node = ('or', node, self.term())
+        return node
+
+    def term(self) -> FilterNode:
+        node = self.factor()
+        while self._peek() in ('and', '&&'):
+            self.position += 1
+            node = ('and', node, self.factor())
+        return node
+
+    def factor(self) -> FilterNode:
+        token = self._peek()
+        if token in ('not', '!'):
+            self.position += 1
+            return ('not', self.factor())
+        if token == '(':
+            self.position += 1
+            node = self.expression()
+            if self._next("')'") != ')':
+                raise DisplayFilterError("falta ')'")
+            return node
+        return self.primitive()
+
+    def primitive(self) -> FilterNode:
+        word = self._next("una condición").lower()
+        if word in (')', 'and', 'or', '&&', '||'):
+            raise DisplayFilterError(f"se esperaba una condición antes de '{word}'")
+        if word in _ADDRESS_FIELDS:
+            text = self._next("una dirección IP")
+            try:
+                value = address_to_int(text)
+            except OSError:
+                raise DisplayFilterError(f"dirección IP no válida: '{text}'") from None
+            return _any_of([(kind, value) for kind in _ADDRESS_FIELDS[word]])
+        if word in _PORT_FIELDS:
+            text = self._next("un puerto")
+            if not text.isdigit() or int(text) > 65535:
+                raise DisplayFilterError(f"puerto no válido: '{text}'")
+            return _any_of([(kind, int(text)) for kind in _PORT_FIELDS[word]])
+        if word == 'iface':
+            return ('iface', self._next("una interfaz"))
+        if word == 'proto':
+            name = self._next("un protocolo")
+            if name.upper() not in self.protocols:
+                raise DisplayFilterError(f"protocolo desconocido: '{name}'")
+            return ('proto', name.upper())
+        if word.upper() not in self.protocols:
+            raise DisplayFilterError(f"condición desconocida: '{self.tokens[self.position - 1]}' "
+                                     f"(no es una palabra clave ni un protocolo conocido)")
+        return ('proto', word.upper())
+
+
+def _any_of(leaves: List[FilterNode]) -> FilterNode:
+    node = leaves[0]
+    for leaf in leaves[1:]:
+        node = ('or', node, leaf)
+    return node
+
+
+def evaluate(node: FilterNode, index: PacketIndex, start: int, stop: int) -> List[int]:
+    """Secuencias en [start, stop) que cumplen el filtro, en orden creciente.
+
+    Las hojas salen de los índices; ``and`` recorre la lista más corta y
+    busca en la otra con bisect, ``or`` une y ``not`` complementa dentro
+    del rango.
+    """
+    kind = node[0]
+    if kind == 'and':
+        left = evaluate(node[1], index, start, stop)
+        if not left:
+            return []
+        return _intersect(left, evaluate(node[2], index, start, stop))
+    if kind == 'or':
+        left = evaluate(node[1], index, start, stop)
+        right = evaluate(node[2], index, start, stop)
+        if not left or not right:
+            return left or right
+        return sorted(set(left).union(right))
+    if kind == 'not':
+        excluded = set(evaluate(node[1], index, start, stop))
+        return [seq for seq in range(start, stop) if seq not in excluded]
+    if kind == 'proto':
+        # Un nombre puede corresponder a un identificador del almacén
+        names = index.store.protocol_names
+        ids = [proto_id for proto_id, name in enumerate(names) if name.upper() == node[1]]
+        if len(ids) == 1:
+            return index.lookup('proto', ids[0], start, stop)
+        return sorted(seq for proto_id in ids for seq in index.lookup('proto', proto_id, start, stop))
+    if kind == 'iface':
+        names = index.store.interface_names
+        if node[1] not in names:
+            return []
+        return index.lookup('iface', names.index(node[1]), start, stop)
+    return index.lookup(kind, node[1], start, stop)
+
+
+def _intersect(left: List[int], right: List[int]) -> List[int]:
+    """Intersección de dos listas ordenadas, en O(corta * log larga)."""
+    if len(left) > len(right):
+        left, right = right, left
+    result = []
+    position = 0
+    size = len(right)
+    for seq in left:
+        position = bisect_left(right, seq, position)
+        if position == size:
+            break
+        if right[position] == seq:
+            result.append(seq)
+    return result
+
+
+class FilteredPackets:
+    """Vista del almacén con solo los paquetes que cumplen un filtro.
+
+    Ofrece la interfaz que usa la lista virtual (``total``, ``len`` y
+    ``newest``). Al crearla se consulta todo el almacén con los índices;
+    después ``update`` evalúa solo las secuencias nuevas, de modo que el
+    filtro se mantiene al día mientras la captura continúa. ``protocols``
+    son los nombres de protocolo admitidos, además de los que ya hay en el
+    almacén.
+    """
+
+    def __init__(self, store, index: PacketIndex, text: str,
+                 protocols: Optional[Iterable[str]] = None):
+        self.store = store
+        self.index = index
+        self.text = text
+        known = list(default_classifier().labels() if protocols is None else protocols)
+        self.query = parse_display_filter(text, known + store.protocol_names)
+        self.matches = array('Q')
+        # Coincidencias descartadas por el principio (ya sobrescritas en el almacén)
+        self._dropped = 0
+        self._scanned = 0
+        self._generation = store.generation
+        self.update()
+
+    @property
+    def total(self) -> int:
+        """Coincidencias encontradas desde el inicio (crece de forma monótona)."""
+        return self._dropped + len(self.matches)
+
+    def __len__(self) -> int:
+        return len(self.matches)
+
+    def update(self) -> int:
+        """Añade las coincidencias de las filas llegadas desde la última llamada."""
+        store = self.store
+        self.index.update()
+        total = store.total
+        if store.generation != self._generation:
+            # El almacén se vació
+            self.matches = array('Q')
+            self._dropped = 0
+            self._scanned = 0
+            self._generation = store.generation
+        first = store.first_seq
+        start = max(self._scanned, first)
+        found: Union[List[int], array] = []
+        if start < total:
+            found = evaluate(self.query, self.index, start, total)
+            self.matches.extend(found)
+        self._scanned = total
+
+        matches = self.matches
+        if matches and matches[0] < first:
+            cut = bisect_left(matches, first)
+            del matches[:cut]
+            self._dropped += cut
+        return len(found)
+
+    def newest(self, offset: int, count: int) -> List[DisplayRow]:
+        """Hasta ``count`` coincidencias empezando por la más reciente - ``offset``."""
+        matches = self.matches
+        last = len(matches) - 1 - offset
+        first = max(0, last - count + 1)
+        get = self.store.get
+        return [get(matches[position]) for position in range(last, first - 1, -1)]
@@ -0,0 +1,237 @@
+import heapq
+from collections import OrderedDict, deque
+from typing import Deque, Iterable, List, Tuple, Union
+
+Port = Union[int, str]
+# (protocolo, ip A, puerto A, ip B, puerto B) con el extremo menor primero
+FlowKey = Tuple[str, str, Port, str, Port]
+
+# Columnas de un flujo en los reportes, en el orden de Flow.as_row()
+FLOW_COLUMNS = (
+    'Protocolo', 'Origen', 'Puerto Origen', 'Destino', 'Puerto Destino',
+    'Inicio', 'Fin', 'Paquetes Ida', 'Bytes Ida', 'Flags Ida',
+    'Paquetes Vuelta', 'Bytes Vuelta', 'Flags Vuelta', 'Estado'
+)
+
+# Bits de los flags TCP
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+TCP_PSH = 0x08
+TCP_ACK = 0x10
+TCP_URG = 0x20
+_TCP_FLAG_NAMES = ((TCP_FIN, 'F'), (TCP_SYN, 'S'), (TCP_RST, 'R'),
+                   (TCP_PSH, 'P'), (TCP_ACK, 'A'), (TCP_URG, 'U'))
+
+
+def format_tcp_flags(flags: int) -> str:
+    """Representa los flags TCP acumulados como letras (p. ej. "SAF")."""
+    return ''.join(name for bit, name in _TCP_FLAG_NAMES if flags & bit)
+
+
+def flow_key(protocol: str, ip_src: str, ip_dst: str, port_src: Port, port_dst: Port) -> FlowKey:
+    """Clave normalizada: los dos sentidos de una conversación dan la misma clave."""
+    if (ip_src, port_src) <= (ip_dst, port_dst):
+        return protocol, ip_src, port_src, ip_dst, port_dst
+    return protocol, ip_dst, port_dst, ip_src, port_src
+
+
+class Flow:
+    """Conversación bidireccional.
+
+    El origen es el extremo que envió el primer paquete visto; los
+    contadores "ida" corresponden a ese sentido y "vuelta" al contrario.
+    """
+
+    __slots__ = ('key', 'protocol', 'src', 'sport', 'dst', 'dport', 'first_seen', 'last_seen',
+                 'packets_fwd', 'bytes_fwd', 'flags_fwd', 'packets_rev', 'bytes_rev', 'flags_rev',
+                 'state')
+
+    def __init__(self, key: FlowKey, protocol: str, src: str, sport: Port,
+                 dst: str, dport: Port, timestamp: float):
+        self.key = key
+        self.protocol = protocol
+        self.src = src
+        self.sport = sport
+        self.dst = dst
+        self.dport = dport
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.packets_fwd = 0
+        self.bytes_fwd = 0
+        self.flags_fwd = 0
+        self.packets_rev = 0
+        self.bytes_rev = 0
+        self.flags_rev = 0
+        self.state = "Activo"
+
+    @property
+    def packets(self) -> int:
+        return self.packets_fwd + self.packets_rev
+
+    @property
+    def bytes(self) -> int:
+        return self.bytes_fwd + self.bytes_rev
+
+    @property
+    def duration(self) -> float:
+        return self.last_seen - self.first_seen
+
+    def label(self) -> str:
+        """Texto corto "origen:puerto <-> destino:puerto" para la interfaz."""
+        if isinstance(self.sport, int):
+            return f"{self.src}:{self.sport} <-> {self.dst}:{self.dport}"
+        return f"{self.src} <-> {self.dst}"
+
+    def as_row(self) -> tuple:
+        """Fila con las columnas de FLOW_COLUMNS."""
+        return (
+            self.protocol, self.src, self.sport, self.dst, self.dport,
+            f"{self.first_seen:.6f}", f"{self.last_seen:.6f}",
+            self.packets_fwd, self.bytes_fwd, format_tcp_flags(self.flags_fwd),
+            self.packets_rev, self.bytes_rev, format_tcp_flags(self.flags_rev),
+            self.state
+        )
+
+
+class FlowTable:
+    """Tabla de flujos por 5-tupla normalizada con expiración y límite de tamaño.
+
+    Los flujos se mantienen en orden de último uso (LRU), de modo que la
+    expiración por inactividad solo examina el principio de la tabla. Un
+    flujo termina por inactividad (``idle_timeout``), por duración máxima
+    (``active_timeout``, comprobada al llegar su siguiente paquete), por
+    RST, por el ACK que sigue a un FIN en cada sentido de TCP (entre tanto
+    el flujo está "Cerrando") o por desalojo cuando la tabla alcanza
+    ``max_flows``; así un barrido de puertos no hace crecer la memoria sin
+    límite. Los últimos ``keep_finished`` flujos terminados se conservan
+    para los reportes.
+
+    Solo la escribe el hilo de captura; la interfaz lee con ``snapshot()``.
+    """
+
+    SWEEP_INTERVAL = 1.0
+
+    def __init__(self, idle_timeout: float = 60.0, active_timeout: float = 1800.0,
+                 max_flows: int = 65536, keep_finished: int = 10000):
+        self.idle_timeout = idle_timeout
+        self.active_timeout = active_timeout
+        self.max_flows = max_flows
+        self.keep_finished = keep_finished
+        self._flows: "OrderedDict[FlowKey, Flow]" = OrderedDict()
+        self.finished: Deque[Flow] = deque(maxlen=keep_finished)
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self._last_sweep = 0.0
+
+    def __len__(self) -> int:
+        return len(self._flows)
+
+    def add(self, timestamp: float, protocol: str, ip_src: str, ip_dst: str,
+            port_src: Port, port_dst: Port, size: int, tcp_flags: int = 0,
+            packets: int = 1) -> Flow:
+        """Contabiliza un paquete en su flujo, creándolo si no existe.
+
+        Con muestreo por paquete, ``packets`` es el peso del paquete
+        conservado y ``size`` ya viene multiplicado por él.
+        """
+        if timestamp - self._last_sweep >= self.SWEEP_INTERVAL:
+            self.expire(timestamp)
+
+        flows = self._flows
+        key = flow_key(protocol, ip_src, ip_dst, port_src, port_dst)
+        flow = flows.get(key)
+        if flow is not None and timestamp - flow.first_seen > self.active_timeout:
+            del flows[key]
+            self._finish(flow, "Duración máxima")
+            flow = None
+        elif flow is not None and flow.state == "Cerrando" and tcp_flags & TCP_SYN:
+            # Conexión nueva con los mismos puertos antes del ACK final
+            del flows[key]
+            self._finish(flow, "Cerrado")
+            flow = None
+
+        if flow is None:
+            if len(flows) >= self.max_flows:
+                _, oldest = flows.popitem(last=False)
+                self.evicted += 1
+                self._finish(oldest, "Desalojado")
+            flow = flows[key] = Flow(key, protocol, ip_src, port_src, ip_dst, port_dst, timestamp)
+            self.created += 1
+        else:
+            flows.move_to_end(key)
+            if timestamp > flow.last_seen:
+                flow.last_seen = timestamp
+
+        if ip_src == flow.src and port_src == flow.sport:
+            flow.packets_fwd += packets
+            flow.bytes_fwd += size
+            flow.flags_fwd |= tcp_flags
+        else:
+            flow.packets_rev += packets
+            flow.bytes_rev += size
+            flow.flags_rev |= tcp_flags
+
+        if tcp_flags & TCP_RST:
+            del flows[key]
+            self._finish(flow, "Cerrado")
+        elif flow.state == "Cerrando":
+            # El ACK (sin FIN) que sigue a los dos FIN termina la conexión
+            if tcp_flags & (TCP_ACK | TCP_FIN) == TCP_ACK:
+                del flows[key]
+                self._finish(flow, "Cerrado")
+        elif flow.flags_fwd & flow.flags_rev & TCP_FIN:
+            # FIN en ambos sentidos: falta el ACK final, que se cuenta en
+            # este flujo; si no llega, la inactividad lo termina
+            flow.state = "Cerrando"
+        return flow
+
+    def expire(self, now: float) -> int:
+        """Termina los flujos inactivos desde hace más de ``idle_timeout``. Devuelve cuántos."""
+        self._last_sweep = now
+        flows = self._flows
+        limit = now - self.idle_timeout
+        count = 0
+        while flows:
+            key, flow = next(iter(flows.items()))
+            if flow.last_seen >= limit:
+                break
+            del flows[key]
+            self._finish(flow, "Cerrado" if flow.state == "Cerrando" else "Inactivo")
+            count += 1
+        self.expired += count
+        return count
+
+    def _finish(self, flow: Flow, state: str) -> None:
+        flow.state = state
+        self.finished.append(flow)
+
+    def snapshot(self) -> List[Flow]:
+        """Copia de la lista de flujos activos, segura frente al hilo de captura."""
+        while True:
+            try:
+                return list(self._flows.values())
+            except RuntimeError:
+                # La tabla cambió durante la copia; reintentar
+                continue
+
+    def top(self, count: int, finished: bool = False) -> List[Flow]:
+        """Los ``count`` flujos con más bytes (activos, y opcionalmente terminados)."""
+        flows = self.snapshot()
+        if finished:
+            flows.extend(list(self.finished))
+        return heapq.nlargest(count, flows, key=lambda flow: flow.bytes_fwd + flow.bytes_rev)
+
+    def load_finished(self, flows: Iterable[Flow]) -> None:
+        """Sustituye los terminados por ``flows``, todos, sin el límite de
+        ``keep_finished`` (sesión guardada reabierta); clear() lo restablece."""
+        self.finished = deque(flows)
+
+    def clear(self) -> None:
+        self._flows = OrderedDict()
+        self.finished = deque(maxlen=self.keep_finished)
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self._last_sweep = 0.0
@@ -0,0 +1,113 @@
+import struct
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+# Cabecera: índice de escritura (byte 0) e índice de lectura (byte 64), en
+# líneas de caché distintas para que productor y consumidor no se pisen
+_HEAD_OFFSET = 0
+_TAIL_OFFSET = 64
+_HEADER_SIZE = 128
+_index = struct.Struct("<Q")
+# Cabecera de cada casilla: marca de tiempo, longitud original, bytes copiados,
+# índice de la interfaz de captura, peso de muestreo
+_slot_header = struct.Struct("<dIIHH")
+_SLOT_HEADER_SIZE = _slot_header.size
+_pack_slot_header = _slot_header.pack_into
+_pack_index = _index.pack_into
+_unpack_index = _index.unpack_from
+
+# (marca de tiempo, longitud original, índice de interfaz, peso, trama posiblemente recortada)
+RingFrame = Tuple[float, int, int, int, bytes]
+
+
+class FrameRing:
+    """Anillo de tramas en memoria compartida, un productor y un consumidor.
+
+    Cada casilla tiene tamaño fijo y guarda hasta ``snaplen`` bytes de la
+    trama (las cabeceras bastan para decodificarla) junto con su longitud
+    original, el índice de la interfaz donde se capturó y su peso de
+    muestreo. Los índices son contadores de 64 bits que solo crecen: el
+    productor escribe la casilla y después publica el nuevo índice de
+    escritura, y el consumidor publica el de lectura tras copiar un lote.
+    Se apoya en que las escrituras alineadas de 8 bytes son atómicas y se
+    ven en orden (x86-64); no usa bloqueos.
+    """
+
+    def __init__(self, slots: int = 16384, snaplen: int = 256, name: Optional[str] = None):
+        self.slots = slots
+        self.snaplen = snaplen
+        self.slot_size = _slot_header.size + snaplen
+        size = _HEADER_SIZE + slots * self.slot_size
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            _index.pack_into(self.shm.buf, _HEAD_OFFSET, 0)
+            _index.pack_into(self.shm.buf, _TAIL_OFFSET, 0)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self._buf = self.shm.buf
+        # Copias locales de los índices propios y del último índice ajeno leído
+        self._head = _index.unpack_from(self._buf, _HEAD_OFFSET)[0]
+        self._tail = _index.unpack_from(self._buf, _TAIL_OFFSET)[0]
+
+    def put(self, frame: bytes, timestamp: float, length: Optional[int] = None,
+            interface: int = 0, weight: int = 1) -> bool:
+        """Escribe una trama (productor). Devuelve False si el anillo está lleno.
+
+        ``length`` es la longitud original si ``frame`` ya llega recortada y
+        ``weight`` cuántos paquetes representa (muestreo).
+        """
+        head = self._head
+        slots = self.slots
+        if head - self._tail >= slots:
+            self._tail = _unpack_index(self._buf, _TAIL_OFFSET)[0]
+            if head - self._tail >= slots:
+                return False
+        caplen = len(frame)
+        if length is None:
+            length = caplen
+        if caplen > self.snaplen:
+            caplen = self.snaplen
+        offset = _HEADER_SIZE + (head % slots) * self.slot_size
+        _pack_slot_header(self._buf, offset, timestamp, length, caplen, interface, weight)
+        start = offset + _SLOT_HEADER_SIZE
+        self._buf[start:start + caplen] = frame if caplen == len(frame) else frame[:caplen]
+        head += 1
+        self._head = head
+        _pack_index(self._buf, _HEAD_OFFSET, head)
+        return True
+
+    def get_batch(self, max_items: int = 1024) -> List[RingFrame]:
+        """Lee hasta ``max_items`` tramas (consumidor)."""
+        tail = self._tail
+        head = _index.unpack_from(self._buf, _HEAD_OFFSET)[0]
+        count = min(head - tail, max_items)
+        if count <= 0:
+            return []
+        buf = self._buf
+        slots = self.slots
+        slot_size = self.slot_size
+        header_size = _slot_header.size
+        unpack = _slot_header.unpack_from
+        batch = []
+        for seq in range(tail, tail + count):
+            offset = _HEADER_SIZE + (seq % slots) * slot_size
+            timestamp, length, caplen, interface, weight = unpack(buf, offset)
+            start = offset + header_size
+            batch.append((timestamp, length, interface, weight, bytes(buf[start:start + caplen])))
+        self._tail = tail + count
+        _index.pack_into(buf, _TAIL_OFFSET, tail + count)
+        return batch
+
+    def __len__(self) -> int:
+        """Tramas pendientes de leer."""
+        return (_index.unpack_from(self._buf, _HEAD_OFFSET)[0]
+                - _index.unpack_from(self._buf, _TAIL_OFFSET)[0])
+
+    def close(self) -> None:
+        self._buf = None
+        self.shm.close()
+
+    def unlink(self) -> None:
+        """Libera el segmento compartido (solo el proceso que lo creó)."""
+        self.shm.unlink()
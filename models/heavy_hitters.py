@@ -0,0 +1,190 @@
+from itertools import islice
+from typing import Dict, Hashable, List, Optional, Tuple
+
+# (elemento, conteo estimado, error máximo de la estimación)
+HeavyHitter = Tuple[Hashable, int, int]
+
+
+class _Bucket:
+    """Grupo de elementos con el mismo conteo, enlazado en orden creciente."""
+
+    __slots__ = ('count', 'items', 'prev', 'next')
+
+    def __init__(self, count: int):
+        self.count = count
+        self.items: Dict[Hashable, int] = {}  # elemento -> error
+        self.prev: Optional['_Bucket'] = None
+        self.next: Optional['_Bucket'] = None
+
+
+class SpaceSaving:
+    """Conteo aproximado de los elementos más frecuentes con memoria fija.
+
+    Algoritmo Space-Saving (Metwally, Agrawal y El Abbadi, 2005) sobre la
+    estructura Stream-Summary: como mucho ``capacity`` contadores agrupados
+    en cubetas de igual conteo, enlazadas en orden. Cada ``add`` es O(1) y
+    ``top(k)`` recorre las cubetas desde la mayor, en O(k).
+
+    Cotas de error, con N paquetes contados y m = ``capacity``:
+
+    - La estimación nunca es menor que el conteo real y lo supera como mucho
+      en el error guardado para ese elemento, que a su vez es <= N/m.
+    - Todo elemento con conteo real > N/m está en la tabla.
+    - El conteo real está en [estimación - error, estimación].
+
+    Mientras haya menos de ``capacity`` elementos distintos los conteos son
+    exactos. Las cotas valen igual con pesos (``add(item, weight)``, para
+    paquetes muestreados que cuentan por varios) tomando N como la suma de
+    los pesos. Lo escribe solo el hilo de captura; ``top`` puede llamarse
+    desde otro hilo y devuelve una vista aproximada del instante.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        if capacity < 1:
+            raise ValueError("capacity debe ser al menos 1")
+        self.capacity = capacity
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._index
+
+    @property
+    def error_bound(self) -> int:
+        """Error máximo posible de cualquier estimación (N/m)."""
+        return self.total // self.capacity
+
+    def add(self, item: Hashable, weight: int = 1) -> None:
+        """Cuenta una aparición de ``item`` (o ``weight`` apariciones)."""
+        if weight != 1:
+            self._add_weighted(item, weight)
+            return
+        self.total += 1
+        index = self._index
+        bucket = index.get(item)
+        if bucket is not None:
+            error = bucket.items.pop(item)
+        elif len(index) < self.capacity:
+            # Elemento nuevo con sitio libre: entra con conteo 1 y error 0
+            first = self._min
+            if first is None or first.count != 1:
+                first = self._link_first(1)
+            first.items[item] = 0
+            index[item] = first
+            return
+        else:
+            # Reemplazar un elemento del conteo mínimo; hereda su conteo como error
+            bucket = self._min
+            evicted, _ = bucket.items.popitem()
+            del index[evicted]
+            error = bucket.count
+
+        count = bucket.count + 1
+        target = bucket.next
+        if target is None or target.count != count:
+            if not bucket.items:
+                # La cubeta se quedaría vacía: basta con subir su conteo
+                bucket.count = count
+                bucket.items[item] = error
+                index[item] = bucket
+                return
+            target = self._link_after(bucket, count)
+        target.items[item] = error
+        index[item] = target
+        if not bucket.items:
+            self._unlink(bucket)
+
+    def _add_weighted(self, item: Hashable, weight: int) -> None:
+        """``add`` con peso: el elemento puede saltar varias cubetas hacia arriba."""
+        self.total += weight
+        index = self._index
+        bucket = index.get(item)
+        if bucket is not None:
+            error = bucket.items.pop(item)
+            count = bucket.count + weight
+        elif len(index) < self.capacity:
+            error = 0
+            count = weight
+        else:
+            bucket = self._min
+            evicted, _ = bucket.items.popitem()
+            del index[evicted]
+            error = bucket.count
+            count = error + weight
+
+        # Última cubeta con conteo <= count, avanzando desde la de partida
+        node = bucket
+        following = node.next if node is not None else self._min
+        while following is not None and following.count <= count:
+            node = following
+            following = node.next
+        if node is not None and node.count == count:
+            target = node
+        elif node is None:
+            target = self._link_first(count)
+        else:
+            target = self._link_after(node, count)
+        target.items[item] = error
+        index[item] = target
+        if bucket is not None and not bucket.items:
+            self._unlink(bucket)
+
+    def _link_first(self, count: int) -> _Bucket:
+        bucket = _Bucket(count)
+        bucket.next = self._min
+        if self._min is not None:
+            self._min.prev = bucket
+        else:
+            self._max = bucket
+        self._min = bucket
+        return bucket
+
+    def _link_after(self, node: _Bucket, count: int) -> _Bucket:
+        bucket = _Bucket(count)
+        bucket.prev = node
+        bucket.next = node.next
+        if node.next is not None:
+            node.next.prev = bucket
+        else:
+            self._max = bucket
+        node.next = bucket
+        return bucket
+
+    def _unlink(self, bucket: _Bucket) -> None:
+        if bucket.prev is not None:
+            bucket.prev.next = bucket.next
+        else:
+            self._min = bucket.next
+        if bucket.next is not None:
+            bucket.next.prev = bucket.prev
+        else:
+            self._max = bucket.prev
+
+    def estimate(self, item: Hashable) -> int:
+        """Conteo estimado (cota superior); 0 si no está en la tabla."""
+        bucket = self._index.get(item)
+        return bucket.count if bucket is not None else 0
+
+    def top(self, k: int) -> List[HeavyHitter]:
+        """Los ``k`` elementos con mayor conteo estimado, de mayor a menor."""
+        rows: List[HeavyHitter] = []
+        seen = set()
+        bucket = self._max
+        while bucket is not None and len(rows) < k:
+            count = bucket.count
+            # Copia de solo los elementos necesarios; se hace de una vez para
+            # no iterar mientras el hilo de captura modifica la cubeta
+            for item, error in list(islice(bucket.items.items(), k - len(rows))):
+                if item not in seen:
+                    seen.add(item)
+                    rows.append((item, count, error))
+            bucket = bucket.prev
+        return rows
+
+    def clear(self) -> None:
+        self._index: Dict[Hashable, _Bucket] = {}
+        self._min: Optional[_Bucket] = None
+        self._max: Optional[_Bucket] = None
+        self.total = 0
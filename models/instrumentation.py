@@ -0,0 +1,261 @@
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Cada potencia de dos se divide en SUB_BUCKETS intervalos: los percentiles
+# tienen un error relativo menor del 25 % con solo 4 casillas por octava
+SUB_BUCKETS = 4
+BUCKETS = SUB_BUCKETS * 64
+
+# Etapas de la ruta de procesamiento, en el orden en que se muestran:
+# (nombre, unidad, descripción)
+STAGES = (
+    ("diseccion", "ns", "Disección de Scapy (recepción del paquete)"),
+    ("decodificacion", "ns", "Lectura de cabeceras"),
+    ("clasificacion", "ns", "Clasificación del protocolo"),
+    ("conteo", "ns", "Contadores, tráfico y flujos"),
+    ("encolado", "ns", "Paso al buffer / anillo"),
+    ("drenado", "ns", "Buffer al almacén (por ciclo)"),
+    ("filtro", "ns", "Filtro de visualización (por ciclo)"),
+    ("lista", "ns", "Lista de paquetes (por ciclo)"),
+    ("ips", "ns", "Top de IPs (por ciclo)"),
+    ("estadisticas", "ns", "Panel de estadísticas (por ciclo)"),
+    ("grafica", "ns", "Gráfica y flujos (por segundo)"),
+    ("tick", "ns", "Ciclo de interfaz completo"),
+    ("retraso_tick", "ns", "Retraso del ciclo sobre lo programado"),
+    ("latencia", "ns", "Captura hasta visualización"),
+    ("cola", "paquetes", "Paquetes pendientes al drenar"),
+)
+
+# Marcas de latencia pendientes como máximo (las más antiguas se pierden)
+MAX_MARKS = 4096
+
+
+def bucket_index(value: int) -> int:
+    """Casilla de un valor: lineal hasta SUB_BUCKETS, logarítmica después."""
+    if value < SUB_BUCKETS:
+        return value if value > 0 else 0
+    exponent = value.bit_length() - 1
+    return (exponent - 1) * SUB_BUCKETS + ((value >> (exponent - 2)) & (SUB_BUCKETS - 1))
+
+
+def bucket_bounds(index: int) -> Tuple[int, int]:
+    """Intervalo [mínimo, máximo) de valores de una casilla."""
+    if index < SUB_BUCKETS:
+        return index, index + 1
+    exponent = index // SUB_BUCKETS + 1
+    low = (SUB_BUCKETS + index % SUB_BUCKETS) << (exponent - 2)
+    return low, low + (1 << (exponent - 2))
+
+
+class Histogram:
+    """Histograma logarítmico de enteros (nanosegundos o elementos).
+
+    ``record`` cuesta una indexación y tres sumas, y la memoria es fija
+    (BUCKETS contadores), así que puede quedarse activo durante toda la
+    captura. Cada histograma lo escribe un solo hilo; la lectura desde la
+    interfaz es aproximada, sin cerrojos.
+    """
+
+    __slots__ = ('unit', 'counts', 'count', 'total', 'max')
+
+    def __init__(self, unit: str = "ns"):
+        self.unit = unit
+        self.clear()
+
+    def clear(self) -> None:
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value: int) -> None:
+        self.counts[bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, state: Tuple[List[int], int, int, int]) -> None:
+        """Suma el estado de otro histograma (de ``take``)."""
+        counts, count, total, maximum = state
+        mine = self.counts
+        for index, value in enumerate(counts):
+            if value:
+                mine[index] += value
+        self.count += count
+        self.total += total
+        if maximum > self.max:
+            self.max = maximum
+
+    def take(self) -> Tuple[List[int], int, int, int]:
+        """Devuelve el estado acumulado y lo reinicia (informes de los procesos)."""
+        state = (self.counts, self.count, self.total, self.max)
+        self.clear()
+        return state
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction: float) -> float:
+        """Valor aproximado (punto medio de la casilla) del percentil indicado."""
+        count = self.count
+        if not count:
+            return 0.0
+        rank = max(1, int(fraction * count + 0.5))
+        seen = 0
+        for index, value in enumerate(list(self.counts)):
+            seen += value
+            if seen >= rank:
+                low, high = bucket_bounds(index)
+                return min((low + high - 1) / 2, self.max)
+        return float(self.max)
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "unidad": self.unit,
+            "muestras": self.count,
+            "media": round(self.mean(), 1),
+            "p50": self.percentile(0.50),
+            "p90": self.percentile(0.90),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
+
+
+class StageProbe:
+    """Muestreo de las etapas por paquete de un hilo productor.
+
+    ``due`` indica si el paquete actual se mide (1 de cada ``every``), con
+    una resta y una comparación; los paquetes no muestreados no llaman al
+    reloj. Cada hilo que procesa paquetes usa su propia sonda.
+    """
+
+    __slots__ = ('instrumentation', 'every', '_countdown', '_histograms')
+
+    def __init__(self, instrumentation: 'Instrumentation', every: int):
+        self.instrumentation = instrumentation
+        self.every = every
+        self._countdown = every
+        self._histograms = instrumentation.histograms
+
+    def due(self) -> bool:
+        self._countdown -= 1
+        if self._countdown:
+            return False
+        self._countdown = self.every
+        return True
+
+    def record(self, name: str, nanoseconds: int) -> None:
+        self._histograms[name].record(nanoseconds)
+
+    def mark(self, position: int, nanoseconds: int) -> None:
+        """Anota que el paquete número ``position`` salió del hilo productor."""
+        self.instrumentation.marks.append((position, nanoseconds))
+
+
+class Instrumentation:
+    """Histogramas de tiempos de la ruta de procesamiento y de la interfaz.
+
+    Las etapas por paquete (disección, decodificación, clasificación,
+    conteo, encolado) se miden en 1 de cada ``sample_every`` paquetes a
+    través de una StageProbe; las etapas por ciclo de la interfaz se miden
+    siempre, con ``stage``. La latencia de captura a visualización se
+    obtiene de las marcas de las sondas: el productor anota la posición del
+    paquete muestreado y, cuando el consumidor la ha pasado a la vista
+    (``consumed`` + ``displayed``), se registra el tiempo transcurrido.
+    ``sample_every`` = 0 desactiva el muestreo por paquete.
+    """
+
+    DEFAULT_SAMPLE_EVERY = 64
+
+    def __init__(self, sample_every: int = DEFAULT_SAMPLE_EVERY):
+        self.sample_every = sample_every
+        self.histograms: Dict[str, Histogram] = {
+            name: Histogram(unit) for name, unit, _ in STAGES
+        }
+        self.marks: Deque[Tuple[int, int]] = deque(maxlen=MAX_MARKS)
+        self._consumed = 0
+        self.started = time.time()
+
+    def probe(self) -> Optional[StageProbe]:
+        """Sonda para un hilo productor, o None si el muestreo está desactivado."""
+        if self.sample_every <= 0:
+            return None
+        return StageProbe(self, self.sample_every)
+
+    def record(self, name: str, value: int) -> None:
+        self.histograms[name].record(value)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Mide el bloque con el reloj monotónico en la etapa ``name``."""
+        started = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.histograms[name].record(time.perf_counter_ns() - started)
+
+    def merge(self, states: Dict[str, Tuple[List[int], int, int, int]]) -> None:
+        """Suma los histogramas enviados por los procesos de decodificación."""
+        for name, state in states.items():
+            self.histograms[name].merge(state)
+
+    def take(self, names: Iterable[str]) -> Dict[str, Tuple[List[int], int, int, int]]:
+        """Extrae y reinicia los histogramas ``names`` que tengan datos (en los procesos)."""
+        histograms = self.histograms
+        return {name: histograms[name].take() for name in names if histograms[name].count}
+
+    def consumed(self, position: int) -> None:
+        """El consumidor ya pasó al almacén los paquetes hasta ``position``."""
+        self._consumed = position
+
+    def reset_marks(self) -> None:
+        """Descarta las marcas pendientes (las posiciones vuelven a empezar)."""
+        self.marks.clear()
+        self._consumed = 0
+
+    def displayed(self) -> None:
+        """Registra la latencia de las marcas que ya llegaron a la vista."""
+        marks = self.marks
+        consumed = self._consumed
+        if not marks or marks[0][0] > consumed:
+            return
+        now = time.perf_counter_ns()
+        latency = self.histograms["latencia"]
+        try:
+            while marks[0][0] <= consumed:
+                latency.record(now - marks.popleft()[1])
+        except IndexError:
+            pass
+
+    def clear(self) -> None:
+        for histogram in self.histograms.values():
+            histogram.clear()
+        self.reset_marks()
+        self.started = time.time()
+
+    def rows(self) -> List[Tuple[str, str, Dict[str, float]]]:
+        """(nombre, descripción, resumen) de cada etapa, en el orden de STAGES."""
+        return [(name, description, self.histograms[name].summary())
+                for name, _, description in STAGES]
+
+    def report(self, extra: Optional[Dict] = None) -> Dict:
+        """Resumen serializable en JSON; ``extra`` añade otros datos de la sesión."""
+        report = {
+            "generado": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "segundos": round(time.time() - self.started, 1),
+            "muestreo": self.sample_every,
+            "etapas": {name: summary for name, _, summary in self.rows()},
+        }
+        if extra:
+            report.update(extra)
+        return report
+
+    def save(self, path: str, extra: Optional[Dict] = None) -> str:
+        """Escribe ``report`` en un fichero JSON. Devuelve la ruta."""
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.report(extra), handle, ensure_ascii=False, indent=2)
+        return path
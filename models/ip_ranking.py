@@ -0,0 +1,86 @@
+import heapq
+from typing import Iterable, List, Mapping, Optional, Tuple
+
+IpRow = Tuple[str, int]
+
+
+class IpRanking:
+    """Clasificación incremental de las IPs con más paquetes.
+
+    Mantiene ordenadas solo las K primeras IPs (K = páginas hasta la actual por
+    tamaño de página). Como los contadores solo crecen, una IP que no estaba en
+    el top y no ha cambiado no puede entrar en él, así que basta con recalcular
+    sobre el top actual más las IPs modificadas desde el último ciclo.
+    """
+
+    def __init__(self, page_size: int = 100):
+        self.page_size = page_size
+        self.page = 0
+        self.total = 0
+        self._top: List[IpRow] = []
+
+    @property
+    def limit(self) -> int:
+        return (self.page + 1) * self.page_size
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-self.total // self.page_size))
+
+    def update(self, counts: Mapping[str, int], dirty: Iterable[str]) -> bool:
+        """Incorpora las IPs modificadas. Devuelve True si la página visible cambió."""
+        dirty = set(dirty)
+        if not dirty:
+            return False
+        previous = (self.page_rows(), self.page_count)
+        candidates = {ip for ip, _ in self._top}
+        candidates.update(dirty)
+        self._top = heapq.nsmallest(
+            self.limit,
+            ((ip, counts.get(ip, 0)) for ip in candidates),
+            key=lambda row: (-row[1], row[0])
+        )
+        self.total = len(counts)
+        return (self.page_rows(), self.page_count) != previous
+
+    def rebuild(self, counts: Mapping[str, int]) -> None:
+        """Recalcula el top completo (al cambiar de página o tras limpiar)."""
+        snapshot = dict(counts)
+        self.total = len(snapshot)
+        self._top = heapq.nsmallest(
+            self.limit,
+            snapshot.items(),
+            key=lambda row: (-row[1], row[0])
+        )
+
+    def load(self, top: Iterable[IpRow], total: int) -> bool:
+        """Toma un top ya ordenado (p. ej. de un contador Space-Saving).
+
+        Devuelve True si la página visible cambió.
+        """
+        previous = (self.page_rows(), self.page_count)
+        self._top = list(top)
+        self.total = total
+        return (self.page_rows(), self.page_count) != previous
+
+    def set_page(self, page: int, counts: Optional[Mapping[str, int]] = None) -> None:
+        """Cambia la página visible, ampliando el top si hace falta.
+
+        Sin ``counts`` el top lo aporta después ``load``.
+        """
+        page = max(0, min(page, self.page_count - 1))
+        if page != self.page:
+            self.page = page
+            if counts is not None and len(self._top) < self.limit:
+                self.rebuild(counts)
+
+    def page_rows(self) -> List[IpRow]:
+        """Filas (ip, paquetes) de la página visible."""
+        start = self.page * self.page_size
+        return self._top[start:start + self.page_size]
+
+    def clear(self) -> None:
+        """Reinicia la clasificación."""
+        self.page = 0
+        self.total = 0
+        self._top = []
@@ -1,18 +1,17 @@
 import time
-from typing import Dict, Optional, Tuple
 
 class NetworkStats:
-    def __init__(self):
-        self.start_time = 0
-        self.total_bytes = 0
-        self.packet_count = 0
-
-    def get_elapsed_time(self) -> str:
-        """Obtiene el tiempo transcurrido desde el inicio de la captura."""
-        if self.start_time == 0:
+    """Formato legible de los contadores.
+
+    Los contadores en sí están en el StatsEngine del modelo; aquí solo se
+    convierten a texto los valores de una instantánea.
+    """
+
+    def format_elapsed(self, seconds: float) -> str:
+        """Formatea como HH:MM:SS el tiempo transcurrido de una captura."""
+        if seconds <= 0:
             return "00:00:00"
-        elapsed = time.time() - self.start_time
-        return time.strftime("%H:%M:%S", time.gmtime(elapsed))
+        return time.strftime("%H:%M:%S", time.gmtime(seconds))
 
     def format_size(self, size_bytes: int) -> str:
         """Formatea el tamaño en bytes a una forma legible."""
@@ -25,23 +24,47 @@ class NetworkStats:
         else:
             return f"{size_bytes / (1024**3):.1f} GB"
 
-    def calculate_other_protocols(self, protocol_counts: Dict[str, int]) -> int:
-        """Calcula la cantidad de paquetes de protocolos no estándar."""
-        standard_protocols = ['TCP', 'UDP', 'ICMP', 'ARP']
-        standard_count = sum(protocol_counts.get(proto, 0) for proto in standard_protocols)
-        return max(0, self.packet_count - standard_count)
-
-    def update_stats(self, bytes_count: int) -> None:
-        """Actualiza las estadísticas con nuevos datos."""
-        self.total_bytes += bytes_count
-        self.packet_count += 1
-
-    def reset_stats(self) -> None:
-        """Reinicia todas las estadísticas."""
-        self.start_time = 0
-        self.total_bytes = 0
-        self.packet_count = 0
-
-    def start_counting(self) -> None:
-        """Inicia el conteo de tiempo."""
-        self.start_time = time.time()
\ No newline at end of file
+    def format_rate(self, bits_per_second: float) -> str:
+        """Formatea una tasa en bits por segundo a una forma legible."""
+        if bits_per_second < 1000:
+            return f"{bits_per_second:.0f} bit/s"
+        elif bits_per_second < 1000**2:
+            return f"{bits_per_second / 1000:.1f} kbit/s"
+        elif bits_per_second < 1000**3:
+            return f"{bits_per_second / (1000**2):.1f} Mbit/s"
+        else:
+            return f"{bits_per_second / (1000**3):.2f} Gbit/s"
+
+    def format_duration(self, nanoseconds: float) -> str:
+        """Formatea una duración en nanosegundos (ns, µs, ms o s)."""
+        if nanoseconds < 1000:
+            return f"{nanoseconds:.0f} ns"
+        elif nanoseconds < 1000**2:
+            return f"{nanoseconds / 1000:.1f} µs"
+        elif nanoseconds < 1000**3:
+            return f"{nanoseconds / (1000**2):.1f} ms"
+        else:
+            return f"{nanoseconds / (1000**3):.2f} s"
+
+    def format_interface(self, interface) -> str:
+        """Formatea los contadores de una interfaz (InterfaceStats) en una línea corta."""
+        text = f"{interface.name}: {interface.packets} paq., {self.format_size(interface.bytes)}"
+        if interface.kernel.available:
+            text += f", {interface.kernel.dropped} desc."
+        return text
+
+    def format_sampling(self, sampler) -> str:
+        """Formatea el muestreo vigente (PacketSampler, o None si no se muestrea)."""
+        if sampler is None:
+            return "todos los paquetes"
+        mode = sampler.mode + (", adaptativo" if sampler.adaptive else "")
+        return f"1 de {sampler.every} ({mode}), {sampler.effective_rate:.1%} conservado"
+
+    def format_session_store(self, store) -> str:
+        """Formatea el estado de la base de sesiones (SessionStore)."""
+        session_id = store.session_id or store.last_session_id
+        text = f"Sesión #{session_id} en {store.path}" if session_id else f"Sesiones en {store.path}"
+        text += f", {store.written} escrituras, {store.dropped} omitidas"
+        if store.error:
+            text += f" (error: {store.error})"
+        return text
@@ -0,0 +1,52 @@
+from collections import deque
+from typing import Any, List, Optional
+
+
+class PacketBuffer:
+    """Buffer circular acotado entre el hilo de captura y el hilo de la interfaz.
+
+    El productor solo añade elementos; cuando el buffer está lleno se descarta
+    el elemento más antiguo y se contabiliza en ``dropped``. El consumidor
+    extrae lotes completos en cada ciclo de actualización.
+    """
+
+    def __init__(self, capacity: int = 65536):
+        self.capacity = capacity
+        self._items: deque = deque(maxlen=capacity)
+        self.pushed = 0
+        self.dropped = 0
+        self.peak = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def push(self, item: Any) -> None:
+        """Añade un elemento; si el buffer está lleno se pierde el más antiguo."""
+        depth = len(self._items)
+        if depth >= self.capacity:
+            self.dropped += 1
+        elif depth >= self.peak:
+            self.peak = depth + 1
+        self._items.append(item)
+        self.pushed += 1
+
+    def drain(self, max_items: Optional[int] = None) -> List[Any]:
+        """Extrae hasta ``max_items`` elementos en orden de llegada."""
+        items = self._items
+        count = len(items) if max_items is None else min(max_items, len(items))
+        popleft = items.popleft
+        batch = []
+        append = batch.append
+        try:
+            for _ in range(count):
+                append(popleft())
+        except IndexError:
+            pass
+        return batch
+
+    def clear(self) -> None:
+        """Vacía el buffer y reinicia los contadores."""
+        self._items.clear()
+        self.pushed = 0
+        self.dropped = 0
+        self.peak = 0
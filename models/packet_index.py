@@ -0,0 +1,106 @@
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from itertools import count
+from typing import Dict, Hashable, List
+
+from models.packet_store import FLAG_DST, FLAG_PORTS, FLAG_SRC
+
+# Tipos de índice: dirección de origen/destino (entero de 128 bits),
+# puerto de origen/destino, protocolo e interfaz (identificadores del almacén)
+INDEX_KINDS = ('src', 'dst', 'sport', 'dport', 'proto', 'iface')
+
+
+class PacketIndex:
+    """Índices invertidos sobre el almacén de paquetes.
+
+    Para cada valor de origen, destino, puertos, protocolo e interfaz guarda la lista
+    ordenada de números de secuencia de los paquetes que lo tienen (un
+    ``array('Q')``, 8 bytes por entrada y tipo). ``update`` indexa solo las
+    filas llegadas desde la última llamada, y ``lookup`` corta la lista de
+    un valor a un rango de secuencias con bisect, sin recorrer el almacén.
+
+    Las secuencias que el anillo del almacén ya sobrescribió se descartan
+    una vez por vuelta del anillo (``_compact``), así que la memoria sigue
+    acotada por la capacidad del almacén. Si el almacén se vacía (cambia su
+    ``generation``), el índice vuelve a empezar en la siguiente llamada,
+    aunque entre tanto haya recibido más filas de las indexadas. Se usa
+    desde el hilo de la interfaz, el mismo que llena el almacén con drain().
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.clear()
+
+    def clear(self) -> None:
+        self._lists: Dict[str, Dict[Hashable, array]] = {
+            kind: defaultdict(lambda: array('Q')) for kind in INDEX_KINDS
+        }
+        self.indexed = 0
+        self._compacted = 0
+        self.generation = self.store.generation
+
+    def entries(self) -> int:
+        """Número total de entradas en los índices."""
+        return sum(len(seqs) for lists in self._lists.values() for seqs in lists.values())
+
+    def update(self) -> int:
+        """Indexa las filas nuevas del almacén. Devuelve cuántas."""
+        store = self.store
+        if store.generation != self.generation:
+            # El almacén se vació (Limpiar o sesión abierta)
+            self.clear()
+        total = store.total
+        start = max(self.indexed, store.first_seq)
+        if start >= total:
+            return 0
+
+        src_index = self._lists['src']
+        dst_index = self._lists['dst']
+        sport_index = self._lists['sport']
+        dport_index = self._lists['dport']
+        proto_index = self._lists['proto']
+        iface_index = self._lists['iface']
+        seq = start
+        for begin, end in store.segments(start, total):
+            rows = zip(
+                count(seq), store.flags[begin:end], store.protocols[begin:end],
+                store.src_hi[begin:end], store.src_lo[begin:end],
+                store.dst_hi[begin:end], store.dst_lo[begin:end],
+                store.sports[begin:end], store.dports[begin:end], store.interfaces[begin:end]
+            )
+            for row_seq, flags, protocol, src_hi, src_lo, dst_hi, dst_lo, sport, dport, iface in rows:
+                proto_index[protocol].append(row_seq)
+                iface_index[iface].append(row_seq)
+                if flags & FLAG_SRC:
+                    src_index[src_hi << 64 | src_lo].append(row_seq)
+                if flags & FLAG_DST:
+                    dst_index[dst_hi << 64 | dst_lo].append(row_seq)
+                if flags & FLAG_PORTS:
+                    sport_index[sport].append(row_seq)
+                    dport_index[dport].append(row_seq)
+            seq += end - begin
+        self.indexed = total
+
+        if store.first_seq - self._compacted >= store.capacity:
+            self._compact(store.first_seq)
+        return total - start
+
+    def _compact(self, first_seq: int) -> None:
+        """Elimina las secuencias ya sobrescritas en el almacén."""
+        for lists in self._lists.values():
+            for key in list(lists):
+                seqs = lists[key]
+                cut = bisect_left(seqs, first_seq)
+                if cut == len(seqs):
+                    del lists[key]
+                elif cut:
+                    del seqs[:cut]
+        self._compacted = first_seq
+
+    def lookup(self, kind: str, value: Hashable, start: int, stop: int) -> List[int]:
+        """Secuencias en [start, stop) con ese valor, en orden creciente."""
+        seqs = self._lists[kind].get(value)
+        if not seqs:
+            return []
+        return seqs[bisect_left(seqs, start):bisect_left(seqs, stop)].tolist()
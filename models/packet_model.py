@@ -1,141 +1,293 @@
-from scapy.all import sniff, Ether, ARP  # type: ignore
-from scapy.layers.inet import IP, TCP, UDP, ICMP  # type: ignore
+import heapq
 import time
 from collections import defaultdict
-import queue
-from typing import Dict, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional, Union
+from models.raw_decoder import DecodedFrame, decode_frame, transport_payload
+from models.protocol_classifier import ProtocolClassifier, default_classifier
+from models.packet_buffer import PacketBuffer
+from models.traffic_series import TrafficSeries
+from models.flow_table import FlowTable, flow_key
+from models.heavy_hitters import SpaceSaving
+from models.stats_engine import StatsEngine
+from models.instrumentation import Instrumentation
+
+# Modos de captura disponibles
+CAPTURE_MODE_SCAPY = "scapy"
+CAPTURE_MODE_RAW = "raw"
+
+# Capas de Scapy que usa process_packet. No se importan con el módulo:
+# load_scapy_layers las carga (desde scapy.layers, no scapy.all) la
+# primera vez que hacen falta, así el modo rápido y el arranque no pagan
+# la importación de Scapy
+ARP = IP = TCP = UDP = ICMP = IPv6 = None
+
+
+def load_scapy_layers() -> None:
+    """Importa las capas de Scapy necesarias para diseccionar la captura."""
+    global ARP, IP, TCP, UDP, ICMP, IPv6
+    if IPv6 is not None:
+        return
+    from scapy.layers.l2 import ARP as arp  # type: ignore
+    from scapy.layers.inet import IP as ip, TCP as tcp, UDP as udp, ICMP as icmp  # type: ignore
+    from scapy.layers.inet6 import IPv6 as ipv6  # type: ignore
+    ARP, IP, TCP, UDP, ICMP = arp, ip, tcp, udp, icmp
+    IPv6 = ipv6
+
+
+def decode_packet(packet) -> DecodedFrame:
+    """Lee las capas de un paquete diseccionado por Scapy.
+
+    Devuelve la misma tupla que decode_frame: para TCP y UDP los puertos
+    son enteros y el protocolo es "TCP"/"UDP" sin clasificar.
+    """
+    if ARP in packet:
+        layer = packet[ARP]
+        return "ARP", layer.psrc, layer.pdst, "ARP", "ARP", 0
+    if IP in packet:
+        ip_layer = packet[IP]
+        if TCP in packet:
+            layer = packet[TCP]
+            return "TCP", ip_layer.src, ip_layer.dst, layer.sport, layer.dport, int(layer.flags) & 0x3F
+        if UDP in packet:
+            layer = packet[UDP]
+            return "UDP", ip_layer.src, ip_layer.dst, layer.sport, layer.dport, 0
+        if ICMP in packet:
+            return "ICMP", ip_layer.src, ip_layer.dst, "ICMP", "ICMP", 0
+        return "Desconocido", ip_layer.src, ip_layer.dst, "N/A", "N/A", 0
+    if IPv6 in packet:
+        layer = packet[IPv6]
+        return "IPv6", layer.src, layer.dst, "N/A", "N/A", 0
+    return "Desconocido", "N/A", "N/A", "N/A", "N/A", 0
+
+
+def packet_payload(packet) -> bytes:
+    """Carga útil TCP/UDP de un paquete de Scapy (vacía si no la hay)."""
+    for layer in (TCP, UDP):
+        if layer in packet:
+            return bytes(packet[layer].payload)
+    return b""
+
+
+# Nombres de los números de protocolo IP más habituales
+IP_PROTOCOL_NAMES = {
+    1: 'ICMP', 2: 'IGMP', 4: 'IPv4', 6: 'TCP', 8: 'EGP',
+    17: 'UDP', 41: 'IPv6', 47: 'GRE', 50: 'ESP', 51: 'AH',
+    88: 'EIGRP', 89: 'OSPF', 132: 'SCTP'
+}
+
+def _pop_all(pending: set) -> set:
+    """Vacía ``pending`` elemento a elemento y devuelve lo extraído."""
+    popped = set()
+    try:
+        for _ in range(len(pending)):
+            popped.add(pending.pop())
+    except KeyError:
+        pass
+    return popped
+
 
 class PacketModel:
-    def __init__(self):
-        self.packet_queue = queue.Queue()
-        self.protocol_counts = defaultdict(int)
+    def __init__(self, heavy_hitters: int = 0, classifier: Optional[ProtocolClassifier] = None,
+                 instrumentation: Optional[Instrumentation] = None):
+        """``heavy_hitters`` > 0 sustituye el conteo exacto por IP por tablas
+        Space-Saving de ese número de contadores para IPs, puertos y flujos,
+        con memoria fija aunque lleguen millones de orígenes distintos.
+        ``classifier`` asigna el protocolo de aplicación a TCP/UDP (por
+        defecto, los servicios de models/servicios.txt). Con
+        ``instrumentation`` se miden las etapas de los paquetes muestreados."""
+        self.classifier = classifier or default_classifier()
+        self.probe = instrumentation.probe() if instrumentation is not None else None
+        self.packet_buffer = PacketBuffer()
+        # Paquetes, bytes y repartos por protocolo y transporte; el hilo que
+        # procesa los paquetes escribe en su propio StatsWriter
+        self.counters = StatsEngine()
+        self._counts = self.counters.writer()
         self.ip_counts = defaultdict(int)
-        self.total_bytes = 0
-        self.packet_count = 0
-        self.start_time = 0
-        self.capturing = False
-
-    def start_capture(self, filtro: Optional[str] = None) -> None:
-        """Inicia la captura de paquetes."""
-        self.capturing = True
-        self.start_time = time.time()
-        
-        try:
-            # Iniciar la captura en modo asíncrono
-            sniff(
-                filter=filtro if filtro else None,
-                prn=self.process_packet,
-                store=False,
-                stop_filter=lambda x: not self.capturing,
-                count=0
-            )
-        except Exception as e:
-            print(f"Error al iniciar la captura: {e}")
-            self.capturing = False
-
-    def stop_capture(self) -> None:
-        """Detiene la captura de paquetes."""
-        self.capturing = False
+        self.ip_dirty = set()
+        # IPs cambiadas desde el último agregado de la base de sesiones (None
+        # si no se guarda la sesión); aparte de ip_dirty, que vacía la interfaz
+        self.ip_unsaved: Optional[set] = None
+        self.ip_sketch: Optional[SpaceSaving] = None
+        self.port_sketch: Optional[SpaceSaving] = None
+        self.flow_sketch: Optional[SpaceSaving] = None
+        if heavy_hitters > 0:
+            self.ip_sketch = SpaceSaving(heavy_hitters)
+            self.port_sketch = SpaceSaving(heavy_hitters)
+            self.flow_sketch = SpaceSaving(heavy_hitters)
+        self.traffic = TrafficSeries()
+        self.flows = FlowTable()
+        # Con muestreo por paquete cada flujo recibe el peso de sus paquetes;
+        # con muestreo por flujo los flujos conservados están completos y
+        # sus contadores ya son exactos (lo fija CaptureSession)
+        self.weighted_flows = True
 
     def clear_data(self) -> None:
         """Limpia todos los datos capturados."""
-        self.protocol_counts.clear()
+        self.counters.clear()
         self.ip_counts.clear()
-        self.total_bytes = 0
-        self.packet_count = 0
-        self.start_time = 0
-        self.packet_queue = queue.Queue()
+        self.ip_dirty.clear()
+        if self.ip_unsaved is not None:
+            self.ip_unsaved.clear()
+        self.traffic.clear()
+        self.flows.clear()
+        for sketch in (self.ip_sketch, self.port_sketch, self.flow_sketch):
+            if sketch is not None:
+                sketch.clear()
+        self.packet_buffer.clear()
+
+    def process_packet(self, packet, interface: str = "", weight: int = 1) -> None:
+        """Procesa un paquete capturado en la interfaz ``interface``.
+
+        ``weight`` es cuántos paquetes representa si la captura se muestrea.
+        """
+        if IPv6 is None:
+            load_scapy_layers()
+        self._process(decode_packet, packet_payload, packet, float(packet.time), len(packet),
+                      interface, weight)
 
-    def process_packet(self, packet) -> None:
-        """Procesa un paquete capturado."""
+    def process_raw(self, frame: bytes, timestamp: Optional[float] = None,
+                    size: Optional[int] = None, interface: str = "", weight: int = 1) -> None:
+        """Procesa una trama cruda decodificando las cabeceras sin Scapy.
+
+        ``size`` es la longitud original si ``frame`` llega recortada,
+        ``interface`` el nombre de la interfaz (o fichero) de origen y
+        ``weight`` cuántos paquetes representa si la captura se muestrea.
+        """
+        self._process(decode_frame, transport_payload, frame,
+                      timestamp if timestamp is not None else time.time(),
+                      size if size is not None else len(frame), interface, weight)
+
+    def _process(self, decode: Callable, payload: Callable, packet, packet_time: float,
+                 size: int, interface: str, weight: int) -> None:
+        """Decodifica, clasifica y cuenta un paquete y entrega su registro al buffer.
+
+        ``decode`` y ``payload`` son las funciones de la ruta de origen
+        (decode_frame/transport_payload o decode_packet/packet_payload). En
+        los paquetes que elige la sonda se anota además el tiempo de cada
+        etapa; en el resto no se llama al reloj.
+        """
+        probe = self.probe
+        timed = probe is not None and probe.due()
         try:
-            timestamp = time.strftime("%H:%M:%S", time.localtime(packet.time))
-            size = len(packet)
-            protocol = "Desconocido"
-            ip_src = "N/A"
-            ip_dst = "N/A"
-            port_src = "N/A"
-            port_dst = "N/A"
-
-            # Identificar el tipo de paquete y protocolo
-            if ARP in packet:
-                protocol = "ARP"
-                arp_layer = packet[ARP]
-                ip_src = arp_layer.psrc
-                ip_dst = arp_layer.pdst
-                port_src = "ARP"
-                port_dst = "ARP"
-                
-            elif IP in packet:
-                ip_layer = packet[IP]
-                ip_src = ip_layer.src
-                ip_dst = ip_layer.dst
-                
-                if TCP in packet:
-                    tcp_layer = packet[TCP]
-                    protocol = "TCP"
-                    port_src = str(tcp_layer.sport)
-                    port_dst = str(tcp_layer.dport)
-                    # Identificar protocolos comunes por puerto
-                    if tcp_layer.dport == 80 or tcp_layer.sport == 80:
-                        protocol = "HTTP"
-                    elif tcp_layer.dport == 443 or tcp_layer.sport == 443:
-                        protocol = "HTTPS"
-                    elif tcp_layer.dport == 53 or tcp_layer.sport == 53:
-                        protocol = "DNS"
-                        
-                elif UDP in packet:
-                    udp_layer = packet[UDP]
-                    protocol = "UDP"
-                    port_src = str(udp_layer.sport)
-                    port_dst = str(udp_layer.dport)
-                    # Identificar protocolos UDP comunes
-                    if udp_layer.dport == 53 or udp_layer.sport == 53:
-                        protocol = "DNS"
-                    elif udp_layer.dport == 67 or udp_layer.dport == 68:
-                        protocol = "DHCP"
-                        
-                elif ICMP in packet:
-                    protocol = "ICMP"
-                    port_src = "ICMP"
-                    port_dst = "ICMP"
-                    
-            elif IPv6 in packet: # type: ignore
-                protocol = "IPv6"
-                ipv6_layer = packet[IPv6] # type: ignore
-                ip_src = ipv6_layer.src
-                ip_dst = ipv6_layer.dst
-
-            # Actualizar contadores
-            self.protocol_counts[protocol] = self.protocol_counts.get(protocol, 0) + 1
+            if timed:
+                started = time.perf_counter_ns()
+            transport, ip_src, ip_dst, port_src, port_dst, tcp_flags = decode(packet)
+            if timed:
+                decoded = time.perf_counter_ns()
+            protocol = transport
+            if transport == "TCP" or transport == "UDP":
+                # Una indexación por puerto; el contenido solo si no basta
+                classifier = self.classifier
+                protocol = (
+                    classifier.by_port(transport, port_src, port_dst)
+                    or classifier.by_payload(transport, payload(packet))
+                    or transport
+                )
+            if timed:
+                classified = time.perf_counter_ns()
+            record = self._count(packet_time, protocol, ip_src, ip_dst, port_src, port_dst,
+                                 size, tcp_flags, transport, interface, weight)
+            if not timed:
+                self.packet_buffer.push(record)
+                return
+            counted = time.perf_counter_ns()
+            buffer = self.packet_buffer
+            buffer.push(record)
+            enqueued = time.perf_counter_ns()
+        except Exception:
+            # Sin print por paquete: el error queda en StatsSnapshot.errors
+            self.count_error(size, weight)
+            return
+        probe.record("decodificacion", decoded - started)
+        probe.record("clasificacion", classified - decoded)
+        probe.record("conteo", counted - classified)
+        probe.record("encolado", enqueued - counted)
+        probe.mark(buffer.pushed, started)
+
+    def count_error(self, size: int = 0, weight: int = 1) -> None:
+        """Cuenta un paquete que no se pudo decodificar (totales y errores).
+
+        Debe llamarse desde el hilo que procesa los paquetes.
+        """
+        self._counts.add_undecoded(size * weight, weight)
+
+    def pop_dirty_ips(self) -> set:
+        """Extrae las IPs cuyo contador cambió desde la última llamada.
+
+        Usa set.pop(), atómico frente al hilo de captura, en lugar de
+        sustituir el conjunto, para no perder marcas añadidas en paralelo.
+        """
+        return _pop_all(self.ip_dirty)
+
+    def track_unsaved_ips(self, enabled: bool) -> None:
+        """Activa (o no) ``ip_unsaved``; al activarlo se marcan todas las IPs ya contadas."""
+        if not enabled:
+            self.ip_unsaved = None
+        elif self.ip_unsaved is None:
+            self.ip_unsaved = set(list(self.ip_counts))
+
+    def pop_unsaved_ips(self) -> set:
+        """Extrae las IPs cambiadas desde el último agregado guardado (como pop_dirty_ips)."""
+        return _pop_all(self.ip_unsaved) if self.ip_unsaved is not None else set()
+
+    def top_ips(self, count: int) -> List[Tuple[str, int]]:
+        """Las ``count`` IPs con más paquetes (estimados si el conteo es aproximado)."""
+        if self.ip_sketch is not None:
+            return [(ip, estimate) for ip, estimate, _ in self.ip_sketch.top(count)]
+        return heapq.nlargest(count, dict(self.ip_counts).items(), key=lambda row: row[1])
+
+    def _count(self, packet_time: float, protocol: str, ip_src: str, ip_dst: str,
+               port_src: Union[int, str], port_dst: Union[int, str], size: int,
+               tcp_flags: int = 0, transport: Optional[str] = None, interface: str = "",
+               weight: int = 1) -> Tuple:
+        """Actualiza los contadores y devuelve el registro crudo del paquete.
+
+        ``transport`` es el protocolo antes de clasificar (TCP, UDP, ICMP,
+        ARP...). El registro conserva los valores numéricos; los textos solo
+        se generan en el almacén al mostrar o exportar cada fila. Con
+        muestreo, los contadores suman ``weight`` paquetes y ``size * weight``
+        bytes (estimación de Horvitz-Thompson); el registro guarda el
+        paquete real.
+        """
+        # Actualizar contadores
+        weighted_size = size * weight
+        self._counts.add(protocol, transport or protocol, weighted_size, weight)
+        ip_sketch = self.ip_sketch
+        if ip_sketch is None:
+            unsaved = self.ip_unsaved
             if ip_src != "N/A":
-                self.ip_counts[ip_src] = self.ip_counts.get(ip_src, 0) + 1
+                self.ip_counts[ip_src] = self.ip_counts.get(ip_src, 0) + weight
+                self.ip_dirty.add(ip_src)
+                if unsaved is not None:
+                    unsaved.add(ip_src)
             if ip_dst != "N/A":
-                self.ip_counts[ip_dst] = self.ip_counts.get(ip_dst, 0) + 1
-
-            self.total_bytes += size
-            self.packet_count += 1
-
-            # Crear la tupla de información del paquete
-            packet_info = (timestamp, protocol, str(ip_src), str(ip_dst),
-                         str(port_src), str(port_dst), str(size))
-            
-            try:
-                self.packet_queue.put_nowait(packet_info)
-            except Exception as e:
-                print(f"Error añadiendo paquete a la cola: {e}")
-
-        except Exception as e:
-            print(f"Error procesando paquete: {e}")
-            # Asegurar que los contadores básicos se actualicen incluso si hay error
-            self.total_bytes += len(packet)
-            self.packet_count += 1
+                self.ip_counts[ip_dst] = self.ip_counts.get(ip_dst, 0) + weight
+                self.ip_dirty.add(ip_dst)
+                if unsaved is not None:
+                    unsaved.add(ip_dst)
+        else:
+            if ip_src != "N/A":
+                ip_sketch.add(ip_src, weight)
+            if ip_dst != "N/A":
+                ip_sketch.add(ip_dst, weight)
+            if port_src.__class__ is int:
+                self.port_sketch.add(port_src, weight)
+                self.port_sketch.add(port_dst, weight)
+            if ip_src != "N/A" and ip_dst != "N/A":
+                self.flow_sketch.add(flow_key(protocol, ip_src, ip_dst, port_src, port_dst),
+                                     weight if self.weighted_flows else 1)
+
+        self.traffic.add(packet_time, protocol, weighted_size, weight)
+        if ip_src != "N/A" and ip_dst != "N/A":
+            if weight == 1 or not self.weighted_flows:
+                self.flows.add(packet_time, protocol, ip_src, ip_dst, port_src, port_dst,
+                               size, tcp_flags)
+            else:
+                self.flows.add(packet_time, protocol, ip_src, ip_dst, port_src, port_dst,
+                               weighted_size, tcp_flags, weight)
+
+        return (packet_time, protocol, ip_src, ip_dst, port_src, port_dst, size, interface)
 
     def _get_protocol_name(self, proto_num: int) -> str:
         """Obtiene el nombre del protocolo a partir de su número."""
-        protocols = {
-            1: 'ICMP', 2: 'IGMP', 4: 'IPv4', 6: 'TCP', 8: 'EGP',
-            17: 'UDP', 41: 'IPv6', 47: 'GRE', 50: 'ESP', 51: 'AH',
-            88: 'EIGRP', 89: 'OSPF', 132: 'SCTP'
-        }
-        return protocols.get(proto_num, f'IP_{proto_num}')
\ No newline at end of file
+        return IP_PROTOCOL_NAMES.get(proto_num, f'IP_{proto_num}')
\ No newline at end of file
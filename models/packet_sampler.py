@@ -0,0 +1,181 @@
+import random
+import struct
+from typing import Callable, Dict, Optional
+
+# Modos de muestreo: identificador -> descripción
+SAMPLING_MODES: Dict[str, str] = {
+    "1-de-n": "1 de cada N paquetes, determinista",
+    "aleatorio": "cada paquete con probabilidad 1/N",
+    "flujo": "flujos completos elegidos por hash de la 5-tupla",
+}
+
+# Mayor N admitido (el peso viaja en 16 bits por el anillo de los procesos)
+MAX_EVERY = 4096
+
+# Ciclos de drenado tranquilos antes de bajar N a la mitad, y ciclos que se
+# deja actuar a cada subida antes de poder subir otra vez
+CALM_CYCLES = 10
+HOLD_CYCLES = 2
+
+_unpack_addresses = struct.Struct("!II").unpack_from
+_unpack_ports = struct.Struct("!HH").unpack_from
+# Direcciones MAC destino y origen, cada una como 16 + 32 bits
+_unpack_macs = struct.Struct("!HIHI").unpack_from
+
+
+def flow_hash(frame: bytes) -> int:
+    """Hash simétrico de la 5-tupla de una trama Ethernet cruda.
+
+    Los dos sentidos de una conversación IPv4 TCP/UDP dan el mismo valor.
+    El resto de tramas (IPv6, VLAN, ARP, fragmentos) usa el par de
+    direcciones MAC; las tramas de menos de 12 bytes dan 0.
+    """
+    if frame[12:14] == b"\x08\x00" and len(frame) >= 34:
+        src, dst = _unpack_addresses(frame, 26)
+        value = src ^ dst
+        l4 = 14 + (frame[14] & 0x0F) * 4
+        proto = frame[23]
+        if (proto == 6 or proto == 17) and not (frame[20] & 0x1F or frame[21]) \
+                and len(frame) >= l4 + 4:
+            sport, dport = _unpack_ports(frame, l4)
+            value ^= sport ^ dport
+    elif len(frame) >= 12:
+        dst_high, dst_low, src_high, src_low = _unpack_macs(frame, 0)
+        value = dst_high ^ dst_low ^ src_high ^ src_low
+    else:
+        return 0
+    return value ^ (value >> 16)
+
+
+class PacketSampler:
+    """Muestreo de las tramas antes de decodificarlas.
+
+    ``weight(frame)`` devuelve 0 si la trama se descarta o N si se
+    conserva: el paquete conservado cuenta por N en los contadores, de modo
+    que totales, protocolos, IPs y tráfico son estimaciones sin sesgo del
+    tráfico real. Modos (SAMPLING_MODES):
+
+    - ``1-de-n``: un paquete de cada N, con una cuenta atrás.
+    - ``aleatorio``: cada paquete con probabilidad 1/N (sin periodicidad
+      que pueda coincidir con la del tráfico).
+    - ``flujo``: se conservan todos los paquetes de 1 de cada N flujos,
+      elegidos por el hash de su 5-tupla, así que los flujos conservados
+      están completos. Al subir N el conjunto de flujos conservados se
+      reduce a un subconjunto del anterior.
+
+    Con ``adaptive``, ``adapt`` (llamado en cada drenado) dobla N mientras
+    la cola pase de ``queue_limit`` (fracción de su capacidad), la latencia
+    de ``latency_limit`` segundos o haya descartes, y lo vuelve a bajar
+    hacia el N inicial cuando la carga cae. Lo usa un solo hilo de captura;
+    la interfaz solo lee ``every``, ``seen`` y ``kept``.
+    """
+
+    def __init__(self, mode: str = "1-de-n", every: int = 1, adaptive: bool = False,
+                 queue_limit: float = 0.5, latency_limit: float = 0.5):
+        if mode not in SAMPLING_MODES:
+            raise ValueError(f"Modo de muestreo desconocido: '{mode}' "
+                             f"(válidos: {', '.join(SAMPLING_MODES)})")
+        if not 1 <= every <= MAX_EVERY:
+            raise ValueError(f"N de muestreo fuera de rango (1-{MAX_EVERY}): {every}")
+        if not 0 < queue_limit <= 1:
+            raise ValueError(f"Umbral de cola fuera de rango (0-1]: {queue_limit}")
+        if latency_limit <= 0:
+            raise ValueError(f"Umbral de latencia no válido: {latency_limit}")
+        self.mode = mode
+        self.base_every = every
+        self.adaptive = adaptive
+        self.queue_limit = queue_limit
+        self.latency_limit = latency_limit
+        self.weight: Callable[[bytes], int] = {
+            "1-de-n": self._one_in_n,
+            "aleatorio": self._random,
+            "flujo": self._flow,
+        }[mode]
+        self._uniform = random.Random().random
+        self.reset()
+
+    @property
+    def complete_flows(self) -> bool:
+        """True si los flujos conservados llevan todos sus paquetes."""
+        return self.mode == "flujo"
+
+    @property
+    def effective_rate(self) -> float:
+        """Fracción de paquetes conservados desde el inicio de la captura."""
+        return self.kept / self.seen if self.seen else 1.0 / self.every
+
+    def reset(self) -> None:
+        """Vuelve al N inicial y pone a cero los contadores (nueva captura)."""
+        self.seen = 0
+        self.kept = 0
+        self.changes = 0
+        self._countdown = 1
+        self._calm = 0
+        self._hold = 0
+        self.set_every(self.base_every)
+
+    def set_every(self, every: int) -> None:
+        every = max(1, min(every, MAX_EVERY))
+        # Se publican juntos N y el umbral del hash: cada trama lee la tupla
+        # una sola vez y su peso siempre corresponde al N con que se eligió
+        self._rate = (every, (1 << 32) // every)
+        self.every = every
+
+    def _one_in_n(self, frame: bytes) -> int:
+        self.seen += 1
+        self._countdown -= 1
+        if self._countdown > 0:
+            return 0
+        every = self._rate[0]
+        self._countdown = every
+        self.kept += 1
+        return every
+
+    def _random(self, frame: bytes) -> int:
+        self.seen += 1
+        every = self._rate[0]
+        if self._uniform() * every >= 1.0:
+            return 0
+        self.kept += 1
+        return every
+
+    def _flow(self, frame: bytes) -> int:
+        self.seen += 1
+        every, threshold = self._rate
+        # Mezcla multiplicativa: el reparto entre procesos usa el hash
+        # módulo el número de procesos, y sin mezclar ambos se correlacionan
+        if (flow_hash(frame) * 0x9E3779B1) & 0xFFFFFFFF >= threshold:
+            return 0
+        self.kept += 1
+        return every
+
+    def adapt(self, queue: float, latency: Optional[float] = None, dropped: bool = False) -> int:
+        """Ajusta N según la carga del último ciclo. Devuelve el N vigente.
+
+        ``queue`` es la ocupación de la cola (0-1), ``latency`` los segundos
+        entre la captura y el drenado del paquete más antiguo (None si no se
+        conoce, como al leer ficheros) y ``dropped`` si hubo descartes.
+        """
+        if not self.adaptive:
+            return self.every
+        overloaded = (dropped or queue >= self.queue_limit
+                      or (latency is not None and latency >= self.latency_limit))
+        if overloaded:
+            self._calm = 0
+            if self._hold:
+                self._hold -= 1
+            elif self.every < MAX_EVERY:
+                self.set_every(self.every * 2)
+                self.changes += 1
+                self._hold = HOLD_CYCLES
+            return self.every
+        self._hold = 0
+        if queue < self.queue_limit / 4 and (latency is None or latency < self.latency_limit / 4):
+            self._calm += 1
+            if self._calm >= CALM_CYCLES and self.every > self.base_every:
+                self.set_every(max(self.base_every, self.every // 2))
+                self.changes += 1
+                self._calm = 0
+        else:
+            self._calm = 0
+        return self.every
@@ -0,0 +1,298 @@
+import socket
+import time
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+# Columnas de un registro de paquete, en el orden de la tupla
+PACKET_COLUMNS = ('Hora', 'Protocolo', 'Origen', 'Destino', 'Puerto Origen', 'Puerto Destino', 'Tamaño',
+                  'Interfaz')
+
+# Registro crudo producido por el modelo:
+# (marca de tiempo, protocolo, ip origen, ip destino, puerto origen, puerto destino, tamaño,
+#  interfaz)
+# Los puertos son enteros para TCP/UDP y etiquetas ("ARP", "ICMP", "N/A") en otro caso.
+# La interfaz es el nombre de la interfaz de captura o del fichero reproducido.
+Port = Union[int, str]
+PacketRecord = Tuple[float, str, str, str, Port, Port, int, str]
+DisplayRow = Tuple[str, str, str, str, str, str, str, str]
+
+# Bits de la columna de indicadores
+FLAG_SRC = 0x01
+FLAG_DST = 0x02
+FLAG_PORTS = 0x04
+
+# Prefijo de las direcciones IPv4 mapeadas en IPv6 (::ffff:a.b.c.d)
+_V4_MAPPED = 0xFFFF << 32
+_MASK64 = (1 << 64) - 1
+
+# Máximo de direcciones en la caché de conversión texto -> entero
+_ADDRESS_CACHE_LIMIT = 65536
+
+# Sufijos ".000" a ".999" de la hora con milisegundos
+_MILLIS = tuple(f".{millis:03d}" for millis in range(1000))
+
+# Bytes por fila: ts(8) + 4 mitades de dirección(32) + puertos(4) + protocolo(2) + tamaño(4)
+# + indicadores(1) + interfaz(1)
+ROW_BYTES = 52
+
+# Nombres de las columnas tipadas, en el orden de PacketStore.columns()
+COLUMN_NAMES = ('hora', 'origen_alto', 'origen_bajo', 'destino_alto', 'destino_bajo',
+                'puerto_origen', 'puerto_destino', 'protocolo', 'tamano', 'indicadores', 'interfaz')
+
+
+def address_to_int(address: str) -> int:
+    """Convierte una IPv4 o IPv6 en texto a entero de 128 bits (IPv4 como ::ffff:a.b.c.d)."""
+    try:
+        return _V4_MAPPED | int.from_bytes(socket.inet_aton(address), 'big')
+    except OSError:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET6, address), 'big')
+
+
+class TimestampFormatter:
+    """Formatea marcas de tiempo como hora local, memorizando el último segundo.
+
+    Las filas se materializan casi siempre en orden (exportación, pantalla),
+    así que ``time.localtime``/``strftime`` se llaman una vez por segundo
+    distinto y no una por fila. Con ``milliseconds`` se añaden los
+    milisegundos (``12:34:56.789``). La memoria es una tupla que se
+    sustituye de una vez, válida aunque la usen a la vez la interfaz y un
+    hilo de exportación.
+    """
+
+    def __init__(self, milliseconds: bool = False):
+        self.milliseconds = milliseconds
+        self._cached: Tuple[int, str] = (-1, "")
+
+    def __call__(self, timestamp: float) -> str:
+        second = int(timestamp)
+        cached_second, text = self._cached
+        if second != cached_second:
+            text = time.strftime("%H:%M:%S", time.localtime(second))
+            self._cached = (second, text)
+        if self.milliseconds:
+            return text + _MILLIS[int((timestamp - second) * 1000)]
+        return text
+
+
+def int_to_address(value: int) -> str:
+    """Convierte un entero de 128 bits a su representación en texto."""
+    if value >> 32 == 0xFFFF:
+        return socket.inet_ntoa((value & 0xFFFFFFFF).to_bytes(4, 'big'))
+    return socket.inet_ntop(socket.AF_INET6, value.to_bytes(16, 'big'))
+
+
+class PacketStore:
+    """Almacén columnar en memoria de los paquetes capturados.
+
+    Cada campo vive en su propio ``array`` de tipo fijo (marca de tiempo
+    float, direcciones de 128 bits en dos mitades de 64, puertos uint16,
+    identificador de protocolo, tamaño uint32, identificador de interfaz
+    uint8), así que el consumo es de
+    ROW_BYTES por paquete y está acotado por ``capacity``. Los registros se
+    direccionan por número de secuencia absoluto y, al llenarse el anillo,
+    los más antiguos se sobrescriben. Los textos solo se generan al pedir
+    una fila para mostrarla o exportarla.
+    """
+
+    def __init__(self, capacity: int = 1_000_000):
+        self.capacity = capacity
+        self.format_time = TimestampFormatter()
+        # Número de veces que se ha vaciado; los índices y vistas derivados
+        # lo comparan para saber que sus secuencias ya no son válidas
+        self.generation = 0
+        self.clear()
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    @property
+    def first_seq(self) -> int:
+        """Número de secuencia del registro más antiguo retenido."""
+        return self.total - len(self)
+
+    def memory_bytes(self) -> int:
+        """Memoria ocupada por las columnas."""
+        return sum(column.itemsize * len(column) for column in self._columns())
+
+    def columns(self) -> Tuple[array, ...]:
+        """Columnas tipadas en el orden de COLUMN_NAMES (índices del anillo, no secuencias)."""
+        return self._columns()
+
+    def _columns(self):
+        return (self.timestamps, self.src_hi, self.src_lo, self.dst_hi, self.dst_lo,
+                self.sports, self.dports, self.protocols, self.sizes, self.flags, self.interfaces)
+
+    def set_milliseconds(self, enabled: bool) -> None:
+        """Muestra (o no) los milisegundos en la columna Hora de las filas."""
+        self.format_time.milliseconds = enabled
+
+    def protocol_id(self, name: str) -> int:
+        """Obtiene (o asigna) el identificador numérico de un protocolo."""
+        proto_id = self._protocol_ids.get(name)
+        if proto_id is None:
+            if len(self.protocol_names) > 0xFFFF:
+                raise ValueError("demasiados protocolos distintos en el almacén")
+            proto_id = len(self.protocol_names)
+            self.protocol_names.append(name)
+            self._protocol_ids[name] = proto_id
+        return proto_id
+
+    def interface_id(self, name: str) -> int:
+        """Obtiene (o asigna) el identificador numérico de una interfaz."""
+        interface_id = self._interface_ids.get(name)
+        if interface_id is None:
+            if len(self.interface_names) > 0xFF:
+                raise ValueError("demasiadas interfaces distintas en el almacén")
+            interface_id = len(self.interface_names)
+            self.interface_names.append(name)
+            self._interface_ids[name] = interface_id
+        return interface_id
+
+    def _address(self, address: str) -> int:
+        cache = self._address_cache
+        value = cache.get(address)
+        if value is None:
+            if len(cache) >= _ADDRESS_CACHE_LIMIT:
+                cache.clear()
+            value = cache[address] = address_to_int(address)
+        return value
+
+    def append_many(self, records: Iterable[PacketRecord]) -> None:
+        """Añade registros crudos en orden de llegada.
+
+        Si un registro no cabe (ValueError por exceso de interfaces o
+        protocolos distintos) se conservan los anteriores y las columnas
+        siguen alineadas.
+        """
+        capacity = self.capacity
+        total = self.total
+        protocol_id = self.protocol_id
+        interface_id = self.interface_id
+        address = self._address
+        (timestamps, src_hi, src_lo, dst_hi, dst_lo,
+         sports, dports, protocols, sizes, flags_column, interfaces) = self._columns()
+        try:
+            for timestamp, protocol, ip_src, ip_dst, port_src, port_dst, size, interface in records:
+                # Los identificadores primero: si alguno falla, la fila no
+                # ha tocado ninguna columna
+                proto_id = protocol_id(protocol)
+                iface_id = interface_id(interface)
+                flags = 0
+                src = dst = 0
+                if ip_src != "N/A":
+                    src = address(ip_src)
+                    flags = FLAG_SRC
+                if ip_dst != "N/A":
+                    dst = address(ip_dst)
+                    flags |= FLAG_DST
+                if port_src.__class__ is int:
+                    flags |= FLAG_PORTS
+                else:
+                    port_src = port_dst = 0
+                if total < capacity:
+                    timestamps.append(timestamp)
+                    src_hi.append(src >> 64)
+                    src_lo.append(src & _MASK64)
+                    dst_hi.append(dst >> 64)
+                    dst_lo.append(dst & _MASK64)
+                    sports.append(port_src)
+                    dports.append(port_dst)
+                    protocols.append(proto_id)
+                    sizes.append(size)
+                    flags_column.append(flags)
+                    interfaces.append(iface_id)
+                else:
+                    index = total % capacity
+                    timestamps[index] = timestamp
+                    src_hi[index] = src >> 64
+                    src_lo[index] = src & _MASK64
+                    dst_hi[index] = dst >> 64
+                    dst_lo[index] = dst & _MASK64
+                    sports[index] = port_src
+                    dports[index] = port_dst
+                    protocols[index] = proto_id
+                    sizes[index] = size
+                    flags_column[index] = flags
+                    interfaces[index] = iface_id
+                total += 1
+        finally:
+            self.total = total
+
+    def get(self, seq: int) -> DisplayRow:
+        """Obtiene como textos el registro con el número de secuencia indicado."""
+        if seq < self.first_seq or seq >= self.total:
+            raise IndexError(seq)
+        return self._materialize(seq % self.capacity)
+
+    def _materialize(self, index: int) -> DisplayRow:
+        """Genera los textos de una fila solo cuando se va a mostrar o exportar."""
+        flags = self.flags[index]
+        protocol = self.protocol_names[self.protocols[index]]
+        ip_src = int_to_address((self.src_hi[index] << 64) | self.src_lo[index]) if flags & FLAG_SRC else "N/A"
+        ip_dst = int_to_address((self.dst_hi[index] << 64) | self.dst_lo[index]) if flags & FLAG_DST else "N/A"
+        if flags & FLAG_PORTS:
+            port_src = str(self.sports[index])
+            port_dst = str(self.dports[index])
+        elif protocol == "ARP" or protocol == "ICMP":
+            port_src = port_dst = protocol
+        else:
+            port_src = port_dst = "N/A"
+        return (self.format_time(self.timestamps[index]), protocol, ip_src, ip_dst, port_src, port_dst,
+                str(self.sizes[index]), self.interface_names[self.interfaces[index]])
+
+    def newest(self, offset: int, count: int) -> List[DisplayRow]:
+        """Devuelve hasta ``count`` filas empezando por la más reciente - ``offset``."""
+        capacity = self.capacity
+        last = self.total - 1 - offset
+        first = max(self.first_seq, last - count + 1)
+        return [self._materialize(seq % capacity) for seq in range(last, first - 1, -1)]
+
+    def __iter__(self) -> Iterator[DisplayRow]:
+        """Recorre las filas retenidas de la más antigua a la más reciente."""
+        capacity = self.capacity
+        for seq in range(self.first_seq, self.total):
+            yield self._materialize(seq % capacity)
+
+    def rows(self, start: int, stop: int) -> List[DisplayRow]:
+        """Filas como textos de los números de secuencia [start, stop)."""
+        capacity = self.capacity
+        materialize = self._materialize
+        return [materialize(seq % capacity) for seq in range(start, stop)]
+
+    def segments(self, start: int, stop: int) -> List[Tuple[int, int]]:
+        """Rangos de índices de las columnas que cubren las secuencias [start, stop).
+
+        Son uno o dos tramos contiguos, según el rango dé la vuelta al anillo,
+        listos para cortar las columnas sin materializar filas.
+        """
+        if stop <= start:
+            return []
+        capacity = self.capacity
+        first = start % capacity
+        count = stop - start
+        if first + count <= capacity:
+            return [(first, first + count)]
+        return [(first, capacity), (0, first + count - capacity)]
+
+    def clear(self) -> None:
+        """Elimina todos los registros y libera las columnas."""
+        self.timestamps = array('d')
+        self.src_hi = array('Q')
+        self.src_lo = array('Q')
+        self.dst_hi = array('Q')
+        self.dst_lo = array('Q')
+        self.sports = array('H')
+        self.dports = array('H')
+        self.protocols = array('H')
+        self.sizes = array('I')
+        self.flags = array('B')
+        self.interfaces = array('B')
+        # Listas nuevas, no vaciadas: una fila que se esté materializando
+        # sigue viendo los nombres que tenía
+        self.protocol_names: List[str] = []
+        self._protocol_ids: Dict[str, int] = {}
+        self.interface_names: List[str] = []
+        self._interface_ids: Dict[str, int] = {}
+        self._address_cache: Dict[str, int] = {}
+        self.total = 0
+        self.generation += 1
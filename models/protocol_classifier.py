@@ -0,0 +1,177 @@
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Fichero de servicios que acompaña a la aplicación
+SERVICES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "servicios.txt")
+
+PORT_COUNT = 65536
+
+# Heurística de contenido: recibe la carga útil de transporte y devuelve
+# una etiqueta o None si no la reconoce
+Heuristic = Callable[[bytes], Optional[str]]
+
+# Etiquetas que asignan los decodificadores y las heurísticas de contenido,
+# además de las registradas en las tablas de puertos
+BASE_LABELS = ("TCP", "UDP", "ICMP", "ARP", "IPv6", "Desconocido", "TLS", "HTTP", "DNS")
+
+# Primeros bytes de una petición o respuesta HTTP/1.x
+HTTP_PREFIXES = (
+    b"GET ", b"POST ", b"HEAD ", b"PUT ", b"DELETE ", b"OPTIONS ",
+    b"PATCH ", b"CONNECT ", b"TRACE ", b"HTTP/1."
+)
+
+
+def looks_like_tls_client_hello(payload: bytes) -> Optional[str]:
+    """Registro TLS de handshake (0x16, versión 3.x) que empieza por ClientHello."""
+    if len(payload) >= 6 and payload[0] == 0x16 and payload[1] == 0x03 and payload[5] == 0x01:
+        return "TLS"
+    return None
+
+
+def looks_like_http(payload: bytes) -> Optional[str]:
+    """Línea de petición con un método HTTP o línea de estado HTTP/1.x."""
+    if len(payload) >= 8 and bytes(payload[:8]).startswith(HTTP_PREFIXES):
+        return "HTTP"
+    return None
+
+
+def looks_like_dns(payload: bytes) -> Optional[str]:
+    """Cabecera DNS plausible: opcode estándar, bit Z a cero y 1-16 preguntas."""
+    if len(payload) < 12:
+        return None
+    flags = payload[2] << 8 | payload[3]
+    questions = payload[4] << 8 | payload[5]
+    if flags & 0x7840 or not 1 <= questions <= 16:
+        return None
+    return "DNS"
+
+
+def looks_like_dns_tcp(payload: bytes) -> Optional[str]:
+    """DNS sobre TCP: mensaje precedido de su longitud en dos bytes."""
+    if len(payload) >= 14 and (payload[0] << 8 | payload[1]) == len(payload) - 2:
+        return looks_like_dns(payload[2:])
+    return None
+
+
+class ProtocolClassifier:
+    """Clasificación de TCP/UDP en protocolos de aplicación.
+
+    Para cada transporte hay una tabla de 65536 entradas (una por puerto)
+    con la etiqueta del servicio o None, así que el caso normal es una sola
+    indexación: se mira el puerto menor de los dos, que casi siempre es el
+    del servidor (el cliente usa uno efímero). Solo si ese puerto no está
+    registrado se prueba el otro, y si ninguno lo está se pasan las
+    heurísticas de contenido (ClientHello TLS, cabecera DNS, método HTTP),
+    que reciben la carga útil y se pueden ampliar con ``add_heuristic``.
+    """
+
+    def __init__(self, services: Iterable[Tuple[str, str, int]] = (), heuristics: bool = True):
+        self.tables: Dict[str, List[Optional[str]]] = {
+            "TCP": [None] * PORT_COUNT,
+            "UDP": [None] * PORT_COUNT,
+        }
+        self.heuristics: Dict[str, List[Heuristic]] = {"TCP": [], "UDP": []}
+        for name, transport, port in services:
+            self.register(name, transport, port)
+        if heuristics:
+            self.add_heuristic("TCP", looks_like_tls_client_hello)
+            self.add_heuristic("TCP", looks_like_http)
+            self.add_heuristic("TCP", looks_like_dns_tcp)
+            self.add_heuristic("UDP", looks_like_dns)
+
+    def register(self, name: str, transport: str, port: int) -> None:
+        """Asocia ``port`` del transporte indicado ("TCP" o "UDP") a ``name``."""
+        self.tables[transport.upper()][port] = name
+
+    def add_heuristic(self, transport: str, heuristic: Heuristic) -> None:
+        """Añade una heurística de contenido, que se prueba tras las anteriores."""
+        self.heuristics[transport.upper()].append(heuristic)
+
+    def load(self, path: str) -> int:
+        """Registra los servicios de un fichero. Devuelve cuántos puertos asignó."""
+        services = read_services(path)
+        for name, transport, port in services:
+            self.register(name, transport, port)
+        return len(services)
+
+    def names(self) -> List[str]:
+        """Etiquetas distintas registradas."""
+        return sorted({name for table in self.tables.values() for name in table if name is not None})
+
+    def labels(self) -> List[str]:
+        """Todas las etiquetas de protocolo que puede asignar a un paquete."""
+        return sorted(set(self.names()).union(BASE_LABELS))
+
+    def by_port(self, transport: str, sport: int, dport: int) -> Optional[str]:
+        """Etiqueta según los puertos, o None si ninguno está registrado."""
+        table = self.tables[transport]
+        if sport < dport:
+            return table[sport] or table[dport]
+        return table[dport] or table[sport]
+
+    def by_payload(self, transport: str, payload: bytes) -> Optional[str]:
+        """Etiqueta según la carga útil, o None si ninguna heurística la reconoce."""
+        if payload:
+            for heuristic in self.heuristics[transport]:
+                name = heuristic(payload)
+                if name is not None:
+                    return name
+        return None
+
+    def classify(self, transport: str, sport: int, dport: int,
+                 payload: Optional[bytes] = None) -> str:
+        """Etiqueta del paquete; el propio transporte si no se reconoce."""
+        name = self.by_port(transport, sport, dport)
+        if name is None and payload is not None:
+            name = self.by_payload(transport, payload)
+        return name or transport
+
+
+def read_services(path: str) -> List[Tuple[str, str, int]]:
+    """Lee un fichero de servicios: ``NOMBRE PUERTO[-PUERTO]/tcp|udp[,...]``.
+
+    Devuelve (nombre, transporte, puerto) por cada puerto; los errores de
+    formato se notifican con ValueError indicando la línea.
+    """
+    services = []
+    with open(path, encoding="utf-8") as handle:
+        for number, line in enumerate(handle, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            try:
+                name, specs = line.split(None, 1)
+                for spec in specs.replace(" ", "").split(","):
+                    ports, transport = spec.split("/")
+                    transport = transport.upper()
+                    if transport not in ("TCP", "UDP"):
+                        raise ValueError(transport)
+                    first, _, last = ports.partition("-")
+                    first_port = int(first)
+                    last_port = int(last) if last else first_port
+                    if not 0 <= first_port <= last_port < PORT_COUNT:
+                        raise ValueError(ports)
+                    for port in range(first_port, last_port + 1):
+                        services.append((name, transport, port))
+            except ValueError:
+                raise ValueError(f"{path}, línea {number}: formato no válido: '{line}'") from None
+    return services
+
+
+def build_classifier(extra_files: Iterable[str] = (), heuristics: bool = True) -> ProtocolClassifier:
+    """Clasificador con los servicios de SERVICES_FILE más los de ``extra_files``."""
+    classifier = ProtocolClassifier(read_services(SERVICES_FILE), heuristics)
+    for path in extra_files:
+        classifier.load(path)
+    return classifier
+
+
+_default: Optional[ProtocolClassifier] = None
+
+
+def default_classifier() -> ProtocolClassifier:
+    """Clasificador compartido con los servicios de la aplicación (se carga una vez)."""
+    global _default
+    if _default is None:
+        _default = build_classifier()
+    return _default
@@ -0,0 +1,130 @@
+import socket
+import struct
+from typing import Tuple, Union
+
+# Ethertypes reconocidos
+ETH_P_IP = 0x0800
+ETH_P_ARP = 0x0806
+ETH_P_IPV6 = 0x86DD
+VLAN_ETHERTYPES = (0x8100, 0x88A8, 0x9100)
+
+# Números de protocolo IP
+IPPROTO_ICMP = 1
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+
+_unpack_ethertype = struct.Struct("!H").unpack_from
+_unpack_ports = struct.Struct("!HH").unpack_from
+
+Port = Union[int, str]
+DecodedFrame = Tuple[str, str, str, Port, Port, int]
+
+
+def decode_frame(frame: bytes) -> DecodedFrame:
+    """Decodifica las cabeceras de una trama Ethernet cruda.
+
+    Devuelve (protocolo, ip_origen, ip_destino, puerto_origen, puerto_destino,
+    flags_tcp) con la misma semántica que la disección de Scapy en PacketModel:
+    para TCP y UDP los puertos son enteros y el protocolo es "TCP"/"UDP" sin
+    clasificar. Los flags TCP valen 0 para el resto de protocolos.
+    """
+    data = memoryview(frame)
+    length = len(data)
+    if length < 14:
+        return "Desconocido", "N/A", "N/A", "N/A", "N/A", 0
+
+    offset = 12
+    ethertype = _unpack_ethertype(data, offset)[0]
+    # Saltar etiquetas VLAN (802.1Q / 802.1ad, incluso apiladas)
+    while ethertype in VLAN_ETHERTYPES and length >= offset + 6:
+        offset += 4
+        ethertype = _unpack_ethertype(data, offset)[0]
+    offset += 2
+
+    if ethertype == ETH_P_ARP:
+        return _decode_arp(data, offset)
+    if ethertype == ETH_P_IP:
+        return _decode_ipv4(data, offset)
+    if ethertype == ETH_P_IPV6 and length >= offset + 40:
+        return (
+            "IPv6",
+            socket.inet_ntop(socket.AF_INET6, data[offset + 8:offset + 24]),
+            socket.inet_ntop(socket.AF_INET6, data[offset + 24:offset + 40]),
+            "N/A",
+            "N/A",
+            0,
+        )
+    return "Desconocido", "N/A", "N/A", "N/A", "N/A", 0
+
+
+def _decode_arp(data: memoryview, offset: int) -> DecodedFrame:
+    """Extrae las direcciones de protocolo de una cabecera ARP."""
+    if len(data) < offset + 8:
+        return "ARP", "N/A", "N/A", "ARP", "ARP", 0
+    hwlen = data[offset + 4]
+    plen = data[offset + 5]
+    psrc = offset + 8 + hwlen
+    pdst = psrc + plen + hwlen
+    if plen != 4 or len(data) < pdst + 4:
+        return "ARP", "N/A", "N/A", "ARP", "ARP", 0
+    return (
+        "ARP",
+        socket.inet_ntoa(data[psrc:psrc + 4]),
+        socket.inet_ntoa(data[pdst:pdst + 4]),
+        "ARP",
+        "ARP",
+        0,
+    )
+
+
+def _decode_ipv4(data: memoryview, offset: int) -> DecodedFrame:
+    """Decodifica una cabecera IPv4 y, si procede, la de transporte."""
+    if len(data) < offset + 20:
+        return "Desconocido", "N/A", "N/A", "N/A", "N/A", 0
+    ihl = (data[offset] & 0x0F) * 4
+    proto = data[offset + 9]
+    ip_src = socket.inet_ntoa(data[offset + 12:offset + 16])
+    ip_dst = socket.inet_ntoa(data[offset + 16:offset + 20])
+
+    # Los fragmentos no iniciales no llevan cabecera de transporte
+    if (data[offset + 6] & 0x1F) or data[offset + 7]:
+        return "Desconocido", ip_src, ip_dst, "N/A", "N/A", 0
+
+    l4 = offset + ihl
+    if proto == IPPROTO_TCP and len(data) >= l4 + 4:
+        sport, dport = _unpack_ports(data, l4)
+        flags = data[l4 + 13] & 0x3F if len(data) >= l4 + 14 else 0
+        return "TCP", ip_src, ip_dst, sport, dport, flags
+    if proto == IPPROTO_UDP and len(data) >= l4 + 4:
+        sport, dport = _unpack_ports(data, l4)
+        return "UDP", ip_src, ip_dst, sport, dport, 0
+    if proto == IPPROTO_ICMP:
+        return "ICMP", ip_src, ip_dst, "ICMP", "ICMP", 0
+    return "Desconocido", ip_src, ip_dst, "N/A", "N/A", 0
+
+
+def transport_payload(frame: bytes) -> bytes:
+    """Carga útil TCP/UDP de una trama IPv4 (vacía si no la hay).
+
+    Vuelve a recorrer las cabeceras; solo se usa cuando los puertos no
+    bastan para clasificar el paquete y hay que mirar el contenido.
+    """
+    data = memoryview(frame)
+    length = len(data)
+    offset = 12
+    if length < 14:
+        return b""
+    ethertype = _unpack_ethertype(data, offset)[0]
+    while ethertype in VLAN_ETHERTYPES and length >= offset + 6:
+        offset += 4
+        ethertype = _unpack_ethertype(data, offset)[0]
+    offset += 2
+    if ethertype != ETH_P_IP or length < offset + 20:
+        return b""
+    proto = data[offset + 9]
+    l4 = offset + (data[offset] & 0x0F) * 4
+    if proto == IPPROTO_TCP and length >= l4 + 13:
+        return data[l4 + (data[l4 + 12] >> 4) * 4:]
+    if proto == IPPROTO_UDP:
+        return data[l4 + 8:]
+    return b""
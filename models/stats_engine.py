@@ -0,0 +1,203 @@
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+# Transportes con contador propio en el panel; el resto cuenta como "otros"
+MAIN_TRANSPORTS = ('TCP', 'UDP')
+
+_EMPTY: Mapping[str, int] = MappingProxyType({})
+
+
+class StatsSnapshot(NamedTuple):
+    """Estado inmutable de los contadores en un instante.
+
+    Los diccionarios son copias propias envueltas en MappingProxyType: la
+    interfaz y los reportes pueden recorrerlos sin copiar nada y sin
+    competir con el hilo de captura.
+    """
+    packets: int = 0
+    bytes: int = 0
+    # Paquetes por etiqueta de protocolo (HTTPS, DNS, ARP...)
+    protocols: Mapping[str, int] = _EMPTY
+    # Paquetes por transporte (TCP, UDP, ICMP, ARP...), antes de clasificar
+    transports: Mapping[str, int] = _EMPTY
+    start_time: float = 0.0
+    # Fin de una sesión guardada y reabierta (0 = la captura sigue su curso)
+    end_time: float = 0.0
+    # Paquetes que no se pudieron decodificar (incluidos en ``packets``)
+    errors: int = 0
+
+    def protocol(self, name: str) -> int:
+        return self.protocols.get(name, 0)
+
+    def transport(self, name: str) -> int:
+        return self.transports.get(name, 0)
+
+    def other_transports(self) -> int:
+        """Paquetes que no van sobre TCP ni UDP (incluidos los no decodificados)."""
+        return self.packets - sum(self.transports.get(name, 0) for name in MAIN_TRANSPORTS)
+
+    def elapsed(self, now: Optional[float] = None) -> float:
+        """Segundos desde el inicio de la captura (0 si no empezó).
+
+        En una sesión reabierta desde la base de sesiones, su duración.
+        """
+        if not self.start_time:
+            return 0.0
+        if self.end_time:
+            return self.end_time - self.start_time
+        return (time.time() if now is None else now) - self.start_time
+
+    def since(self, previous: 'StatsSnapshot') -> 'StatsSnapshot':
+        """Incrementos desde ``previous`` (tasas, informes parciales)."""
+        return StatsSnapshot(
+            self.packets - previous.packets,
+            self.bytes - previous.bytes,
+            MappingProxyType(_subtract(self.protocols, previous.protocols)),
+            MappingProxyType(_subtract(self.transports, previous.transports)),
+            self.start_time,
+            self.end_time,
+            self.errors - previous.errors
+        )
+
+
+def _subtract(current: Mapping[str, int], previous: Mapping[str, int]) -> Dict[str, int]:
+    return {key: count - previous.get(key, 0) for key, count in current.items()
+            if count != previous.get(key, 0)}
+
+
+class StatsWriter:
+    """Contadores acumulados por un único hilo productor.
+
+    Solo su hilo los modifica, sin cerrojos. ``version`` es impar mientras
+    se actualiza un paquete; ``read`` la consulta antes y después de copiar
+    para devolver siempre un estado coherente (paquetes, bytes y repartos
+    del mismo instante), reintentando si coincidió con una escritura.
+    """
+
+    __slots__ = ('packets', 'bytes', 'protocols', 'transports', 'errors', 'version')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.version = 0
+        self.packets = 0
+        self.bytes = 0
+        self.protocols: Dict[str, int] = {}
+        self.transports: Dict[str, int] = {}
+        self.errors = 0
+
+    def add(self, protocol: str, transport: str, size: int, packets: int = 1) -> None:
+        """Cuenta un paquete (hilo productor).
+
+        Con muestreo, un paquete conservado vale por ``packets`` paquetes y
+        ``size`` ya viene multiplicado por ese peso.
+        """
+        self.version += 1
+        self.packets += packets
+        self.bytes += size
+        protocols = self.protocols
+        protocols[protocol] = protocols.get(protocol, 0) + packets
+        transports = self.transports
+        transports[transport] = transports.get(transport, 0) + packets
+        self.version += 1
+
+    def add_undecoded(self, size: int, packets: int = 1) -> None:
+        """Cuenta un paquete que no se pudo decodificar (totales y ``errors``)."""
+        self.version += 1
+        self.packets += packets
+        self.bytes += size
+        self.errors += packets
+        self.version += 1
+
+    def add_counts(self, packets: int, size: int, protocols: Mapping[str, int],
+                   transports: Mapping[str, int], errors: int = 0) -> None:
+        """Suma contadores ya agregados (informes de otros procesos)."""
+        self.version += 1
+        self.packets += packets
+        self.bytes += size
+        self.errors += errors
+        for counts, increments in ((self.protocols, protocols), (self.transports, transports)):
+            for key, count in increments.items():
+                counts[key] = counts.get(key, 0) + count
+        self.version += 1
+
+    def read(self) -> Tuple[int, int, Dict[str, int], Dict[str, int], int]:
+        """Copia coherente de los contadores (desde cualquier hilo)."""
+        while True:
+            version = self.version
+            if not version & 1:
+                state = (self.packets, self.bytes, self.protocols.copy(), self.transports.copy(),
+                         self.errors)
+                if self.version == version:
+                    return state
+            # Una escritura a medias: ceder el GIL para que el productor termine
+            time.sleep(0)
+
+
+class StatsEngine:
+    """Núcleo único de contadores de la captura.
+
+    Cada hilo que procesa paquetes obtiene su propio StatsWriter con
+    ``writer()`` y lo actualiza sin cerrojos; ``snapshot()`` suma los de
+    todos en un StatsSnapshot inmutable. La interfaz toma una instantánea
+    por ciclo y los reportes la suya, sin tocar diccionarios vivos.
+    ``clear`` solo debe llamarse sin productores activos.
+    """
+
+    def __init__(self):
+        self._writers: List[StatsWriter] = []
+        self._register_lock = threading.Lock()
+        self._merge_writer: Optional[StatsWriter] = None
+        self.start_time = 0.0
+        self.end_time = 0.0
+
+    def writer(self) -> StatsWriter:
+        """Registra los contadores de un nuevo hilo productor."""
+        writer = StatsWriter()
+        with self._register_lock:
+            self._writers = self._writers + [writer]
+        return writer
+
+    def merge(self, packets: int, size: int, protocols: Mapping[str, int],
+              transports: Mapping[str, int], errors: int = 0) -> None:
+        """Suma incrementos ya agregados; siempre desde el mismo hilo (drain)."""
+        if self._merge_writer is None:
+            self._merge_writer = self.writer()
+        self._merge_writer.add_counts(packets, size, protocols, transports, errors)
+
+    def start(self) -> None:
+        """Marca el inicio de una captura (para el tiempo transcurrido)."""
+        self.start_time = time.time()
+        self.end_time = 0.0
+
+    def clear(self) -> None:
+        for writer in self._writers:
+            writer.reset()
+        self.start_time = 0.0
+        self.end_time = 0.0
+
+    def snapshot(self) -> StatsSnapshot:
+        """Suma coherente de los contadores de todos los productores."""
+        writers = self._writers
+        if len(writers) == 1:
+            packets, size, protocols, transports, errors = writers[0].read()
+        else:
+            packets = size = errors = 0
+            protocols: Dict[str, int] = {}
+            transports: Dict[str, int] = {}
+            for writer in writers:
+                (writer_packets, writer_bytes, writer_protocols, writer_transports,
+                 writer_errors) = writer.read()
+                packets += writer_packets
+                size += writer_bytes
+                errors += writer_errors
+                for counts, increments in ((protocols, writer_protocols), (transports, writer_transports)):
+                    for key, count in increments.items():
+                        counts[key] = counts.get(key, 0) + count
+        return StatsSnapshot(
+            packets, size, MappingProxyType(protocols), MappingProxyType(transports),
+            self.start_time, self.end_time, errors
+        )
@@ -0,0 +1,164 @@
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+# (inicio del intervalo en segundos epoch, bytes, paquetes)
+RatePoint = Tuple[int, float, float]
+
+
+class RateRing:
+    """Anillo de contadores de bytes/paquetes por intervalo de tiempo fijo.
+
+    Cada casilla guarda el intervalo al que pertenece; al llegar un paquete
+    de un intervalo nuevo la casilla se reinicia. La actualización es O(1)
+    y la memoria depende solo de ``slots`` y del número de protocolos.
+    """
+
+    def __init__(self, slots: int, resolution: int):
+        self.slots = slots
+        self.resolution = resolution
+        self._stamps = array('q', [-1]) * slots
+        self._bytes = array('d', [0.0]) * slots
+        self._packets = array('d', [0.0]) * slots
+        self._protocols: Dict[str, Tuple[array, array]] = {}
+
+    def add(self, timestamp: float, protocol: str, size: int, packets: int = 1) -> None:
+        """Suma ``packets`` paquetes y ``size`` bytes al intervalo de ``timestamp``."""
+        period = int(timestamp) // self.resolution
+        index = period % self.slots
+        if self._stamps[index] != period:
+            self._reset(index, period)
+        self._bytes[index] += size
+        self._packets[index] += packets
+        columns = self._protocols.get(protocol)
+        if columns is None:
+            columns = self._protocols[protocol] = (
+                array('d', [0.0]) * self.slots, array('d', [0.0]) * self.slots
+            )
+        columns[0][index] += size
+        columns[1][index] += packets
+
+    def _reset(self, index: int, period: int) -> None:
+        self._stamps[index] = period
+        self._bytes[index] = 0.0
+        self._packets[index] = 0.0
+        for proto_bytes, proto_packets in self._protocols.values():
+            proto_bytes[index] = 0.0
+            proto_packets[index] = 0.0
+
+    def series(self, end: float, count: int, protocol: Optional[str] = None) -> List[RatePoint]:
+        """Últimos ``count`` intervalos hasta ``end`` (incluido), del más antiguo al más reciente."""
+        count = min(count, self.slots)
+        last = int(end) // self.resolution
+        if protocol is None:
+            bytes_column, packets_column = self._bytes, self._packets
+        else:
+            columns = self._protocols.get(protocol)
+            if columns is None:
+                return [(period * self.resolution, 0.0, 0.0) for period in range(last - count + 1, last + 1)]
+            bytes_column, packets_column = columns
+        points = []
+        for period in range(last - count + 1, last + 1):
+            index = period % self.slots
+            if self._stamps[index] == period:
+                points.append((period * self.resolution, bytes_column[index], packets_column[index]))
+            else:
+                points.append((period * self.resolution, 0.0, 0.0))
+        return points
+
+    def rows(self, first: float, last: float) -> List[Tuple[int, str, float, float]]:
+        """(inicio del intervalo, protocolo, bytes, paquetes) entre ``first`` y ``last``.
+
+        Solo los intervalos que siguen en el anillo y los protocolos con
+        paquetes en ellos; es la materia de los agregados de SessionStore.
+        """
+        last_period = int(last) // self.resolution
+        first_period = max(int(first) // self.resolution, last_period - self.slots + 1)
+        protocols = list(self._protocols.copy().items())
+        rows = []
+        for period in range(first_period, last_period + 1):
+            index = period % self.slots
+            if self._stamps[index] != period:
+                continue
+            start = period * self.resolution
+            for protocol, (proto_bytes, proto_packets) in protocols:
+                if proto_packets[index]:
+                    rows.append((start, protocol, proto_bytes[index], proto_packets[index]))
+        return rows
+
+    def protocols(self) -> List[str]:
+        return list(self._protocols.copy())
+
+    def clear(self) -> None:
+        self._stamps = array('q', [-1]) * self.slots
+        self._bytes = array('d', [0.0]) * self.slots
+        self._packets = array('d', [0.0]) * self.slots
+        self._protocols = {}
+
+
+class TrafficSeries:
+    """Series temporales de tráfico por segundo y por minuto.
+
+    Por defecto guarda la última hora con resolución de un segundo y las
+    últimas 24 horas con resolución de un minuto, con memoria constante
+    independientemente de la duración de la captura.
+    """
+
+    def __init__(self, seconds: int = 3600, minutes: int = 1440):
+        self.per_second = RateRing(seconds, 1)
+        self.per_minute = RateRing(minutes, 60)
+        self.first_time: Optional[float] = None
+        self.last_time: Optional[float] = None
+
+    def add(self, timestamp: float, protocol: str, size: int, packets: int = 1) -> None:
+        """Registra un paquete, o un agregado de ``packets`` paquetes (O(1))."""
+        if self.first_time is None:
+            self.first_time = timestamp
+        if self.last_time is None or timestamp > self.last_time:
+            self.last_time = timestamp
+        self.per_second.add(timestamp, protocol, size, packets)
+        self.per_minute.add(timestamp, protocol, size, packets)
+
+    def recent(self, count: int, protocol: Optional[str] = None) -> List[RatePoint]:
+        """Últimos ``count`` segundos hasta el paquete más reciente."""
+        if self.last_time is None:
+            return []
+        return self.per_second.series(self.last_time, count, protocol)
+
+    def current_rate(self) -> Tuple[float, float]:
+        """Bits/s y paquetes/s del último segundo completo."""
+        points = self.recent(2)
+        if not points:
+            return 0.0, 0.0
+        _, size, packets = points[0]
+        return size * 8, packets
+
+    def summary(self) -> Dict[str, object]:
+        """Resumen de tasas medias y máximas (como mucho de la última hora) para los reportes."""
+        if self.first_time is None or self.last_time is None:
+            return {}
+        duration = max(1.0, self.last_time - self.first_time)
+        window = min(self.per_second.slots, int(duration) + 1)
+        points = self.per_second.series(self.last_time, window)
+        total_bytes = sum(size for _, size, _ in points)
+        total_packets = sum(packets for _, _, packets in points)
+        span = max(1, len(points))
+        protocols = {}
+        for protocol in self.per_second.protocols():
+            proto_points = self.per_second.series(self.last_time, window, protocol)
+            proto_bytes = sum(size for _, size, _ in proto_points)
+            if proto_bytes:
+                protocols[protocol] = proto_bytes * 8 / span
+        return {
+            "ventana_s": span,
+            "bps_medio": total_bytes * 8 / span,
+            "bps_maximo": max(size for _, size, _ in points) * 8,
+            "pps_medio": total_packets / span,
+            "pps_maximo": max(packets for _, _, packets in points),
+            "bps_por_protocolo": protocols,
+        }
+
+    def clear(self) -> None:
+        self.per_second.clear()
+        self.per_minute.clear()
+        self.first_time = None
+        self.last_time = None
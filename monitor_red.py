@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
+import time
+# Origen de las marcas de --medir-arranque
+_STARTED = time.perf_counter()
+import argparse
 import os
 import sys
-from views.main_view import MainView
-from controllers.network_controller import NetworkController
 # sudo "/home/arthur/Documents/proyectos/monitoreo de red/.venv/bin/python" "/home/arthur/Documents/proyectos/monitoreo de red/monitor_red.py"
 def check_permissions():
     """Verifica los permisos necesarios para la captura de paquetes."""
@@ -22,20 +24,325 @@ def check_permissions():
             print("Advertencia: No se pudo verificar el ID de usuario.")
             print("Asegúrate de ejecutar con permisos adecuados si la captura falla.")
 
+def parse_args(argv=None):
+    """Interpreta las opciones de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Monitor de Red Moderno")
+    parser.add_argument("--headless", action="store_true",
+                        help="captura sin interfaz gráfica (sensores remotos)")
+    parser.add_argument("--filtro", default="tcp or udp",
+                        help="expresión BPF de captura (por defecto: 'tcp or udp')")
+    parser.add_argument("--interfaz", action="append", default=[], metavar="NOMBRE[=FILTRO]",
+                        help="interfaz de captura (por defecto la de Scapy); se puede repetir para "
+                             "capturar de varias a la vez, cada una con su propio filtro BPF "
+                             "tras '=' (si no, usa --filtro)")
+    parser.add_argument("--snaplen", type=int, default=0,
+                        help="bytes copiados de cada trama en modo raw (no con --modo scapy); "
+                             "0 = trama completa")
+    parser.add_argument("--buffer-kernel", type=float, default=0.0, metavar="MB",
+                        help="tamaño del buffer de recepción del socket en MB; 0 = predeterminado")
+    parser.add_argument("--sin-promiscuo", action="store_true",
+                        help="no poner la interfaz en modo promiscuo")
+    parser.add_argument("--spool", default=None, metavar="DIR",
+                        help="guardar las tramas capturadas en ficheros pcap rotativos en DIR")
+    parser.add_argument("--spool-tamano", type=float, default=100.0, metavar="MB",
+                        help="tamaño máximo de cada fichero del spool en MB")
+    parser.add_argument("--spool-rotacion", type=float, default=3600.0, metavar="S",
+                        help="segundos antes de pasar a otro fichero del spool; 0 = solo por tamaño")
+    parser.add_argument("--spool-ficheros", type=int, default=10, metavar="N",
+                        help="ficheros del spool que se conservan (los más antiguos se borran)")
+    parser.add_argument("--sesiones", default=None, metavar="FICHERO",
+                        help="guardar los agregados por segundo de la captura (protocolos, IPs y "
+                             "flujos) en la base SQLite FICHERO")
+    parser.add_argument("--listar-sesiones", action="store_true",
+                        help="listar las sesiones guardadas en --sesiones y salir")
+    parser.add_argument("--reporte-sesion", type=int, default=None, metavar="ID",
+                        help="regenerar los reportes PDF/CSV de la sesión ID de --sesiones en "
+                             "--directorio-reportes y salir")
+    parser.add_argument("--modo", choices=["scapy", "raw"], default="scapy",
+                        help="modo de captura: disección Scapy o decodificación cruda")
+    parser.add_argument("--archivo", default=None,
+                        help="reproducir un fichero pcap/pcapng en lugar de capturar en vivo")
+    parser.add_argument("--tiempo-real", action="store_true",
+                        help="reproducir el fichero respetando los tiempos originales")
+    parser.add_argument("--capacidad", type=int, default=1_000_000,
+                        help="paquetes retenidos en memoria (52 bytes por paquete)")
+    parser.add_argument("--contadores-aproximados", type=int, default=0, metavar="N",
+                        help="contar IPs, puertos y flujos con N contadores Space-Saving "
+                             "(memoria fija, conteos aproximados); 0 = conteo exacto")
+    parser.add_argument("--procesos", type=int, default=1, metavar="N",
+                        help="decodificar en N procesos repartiendo las tramas por flujo "
+                             "(implica decodificación cruda); 1 = un solo hilo")
+    parser.add_argument("--muestreo", choices=["1-de-n", "aleatorio", "flujo"], default=None,
+                        help="decodificar solo una muestra de las tramas: 1 de cada N, al azar "
+                             "con probabilidad 1/N o flujos completos (1 de cada N); los "
+                             "contadores se escalan por N")
+    parser.add_argument("--muestreo-n", type=int, default=10, metavar="N",
+                        help="N inicial del muestreo (por defecto 10)")
+    parser.add_argument("--muestreo-adaptativo", action="store_true",
+                        help="subir N mientras la cola, la latencia o los descartes pasen de los "
+                             "umbrales y bajarlo cuando cede la carga (sin --muestreo, 1 de N "
+                             "empezando sin muestrear)")
+    parser.add_argument("--umbral-cola", type=float, default=0.5, metavar="FRACCION",
+                        help="ocupación de la cola (0-1) que activa el muestreo adaptativo")
+    parser.add_argument("--umbral-latencia", type=float, default=500.0, metavar="MS",
+                        help="latencia de captura a almacén que activa el muestreo adaptativo")
+    parser.add_argument("--servicios", action="append", default=[], metavar="FICHERO",
+                        help="fichero de servicios (NOMBRE PUERTO/tcp|udp) que amplía o "
+                             "sustituye la clasificación por puerto; se puede repetir")
+    parser.add_argument("--sin-heuristicas", action="store_true",
+                        help="no inspeccionar el contenido cuando el puerto no identifica el protocolo")
+    parser.add_argument("--milisegundos", action="store_true",
+                        help="mostrar y exportar la hora de cada paquete con milisegundos")
+    parser.add_argument("--intervalo", type=float, default=5.0,
+                        help="segundos entre líneas de estadísticas (modo headless)")
+    parser.add_argument("--reporte-cada", type=float, default=0.0,
+                        help="segundos entre reportes PDF/CSV; 0 = sin reportes (modo headless)")
+    parser.add_argument("--formato-paquetes", choices=["csv", "csv.gz", "npz"], default="csv",
+                        help="formato del reporte de paquetes: CSV, CSV con gzip o columnas NumPy (modo headless)")
+    parser.add_argument("--directorio-reportes", default=".",
+                        help="directorio donde se escriben los reportes (modo headless)")
+    parser.add_argument("--medir-arranque", action="store_true",
+                        help="imprimir el tiempo de importación, de la primera pintura de la "
+                             "ventana y de carga de Scapy")
+    parser.add_argument("--muestreo-diagnostico", type=int, default=64, metavar="N",
+                        help="medir las etapas de 1 de cada N paquetes para el diagnóstico; 0 = no medir")
+    parser.add_argument("--diagnostico", default=None, metavar="FICHERO",
+                        help="guardar al terminar los tiempos de cada etapa en JSON (modo headless)")
+    parser.add_argument("--perfilar", type=float, default=0.0, metavar="S",
+                        help="perfilar por muestreo todos los hilos durante S segundos desde el "
+                             "inicio (modo headless)")
+    parser.add_argument("--duracion", type=float, default=None,
+                        help="detener la captura tras estos segundos (modo headless)")
+    args = parser.parse_args(argv)
+    if args.procesos > 1 and args.contadores_aproximados:
+        parser.error("--procesos no es compatible con --contadores-aproximados")
+    if args.snaplen < 0 or 0 < args.snaplen < 64:
+        parser.error("--snaplen debe ser 0 o al menos 64")
+    if args.snaplen and args.modo != "raw" and args.procesos <= 1 and not args.archivo:
+        parser.error("--snaplen solo se aplica con --modo raw (o --procesos)")
+    if args.buffer_kernel < 0:
+        parser.error("--buffer-kernel no puede ser negativo")
+    if args.muestreo_diagnostico < 0 or args.perfilar < 0:
+        parser.error("--muestreo-diagnostico y --perfilar no pueden ser negativos")
+    if any(not spec.partition("=")[0].strip() for spec in args.interfaz):
+        parser.error("--interfaz necesita un nombre de interfaz")
+    if args.muestreo_adaptativo or args.muestreo:
+        try:
+            packet_sampler(args)
+        except ValueError as e:
+            parser.error(f"muestreo: {e}")
+    if args.spool_ficheros < 1 or args.spool_tamano <= 0:
+        parser.error("--spool-ficheros y --spool-tamano deben ser positivos")
+    if (args.listar_sesiones or args.reporte_sesion is not None) and not (
+            args.sesiones and os.path.isfile(args.sesiones)):
+        parser.error("--listar-sesiones y --reporte-sesion necesitan una base existente en --sesiones")
+    if args.servicios:
+        from models.protocol_classifier import read_services
+        for path in args.servicios:
+            try:
+                read_services(path)
+            except (OSError, ValueError) as e:
+                parser.error(f"--servicios: {e}")
+    return args
+
+def capture_options(args):
+    """Construye las opciones del socket de captura a partir de los argumentos."""
+    from controllers.capture_options import CaptureOptions
+
+    interfaces = []
+    filters = {}
+    for spec in args.interfaz:
+        name, separator, filtro = spec.partition("=")
+        interfaces.append(name.strip())
+        if separator:
+            filters[name.strip()] = filtro.strip()
+    return CaptureOptions(
+        interfaces=interfaces,
+        snaplen=args.snaplen,
+        rcvbuf=int(args.buffer_kernel * 1024 * 1024),
+        promisc=not args.sin_promiscuo,
+        filters=filters
+    )
+
+def pcap_spool(args):
+    """Crea el spool pcap pedido con --spool, o None."""
+    if not args.spool:
+        return None
+    from controllers.pcap_spool import PcapSpool
+
+    return PcapSpool(
+        args.spool,
+        max_file_bytes=int(args.spool_tamano * 1024 * 1024),
+        rotate_seconds=args.spool_rotacion,
+        max_files=args.spool_ficheros
+    )
+
+def session_store(args):
+    """Base de sesiones pedida con --sesiones, o None."""
+    if not args.sesiones:
+        return None
+    from controllers.session_store import SessionStore
+
+    return SessionStore(args.sesiones)
+
+def run_session_tools(args):
+    """Lista las sesiones guardadas o regenera los reportes de una."""
+    from controllers.session_store import SessionStore
+    from models.network_stats import NetworkStats
+
+    store = SessionStore(args.sesiones)
+    stats = NetworkStats()
+    if args.listar_sesiones:
+        sessions = store.sessions()
+        if not sessions:
+            print(f"No hay sesiones guardadas en '{args.sesiones}'.")
+        for info in sessions:
+            sampling = f" muestreo={info.sampling}" if info.sampling else ""
+            print(f"#{info.id} {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(info.start))} "
+                  f"duración={stats.format_elapsed(info.duration)} origen={info.origin} "
+                  f"modo={info.mode} paquetes={info.packets} "
+                  f"tráfico={stats.format_size(info.bytes)}{sampling}")
+    if args.reporte_sesion is None:
+        return
+    from controllers.reports import (
+        write_session_pdf_report, write_session_traffic_csv_report, write_session_flow_csv_report
+    )
+
+    session_id = args.reporte_sesion
+    try:
+        store.session(session_id)
+    except KeyError:
+        print(f"No existe la sesión {session_id} en '{args.sesiones}'.")
+        return
+    os.makedirs(args.directorio_reportes, exist_ok=True)
+    for writer, name in (
+        (lambda path: write_session_pdf_report(store, session_id, path), f"reporte_sesion_{session_id}.pdf"),
+        (lambda path: write_session_traffic_csv_report(store, session_id, path),
+         f"reporte_sesion_{session_id}_trafico.csv"),
+        (lambda path: write_session_flow_csv_report(store, session_id, path),
+         f"reporte_sesion_{session_id}_flujos.csv"),
+    ):
+        try:
+            print(f"Reporte generado: {writer(os.path.join(args.directorio_reportes, name))}")
+        except Exception as e:
+            print(f"Error generando el reporte '{name}': {e}")
+
+def packet_sampler(args):
+    """Muestreo pedido con --muestreo/--muestreo-adaptativo, o None."""
+    if not args.muestreo and not args.muestreo_adaptativo:
+        return None
+    from models.packet_sampler import PacketSampler
+
+    return PacketSampler(
+        args.muestreo or "1-de-n",
+        args.muestreo_n if args.muestreo else 1,
+        adaptive=args.muestreo_adaptativo,
+        queue_limit=args.umbral_cola,
+        latency_limit=args.umbral_latencia / 1000
+    )
+
+def protocol_classifier(args):
+    """Clasificador de protocolos pedido con --servicios/--sin-heuristicas, o None."""
+    if not args.servicios and not args.sin_heuristicas:
+        return None
+    from models.protocol_classifier import build_classifier
+
+    return build_classifier(args.servicios, heuristics=not args.sin_heuristicas)
+
+def watch_first_paint(view, timer):
+    """Marca la primera pintura: el primer <Map> de la ventana y su repintado."""
+    def on_map(_event):
+        view.unbind("<Map>", binding)
+        view.after_idle(timer.mark, "primera pintura")
+
+    binding = view.bind("<Map>", on_map, add="+")
+
+def run_headless(args, timer=None):
+    """Ejecuta la captura sin interfaz gráfica."""
+    from controllers.headless_controller import HeadlessController
+
+    if timer is not None:
+        timer.mark("módulos importados")
+
+    HeadlessController(
+        filtro=args.filtro,
+        modo=args.modo,
+        stats_interval=args.intervalo,
+        report_interval=args.reporte_cada,
+        report_dir=args.directorio_reportes,
+        duration=args.duracion,
+        capture_file=args.archivo,
+        realtime=args.tiempo_real,
+        store_capacity=args.capacidad,
+        heavy_hitters=args.contadores_aproximados,
+        workers=args.procesos,
+        options=capture_options(args),
+        packet_format=args.formato_paquetes,
+        spool=pcap_spool(args),
+        sampler=packet_sampler(args),
+        classifier=protocol_classifier(args),
+        milliseconds=args.milisegundos,
+        sample_every=args.muestreo_diagnostico,
+        diagnostics_file=args.diagnostico,
+        profile_seconds=args.perfilar,
+        session_store=session_store(args)
+    ).run()
+
 def main():
     """Punto de entrada principal de la aplicación."""
+    args = parse_args()
+    timer = None
+    if args.medir_arranque:
+        from controllers.startup_timer import StartupTimer
+        timer = StartupTimer(_STARTED)
+
+    if args.listar_sesiones or args.reporte_sesion is not None:
+        run_session_tools(args)
+        return
+
     # Verificar permisos al inicio
     check_permissions()
 
     try:
-        # Crear la vista principal
+        if args.headless:
+            run_headless(args, timer)
+            return
+
+        from views.main_view import MainView
+
+        # Crear y mostrar la vista principal antes de cargar el resto
         view = MainView()
+        if timer is not None:
+            timer.mark("vista creada")
+            watch_first_paint(view, timer)
+        view.update()
+
+        # Scapy y fpdf no se importan aquí: la captura carga Scapy en segundo
+        # plano y fpdf se importa al generar el primer reporte PDF
+        from controllers.network_controller import NetworkController
+        if timer is not None:
+            timer.mark("módulos importados")
         
         # Crear el controlador
-        controller = NetworkController(view)
+        controller = NetworkController(
+            view,
+            store_capacity=args.capacidad,
+            heavy_hitters=args.contadores_aproximados,
+            workers=args.procesos,
+            spool=pcap_spool(args),
+            sampler=packet_sampler(args),
+            session_store=session_store(args),
+            classifier=protocol_classifier(args),
+            milliseconds=args.milisegundos,
+            startup_timer=timer,
+            sample_every=args.muestreo_diagnostico
+        )
+        if args.archivo:
+            view.after(0, controller.open_capture_file, args.archivo, args.tiempo_real)
         
         # Iniciar la aplicación
         view.mainloop()
+        controller.close()
         
     except KeyboardInterrupt:
         print("\nAplicación interrumpida por el usuario.")
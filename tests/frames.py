@@ -0,0 +1,55 @@
+"""Tramas Ethernet crudas mínimas para las pruebas."""
+import socket
+import struct
+
+MAC_DST = bytes.fromhex("00163e000001")
+MAC_SRC = bytes.fromhex("00163e000002")
+
+
+def ether(ethertype: int, payload: bytes, vlans=()) -> bytes:
+    tags = b"".join(struct.pack("!HH", 0x8100, vlan) for vlan in vlans)
+    return MAC_DST + MAC_SRC + tags + struct.pack("!H", ethertype) + payload
+
+
+def ipv4(src: str, dst: str, proto: int, payload: bytes, fragment: int = 0x4000) -> bytes:
+    header = struct.pack("!BBHHHBBH4s4s", 0x45, 0, 20 + len(payload), 0, fragment, 64, proto, 0,
+                         socket.inet_aton(src), socket.inet_aton(dst))
+    return header + payload
+
+
+def tcp(sport: int, dport: int, flags: int = 0x18, payload: bytes = b"") -> bytes:
+    return struct.pack("!HHIIBBHHH", sport, dport, 1, 0, 0x50, flags, 65535, 0, 0) + payload
+
+
+def udp(sport: int, dport: int, payload: bytes = b"") -> bytes:
+    return struct.pack("!HHHH", sport, dport, 8 + len(payload), 0) + payload
+
+
+def tcp_frame(src: str, dst: str, sport: int, dport: int, flags: int = 0x18,
+              payload: bytes = b"", vlans=()) -> bytes:
+    return ether(0x0800, ipv4(src, dst, 6, tcp(sport, dport, flags, payload)), vlans)
+
+
+def udp_frame(src: str, dst: str, sport: int, dport: int, payload: bytes = b"") -> bytes:
+    return ether(0x0800, ipv4(src, dst, 17, udp(sport, dport, payload)))
+
+
+def icmp_frame(src: str, dst: str) -> bytes:
+    return ether(0x0800, ipv4(src, dst, 1, struct.pack("!BBHHH", 8, 0, 0, 1, 1)))
+
+
+def arp_frame(psrc: str, pdst: str) -> bytes:
+    body = struct.pack("!HHBBH", 1, 0x0800, 6, 4, 1)
+    body += MAC_SRC + socket.inet_aton(psrc) + bytes(6) + socket.inet_aton(pdst)
+    return ether(0x0806, body)
+
+
+def ipv6_frame(src: str, dst: str) -> bytes:
+    header = struct.pack("!IHBB", 6 << 28, 8, 17, 64)
+    header += socket.inet_pton(socket.AF_INET6, src) + socket.inet_pton(socket.AF_INET6, dst)
+    return ether(0x86DD, header + udp(5000, 5001))
+
+
+def dns_query() -> bytes:
+    question = b"\x07example\x03com\x00" + struct.pack("!HH", 1, 1)
+    return struct.pack("!HHHHHH", 0x1234, 0x0100, 1, 0, 0, 0) + question
@@ -0,0 +1,39 @@
+import socket
+import struct
+
+import pytest
+
+from controllers.capture_options import (
+    PACKET_AUXDATA, SO_TIMESTAMPNS, SOL_PACKET, CaptureOptions, read_ancillary
+)
+from models.packet_model import CAPTURE_MODE_RAW, CAPTURE_MODE_SCAPY
+
+
+def auxdata(status=0, tci=0, tpid=0):
+    return SOL_PACKET, PACKET_AUXDATA, struct.pack("IIIHHHH", status, 60, 60, 0, 0, tci, tpid)
+
+
+def test_read_ancillary_returns_timestamp_and_vlan_tag():
+    stamp = (socket.SOL_SOCKET, SO_TIMESTAMPNS, struct.pack("qq", 1700000000, 250000000))
+    timestamp, tag = read_ancillary([auxdata(status=1 << 4, tci=100), stamp])
+    assert timestamp == pytest.approx(1700000000.25)
+    assert tag == b"\x81\x00\x00\x64"
+
+
+def test_read_ancillary_keeps_the_reported_tpid():
+    _, tag = read_ancillary([auxdata(status=(1 << 4) | (1 << 6), tci=7, tpid=0x88A8)])
+    assert tag == b"\x88\xa8\x00\x07"
+
+
+def test_read_ancillary_without_vlan_or_timestamp():
+    assert read_ancillary([auxdata()]) == (None, b"")
+    assert read_ancillary([]) == (None, b"")
+
+
+def test_snaplen_is_rejected_with_scapy_decoding():
+    options = CaptureOptions(snaplen=128)
+    with pytest.raises(ValueError):
+        options.check_mode(CAPTURE_MODE_SCAPY)
+    options.check_mode(CAPTURE_MODE_RAW)
+    options.check_mode(CAPTURE_MODE_SCAPY, workers=2)
+    CaptureOptions().check_mode(CAPTURE_MODE_SCAPY)
@@ -0,0 +1,93 @@
+import pytest
+
+from models.display_filter import DisplayFilterError, FilteredPackets, parse_display_filter
+from models.packet_index import PacketIndex
+from models.packet_store import PacketStore, address_to_int
+
+PROTOCOLS = ("TCP", "UDP", "ICMP", "ARP", "HTTPS", "DNS")
+
+
+def parse(text):
+    return parse_display_filter(text, PROTOCOLS)
+
+
+def test_primitives():
+    address = address_to_int("10.0.0.5")
+    assert parse("src 10.0.0.5") == ('src', address)
+    assert parse("host 10.0.0.5") == ('or', ('src', address), ('dst', address))
+    assert parse("port 53") == ('or', ('sport', 53), ('dport', 53))
+    assert parse("iface eth0") == ('iface', 'eth0')
+    assert parse("https") == ('proto', 'HTTPS')
+    assert parse("proto dns") == ('proto', 'DNS')
+
+
+def test_precedence_and_aliases():
+    https = ('proto', 'HTTPS')
+    dns = ('proto', 'DNS')
+    udp = ('proto', 'UDP')
+    assert parse("https or dns and udp") == ('or', https, ('and', dns, udp))
+    assert parse("(https || dns) && !udp") == ('and', ('or', https, dns), ('not', udp))
+    assert parse("not not udp") == ('not', ('not', udp))
+
+
+@pytest.mark.parametrize("text", [
+    "", "   ", "src", "src 10.0.0.x", "port abc", "port 70000", "(udp", "udp)",
+    "udp and", "and udp", "udp $", "10.0.0.1", "htps", "proto htps",
+])
+def test_invalid_filters(text):
+    with pytest.raises(DisplayFilterError):
+        parse(text)
+
+
+def test_default_protocols_come_from_classifier():
+    assert parse_display_filter("https") == ('proto', 'HTTPS')
+    assert parse_display_filter("tls or ipv6") == ('or', ('proto', 'TLS'), ('proto', 'IPV6'))
+    with pytest.raises(DisplayFilterError):
+        parse_display_filter("htps")
+
+
+def record(seq, protocol, src, dst, sport, dport, interface="eth0"):
+    return (1000.0 + seq, protocol, src, dst, sport, dport, 60, interface)
+
+
+@pytest.fixture
+def store():
+    store = PacketStore(capacity=100)
+    store.append_many([
+        record(0, "HTTPS", "10.0.0.1", "10.0.0.9", 40000, 443),
+        record(1, "DNS", "10.0.0.2", "10.0.0.53", 50000, 53),
+        record(2, "ARP", "10.0.0.1", "10.0.0.2", "ARP", "ARP", "eth1"),
+        record(3, "HTTPS", "10.0.0.9", "10.0.0.1", 443, 40000),
+        record(4, "Desconocido", "N/A", "N/A", "N/A", "N/A", "eth1"),
+    ])
+    return store
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("host 10.0.0.1", [0, 2, 3]),
+    ("src 10.0.0.1 and https", [0]),
+    ("dport 443 or port 53", [0, 1]),
+    ("not https", [1, 2, 4]),
+    ("iface eth1", [2, 4]),
+    ("iface wlan0", []),
+    ("tcp", []),
+    ("desconocido or arp", [2, 4]),
+    ("(https or dns) and not host 10.0.0.9", [1]),
+])
+def test_filtered_packets(store, text, expected):
+    filtered = FilteredPackets(store, PacketIndex(store), text, PROTOCOLS)
+    assert list(filtered.matches) == expected
+    assert filtered.total == len(expected)
+
+
+def test_store_protocols_are_accepted(store):
+    store.append_many([record(5, "QUIC", "10.0.0.3", "10.0.0.4", 50001, 443)])
+    filtered = FilteredPackets(store, PacketIndex(store), "quic", PROTOCOLS)
+    assert list(filtered.matches) == [5]
+
+
+def test_update_keeps_matches_current(store):
+    filtered = FilteredPackets(store, PacketIndex(store), "dns", PROTOCOLS)
+    store.append_many([record(5, "DNS", "10.0.0.2", "10.0.0.53", 50001, 53)])
+    assert filtered.update() == 1
+    assert filtered.newest(0, 10) == [store.get(5), store.get(1)]
@@ -0,0 +1,111 @@
+from models.flow_table import (TCP_ACK, TCP_FIN, TCP_RST, TCP_SYN, FlowTable, flow_key,
+                               format_tcp_flags)
+
+CLIENT = ("10.0.0.1", 40000)
+SERVER = ("10.0.0.9", 443)
+
+
+def send(table, timestamp, forward=True, size=100, flags=TCP_ACK, packets=1):
+    (src, sport), (dst, dport) = (CLIENT, SERVER) if forward else (SERVER, CLIENT)
+    return table.add(timestamp, "HTTPS", src, dst, sport, dport, size, flags, packets)
+
+
+def test_key_is_direction_independent():
+    assert flow_key("TCP", "10.0.0.9", "10.0.0.1", 443, 40000) == \
+        flow_key("TCP", "10.0.0.1", "10.0.0.9", 40000, 443)
+    assert format_tcp_flags(TCP_SYN | TCP_ACK | TCP_FIN) == "FSA"
+
+
+def test_both_directions_in_one_flow():
+    table = FlowTable()
+    send(table, 10.0, flags=TCP_SYN)
+    send(table, 10.1, forward=False, size=60, flags=TCP_SYN | TCP_ACK)
+    flow = send(table, 10.2, size=500, packets=3)
+    assert len(table) == 1
+    assert (flow.src, flow.sport) == CLIENT
+    assert (flow.packets_fwd, flow.bytes_fwd, flow.packets_rev, flow.bytes_rev) == (4, 600, 1, 60)
+    assert format_tcp_flags(flow.flags_fwd) == "SA"
+    assert flow.duration == 10.2 - 10.0
+
+
+def test_idle_timeout():
+    table = FlowTable(idle_timeout=5)
+    send(table, 10.0)
+    table.add(12.0, "DNS", "10.0.0.2", "10.0.0.53", 5000, 53, 80)
+    assert table.expire(15.5) == 1
+    assert len(table) == 1
+    assert table.finished[-1].state == "Inactivo"
+    # El barrido también se hace al llegar paquetes
+    table.add(30.0, "DNS", "10.0.0.3", "10.0.0.53", 5001, 53, 80)
+    assert len(table) == 1 and table.expired == 2
+
+
+def test_active_timeout_splits_a_long_flow():
+    table = FlowTable(idle_timeout=60, active_timeout=100)
+    first = send(table, 0.0)
+    for second in range(1, 101, 10):
+        send(table, float(second))
+    second = send(table, 101.0)
+    assert first is not second
+    assert first.state == "Duración máxima"
+    assert table.finished[-1] is first and second.packets == 1
+
+
+def test_rst_closes_the_flow():
+    table = FlowTable()
+    send(table, 1.0)
+    closed = send(table, 1.1, forward=False, flags=TCP_RST)
+    assert closed.state == "Cerrado" and len(table) == 0
+
+
+def test_full_teardown_is_one_flow():
+    table = FlowTable()
+    send(table, 1.0, flags=TCP_SYN)
+    send(table, 1.1, forward=False, flags=TCP_SYN | TCP_ACK)
+    send(table, 1.2)
+    send(table, 2.0, flags=TCP_FIN | TCP_ACK)
+    closing = send(table, 2.1, forward=False, flags=TCP_FIN | TCP_ACK)
+    assert closing.state == "Cerrando" and len(table) == 1
+    closed = send(table, 2.2)
+    assert closed is closing and closed.state == "Cerrado"
+    assert len(table) == 0 and table.created == 1 and table.finished[-1] is closed
+    assert (closed.packets_fwd, closed.packets_rev) == (4, 2)
+
+
+def test_closing_flow_ends_on_idle_or_reused_ports():
+    table = FlowTable(idle_timeout=5)
+    send(table, 1.0, flags=TCP_FIN | TCP_ACK)
+    send(table, 1.1, forward=False, flags=TCP_FIN | TCP_ACK)
+    assert table.expire(10.0) == 1
+    assert table.finished[-1].state == "Cerrado"
+    send(table, 20.0, flags=TCP_FIN | TCP_ACK)
+    closing = send(table, 20.1, forward=False, flags=TCP_FIN | TCP_ACK)
+    # Un SYN con los mismos puertos abre otra conexión
+    opened = send(table, 20.2, flags=TCP_SYN)
+    assert opened is not closing and closing.state == "Cerrado"
+    assert len(table) == 1 and opened.state == "Activo"
+
+
+def test_eviction_drops_least_recently_used():
+    table = FlowTable(max_flows=3)
+    for port in range(3):
+        table.add(1.0 + port / 10, "UDP", "10.0.0.1", "10.0.0.2", 1000 + port, 53, 60)
+    # El flujo del puerto 1000 vuelve a usarse: el desalojado es el 1001
+    table.add(1.5, "UDP", "10.0.0.1", "10.0.0.2", 1000, 53, 60)
+    table.add(1.6, "UDP", "10.0.0.1", "10.0.0.2", 1003, 53, 60)
+    assert len(table) == 3 and table.evicted == 1
+    assert table.finished[-1].sport == 1001 and table.finished[-1].state == "Desalojado"
+
+
+def test_top_and_finished_limits():
+    table = FlowTable(max_flows=2, keep_finished=2)
+    for port in range(6):
+        table.add(1.0, "UDP", "10.0.0.1", "10.0.0.2", 1000 + port, 53, 100 * (port + 1))
+    assert len(table.finished) == 2
+    assert [flow.sport for flow in table.top(2)] == [1005, 1004]
+    assert [flow.sport for flow in table.top(3, finished=True)] == [1005, 1004, 1003]
+    # Una sesión reabierta carga todos sus flujos; clear vuelve al límite
+    table.load_finished(list(table.finished) * 5)
+    assert len(table.finished) == 10
+    table.clear()
+    assert len(table) == 0 and table.finished.maxlen == 2 and table.created == 0
@@ -0,0 +1,41 @@
+import pytest
+
+from models.frame_ring import FrameRing
+
+
+@pytest.fixture
+def ring():
+    ring = FrameRing(slots=4, snaplen=16)
+    yield ring
+    ring.close()
+    ring.unlink()
+
+
+def test_put_and_get_batch(ring):
+    assert ring.put(b"abc", 1.5, interface=2, weight=8)
+    assert ring.put(b"x" * 40, 2.5)
+    assert len(ring) == 2
+    assert ring.get_batch() == [(1.5, 3, 2, 8, b"abc"), (2.5, 40, 0, 1, b"x" * 16)]
+    assert len(ring) == 0 and ring.get_batch() == []
+
+
+def test_full_ring_rejects_until_read(ring):
+    for number in range(4):
+        assert ring.put(bytes([number]), float(number))
+    assert not ring.put(b"lleno", 9.0)
+    assert [frame[4] for frame in ring.get_batch(3)] == [b"\x00", b"\x01", b"\x02"]
+    for number in range(4, 7):
+        assert ring.put(bytes([number]), float(number), length=1500)
+    assert not ring.put(b"lleno", 9.0)
+    batch = ring.get_batch()
+    assert [frame[4] for frame in batch] == [b"\x03", b"\x04", b"\x05", b"\x06"]
+    assert batch[-1][1] == 1500
+
+
+def test_consumer_attaches_by_name(ring):
+    consumer = FrameRing(slots=4, snaplen=16, name=ring.name)
+    try:
+        ring.put(b"hola", 3.0)
+        assert consumer.get_batch() == [(3.0, 4, 0, 1, b"hola")]
+    finally:
+        consumer.close()
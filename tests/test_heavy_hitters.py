@@ -0,0 +1,77 @@
+import random
+from collections import Counter
+
+import pytest
+
+from models.heavy_hitters import SpaceSaving
+
+
+def zipf_stream(length, distinct, seed=1):
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, distinct + 1)]
+    return rng.choices(range(distinct), weights, k=length)
+
+
+def test_exact_below_capacity():
+    sketch = SpaceSaving(capacity=10)
+    for item in "abcabca":
+        sketch.add(item)
+    top = sketch.top(3)
+    assert top[0] == ("a", 3, 0)
+    assert sorted(top[1:]) == [("b", 2, 0), ("c", 2, 0)]
+    assert sketch.estimate("a") == 3
+    assert sketch.estimate("z") == 0
+    assert len(sketch) == 3 and "b" in sketch
+
+
+@pytest.mark.parametrize("weighted", [False, True])
+def test_error_bounds(weighted):
+    capacity = 50
+    sketch = SpaceSaving(capacity)
+    rng = random.Random(2)
+    real = Counter()
+    for item in zipf_stream(20000, 2000):
+        weight = rng.randint(1, 8) if weighted else 1
+        sketch.add(item, weight)
+        real[item] += weight
+    total = sum(real.values())
+    assert sketch.total == total
+    assert len(sketch) <= capacity
+    assert sketch.error_bound == total // capacity
+    rows = sketch.top(capacity)
+    for item, estimate, error in rows:
+        # El conteo real está en [estimación - error, estimación] y error <= N/m
+        assert estimate - error <= real[item] <= estimate
+        assert error <= total / capacity
+    # Todo elemento con más de N/m está en la tabla
+    for item, count in real.items():
+        if count > total / capacity:
+            assert item in sketch
+    estimates = [estimate for _, estimate, _ in rows]
+    assert estimates == sorted(estimates, reverse=True)
+
+
+def test_weighted_add_matches_repeated_add():
+    repeated = SpaceSaving(5)
+    weighted = SpaceSaving(5)
+    for item in zipf_stream(300, 20, seed=3):
+        for _ in range(3):
+            repeated.add(item)
+        weighted.add(item, 3)
+    assert weighted.total == repeated.total
+    assert sorted(weighted.top(5), key=repr) == sorted(repeated.top(5), key=repr)
+
+
+def test_top_limits_and_clear():
+    sketch = SpaceSaving(4)
+    for item in range(10):
+        sketch.add(item, item + 1)
+    assert len(sketch.top(2)) == 2
+    assert sketch.top(2)[0][1] >= sketch.top(2)[1][1]
+    sketch.clear()
+    assert sketch.top(5) == [] and sketch.total == 0 and len(sketch) == 0
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        SpaceSaving(0)
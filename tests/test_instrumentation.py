@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from models.instrumentation import (BUCKETS, SUB_BUCKETS, Histogram, Instrumentation, bucket_bounds,
+                                    bucket_index)
+
+
+@pytest.mark.parametrize("value", [0, 1, 3, 4, 5, 7, 8, 15, 16, 1000, 123_456_789, 2 ** 62])
+def test_value_falls_in_its_bucket(value):
+    index = bucket_index(value)
+    low, high = bucket_bounds(index)
+    assert 0 <= index < BUCKETS
+    assert low <= value < high
+
+
+def test_buckets_are_contiguous_with_bounded_width():
+    previous_high = 0
+    for index in range(SUB_BUCKETS * 40):
+        low, high = bucket_bounds(index)
+        assert low == previous_high
+        assert high - low <= max(1, low // SUB_BUCKETS)
+        previous_high = high
+
+
+def test_percentiles_within_relative_error():
+    histogram = Histogram()
+    for value in range(1, 10001):
+        histogram.record(value)
+    assert histogram.count == 10000 and histogram.max == 10000
+    assert histogram.mean() == 5000.5
+    for fraction in (0.5, 0.9, 0.99):
+        exact = fraction * 10000
+        assert abs(histogram.percentile(fraction) - exact) / exact < 0.25
+    assert histogram.percentile(1.0) <= 10000
+    assert Histogram().percentile(0.5) == 0.0
+
+
+def test_take_and_merge():
+    first, second = Histogram(), Histogram()
+    for value in (10, 20, 30):
+        first.record(value)
+    second.record(5000)
+    state = second.take()
+    assert second.count == 0
+    first.merge(state)
+    assert (first.count, first.total, first.max) == (4, 5060, 5000)
+
+
+def test_probe_samples_one_in_n_and_latency_marks():
+    instrumentation = Instrumentation(sample_every=4)
+    probe = instrumentation.probe()
+    assert [probe.due() for _ in range(8)] == [False, False, False, True] * 2
+    assert Instrumentation(sample_every=0).probe() is None
+    probe.mark(10, 0)
+    probe.mark(20, 0)
+    instrumentation.consumed(15)
+    instrumentation.displayed()
+    assert instrumentation.histograms["latencia"].count == 1
+    assert len(instrumentation.marks) == 1
+    instrumentation.clear()
+    assert not instrumentation.marks
+
+
+def test_report_and_merge_of_process_states(tmp_path):
+    worker = Instrumentation()
+    worker.record("decodificacion", 300)
+    states = worker.take(["decodificacion", "conteo"])
+    assert list(states) == ["decodificacion"]
+    main = Instrumentation()
+    main.merge(states)
+    with main.stage("tick"):
+        pass
+    report = main.report({"paquetes": 1})
+    assert report["etapas"]["decodificacion"]["muestras"] == 1
+    assert report["etapas"]["tick"]["muestras"] == 1
+    assert report["paquetes"] == 1
+    path = str(tmp_path / "instrumentacion.json")
+    assert main.save(path, {"paquetes": 1}) == path
+    with open(path, encoding="utf-8") as handle:
+        assert json.load(handle)["paquetes"] == 1
@@ -0,0 +1,48 @@
+import random
+
+from models.ip_ranking import IpRanking
+
+
+def test_incremental_update_matches_rebuild():
+    rng = random.Random(4)
+    counts = {}
+    ranking = IpRanking(page_size=5)
+    for _ in range(200):
+        dirty = set()
+        for _ in range(rng.randint(1, 20)):
+            ip = f"10.0.0.{rng.randint(1, 60)}"
+            counts[ip] = counts.get(ip, 0) + rng.randint(1, 5)
+            dirty.add(ip)
+        ranking.update(counts, dirty)
+        reference = IpRanking(page_size=5)
+        reference.rebuild(counts)
+        assert ranking.page_rows() == reference.page_rows()
+    assert ranking.total == len(counts)
+
+
+def test_update_reports_visible_changes_only():
+    ranking = IpRanking(page_size=2)
+    counts = {"a": 5, "b": 4, "c": 1}
+    assert ranking.update(counts, counts)
+    assert ranking.page_rows() == [("a", 5), ("b", 4)]
+    counts["c"] = 2
+    assert not ranking.update(counts, {"c"})
+    assert not ranking.update(counts, ())
+    counts["c"] = 9
+    assert ranking.update(counts, {"c"})
+    assert ranking.page_rows() == [("c", 9), ("a", 5)]
+
+
+def test_pages_and_load():
+    counts = {f"10.0.0.{i}": i for i in range(1, 8)}
+    ranking = IpRanking(page_size=3)
+    ranking.rebuild(counts)
+    assert ranking.page_count == 3
+    ranking.set_page(1, counts)
+    assert ranking.page_rows() == [("10.0.0.4", 4), ("10.0.0.3", 3), ("10.0.0.2", 2)]
+    ranking.set_page(99, counts)
+    assert ranking.page == 2 and ranking.page_rows() == [("10.0.0.1", 1)]
+    ranking.clear()
+    assert ranking.load([("x", 10), ("y", 3)], total=2)
+    assert ranking.page_rows() == [("x", 10), ("y", 3)]
+    assert not ranking.load([("x", 10), ("y", 3)], total=2)
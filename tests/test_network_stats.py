@@ -0,0 +1,27 @@
+from types import SimpleNamespace
+
+from models.network_stats import NetworkStats
+from models.packet_sampler import PacketSampler
+
+stats = NetworkStats()
+
+
+def test_sizes_rates_and_durations():
+    assert stats.format_elapsed(0) == "00:00:00"
+    assert stats.format_elapsed(3725) == "01:02:05"
+    assert stats.format_size(512) == "512 B"
+    assert stats.format_size(1536) == "1.5 KB"
+    assert stats.format_size(3 * 1024 ** 3) == "3.0 GB"
+    assert stats.format_rate(999) == "999 bit/s"
+    assert stats.format_rate(2_500_000) == "2.5 Mbit/s"
+    assert stats.format_duration(1500) == "1.5 µs"
+    assert stats.format_duration(2.5e9) == "2.50 s"
+
+
+def test_interface_and_sampling():
+    interface = SimpleNamespace(name="eth0", packets=10, bytes=2048,
+                                kernel=SimpleNamespace(available=True, dropped=3))
+    assert stats.format_interface(interface) == "eth0: 10 paq., 2.0 KB, 3 desc."
+    assert stats.format_sampling(None) == "todos los paquetes"
+    sampler = PacketSampler("1-de-n", every=4, adaptive=True)
+    assert stats.format_sampling(sampler) == "1 de 4 (1-de-n, adaptativo), 25.0% conservado"
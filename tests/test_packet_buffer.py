@@ -0,0 +1,21 @@
+from models.packet_buffer import PacketBuffer
+
+
+def test_drain_in_order_with_limit():
+    buffer = PacketBuffer(capacity=10)
+    for item in range(5):
+        buffer.push(item)
+    assert buffer.drain(2) == [0, 1]
+    assert buffer.drain() == [2, 3, 4]
+    assert buffer.drain() == [] and len(buffer) == 0
+    assert (buffer.pushed, buffer.peak, buffer.dropped) == (5, 5, 0)
+
+
+def test_full_buffer_drops_oldest():
+    buffer = PacketBuffer(capacity=3)
+    for item in range(5):
+        buffer.push(item)
+    assert (buffer.dropped, buffer.peak) == (2, 3)
+    assert buffer.drain() == [2, 3, 4]
+    buffer.clear()
+    assert (buffer.pushed, buffer.dropped, buffer.peak) == (0, 0, 0)
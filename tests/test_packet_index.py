@@ -0,0 +1,71 @@
+from models.display_filter import FilteredPackets, parse_display_filter
+from models.packet_index import PacketIndex
+from models.packet_store import PacketStore, address_to_int
+
+
+def record(seq, src="10.0.0.1", dst="10.0.0.9", protocol="HTTPS", sport=40000, dport=443):
+    return (1000.0 + seq, protocol, src, dst, sport, dport, 60, "eth0")
+
+
+def test_update_indexes_only_new_rows():
+    store = PacketStore(capacity=100)
+    index = PacketIndex(store)
+    store.append_many(record(seq) for seq in range(5))
+    assert index.update() == 5
+    assert index.update() == 0
+    store.append_many(record(seq, src="10.0.0.2") for seq in range(5, 8))
+    assert index.update() == 3
+    assert index.lookup('src', address_to_int("10.0.0.1"), 0, 8) == [0, 1, 2, 3, 4]
+    assert index.lookup('src', address_to_int("10.0.0.2"), 0, 8) == [5, 6, 7]
+    assert index.lookup('src', address_to_int("10.0.0.1"), 2, 4) == [2, 3]
+
+
+def test_clear_resets_index_even_if_store_grew_past_indexed():
+    # Regresión: indexar 5 filas, vaciar el almacén y añadir 8 nuevas sin
+    # consultar el índice entre medias (filtro quitado, Limpiar, captura)
+    store = PacketStore(capacity=100)
+    index = PacketIndex(store)
+    store.append_many(record(seq) for seq in range(5))
+    index.update()
+    store.clear()
+    store.append_many(record(seq, src="10.0.0.2") for seq in range(8))
+    assert index.update() == 8
+    assert index.lookup('src', address_to_int("10.0.0.1"), 0, 8) == []
+    assert index.lookup('src', address_to_int("10.0.0.2"), 0, 8) == list(range(8))
+
+
+def test_filtered_packets_restart_after_clear():
+    store = PacketStore(capacity=100)
+    index = PacketIndex(store)
+    store.append_many(record(seq) for seq in range(5))
+    filtered = FilteredPackets(store, index, "src 10.0.0.1")
+    assert filtered.total == 5
+    store.clear()
+    store.append_many(record(seq, src="10.0.0.1" if seq < 2 else "10.0.0.2") for seq in range(8))
+    filtered.update()
+    assert filtered.total == 2
+    assert list(filtered.matches) == [0, 1]
+
+
+def test_compaction_drops_overwritten_sequences():
+    store = PacketStore(capacity=10)
+    index = PacketIndex(store)
+    store.append_many(record(seq, src=f"10.0.1.{seq}") for seq in range(10))
+    index.update()
+    assert index.lookup('src', address_to_int("10.0.1.3"), 0, 10) == [3]
+    store.append_many(record(seq, src=f"10.0.1.{seq}") for seq in range(10, 25))
+    index.update()
+    assert store.first_seq == 15
+    # Las direcciones de las filas sobrescritas ya no tienen lista
+    assert index.lookup('src', address_to_int("10.0.1.3"), 0, 25) == []
+    assert index.lookup('src', address_to_int("10.0.1.20"), 0, 25) == [20]
+    assert index.entries() <= 10 * 6
+
+
+def test_filter_matches_within_ring_after_wraparound():
+    store = PacketStore(capacity=10)
+    index = PacketIndex(store)
+    store.append_many(record(seq, dport=53 if seq % 2 else 443) for seq in range(25))
+    filtered = FilteredPackets(store, index, "dport 53")
+    assert list(filtered.matches) == [15, 17, 19, 21, 23]
+    assert parse_display_filter("dport 53") == ('dport', 53)
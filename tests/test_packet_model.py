@@ -0,0 +1,102 @@
+from scapy.all import Ether  # type: ignore
+
+from models.instrumentation import Instrumentation
+from models.packet_model import PacketModel
+from tests.frames import arp_frame, dns_query, tcp_frame, udp_frame
+
+
+def test_process_raw_decodes_classifies_and_counts():
+    model = PacketModel()
+    model.process_raw(tcp_frame("10.0.0.1", "10.0.0.9", 40000, 443), 100.0, interface="eth0")
+    model.process_raw(udp_frame("10.0.0.1", "10.0.0.53", 40001, 9999, dns_query()), 100.5)
+    model.process_raw(arp_frame("10.0.0.1", "10.0.0.254"), 101.0)
+    model.process_raw(b"\x00" * 10, 101.0)
+    records = model.packet_buffer.drain()
+    assert [record[1] for record in records] == ["HTTPS", "DNS", "ARP", "Desconocido"]
+    assert records[0] == (100.0, "HTTPS", "10.0.0.1", "10.0.0.9", 40000, 443, 54, "eth0")
+    snapshot = model.counters.snapshot()
+    assert snapshot.packets == 4
+    assert snapshot.bytes == 54 + 42 + len(dns_query()) + 42 + 10
+    assert dict(snapshot.transports) == {"TCP": 1, "UDP": 1, "ARP": 1, "Desconocido": 1}
+    assert model.ip_counts["10.0.0.1"] == 3
+    assert model.top_ips(1) == [("10.0.0.1", 3)]
+    assert len(model.flows) == 3
+
+
+def test_scapy_and_raw_paths_count_alike():
+    frames = [tcp_frame("10.0.0.1", "10.0.0.9", 40000, 80),
+              udp_frame("10.0.0.2", "10.0.0.9", 40001, 67),
+              arp_frame("10.0.0.1", "10.0.0.254")]
+    raw = PacketModel()
+    scapy = PacketModel()
+    for frame in frames:
+        raw.process_raw(frame, 100.0)
+        packet = Ether(frame)
+        packet.time = 100.0
+        scapy.process_packet(packet)
+    assert raw.counters.snapshot() == scapy.counters.snapshot()
+    assert dict(raw.counters.snapshot().protocols) == {"HTTP": 1, "DHCP": 1, "ARP": 1}
+    assert dict(raw.ip_counts) == dict(scapy.ip_counts)
+
+
+def test_processing_errors_are_counted_without_printing(capsys):
+    class BrokenClassifier:
+        def by_port(self, transport, port_src, port_dst):
+            raise ValueError("clasificador roto")
+
+    model = PacketModel(classifier=BrokenClassifier())
+    model.process_raw(tcp_frame("10.0.0.1", "10.0.0.9", 40000, 443), 100.0, weight=2)
+    snapshot = model.counters.snapshot()
+    assert (snapshot.packets, snapshot.bytes, snapshot.errors) == (2, 108, 2)
+    assert model.packet_buffer.drain() == []
+    assert capsys.readouterr().out == ""
+
+
+def test_sampling_weight_scales_counters_but_not_records():
+    model = PacketModel()
+    frame = tcp_frame("10.0.0.1", "10.0.0.9", 40000, 443)
+    model.process_raw(frame, 100.0, weight=8)
+    snapshot = model.counters.snapshot()
+    assert (snapshot.packets, snapshot.bytes) == (8, 8 * len(frame))
+    assert model.ip_counts["10.0.0.9"] == 8
+    assert model.packet_buffer.drain()[0][6] == len(frame)
+    flow = model.flows.snapshot()[0]
+    assert (flow.packets, flow.bytes) == (8, 8 * len(frame))
+    model.weighted_flows = False
+    model.process_raw(frame, 100.1, weight=8)
+    assert model.flows.snapshot()[0].packets == 9
+
+
+def test_dirty_and_unsaved_ips():
+    model = PacketModel()
+    model.process_raw(tcp_frame("10.0.0.1", "10.0.0.9", 40000, 443), 100.0)
+    assert model.pop_unsaved_ips() == set()
+    model.track_unsaved_ips(True)
+    assert model.pop_unsaved_ips() == {"10.0.0.1", "10.0.0.9"}
+    model.process_raw(udp_frame("10.0.0.2", "10.0.0.9", 40000, 53), 100.0)
+    assert model.pop_unsaved_ips() == {"10.0.0.2", "10.0.0.9"}
+    assert model.pop_dirty_ips() == {"10.0.0.1", "10.0.0.2", "10.0.0.9"}
+    assert model.pop_dirty_ips() == set()
+    model.track_unsaved_ips(False)
+    assert model.ip_unsaved is None
+
+
+def test_heavy_hitters_replace_exact_ip_counts():
+    model = PacketModel(heavy_hitters=16)
+    for port in range(5):
+        model.process_raw(tcp_frame("10.0.0.1", "10.0.0.9", 40000 + port, 443), 100.0)
+    assert not model.ip_counts
+    assert sorted(model.top_ips(2)) == [("10.0.0.1", 5), ("10.0.0.9", 5)]
+    assert model.port_sketch.estimate(443) == 5
+    model.clear_data()
+    assert model.top_ips(2) == [] and model.counters.snapshot().packets == 0
+
+
+def test_instrumented_packets_record_stages():
+    instrumentation = Instrumentation(sample_every=2)
+    model = PacketModel(instrumentation=instrumentation)
+    for _ in range(4):
+        model.process_raw(tcp_frame("10.0.0.1", "10.0.0.9", 40000, 443), 100.0)
+    assert instrumentation.histograms["decodificacion"].count == 2
+    assert instrumentation.histograms["encolado"].count == 2
+    assert [position for position, _ in instrumentation.marks] == [2, 4]
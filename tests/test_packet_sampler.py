@@ -0,0 +1,99 @@
+import random
+
+import pytest
+
+from models.packet_sampler import CALM_CYCLES, HOLD_CYCLES, MAX_EVERY, PacketSampler, flow_hash
+from tests.frames import arp_frame, tcp_frame, udp_frame
+
+
+def test_one_in_n_is_deterministic():
+    sampler = PacketSampler("1-de-n", every=4)
+    weights = [sampler.weight(b"") for _ in range(12)]
+    assert weights == [4, 0, 0, 0] * 3
+    assert (sampler.seen, sampler.kept) == (12, 3)
+    assert sampler.effective_rate == 0.25
+
+
+def test_random_mode_keeps_about_one_in_n():
+    sampler = PacketSampler("aleatorio", every=10)
+    sampler._uniform = random.Random(1).random
+    weights = [sampler.weight(b"") for _ in range(20000)]
+    assert set(weights) == {0, 10}
+    assert 1800 < sampler.kept < 2200
+    # Estimación sin sesgo del total
+    assert abs(sum(weights) - 20000) < 2000
+
+
+def test_flow_hash_is_symmetric():
+    forward = tcp_frame("10.0.0.1", "10.0.0.2", 40000, 443)
+    reverse = tcp_frame("10.0.0.2", "10.0.0.1", 443, 40000, flags=0x10)
+    assert flow_hash(forward) == flow_hash(reverse)
+    assert flow_hash(forward) != flow_hash(tcp_frame("10.0.0.1", "10.0.0.2", 40001, 443))
+    assert flow_hash(arp_frame("10.0.0.1", "10.0.0.2")) == flow_hash(arp_frame("10.0.0.3", "10.0.0.4"))
+    assert flow_hash(b"short") == 0
+
+
+def test_flow_mode_keeps_whole_flows_and_shrinks_to_a_subset():
+    frames = [udp_frame(f"10.0.{i // 250}.{i % 250}", "10.1.0.1", 1024 + i, 53) for i in range(2000)]
+    sampler = PacketSampler("flujo", every=4)
+    kept = {index for index, frame in enumerate(frames) if sampler.weight(frame)}
+    assert 350 < len(kept) < 650
+    # Los dos sentidos de un flujo conservado se conservan
+    for index in list(kept)[:50]:
+        reply = udp_frame("10.1.0.1", f"10.0.{index // 250}.{index % 250}", 53, 1024 + index)
+        assert sampler.weight(reply) == 4
+    sampler.set_every(8)
+    narrower = {index for index, frame in enumerate(frames) if sampler.weight(frame)}
+    assert narrower <= kept
+    assert sampler.complete_flows
+
+
+def test_adaptive_doubles_under_load_and_waits_between_steps():
+    sampler = PacketSampler("1-de-n", every=2, adaptive=True, queue_limit=0.5)
+    assert sampler.adapt(0.9) == 4
+    # Cada subida se deja actuar HOLD_CYCLES ciclos
+    for _ in range(HOLD_CYCLES):
+        assert sampler.adapt(0.9) == 4
+    assert sampler.adapt(0.1, dropped=True) == 8
+    assert sampler.changes == 2
+
+
+def test_adaptive_latency_triggers_and_calm_steps_back_to_base():
+    sampler = PacketSampler("1-de-n", every=2, adaptive=True, latency_limit=0.5)
+    assert sampler.adapt(0.0, latency=0.6) == 4
+    # Carga intermedia: ni sube ni cuenta como ciclo tranquilo
+    for _ in range(CALM_CYCLES * 2):
+        assert sampler.adapt(0.2) == 4
+    for _ in range(CALM_CYCLES - 1):
+        assert sampler.adapt(0.0, latency=0.01) == 4
+    assert sampler.adapt(0.0) == 2
+    for _ in range(CALM_CYCLES * 3):
+        assert sampler.adapt(0.0) == 2
+
+
+def test_adaptive_is_capped_and_reset_restores_base():
+    sampler = PacketSampler("1-de-n", every=MAX_EVERY // 2, adaptive=True)
+    sampler.adapt(1.0)
+    for _ in range(HOLD_CYCLES + 1):
+        sampler.adapt(1.0)
+    assert sampler.every == MAX_EVERY
+    sampler.reset()
+    assert (sampler.every, sampler.seen, sampler.kept, sampler.changes) == (MAX_EVERY // 2, 0, 0, 0)
+
+
+def test_fixed_sampler_ignores_load():
+    sampler = PacketSampler("1-de-n", every=3)
+    assert sampler.adapt(1.0, dropped=True) == 3
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"mode": "todo"},
+    {"every": 0},
+    {"every": MAX_EVERY + 1},
+    {"queue_limit": 0},
+    {"queue_limit": 1.5},
+    {"latency_limit": 0},
+])
+def test_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        PacketSampler(**kwargs)
@@ -0,0 +1,103 @@
+import time
+
+import pytest
+
+from models.packet_store import (ROW_BYTES, PacketStore, TimestampFormatter, address_to_int,
+                                 int_to_address)
+
+
+def record(seq, src="10.0.0.1", dst="10.0.0.9", protocol="HTTPS", sport=40000, dport=443,
+           interface="eth0"):
+    return (1000.0 + seq, protocol, src, dst, sport, dport, 60 + seq, interface)
+
+
+def clock(timestamp):
+    return time.strftime("%H:%M:%S", time.localtime(int(timestamp)))
+
+
+@pytest.mark.parametrize("address", ["10.0.0.1", "255.255.255.255", "2001:db8::1", "::1"])
+def test_address_round_trip(address):
+    assert int_to_address(address_to_int(address)) == address
+
+
+def test_ipv4_is_mapped_into_ipv6():
+    assert address_to_int("1.2.3.4") == (0xFFFF << 32) | 0x01020304
+
+
+def test_rows_are_materialized_as_text():
+    store = PacketStore(capacity=10)
+    store.append_many([
+        record(0),
+        (1001.0, "ARP", "10.0.0.1", "10.0.0.254", "ARP", "ARP", 42, "eth1"),
+        (1002.0, "Desconocido", "N/A", "N/A", "N/A", "N/A", 30, "eth0"),
+        record(3, src="2001:db8::1", dst="2001:db8::2", protocol="IPv6", sport="N/A", dport="N/A"),
+    ])
+    assert len(store) == 4 and store.first_seq == 0
+    assert store.get(0) == (clock(1000.0), "HTTPS", "10.0.0.1", "10.0.0.9", "40000", "443", "60", "eth0")
+    assert store.get(1)[1:] == ("ARP", "10.0.0.1", "10.0.0.254", "ARP", "ARP", "42", "eth1")
+    assert store.get(2)[1:] == ("Desconocido", "N/A", "N/A", "N/A", "N/A", "30", "eth0")
+    assert store.get(3)[2:6] == ("2001:db8::1", "2001:db8::2", "N/A", "N/A")
+    assert store.protocol_names == ["HTTPS", "ARP", "Desconocido", "IPv6"]
+    assert store.memory_bytes() == 4 * ROW_BYTES
+
+
+def test_ring_overwrites_oldest():
+    store = PacketStore(capacity=4)
+    store.append_many(record(seq, sport=1000 + seq) for seq in range(10))
+    assert (len(store), store.first_seq, store.total) == (4, 6, 10)
+    assert [row[4] for row in store] == ["1006", "1007", "1008", "1009"]
+    assert [row[4] for row in store.rows(7, 9)] == ["1007", "1008"]
+    assert [row[4] for row in store.newest(1, 2)] == ["1008", "1007"]
+    assert [row[4] for row in store.newest(0, 100)] == ["1009", "1008", "1007", "1006"]
+    with pytest.raises(IndexError):
+        store.get(5)
+    with pytest.raises(IndexError):
+        store.get(10)
+
+
+def test_segments_split_at_the_ring_edge():
+    store = PacketStore(capacity=4)
+    store.append_many(record(seq) for seq in range(6))
+    assert store.segments(2, 6) == [(2, 4), (0, 2)]
+    assert store.segments(4, 6) == [(0, 2)]
+    assert store.segments(3, 3) == []
+
+
+def test_clear_resets_rows_and_bumps_generation():
+    store = PacketStore(capacity=4)
+    store.append_many(record(seq) for seq in range(6))
+    generation = store.generation
+    store.clear()
+    assert (len(store), store.total, store.generation) == (0, 0, generation + 1)
+    assert list(store) == []
+
+
+def test_interface_ids_are_limited_to_a_byte():
+    store = PacketStore(capacity=4)
+    for number in range(256):
+        store.interface_id(f"if{number}")
+    with pytest.raises(ValueError):
+        store.interface_id("if256")
+    # clear() libera los nombres junto con las filas
+    store.clear()
+    assert store.interface_names == [] and store.protocol_names == []
+    assert store.interface_id("if256") == 0
+
+
+def test_rejected_record_leaves_columns_aligned():
+    store = PacketStore(capacity=4)
+    for number in range(256):
+        store.interface_id(f"if{number}")
+    with pytest.raises(ValueError):
+        store.append_many([record(0, interface="if0"), record(1, interface="nueva")])
+    assert store.total == 1
+    assert {len(column) for column in store.columns()} == {1}
+    store.append_many([record(2, interface="if1")])
+    assert [row[7] for row in store] == ["if0", "if1"]
+
+
+def test_timestamp_formatter_milliseconds():
+    formatter = TimestampFormatter(milliseconds=True)
+    assert formatter(1000.0421) == clock(1000) + ".042"
+    assert formatter(1000.999) == clock(1000) + ".999"
+    assert TimestampFormatter()(1001.5) == clock(1001)
@@ -0,0 +1,59 @@
+import struct
+
+import pytest
+
+from models.protocol_classifier import (BASE_LABELS, ProtocolClassifier, default_classifier,
+                                        read_services)
+from tests.frames import dns_query
+
+CLIENT_HELLO = bytes([0x16, 0x03, 0x01, 0x00, 0x2a, 0x01]) + bytes(42)
+
+
+def test_lower_registered_port_wins():
+    classifier = ProtocolClassifier([("HTTPS", "tcp", 443), ("ALT", "TCP", 50000)], heuristics=False)
+    assert classifier.by_port("TCP", 50000, 443) == "HTTPS"
+    assert classifier.by_port("TCP", 443, 50000) == "HTTPS"
+    assert classifier.by_port("TCP", 40000, 50000) == "ALT"
+    assert classifier.by_port("UDP", 443, 50000) is None
+    assert classifier.classify("TCP", 1, 2) == "TCP"
+
+
+def test_payload_heuristics():
+    classifier = ProtocolClassifier()
+    assert classifier.classify("TCP", 40000, 9999, CLIENT_HELLO) == "TLS"
+    assert classifier.classify("TCP", 40000, 9999, b"GET /index HTTP/1.1\r\n") == "HTTP"
+    query = dns_query()
+    assert classifier.classify("UDP", 40000, 9999, query) == "DNS"
+    assert classifier.classify("TCP", 40000, 9999, struct.pack("!H", len(query)) + query) == "DNS"
+    assert classifier.classify("UDP", 40000, 9999, b"\x00" * 12) == "UDP"
+    assert classifier.by_payload("TCP", b"") is None
+    assert ProtocolClassifier(heuristics=False).classify("TCP", 1, 2, CLIENT_HELLO) == "TCP"
+
+
+def test_read_services_ranges_and_comments(tmp_path):
+    path = tmp_path / "servicios.txt"
+    path.write_text("# propio\nJUEGO  27015-27017/udp,27015/tcp  # servidor\n\nWEB 8081/tcp\n",
+                    encoding="utf-8")
+    assert read_services(str(path)) == [
+        ("JUEGO", "UDP", 27015), ("JUEGO", "UDP", 27016), ("JUEGO", "UDP", 27017),
+        ("JUEGO", "TCP", 27015), ("WEB", "TCP", 8081),
+    ]
+    classifier = ProtocolClassifier(heuristics=False)
+    assert classifier.load(str(path)) == 5
+    assert classifier.names() == ["JUEGO", "WEB"]
+    assert set(BASE_LABELS) <= set(classifier.labels())
+
+
+@pytest.mark.parametrize("line", ["SOLO", "X 80/sctp", "X 70000/tcp", "X 90-80/tcp", "X abc/tcp"])
+def test_read_services_rejects_bad_lines(tmp_path, line):
+    path = tmp_path / "servicios.txt"
+    path.write_text(f"OK 80/tcp\n{line}\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="línea 2"):
+        read_services(str(path))
+
+
+def test_default_services():
+    classifier = default_classifier()
+    assert classifier.by_port("TCP", 51000, 443) == "HTTPS"
+    assert classifier.by_port("UDP", 53, 51000) == "DNS"
+    assert classifier.by_port("UDP", 51000, 443) == "QUIC"
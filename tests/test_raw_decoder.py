@@ -0,0 +1,63 @@
+import pytest
+
+from models.raw_decoder import decode_frame, transport_payload
+from tests.frames import (arp_frame, dns_query, ether, icmp_frame, ipv4, ipv6_frame, tcp,
+                          tcp_frame, udp_frame)
+
+
+def test_tcp_ports_and_flags():
+    frame = tcp_frame("10.0.0.1", "192.168.0.1", 40000, 443, flags=0x12)
+    assert decode_frame(frame) == ("TCP", "10.0.0.1", "192.168.0.1", 40000, 443, 0x12)
+
+
+def test_udp_icmp_arp_ipv6():
+    assert decode_frame(udp_frame("10.0.0.1", "10.0.0.2", 5353, 53)) == \
+        ("UDP", "10.0.0.1", "10.0.0.2", 5353, 53, 0)
+    assert decode_frame(icmp_frame("10.0.0.1", "10.0.0.2")) == \
+        ("ICMP", "10.0.0.1", "10.0.0.2", "ICMP", "ICMP", 0)
+    assert decode_frame(arp_frame("10.0.0.1", "10.0.0.254")) == \
+        ("ARP", "10.0.0.1", "10.0.0.254", "ARP", "ARP", 0)
+    assert decode_frame(ipv6_frame("2001:db8::1", "2001:db8::2")) == \
+        ("IPv6", "2001:db8::1", "2001:db8::2", "N/A", "N/A", 0)
+
+
+def test_stacked_vlan_tags_are_skipped():
+    frame = tcp_frame("10.0.0.1", "10.0.0.2", 1234, 80, vlans=(10, 20))
+    assert decode_frame(frame) == ("TCP", "10.0.0.1", "10.0.0.2", 1234, 80, 0x18)
+
+
+def test_non_initial_fragment_has_no_ports():
+    frame = ether(0x0800, ipv4("10.0.0.1", "10.0.0.2", 6, tcp(1234, 80), fragment=0x0010))
+    assert decode_frame(frame) == ("Desconocido", "10.0.0.1", "10.0.0.2", "N/A", "N/A", 0)
+
+
+@pytest.mark.parametrize("frame", [
+    b"",
+    bytes(13),
+    ether(0x0800, bytes(10)),                   # cabecera IPv4 incompleta
+    ether(0x86DD, bytes(20)),                   # cabecera IPv6 incompleta
+    ether(0x88CC, bytes(40)),                   # LLDP
+])
+def test_short_or_unknown_frames(frame):
+    assert decode_frame(frame) == ("Desconocido", "N/A", "N/A", "N/A", "N/A", 0)
+
+
+def test_truncated_tcp_keeps_ports_without_flags():
+    frame = tcp_frame("10.0.0.1", "10.0.0.2", 1234, 80)[:14 + 20 + 8]
+    assert decode_frame(frame) == ("TCP", "10.0.0.1", "10.0.0.2", 1234, 80, 0)
+
+
+def test_truncated_arp():
+    assert decode_frame(arp_frame("10.0.0.1", "10.0.0.2")[:30]) == \
+        ("ARP", "N/A", "N/A", "ARP", "ARP", 0)
+
+
+def test_transport_payload():
+    query = dns_query()
+    assert bytes(transport_payload(udp_frame("10.0.0.1", "10.0.0.2", 5000, 53, query))) == query
+    request = b"GET / HTTP/1.1\r\n"
+    frame = tcp_frame("10.0.0.1", "10.0.0.2", 40000, 8081, payload=request, vlans=(7,))
+    assert bytes(transport_payload(frame)) == request
+    assert transport_payload(icmp_frame("10.0.0.1", "10.0.0.2")) == b""
+    assert transport_payload(ipv6_frame("::1", "::2")) == b""
+    assert transport_payload(b"") == b""
@@ -0,0 +1,64 @@
+import ast
+import struct
+import sys
+import zipfile
+from types import SimpleNamespace
+
+from controllers import reports
+from models.packet_store import COLUMN_NAMES, PacketStore, address_to_int
+
+
+def read_npy(data):
+    """(descr, forma, cuerpo) de un .npy 1.0, sin NumPy."""
+    assert data[:8] == b"\x93NUMPY\x01\x00"
+    length = struct.unpack("<H", data[8:10])[0]
+    assert (10 + length) % 64 == 0
+    header = ast.literal_eval(data[10:10 + length].decode("latin-1"))
+    assert header["fortran_order"] is False
+    return header["descr"], header["shape"], data[10 + length:]
+
+
+def store_after_wraparound():
+    store = PacketStore(capacity=4)
+    store.append_many(
+        (1000.0 + seq, "HTTPS" if seq % 2 else "DNS", f"10.0.0.{seq}", "10.0.0.99",
+         40000 + seq, 443, 60 + seq, "eth0")
+        for seq in range(6)
+    )
+    return store
+
+
+def test_npz_columns_in_arrival_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(reports, "EXPORT_CHUNK", 1)
+    progress = []
+    filename = str(tmp_path / "paquetes.npz")
+    session = SimpleNamespace(store=store_after_wraparound())
+    reports.write_npz_report(session, filename, compress=True,
+                             progress=lambda done, total: progress.append((done, total)))
+    assert progress[-1] == (4 * len(COLUMN_NAMES), 4 * len(COLUMN_NAMES))
+    order = "<" if sys.byteorder == "little" else ">"
+    with zipfile.ZipFile(filename) as archive:
+        members = {name: read_npy(archive.read(f"{name}.npy")) for name in COLUMN_NAMES}
+        names = read_npy(archive.read("nombres_protocolo.npy"))
+    descr, shape, body = members["hora"]
+    assert (descr, shape) == (f"{order}f8", (4,))
+    assert struct.unpack(f"{order}4d", body) == (1002.0, 1003.0, 1004.0, 1005.0)
+    descr, _, body = members["origen_bajo"]
+    assert descr == f"{order}u8"
+    assert struct.unpack(f"{order}4Q", body)[0] == address_to_int("10.0.0.2") & ((1 << 64) - 1)
+    assert members["indicadores"][0] == "|u1"
+    assert struct.unpack(f"{order}4H", members["puerto_origen"][2]) == (40002, 40003, 40004, 40005)
+    descr, shape, body = names
+    assert (descr, shape) == (f"{order}U5", (2,))
+    assert body.decode("utf-32-le" if order == "<" else "utf-32-be") == "DNS\0\0HTTPS"
+    ids = struct.unpack(f"{order}4H", members["protocolo"][2])
+    assert [("DNS", "HTTPS")[index] for index in ids] == ["DNS", "HTTPS", "DNS", "HTTPS"]
+
+
+def test_npz_of_an_empty_store(tmp_path):
+    filename = str(tmp_path / "vacio.npz")
+    reports.write_npz_report(SimpleNamespace(store=PacketStore(capacity=4)), filename)
+    with zipfile.ZipFile(filename) as archive:
+        assert read_npy(archive.read("tamano.npy"))[1:] == ((0,), b"")
+        assert read_npy(archive.read("nombres_interfaz.npy"))[:2] == (
+            ("<" if sys.byteorder == "little" else ">") + "U1", (0,))
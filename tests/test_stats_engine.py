@@ -0,0 +1,73 @@
+import threading
+import time
+
+from models.stats_engine import StatsEngine, StatsSnapshot, StatsWriter
+
+
+def test_writer_counts_and_weights():
+    writer = StatsWriter()
+    writer.add("HTTPS", "TCP", 100)
+    writer.add("DNS", "UDP", 80 * 4, packets=4)
+    writer.add_undecoded(60)
+    assert writer.read() == (6, 480, {"HTTPS": 1, "DNS": 4}, {"TCP": 1, "UDP": 4}, 1)
+    assert writer.version % 2 == 0
+
+
+def test_read_waits_for_an_unfinished_write():
+    writer = StatsWriter()
+    writer.add("HTTPS", "TCP", 100)
+    # Escritura a medias: versión impar y contadores a mitad de actualizar
+    writer.version += 1
+    writer.packets += 1
+
+    def finish():
+        time.sleep(0.05)
+        writer.bytes += 50
+        writer.protocols["HTTPS"] += 1
+        writer.transports["TCP"] += 1
+        writer.version += 1
+
+    thread = threading.Thread(target=finish)
+    thread.start()
+    assert writer.read() == (2, 150, {"HTTPS": 2}, {"TCP": 2}, 0)
+    thread.join()
+
+
+def test_snapshot_sums_writers_and_merges():
+    engine = StatsEngine()
+    first, second = engine.writer(), engine.writer()
+    first.add("HTTPS", "TCP", 100)
+    second.add("HTTPS", "TCP", 200)
+    second.add("ARP", "ARP", 42)
+    second.add_undecoded(30)
+    engine.merge(10, 1000, {"DNS": 10}, {"UDP": 10}, errors=2)
+    snapshot = engine.snapshot()
+    assert (snapshot.packets, snapshot.bytes, snapshot.errors) == (14, 1372, 3)
+    assert dict(snapshot.protocols) == {"HTTPS": 2, "ARP": 1, "DNS": 10}
+    assert snapshot.transport("UDP") == 10 and snapshot.protocol("QUIC") == 0
+    assert snapshot.other_transports() == 2
+    engine.clear()
+    assert engine.snapshot()[:2] == (0, 0) and engine.snapshot().errors == 0
+
+
+def test_snapshot_is_immutable_copy():
+    engine = StatsEngine()
+    writer = engine.writer()
+    writer.add("HTTPS", "TCP", 100)
+    snapshot = engine.snapshot()
+    writer.add("HTTPS", "TCP", 100)
+    assert snapshot.protocol("HTTPS") == 1
+    assert engine.snapshot().protocol("HTTPS") == 2
+
+
+def test_since_and_elapsed():
+    previous = StatsSnapshot(10, 1000, {"HTTPS": 6, "DNS": 4}, {"TCP": 6, "UDP": 4}, 100.0)
+    current = StatsSnapshot(15, 1600, {"HTTPS": 9, "DNS": 4, "ARP": 2}, {"TCP": 9, "UDP": 4, "ARP": 2},
+                            100.0)
+    delta = current.since(previous)
+    assert (delta.packets, delta.bytes) == (5, 600)
+    assert dict(delta.protocols) == {"HTTPS": 3, "ARP": 2}
+    assert current.elapsed(now=130.0) == 30.0
+    assert StatsSnapshot().elapsed(now=130.0) == 0.0
+    # Sesión reabierta: la duración guardada, no el reloj
+    assert current._replace(end_time=160.0).elapsed(now=1e9) == 60.0
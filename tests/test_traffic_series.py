@@ -0,0 +1,44 @@
+from models.traffic_series import RateRing, TrafficSeries
+
+
+def test_rate_ring_series_and_rows():
+    ring = RateRing(slots=4, resolution=1)
+    ring.add(100.2, "HTTPS", 1000)
+    ring.add(100.7, "DNS", 80, packets=2)
+    ring.add(102.0, "HTTPS", 500)
+    assert ring.series(102.5, 3) == [(100, 1080.0, 3.0), (101, 0.0, 0.0), (102, 500.0, 1.0)]
+    assert ring.series(102, 2, "DNS") == [(101, 0.0, 0.0), (102, 0.0, 0.0)]
+    assert ring.series(102, 1, "QUIC") == [(102, 0.0, 0.0)]
+    assert sorted(ring.rows(100, 102)) == [(100, "DNS", 80.0, 2.0), (100, "HTTPS", 1000.0, 1.0),
+                                           (102, "HTTPS", 500.0, 1.0)]
+    assert sorted(ring.protocols()) == ["DNS", "HTTPS"]
+
+
+def test_rate_ring_reuses_slots_of_old_periods():
+    ring = RateRing(slots=4, resolution=60)
+    ring.add(0, "HTTPS", 100)
+    ring.add(4 * 60 + 5, "HTTPS", 7)
+    # La casilla del minuto 0 se reinició al llegar el minuto 4
+    assert ring.series(4 * 60, 4)[-1] == (240, 7.0, 1.0)
+    assert ring.rows(0, 4 * 60) == [(240, "HTTPS", 7.0, 1.0)]
+    ring.clear()
+    assert ring.rows(0, 240) == [] and ring.protocols() == []
+
+
+def test_traffic_series_rate_and_summary():
+    series = TrafficSeries(seconds=60, minutes=10)
+    assert series.recent(5) == [] and series.current_rate() == (0.0, 0.0) and series.summary() == {}
+    for second in range(10):
+        series.add(1000 + second, "HTTPS", 1000)
+        series.add(1000 + second + 0.5, "DNS", 100)
+    series.add(1010.2, "HTTPS", 1)
+    # El último segundo completo es el 1009
+    assert series.current_rate() == (1100 * 8, 2)
+    summary = series.summary()
+    assert summary["ventana_s"] == 11
+    assert summary["bps_maximo"] == 1100 * 8
+    assert summary["pps_maximo"] == 2
+    assert summary["bps_por_protocolo"]["DNS"] == 1000 * 8 / 11
+    assert series.per_minute.series(1010, 1) == [(960, 11001.0, 21.0)]
+    series.clear()
+    assert series.first_time is None and series.recent(3) == []
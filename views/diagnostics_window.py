@@ -0,0 +1,91 @@
+import tkinter as tk
+from tkinter import ttk, filedialog
+from typing import Callable, List, Tuple
+
+
+class DiagnosticsWindow(tk.Toplevel):
+    """Ventana de diagnóstico: tiempos de cada etapa de la captura y la interfaz.
+
+    Muestra una fila por etapa con las muestras, la media y los percentiles
+    de su histograma, y ofrece guardar el resumen en JSON y lanzar un perfil
+    por muestreo de unos segundos. El controlador la rellena con ``update_rows``.
+    """
+
+    COLUMNS = ('Etapa', 'Muestras', 'Media', 'p50', 'p90', 'p99', 'Máx')
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Diagnóstico de rendimiento")
+        self.geometry("760x480")
+        self.profile_seconds_var = tk.StringVar(value="10")
+
+        frame = ttk.Frame(self, padding="10 10 10 10")
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        self.summary_label = ttk.Label(frame, text="", anchor=tk.W)
+        self.summary_label.pack(fill=tk.X, pady=(0, 5))
+
+        tree_frame = ttk.Frame(frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(tree_frame, columns=self.COLUMNS, show='headings')
+        for column in self.COLUMNS:
+            first = column == 'Etapa'
+            self.tree.heading(column, text=column, anchor=tk.W if first else tk.E)
+            self.tree.column(
+                column, width=260 if first else 80, minwidth=60,
+                stretch=tk.YES if first else tk.NO, anchor=tk.W if first else tk.E
+            )
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscroll=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        buttons = ttk.Frame(frame)
+        buttons.pack(fill=tk.X, pady=(10, 0))
+        self.btn_save = ttk.Button(buttons, text="Guardar JSON...")
+        self.btn_save.pack(side=tk.LEFT)
+        ttk.Label(buttons, text="Perfilar durante (s):").pack(side=tk.LEFT, padx=(20, 5))
+        self.profile_spin = ttk.Spinbox(
+            buttons, from_=1, to=600, width=5, textvariable=self.profile_seconds_var
+        )
+        self.profile_spin.pack(side=tk.LEFT)
+        self.btn_profile = ttk.Button(buttons, text="Perfilar")
+        self.btn_profile.pack(side=tk.LEFT, padx=5)
+        self.profile_label = ttk.Label(buttons, text="", anchor=tk.W)
+        self.profile_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+
+    def set_callbacks(self, save: Callable[[], None], profile: Callable[[], None]):
+        """Configura los botones Guardar JSON y Perfilar."""
+        self.btn_save.configure(command=save)
+        self.btn_profile.configure(command=profile)
+
+    def update_rows(self, summary: str, rows: List[Tuple[str, ...]]):
+        """Sustituye el resumen y las filas de la tabla (una por etapa, en orden)."""
+        self.summary_label.configure(text=summary)
+        tree = self.tree
+        existing = tree.get_children()
+        for index, values in enumerate(rows):
+            iid = str(index)
+            if iid in existing:
+                tree.item(iid, values=values)
+            else:
+                tree.insert('', tk.END, iid=iid, values=values)
+
+    def get_profile_seconds(self) -> str:
+        """Duración del perfil tal como la escribió el usuario (la valida el controlador)."""
+        return self.profile_seconds_var.get().strip()
+
+    def update_profile(self, running: bool, text: str = ""):
+        """Muestra el estado del perfil y bloquea el botón mientras se ejecuta."""
+        self.btn_profile.configure(state=tk.DISABLED if running else tk.NORMAL)
+        self.profile_label.configure(text=text)
+
+    def ask_json_file(self) -> str:
+        """Pide el fichero donde guardar el resumen de diagnóstico."""
+        return filedialog.asksaveasfilename(
+            parent=self,
+            title="Guardar diagnóstico",
+            defaultextension=".json",
+            initialfile="diagnostico.json",
+            filetypes=[("JSON", "*.json"), ("Todos los archivos", "*")]
+        )
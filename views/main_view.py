@@ -1,9 +1,21 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog, simpledialog
 from .styles import StyleConfig
-from typing import Callable, Dict, Any
+from .virtual_list import VirtualPacketList
+from .throughput_graph import ThroughputGraph
+from .diagnostics_window import DiagnosticsWindow
+from .sessions_window import SessionsWindow
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
 class MainView(tk.Tk):
+    # Modos de captura: (etiqueta visible, identificador del modelo)
+    CAPTURE_MODES = [("Scapy", "scapy"), ("Rápido (bytes)", "raw")]
+    # Texto del selector de interfaces cuando no hay ninguna marcada (elige Scapy)
+    DEFAULT_INTERFACE = "(predeterminada)"
+    # (texto del selector, modo de PacketSampler); None = sin muestreo
+    SAMPLING_MODES = [("Sin muestreo", None), ("1 de cada N", "1-de-n"),
+                      ("Aleatorio (1/N)", "aleatorio"), ("Por flujo (1/N)", "flujo")]
+
     def __init__(self):
         super().__init__()
         self.title("Monitor de Red Moderno - Tema Claro")
@@ -14,7 +26,25 @@ class MainView(tk.Tk):
         
         # Variables de la interfaz
         self.filter_var = tk.StringVar(value="tcp or udp")
+        self.mode_var = tk.StringVar(value=self.CAPTURE_MODES[0][0])
+        self.realtime_var = tk.BooleanVar(value=False)
+        self.interface_var = tk.StringVar(value=self.DEFAULT_INTERFACE)
+        self.snaplen_var = tk.StringVar(value="0")
+        self.rcvbuf_var = tk.StringVar(value="0")
+        self.promisc_var = tk.BooleanVar(value=True)
+        self.spool_var = tk.BooleanVar(value=False)
+        self.sessions_var = tk.BooleanVar(value=False)
+        self.sampling_var = tk.StringVar(value=self.SAMPLING_MODES[0][0])
+        self.sampling_n_var = tk.StringVar(value="10")
+        self.sampling_adaptive_var = tk.BooleanVar(value=False)
+        self.display_filter_var = tk.StringVar(value="")
+        self.milliseconds_var = tk.BooleanVar(value=False)
+        # Interfaz -> casilla del menú de interfaces, y filtros BPF propios
+        self._interface_vars: Dict[str, tk.BooleanVar] = {}
+        self.interface_filters: Dict[str, str] = {}
         self.stats_labels: Dict[str, ttk.Label] = {}
+        self._ip_rows: Dict[str, int] = {}
+        self._ip_order: List[str] = []
         self._create_widgets()
 
     def _create_widgets(self):
@@ -40,13 +70,25 @@ class MainView(tk.Tk):
         self.menu_bar = tk.Menu(self)
         
         # Menú Archivo
-        file_menu = tk.Menu(self.menu_bar, tearoff=0)
-        file_menu.add_command(label="Salir", command=self.quit)
-        self.menu_bar.add_cascade(label="Archivo", menu=file_menu)
+        self.file_menu = tk.Menu(self.menu_bar, tearoff=0)
+        self.file_menu.add_command(label="Abrir captura...")
+        self.file_menu.add_command(label="Sesiones guardadas...")
+        self.file_menu.add_checkbutton(
+            label="Reproducir a velocidad real",
+            variable=self.realtime_var
+        )
+        self.file_menu.add_separator()
+        self.file_menu.add_command(label="Salir", command=self.quit)
+        self.menu_bar.add_cascade(label="Archivo", menu=self.file_menu)
         
         # Menú Reportes
         self.report_menu = tk.Menu(self.menu_bar, tearoff=0)
         self.menu_bar.add_cascade(label="Reportes", menu=self.report_menu)
+
+        # Menú Herramientas
+        self.tools_menu = tk.Menu(self.menu_bar, tearoff=0)
+        self.tools_menu.add_command(label="Diagnóstico de rendimiento...")
+        self.menu_bar.add_cascade(label="Herramientas", menu=self.tools_menu)
         
         # Menú Ayuda
         help_menu = tk.Menu(self.menu_bar, tearoff=0)
@@ -95,34 +137,161 @@ class MainView(tk.Tk):
 
         ttk.Label(filter_frame, text="Filtro (BPF):", anchor=tk.W).pack(side=tk.LEFT, padx=(0, 5))
 
+        # Editable: admite cualquier expresión BPF, que se valida al iniciar
         filter_options = ["tcp or udp", "tcp", "udp", "icmp", "arp", "ip", "port 80", "port 443", ""]
         self.filter_menu = ttk.Combobox(
             filter_frame,
             textvariable=self.filter_var,
             values=filter_options,
-            state="readonly",
             width=15
         )
         self.filter_menu.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
 
+        # Modo de captura
+        ttk.Label(filter_frame, text="Modo:", anchor=tk.W).pack(side=tk.LEFT, padx=(10, 5))
+        self.mode_menu = ttk.Combobox(
+            filter_frame,
+            textvariable=self.mode_var,
+            values=[label for label, _ in self.CAPTURE_MODES],
+            state="readonly",
+            width=14
+        )
+        self.mode_menu.pack(side=tk.LEFT, padx=5)
+
+        # Opciones del socket de captura
+        self._create_capture_options(left_container)
+
+        # Muestreo de paquetes antes de decodificar
+        self._create_sampling_options(left_container)
+
+        # Filtro de visualización sobre los paquetes ya capturados
+        self._create_display_filter(left_container)
+
         # TreeView de paquetes
         self._create_packet_tree(left_container)
         
         # Panel de estadísticas
         self._create_stats_panel(left_container)
 
-    def _create_packet_tree(self, parent):
-        """Crea el TreeView para la lista de paquetes."""
-        tree_frame = ttk.Frame(parent)
-        tree_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+    def _create_capture_options(self, parent):
+        """Crea la fila de opciones de captura (interfaz, snaplen, buffer, promiscuo)."""
+        options_frame = ttk.Frame(parent)
+        options_frame.pack(fill=tk.X, pady=(0, 10))
+
+        # Varias interfaces a la vez: una casilla por interfaz en un menú
+        ttk.Label(options_frame, text="Interfaces:", anchor=tk.W).pack(side=tk.LEFT, padx=(0, 5))
+        self.interface_menu = ttk.Menubutton(
+            options_frame,
+            textvariable=self.interface_var,
+            width=16
+        )
+        self.interface_choices = tk.Menu(self.interface_menu, tearoff=0)
+        self.interface_menu.configure(menu=self.interface_choices)
+        self.interface_menu.pack(side=tk.LEFT, padx=5)
+        self._build_interface_menu([])
+
+        ttk.Label(options_frame, text="Snaplen (0 = completa):", anchor=tk.W).pack(side=tk.LEFT, padx=(10, 5))
+        self.snaplen_spin = ttk.Spinbox(
+            options_frame,
+            textvariable=self.snaplen_var,
+            from_=0,
+            to=65535,
+            increment=64,
+            width=7
+        )
+        self.snaplen_spin.pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(options_frame, text="Buffer kernel (MB):", anchor=tk.W).pack(side=tk.LEFT, padx=(10, 5))
+        self.rcvbuf_spin = ttk.Spinbox(
+            options_frame,
+            textvariable=self.rcvbuf_var,
+            from_=0,
+            to=1024,
+            increment=4,
+            width=6
+        )
+        self.rcvbuf_spin.pack(side=tk.LEFT, padx=5)
 
-        self.packet_tree = ttk.Treeview(
-            tree_frame,
-            columns=('Hora', 'Protocolo', 'Origen', 'Destino', 'Puerto Origen', 'Puerto Destino', 'Tamaño'),
-            show='headings'
+        self.promisc_check = ttk.Checkbutton(
+            options_frame,
+            text="Modo promiscuo",
+            variable=self.promisc_var
+        )
+        self.promisc_check.pack(side=tk.LEFT, padx=(10, 0))
+
+        self.spool_check = ttk.Checkbutton(
+            options_frame,
+            text="Guardar pcap",
+            variable=self.spool_var
         )
+        self.spool_check.pack(side=tk.LEFT, padx=(10, 0))
 
-        # Configurar columnas
+        self.sessions_check = ttk.Checkbutton(
+            options_frame,
+            text="Guardar sesión",
+            variable=self.sessions_var
+        )
+        self.sessions_check.pack(side=tk.LEFT, padx=(10, 0))
+
+    def _create_sampling_options(self, parent):
+        """Crea la fila de muestreo (modo, N y ajuste adaptativo)."""
+        sampling_frame = ttk.Frame(parent)
+        sampling_frame.pack(fill=tk.X, pady=(0, 10))
+
+        ttk.Label(sampling_frame, text="Muestreo:", anchor=tk.W).pack(side=tk.LEFT, padx=(0, 5))
+        self.sampling_menu = ttk.Combobox(
+            sampling_frame,
+            textvariable=self.sampling_var,
+            values=[label for label, _ in self.SAMPLING_MODES],
+            state="readonly",
+            width=16
+        )
+        self.sampling_menu.pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(sampling_frame, text="N:", anchor=tk.W).pack(side=tk.LEFT, padx=(10, 5))
+        self.sampling_spin = ttk.Spinbox(
+            sampling_frame,
+            textvariable=self.sampling_n_var,
+            from_=1,
+            to=4096,
+            increment=1,
+            width=6
+        )
+        self.sampling_spin.pack(side=tk.LEFT, padx=5)
+
+        self.sampling_adaptive_check = ttk.Checkbutton(
+            sampling_frame,
+            text="Adaptativo (sube N con la carga)",
+            variable=self.sampling_adaptive_var
+        )
+        self.sampling_adaptive_check.pack(side=tk.LEFT, padx=(10, 0))
+
+    def _create_display_filter(self, parent):
+        """Crea la barra del filtro de visualización."""
+        display_frame = ttk.Frame(parent)
+        display_frame.pack(fill=tk.X, pady=(0, 10))
+
+        ttk.Label(display_frame, text="Filtro de visualización:", anchor=tk.W).pack(side=tk.LEFT, padx=(0, 5))
+        self.display_filter_entry = ttk.Entry(display_frame, textvariable=self.display_filter_var)
+        self.display_filter_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+
+        self.btn_aplicar_filtro = ttk.Button(display_frame, text="Aplicar", width=10)
+        self.btn_aplicar_filtro.pack(side=tk.LEFT, padx=5)
+        self.btn_quitar_filtro = ttk.Button(display_frame, text="Quitar", width=10, state=tk.DISABLED)
+        self.btn_quitar_filtro.pack(side=tk.LEFT, padx=5)
+
+        self.display_filter_label = ttk.Label(display_frame, text="", anchor=tk.W, width=28)
+        self.display_filter_label.pack(side=tk.LEFT, padx=(10, 0))
+
+        self.milliseconds_check = ttk.Checkbutton(
+            display_frame,
+            text="Milisegundos",
+            variable=self.milliseconds_var
+        )
+        self.milliseconds_check.pack(side=tk.LEFT, padx=(10, 0))
+
+    def _create_packet_tree(self, parent):
+        """Crea la lista virtual de paquetes."""
         columns = [
             ('Hora', 80, 70, tk.W),
             ('Protocolo', 70, 60, tk.W),
@@ -130,20 +299,17 @@ class MainView(tk.Tk):
             ('Destino', 180, 120, tk.W),
             ('Puerto Origen', 90, 70, tk.CENTER),
             ('Puerto Destino', 90, 70, tk.CENTER),
-            ('Tamaño', 70, 60, tk.E)
+            ('Tamaño', 70, 60, tk.E),
+            ('Interfaz', 90, 60, tk.W)
         ]
 
-        for col, width, minwidth, anchor in columns:
-            self.packet_tree.heading(col, text=col, anchor=anchor)
-            self.packet_tree.column(col, width=width, minwidth=minwidth, stretch=tk.YES, anchor=anchor)
+        self.packet_list = VirtualPacketList(parent, columns)
+        self.packet_list.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+        self.packet_tree = self.packet_list.tree
 
-        # Scrollbars
-        scrollbar_y = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.packet_tree.yview)
+        # Scrollbar horizontal
         scrollbar_x = ttk.Scrollbar(parent, orient=tk.HORIZONTAL, command=self.packet_tree.xview)
-        self.packet_tree.configure(yscrollcommand=scrollbar_y.set, xscrollcommand=scrollbar_x.set)
-
-        scrollbar_y.pack(side=tk.RIGHT, fill=tk.Y)
-        self.packet_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.packet_tree.configure(xscrollcommand=scrollbar_x.set)
         scrollbar_x.pack(fill=tk.X, side=tk.BOTTOM, pady=(5,0))
 
     def _create_stats_panel(self, parent):
@@ -154,10 +320,17 @@ class MainView(tk.Tk):
         self.stats_labels = {
             'Tiempo': ttk.Label(stats_frame, text="Tiempo: 00:00:00", anchor=tk.W),
             'Paquetes': ttk.Label(stats_frame, text="Paquetes: 0", anchor=tk.W),
+            'Kernel': ttk.Label(stats_frame, text="Descartes kernel: n/d", anchor=tk.W),
             'Trafico': ttk.Label(stats_frame, text="Tráfico: 0 B", anchor=tk.W),
             'TCP': ttk.Label(stats_frame, text="TCP: 0", anchor=tk.W),
             'UDP': ttk.Label(stats_frame, text="UDP: 0", anchor=tk.W),
-            'Otros': ttk.Label(stats_frame, text="Otros: 0", anchor=tk.W)
+            'Otros': ttk.Label(stats_frame, text="Otros: 0", anchor=tk.W),
+            'Tasa': ttk.Label(stats_frame, text="Tasa: 0 bit/s", anchor=tk.W),
+            'Cola': ttk.Label(stats_frame, text="Cola: 0", anchor=tk.W),
+            'Descartados': ttk.Label(stats_frame, text="Descartados: 0", anchor=tk.W),
+            'Errores': ttk.Label(stats_frame, text="Errores decodificación: 0", anchor=tk.W),
+            'Spool': ttk.Label(stats_frame, text="Spool: inactivo", anchor=tk.W),
+            'Muestreo': ttk.Label(stats_frame, text="Muestreo: todos los paquetes", anchor=tk.W)
         }
 
         num_cols = 3
@@ -165,6 +338,25 @@ class MainView(tk.Tk):
         for i, label in enumerate(self.stats_labels.values()):
             label.grid(row=i // num_cols, column=i % num_cols, padx=5, pady=2, sticky="ew")
 
+        # Paquetes, tráfico y descartes de cada interfaz, en una fila propia
+        row = (len(self.stats_labels) + num_cols - 1) // num_cols
+        interfaces_label = ttk.Label(stats_frame, text="Interfaces: -", anchor=tk.W)
+        interfaces_label.grid(row=row, column=0, columnspan=num_cols, padx=5, pady=2, sticky="ew")
+        self.stats_labels['Interfaces'] = interfaces_label
+
+        # Sesión guardada en la base SQLite (o reabierta desde ella)
+        row += 1
+        session_label = ttk.Label(stats_frame, text="Sesión: no se guarda", anchor=tk.W)
+        session_label.grid(row=row, column=0, columnspan=num_cols, padx=5, pady=2, sticky="ew")
+        self.stats_labels['Sesion'] = session_label
+
+        # Progreso de la exportación en segundo plano
+        row += 1
+        self.export_label = ttk.Label(stats_frame, text="", anchor=tk.W)
+        self.export_label.grid(row=row, column=0, padx=5, pady=2, sticky="ew")
+        self.export_progress = ttk.Progressbar(stats_frame, mode="determinate", maximum=1.0)
+        self.export_progress.grid(row=row, column=1, columnspan=num_cols - 1, padx=5, pady=2, sticky="ew")
+
     def _create_right_panel(self, parent):
         """Crea el panel derecho con la lista de IPs."""
         right_container = ttk.Frame(parent, padding=(10, 0, 0, 0))
@@ -199,6 +391,55 @@ class MainView(tk.Tk):
         scrollbar_ip.pack(side=tk.RIGHT, fill=tk.Y)
         self.ip_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
+        # Paginación del top de IPs
+        page_frame = ttk.Frame(right_container)
+        page_frame.pack(fill=tk.X, pady=(5, 0))
+        self.btn_ip_prev = ttk.Button(page_frame, text="◀", width=3)
+        self.btn_ip_prev.pack(side=tk.LEFT)
+        self.ip_page_label = ttk.Label(page_frame, text="Página 1 de 1", anchor=tk.CENTER)
+        self.ip_page_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.btn_ip_next = ttk.Button(page_frame, text="▶", width=3)
+        self.btn_ip_next.pack(side=tk.RIGHT)
+
+        # Top de flujos
+        ttk.Label(
+            right_container,
+            text="Flujos Principales",
+            anchor=tk.W
+        ).pack(fill=tk.X, pady=(10, 0))
+        flow_tree_frame = ttk.Frame(right_container)
+        flow_tree_frame.pack(fill=tk.BOTH, pady=(5, 0))
+
+        self.flow_tree = ttk.Treeview(
+            flow_tree_frame,
+            columns=('Flujo', 'Protocolo', 'Paquetes', 'Bytes'),
+            show='headings',
+            height=8
+        )
+        self.flow_tree.heading('Flujo', text='Flujo', anchor=tk.W)
+        self.flow_tree.heading('Protocolo', text='Protocolo', anchor=tk.W)
+        self.flow_tree.heading('Paquetes', text='Paquetes', anchor=tk.E)
+        self.flow_tree.heading('Bytes', text='Tráfico', anchor=tk.E)
+        self.flow_tree.column('Flujo', width=260, minwidth=180, stretch=tk.YES, anchor=tk.W)
+        self.flow_tree.column('Protocolo', width=80, minwidth=60, stretch=tk.NO, anchor=tk.W)
+        self.flow_tree.column('Paquetes', width=80, minwidth=60, stretch=tk.NO, anchor=tk.E)
+        self.flow_tree.column('Bytes', width=80, minwidth=60, stretch=tk.NO, anchor=tk.E)
+
+        scrollbar_flow = ttk.Scrollbar(flow_tree_frame, orient=tk.VERTICAL, command=self.flow_tree.yview)
+        self.flow_tree.configure(yscroll=scrollbar_flow.set)
+
+        scrollbar_flow.pack(side=tk.RIGHT, fill=tk.Y)
+        self.flow_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        # Gráfica de tráfico
+        ttk.Label(
+            right_container,
+            text="Tráfico (últimos 2 minutos)",
+            anchor=tk.W
+        ).pack(fill=tk.X, pady=(10, 0))
+        self.throughput_graph = ThroughputGraph(right_container)
+        self.throughput_graph.pack(fill=tk.X, pady=(5, 0))
+
     def set_start_capture_callback(self, callback: Callable[[], None]):
         """Configura el callback para iniciar la captura."""
         self.btn_iniciar.configure(command=callback)
@@ -211,17 +452,83 @@ class MainView(tk.Tk):
         """Configura el callback para limpiar resultados."""
         self.btn_limpiar.configure(command=callback)
 
+    def set_open_capture_callback(self, callback: Callable[[], None]):
+        """Configura el callback de la opción "Abrir captura..."."""
+        self.file_menu.entryconfigure(0, command=callback)
+
+    def set_diagnostics_callback(self, callback: Callable[[], None]):
+        """Configura la entrada Diagnóstico de rendimiento del menú Herramientas."""
+        self.tools_menu.entryconfigure(0, command=callback)
+
+    def open_diagnostics(self) -> DiagnosticsWindow:
+        """Abre la ventana de diagnóstico."""
+        return DiagnosticsWindow(self)
+
+    def set_sessions_callback(self, callback: Callable[[], None]):
+        """Configura la entrada "Sesiones guardadas..." del menú Archivo."""
+        self.file_menu.entryconfigure(1, command=callback)
+
+    def open_sessions(self, path: str) -> SessionsWindow:
+        """Abre la ventana de sesiones guardadas en la base ``path``."""
+        return SessionsWindow(self, path)
+
+    def update_flow_list(self, rows: List[Tuple[str, str, int, str]]):
+        """Sustituye las filas del top de flujos (flujo, protocolo, paquetes, tráfico)."""
+        try:
+            tree = self.flow_tree
+            children = tree.get_children()
+            for index, values in enumerate(rows):
+                if index < len(children):
+                    tree.item(children[index], values=values)
+                else:
+                    tree.insert('', tk.END, values=values)
+            if len(children) > len(rows):
+                tree.delete(*children[len(rows):])
+        except Exception as e:
+            print(f"Error actualizando lista de flujos: {e}")
+
+    def update_throughput(self, bits_per_second: List[float], peak_text: str, current_text: str):
+        """Actualiza la gráfica de tráfico."""
+        self.throughput_graph.update_series(bits_per_second, peak_text, current_text)
+
+    def set_ip_page_callback(self, callback: Callable[[int], None]):
+        """Configura el callback de paginación de IPs (recibe -1 o +1)."""
+        self.btn_ip_prev.configure(command=lambda: callback(-1))
+        self.btn_ip_next.configure(command=lambda: callback(1))
+
+    def clear_ip_list(self):
+        """Elimina todas las filas de la lista de IPs."""
+        self.ip_tree.delete(*self.ip_tree.get_children())
+        self._ip_rows.clear()
+        self._ip_order = []
+        self.ip_page_label.config(text="Página 1 de 1")
+
     def update_stats_label(self, label_key: str, text: str):
         """Actualiza el texto de una etiqueta de estadísticas."""
         if label_key in self.stats_labels:
             self.stats_labels[label_key].config(text=text)
 
-    def update_capture_state(self, is_capturing: bool):
-        """Actualiza el estado de los botones según el estado de captura."""
+    def update_capture_state(self, is_capturing: bool, stopping: bool = False):
+        """Actualiza el estado de los botones según el estado de captura.
+
+        Con ``stopping`` (parada en curso) también se desactiva Detener.
+        """
         self.btn_iniciar.config(state=tk.DISABLED if is_capturing else tk.NORMAL)
-        self.btn_detener.config(state=tk.NORMAL if is_capturing else tk.DISABLED)
-        self.filter_menu.config(state=tk.DISABLED if is_capturing else "readonly")
+        self.btn_detener.config(state=tk.NORMAL if is_capturing and not stopping else tk.DISABLED)
+        self.filter_menu.config(state=tk.DISABLED if is_capturing else tk.NORMAL)
+        self.mode_menu.config(state=tk.DISABLED if is_capturing else "readonly")
+        self.interface_menu.config(state=tk.DISABLED if is_capturing else tk.NORMAL)
+        self.sampling_menu.config(state=tk.DISABLED if is_capturing else "readonly")
+        for widget in (self.snaplen_spin, self.rcvbuf_spin, self.promisc_check, self.spool_check,
+                       self.sessions_check, self.sampling_spin, self.sampling_adaptive_check):
+            widget.config(state=tk.DISABLED if is_capturing else tk.NORMAL)
         self.btn_limpiar.config(state=tk.DISABLED if is_capturing else tk.NORMAL)
+        self.file_menu.entryconfigure(0, state=tk.DISABLED if is_capturing else tk.NORMAL)
+
+    def update_export_progress(self, text: str, fraction: float = 0.0):
+        """Muestra el progreso de la exportación (texto vacío = sin exportación)."""
+        self.export_label.config(text=text)
+        self.export_progress.config(value=fraction)
 
     def show_error(self, title: str, message: str):
         """Muestra un mensaje de error."""
@@ -235,63 +542,209 @@ class MainView(tk.Tk):
         """Muestra un mensaje informativo."""
         messagebox.showinfo(title, message)
 
+    def ask_yes_no(self, title: str, message: str) -> bool:
+        """Pide confirmación; devuelve True si se acepta."""
+        return messagebox.askyesno(title, message)
+
     def get_filter(self) -> str:
         """Obtiene el filtro actual."""
         return self.filter_var.get().strip()
 
-    def add_packet_to_tree(self, packet_info):
-        """Añade un paquete al árbol de paquetes."""
-        try:
-            # Asegurar que estamos en el hilo principal
-            if not isinstance(packet_info, tuple) or len(packet_info) != 7:
-                return
-                
-            timestamp, protocol, ip_src, ip_dst, port_src, port_dst, size = packet_info
-            
-            # Insertar al inicio del árbol para mejor rendimiento
-            self.packet_tree.insert(
-                '',
-                0,
-                values=(timestamp, protocol, ip_src, ip_dst, port_src, port_dst, size)
+    def set_interfaces(self, interfaces: List[str]):
+        """Rellena el menú de interfaces de captura (conserva las ya marcadas)."""
+        self._build_interface_menu(interfaces)
+
+    def _build_interface_menu(self, interfaces: List[str]):
+        """Crea una casilla por interfaz y la entrada de los filtros por interfaz."""
+        previous = self._interface_vars
+        self._interface_vars = {
+            name: tk.BooleanVar(value=name in previous and previous[name].get())
+            for name in interfaces
+        }
+        menu = self.interface_choices
+        menu.delete(0, tk.END)
+        for name, variable in self._interface_vars.items():
+            menu.add_checkbutton(label=name, variable=variable, command=self._update_interface_label)
+        if interfaces:
+            menu.add_separator()
+        menu.add_command(label="Filtro BPF por interfaz...", command=self._ask_interface_filters)
+        self._update_interface_label()
+
+    def _selected_interfaces(self) -> List[str]:
+        return [name for name, variable in self._interface_vars.items() if variable.get()]
+
+    def _update_interface_label(self):
+        """Resume las interfaces marcadas; con asterisco las que tienen filtro propio."""
+        names = [
+            f"{name}*" if name in self.interface_filters else name
+            for name in self._selected_interfaces()
+        ]
+        self.interface_var.set(", ".join(names) if names else self.DEFAULT_INTERFACE)
+
+    def _ask_interface_filters(self):
+        """Pide el filtro BPF propio de cada interfaz marcada (vacío = el general)."""
+        selected = self._selected_interfaces()
+        if not selected:
+            self.show_info("Filtro por interfaz", "Marca primero las interfaces de captura.")
+            return
+        for name in selected:
+            text = simpledialog.askstring(
+                "Filtro por interfaz",
+                f"Filtro BPF de {name} (vacío = el filtro general):",
+                initialvalue=self.interface_filters.get(name, ""),
+                parent=self
             )
-            
-            # Mantener un límite de elementos mostrados para evitar problemas de rendimiento
-            if len(self.packet_tree.get_children()) > 1000:
-                # Eliminar el último elemento
-                last_item = self.packet_tree.get_children()[-1]
-                self.packet_tree.delete(last_item)
-                
-            # Asegurar que el scroll siga los nuevos elementos
-            self.packet_tree.yview_moveto(0)
-            
-        except Exception as e:
-            print(f"Error añadiendo paquete al árbol: {e}")
+            if text is None:
+                break
+            if text.strip():
+                self.interface_filters[name] = text.strip()
+            else:
+                self.interface_filters.pop(name, None)
+        self._update_interface_label()
+
+    def get_capture_options(self) -> Dict[str, Any]:
+        """Obtiene las opciones de captura tal como las escribió el usuario.
+
+        Devuelve interfaces (vacía = la predeterminada), interface_filters
+        (filtro propio de las interfaces marcadas que lo tienen), snaplen y
+        rcvbuf (texto, el controlador los valida), promisc, spool y sessions.
+        """
+        interfaces = self._selected_interfaces()
+        return {
+            'interfaces': interfaces,
+            'interface_filters': {
+                name: self.interface_filters[name] for name in interfaces if name in self.interface_filters
+            },
+            'snaplen': self.snaplen_var.get().strip(),
+            'rcvbuf': self.rcvbuf_var.get().strip(),
+            'promisc': self.promisc_var.get(),
+            'spool': self.spool_var.get(),
+            'sessions': self.sessions_var.get(),
+        }
 
-    def update_ip_list(self, ip_counts: Dict[str, int]):
-        """Actualiza la lista de IPs con sus contadores."""
+    def get_sampling_options(self) -> Dict[str, Any]:
+        """Obtiene el muestreo elegido: mode (None = sin muestreo), every
+        (texto, el controlador lo valida) y adaptive."""
+        selected = self.sampling_var.get()
+        mode = next((mode for label, mode in self.SAMPLING_MODES if label == selected), None)
+        return {
+            'mode': mode,
+            'every': self.sampling_n_var.get().strip(),
+            'adaptive': self.sampling_adaptive_var.get(),
+        }
+
+    def set_sampling_options(self, mode: Optional[str], every: int, adaptive: bool):
+        """Selecciona el muestreo inicial (el de la línea de comandos)."""
+        for label, value in self.SAMPLING_MODES:
+            if value == mode:
+                self.sampling_var.set(label)
+        self.sampling_n_var.set(str(every))
+        self.sampling_adaptive_var.set(adaptive)
+
+    def set_spool(self, enabled: bool, directory: str):
+        """Configura la casilla de guardado en pcap y el directorio que muestra."""
+        self.spool_var.set(enabled)
+        self.spool_check.config(text=f"Guardar pcap en {directory}")
+
+    def set_session_store(self, enabled: bool, path: str):
+        """Configura la casilla de guardado de la sesión y la base que muestra."""
+        self.sessions_var.set(enabled)
+        self.sessions_check.config(text=f"Guardar sesión en {path}")
+
+    def ask_capture_file(self) -> str:
+        """Pide al usuario un fichero de captura pcap/pcapng."""
+        return filedialog.askopenfilename(
+            title="Abrir captura",
+            filetypes=[("Capturas", "*.pcap *.pcapng *.cap"), ("Todos los archivos", "*")]
+        )
+
+    def get_realtime_replay(self) -> bool:
+        """Indica si la reproducción de ficheros debe respetar los tiempos originales."""
+        return self.realtime_var.get()
+
+    def get_capture_mode(self) -> str:
+        """Obtiene el identificador del modo de captura seleccionado."""
+        selected = self.mode_var.get()
+        for label, mode in self.CAPTURE_MODES:
+            if label == selected:
+                return mode
+        return self.CAPTURE_MODES[0][1]
+
+    def set_packet_source(self, source):
+        """Asocia el almacén de paquetes que alimenta la lista virtual."""
+        self.packet_list.set_source(source)
+
+    def refresh_packet_list(self):
+        """Repinta las filas visibles de la lista de paquetes."""
+        try:
+            self.packet_list.refresh()
+        except Exception as e:
+            print(f"Error refrescando la lista de paquetes: {e}")
+
+    def set_display_filter_callbacks(self, apply: Callable[[], None], remove: Callable[[], None]):
+        """Configura los botones del filtro de visualización (Intro también aplica)."""
+        self.btn_aplicar_filtro.configure(command=apply)
+        self.btn_quitar_filtro.configure(command=remove)
+        self.display_filter_entry.bind("<Return>", lambda _event: apply())
+
+    def set_milliseconds_callback(self, callback: Callable[[], None]):
+        """Configura el callback de la casilla Milisegundos."""
+        self.milliseconds_check.configure(command=callback)
+
+    def get_milliseconds(self) -> bool:
+        """Indica si la columna Hora debe mostrar milisegundos."""
+        return self.milliseconds_var.get()
+
+    def set_milliseconds(self, enabled: bool):
+        """Marca la casilla Milisegundos y ajusta el ancho de la columna Hora."""
+        self.milliseconds_var.set(enabled)
+        self.packet_tree.column('Hora', width=105 if enabled else 80)
+
+    def get_display_filter(self) -> str:
+        """Obtiene la expresión del filtro de visualización."""
+        return self.display_filter_var.get().strip()
+
+    def update_display_filter(self, active: bool, text: str = ""):
+        """Muestra si hay un filtro de visualización activo y sus coincidencias."""
+        self.btn_quitar_filtro.configure(state=tk.NORMAL if active else tk.DISABLED)
+        self.display_filter_label.configure(text=text)
+
+    def update_ip_list(self, rows: List[Tuple[str, int]], page: int = 0, page_count: int = 1):
+        """Actualiza la página visible de IPs modificando solo las filas necesarias.
+
+        Las filas usan la IP como iid, por lo que la selección y el foco se
+        conservan mientras la IP siga en la página.
+        """
         try:
-            # Guardar la selección actual
-            current_selection = self.ip_tree.selection()
-            current_focus = self.ip_tree.focus()
-
-            # Limpiar la lista actual
-            self.ip_tree.delete(*self.ip_tree.get_children())
-            
-            # Insertar las IPs ordenadas por cantidad de paquetes
-            for ip, count in sorted(
-                ip_counts.items(),
-                key=lambda x: (-x[1], x[0])  # Ordenar por count (descendente) y luego por IP
-            ):
-                if ip and ip != "N/A":  # Solo mostrar IPs válidas
-                    self.ip_tree.insert('', tk.END, values=(ip, count), iid=ip)
-
-            # Restaurar la selección si los elementos aún existen
-            if current_focus and self.ip_tree.exists(current_focus):
-                self.ip_tree.focus(current_focus)
-            if current_selection:
-                valid_selection = [item for item in current_selection if self.ip_tree.exists(item)]
-                if valid_selection:
-                    self.ip_tree.selection_set(valid_selection)
+            tree = self.ip_tree
+            desired = [ip for ip, _ in rows]
+            desired_set = set(desired)
+
+            # Eliminar las IPs que ya no están en la página
+            removed = [ip for ip in self._ip_rows if ip not in desired_set]
+            if removed:
+                tree.delete(*removed)
+                for ip in removed:
+                    del self._ip_rows[ip]
+            order = [ip for ip in self._ip_order if ip in desired_set]
+
+            # Insertar las nuevas y actualizar los contadores que cambiaron
+            for index, (ip, count) in enumerate(rows):
+                if ip not in self._ip_rows:
+                    tree.insert('', index, values=(ip, count), iid=ip)
+                    order.insert(index, ip)
+                elif self._ip_rows[ip] != count:
+                    tree.item(ip, values=(ip, count))
+                self._ip_rows[ip] = count
+
+            # Reordenar a partir de la primera posición que difiera
+            if order != desired:
+                first = next(i for i, (a, b) in enumerate(zip(order, desired)) if a != b)
+                for index in range(first, len(desired)):
+                    tree.move(desired[index], '', index)
+            self._ip_order = desired
+
+            self.ip_page_label.config(text=f"Página {page + 1} de {page_count}")
                     
         except Exception as e:
             print(f"Error actualizando lista de IPs: {e}")
\ No newline at end of file
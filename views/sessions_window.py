@@ -0,0 +1,80 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, List, Optional, Tuple
+
+
+class SessionsWindow(tk.Toplevel):
+    """Ventana de sesiones guardadas en la base SQLite.
+
+    Lista las sesiones (la más reciente primero) y ofrece abrir la
+    seleccionada en la ventana principal y regenerar sus reportes PDF y
+    CSV. El controlador la rellena con ``update_rows`` y lee la selección
+    con ``get_selected``.
+    """
+
+    COLUMNS = ('Sesión', 'Inicio', 'Duración', 'Origen', 'Modo', 'Paquetes', 'Tráfico', 'Muestreo')
+    # Columnas alineadas a la derecha
+    NUMERIC = ('Sesión', 'Duración', 'Paquetes', 'Tráfico')
+
+    def __init__(self, parent, path: str):
+        super().__init__(parent)
+        self.title("Sesiones guardadas")
+        self.geometry("900x420")
+
+        frame = ttk.Frame(self, padding="10 10 10 10")
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        self.summary_label = ttk.Label(frame, text=f"Base: {path}", anchor=tk.W)
+        self.summary_label.pack(fill=tk.X, pady=(0, 5))
+
+        tree_frame = ttk.Frame(frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(tree_frame, columns=self.COLUMNS, show='headings', selectmode='browse')
+        for column in self.COLUMNS:
+            numeric = column in self.NUMERIC
+            self.tree.heading(column, text=column, anchor=tk.E if numeric else tk.W)
+            self.tree.column(
+                column, width=220 if column == 'Origen' else 90, minwidth=50,
+                stretch=tk.YES if column == 'Origen' else tk.NO,
+                anchor=tk.E if numeric else tk.W
+            )
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscroll=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        buttons = ttk.Frame(frame)
+        buttons.pack(fill=tk.X, pady=(10, 0))
+        self.btn_open = ttk.Button(buttons, text="Abrir")
+        self.btn_open.pack(side=tk.LEFT)
+        self.btn_pdf = ttk.Button(buttons, text="Reporte PDF")
+        self.btn_pdf.pack(side=tk.LEFT, padx=5)
+        self.btn_csv = ttk.Button(buttons, text="Reportes CSV")
+        self.btn_csv.pack(side=tk.LEFT)
+        self.btn_refresh = ttk.Button(buttons, text="Actualizar")
+        self.btn_refresh.pack(side=tk.RIGHT)
+
+    def set_callbacks(self, open_session: Callable[[], None], pdf: Callable[[], None],
+                      csv: Callable[[], None], refresh: Callable[[], None]):
+        """Configura los botones Abrir, Reporte PDF, Reportes CSV y Actualizar."""
+        self.btn_open.configure(command=open_session)
+        self.btn_pdf.configure(command=pdf)
+        self.btn_csv.configure(command=csv)
+        self.btn_refresh.configure(command=refresh)
+        self.tree.bind("<Double-1>", lambda _event: open_session())
+
+    def update_rows(self, rows: List[Tuple[int, ...]], pdf_enabled: bool = True):
+        """Sustituye la lista; el primer valor de cada fila es el número de sesión."""
+        selected = self.get_selected()
+        tree = self.tree
+        tree.delete(*tree.get_children())
+        for values in rows:
+            tree.insert('', tk.END, iid=str(values[0]), values=values)
+        if selected is not None and tree.exists(str(selected)):
+            tree.selection_set(str(selected))
+        self.btn_pdf.configure(state=tk.NORMAL if pdf_enabled else tk.DISABLED)
+
+    def get_selected(self) -> Optional[int]:
+        """Número de la sesión seleccionada, o None."""
+        selection = self.tree.selection()
+        return int(selection[0]) if selection else None
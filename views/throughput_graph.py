@@ -0,0 +1,58 @@
+import tkinter as tk
+from typing import Sequence
+from .styles import StyleConfig
+
+
+class ThroughputGraph(tk.Canvas):
+    """Gráfica en vivo del tráfico (bits/s) de los últimos segundos."""
+
+    PADDING = 6
+
+    def __init__(self, parent, height: int = 120, **kwargs):
+        super().__init__(
+            parent,
+            height=height,
+            background=StyleConfig.LIST_BG_LIGHT,
+            highlightthickness=1,
+            highlightbackground=StyleConfig.BORDER_COLOR_LIGHT,
+            **kwargs
+        )
+        self._values: Sequence[float] = []
+        self._peak_text = ""
+        self._current_text = ""
+        self.bind('<Configure>', lambda e: self._redraw())
+
+    def update_series(self, bits_per_second: Sequence[float], peak_text: str, current_text: str) -> None:
+        """Actualiza los valores (del más antiguo al más reciente) y repinta."""
+        self._values = bits_per_second
+        self._peak_text = peak_text
+        self._current_text = current_text
+        self._redraw()
+
+    def _redraw(self) -> None:
+        self.delete('all')
+        width = self.winfo_width()
+        height = self.winfo_height()
+        values = self._values
+        if width < 20 or height < 20 or not values:
+            return
+
+        pad = self.PADDING
+        peak = max(values) or 1.0
+        step = (width - 2 * pad) / max(1, len(values) - 1)
+        scale = (height - 2 * pad - 14) / peak
+        points = []
+        for index, value in enumerate(values):
+            points.append(pad + index * step)
+            points.append(height - pad - value * scale)
+
+        if len(points) >= 4:
+            self.create_line(*points, fill=StyleConfig.ACCENT_COLOR_LIGHT, width=2)
+        self.create_text(
+            pad, pad, anchor=tk.NW, fill=StyleConfig.FG_COLOR_LIGHT,
+            text=self._peak_text
+        )
+        self.create_text(
+            width - pad, pad, anchor=tk.NE, fill=StyleConfig.FG_COLOR_LIGHT,
+            text=self._current_text
+        )
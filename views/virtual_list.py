@@ -0,0 +1,131 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, List, Optional, Sequence, Tuple
+
+# (nombre, ancho, ancho mínimo, alineación)
+ColumnSpec = Tuple[str, int, int, str]
+
+
+class VirtualPacketList(ttk.Frame):
+    """Lista virtual de paquetes.
+
+    Solo existen como elementos del Treeview las filas que caben en pantalla;
+    su contenido se repinta desde el almacén de datos en cada refresco. El
+    almacén debe ofrecer ``total``, ``__len__`` y ``newest(offset, count)``.
+    Las filas se muestran de la más reciente a la más antigua y, mientras el
+    usuario no se desplaza, la lista sigue a los paquetes nuevos.
+    """
+
+    def __init__(self, parent, columns: Sequence[ColumnSpec], **kwargs):
+        super().__init__(parent, **kwargs)
+        self.source: Any = None
+        self._visible_rows = 1
+        self._anchor_seq: Optional[int] = None  # None = seguir los nuevos paquetes
+        self._painted: List[tuple] = []
+
+        self.tree = ttk.Treeview(
+            self,
+            columns=[col for col, *_ in columns],
+            show='headings',
+            selectmode='browse'
+        )
+        for col, width, minwidth, anchor in columns:
+            self.tree.heading(col, text=col, anchor=anchor)
+            self.tree.column(col, width=width, minwidth=minwidth, stretch=tk.YES, anchor=anchor)
+
+        self.scrollbar_y = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar_y.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.tree.bind('<Configure>', self._on_resize)
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.tree.bind(sequence, self._on_mousewheel)
+        self.tree.bind('<Home>', lambda e: self._scroll_to(0))
+        self.tree.bind('<Prior>', lambda e: self._scroll_by(-self._visible_rows))
+        self.tree.bind('<Next>', lambda e: self._scroll_by(self._visible_rows))
+
+    def set_source(self, source: Any) -> None:
+        """Asocia el almacén de paquetes que alimenta la lista."""
+        self.source = source
+        self._anchor_seq = None
+        self.refresh()
+
+    @property
+    def offset(self) -> int:
+        """Distancia de la primera fila visible al paquete más reciente."""
+        if self.source is None or self._anchor_seq is None:
+            return 0
+        offset = self.source.total - 1 - self._anchor_seq
+        return max(0, min(offset, self._max_offset()))
+
+    def refresh(self) -> None:
+        """Repinta las filas visibles a partir del almacén."""
+        if self.source is None:
+            return
+        offset = self.offset
+        rows = self.source.newest(offset, self._visible_rows)
+        if rows != self._painted:
+            self._paint(rows)
+        self._update_scrollbar(offset)
+
+    def _paint(self, rows: List[tuple]) -> None:
+        """Ajusta el número de elementos del Treeview y actualiza sus valores."""
+        tree = self.tree
+        existing = len(self._painted)
+        for index, values in enumerate(rows):
+            iid = f"r{index}"
+            if index < existing:
+                if self._painted[index] != values:
+                    tree.item(iid, values=values)
+            else:
+                tree.insert('', tk.END, iid=iid, values=values)
+        if existing > len(rows):
+            tree.delete(*[f"r{index}" for index in range(len(rows), existing)])
+        self._painted = rows
+
+    def _update_scrollbar(self, offset: int) -> None:
+        total = len(self.source)
+        if total <= self._visible_rows:
+            self.scrollbar_y.set(0.0, 1.0)
+        else:
+            self.scrollbar_y.set(offset / total, (offset + self._visible_rows) / total)
+
+    def _max_offset(self) -> int:
+        return max(0, len(self.source) - self._visible_rows)
+
+    def _scroll_to(self, offset: int) -> None:
+        if self.source is None:
+            return
+        offset = max(0, min(offset, self._max_offset()))
+        self._anchor_seq = None if offset == 0 else self.source.total - 1 - offset
+        self.refresh()
+
+    def _scroll_by(self, rows: int) -> None:
+        self._scroll_to(self.offset + rows)
+
+    def _on_scrollbar(self, action: str, amount: str, unit: Optional[str] = None) -> None:
+        """Traduce los comandos del Scrollbar a desplazamientos en el almacén."""
+        if self.source is None:
+            return
+        if action == 'moveto':
+            self._scroll_to(int(float(amount) * len(self.source)))
+        elif action == 'scroll':
+            step = self._visible_rows if unit == 'pages' else 1
+            self._scroll_by(int(amount) * step)
+
+    def _on_mousewheel(self, event) -> str:
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            self._scroll_by(-3)
+        else:
+            self._scroll_by(3)
+        return 'break'
+
+    def _on_resize(self, event) -> None:
+        """Recalcula cuántas filas caben en el área visible."""
+        style = ttk.Style(self)
+        row_height = int(style.lookup('Treeview', 'rowheight') or 20)
+        heading_height = row_height + 8
+        visible = max(1, (event.height - heading_height) // row_height)
+        if visible != self._visible_rows:
+            self._visible_rows = visible
+            self.refresh()